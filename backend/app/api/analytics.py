@@ -5,10 +5,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.core.database import get_db
-from app.models.models import Student, LearningSession, StudentKnowledge
+from app.models.models import LearningSession, StudentKnowledge
 from app.models.schemas import DashboardData, StudentResponse, KnowledgeState, ProgressData
 from app.services.student_model import StudentModelService
 from app.services.rl_agent import agent
+from app.services.principal_cache import principal_cache
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
@@ -19,7 +20,7 @@ def get_dashboard(username: str, db: Session = Depends(get_db)):
     """Get complete dashboard analytics for student"""
     
     # Get student
-    student = db.query(Student).filter(Student.username == username).first()
+    student = principal_cache.by_username(db, username)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
@@ -129,7 +130,7 @@ def get_rl_statistics():
 def get_performance_chart(username: str, days: int = 7, db: Session = Depends(get_db)):
     """Get performance data for charting"""
     
-    student = db.query(Student).filter(Student.username == username).first()
+    student = principal_cache.by_username(db, username)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
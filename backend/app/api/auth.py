@@ -1,15 +1,17 @@
 """
 Authentication API endpoints
 """
+from typing import Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from app.core.database import get_db
 from app.api.deps import get_current_student
 from app.core.security import (
-    verify_password, 
-    get_password_hash, 
+    password_hasher,
+    PasswordHasherBusy,
     create_access_token,
     create_refresh_token,
     verify_refresh_token
@@ -22,29 +24,40 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 limiter = Limiter(key_func=get_remote_address)
 
 
-@router.post("/register", response_model=Token)
-# @limiter.limit("100/hour")  # Temporarily disabled for testing
-def register(request: Request, student_data: StudentCreate, db: Session = Depends(get_db)):
-    """Register a new student"""
-    
-    # Check if email already exists
-    existing_email = db.query(Student).filter(Student.email == student_data.email).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Check if username already exists
-    existing_username = db.query(Student).filter(Student.username == student_data.username).first()
-    if existing_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
-    
-    # Create new student
-    hashed_password = get_password_hash(student_data.password)
+def hashing_busy() -> HTTPException:
+    """503 for a request refused by the password hasher's admission limit"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many logins in progress, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
+def _check_available(db: Session, student_data: StudentCreate):
+    """Raise 400 if the email or username is taken, then release the connection"""
+    try:
+        # Check if email already exists
+        existing_email = db.query(Student).filter(Student.email == student_data.email).first()
+        if existing_email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        
+        # Check if username already exists
+        existing_username = db.query(Student).filter(Student.username == student_data.username).first()
+        if existing_username:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already taken"
+            )
+    finally:
+        # End the read transaction so the pooled connection is free while bcrypt runs
+        db.rollback()
+
+
+def _create_student(db: Session, student_data: StudentCreate, hashed_password: str):
+    """Insert the student and its initial knowledge state"""
     new_student = Student(
         email=student_data.email,
         username=student_data.username,
@@ -58,6 +71,35 @@ def register(request: Request, student_data: StudentCreate, db: Session = Depend
     
     # Initialize knowledge state
     StudentModelService.initialize_knowledge(db, new_student.id)
+
+
+def _find_credentials(db: Session, username: str) -> Optional[Tuple[str, str]]:
+    """(username, password hash) of a student, or None; releases the connection"""
+    try:
+        student = db.query(Student).filter(Student.username == username).first()
+        return (student.username, student.hashed_password) if student else None
+    finally:
+        db.rollback()
+
+
+@router.post("/register", response_model=Token)
+# @limiter.limit("100/hour")  # Temporarily disabled for testing
+async def register(request: Request, student_data: StudentCreate, db: Session = Depends(get_db)):
+    """
+    Register a new student
+    
+    Database work runs on the thread pool and bcrypt in the password
+    hashing pool, so the event loop only awaits.
+    """
+    await run_in_threadpool(_check_available, db, student_data)
+    
+    try:
+        hashed_password = await password_hasher.hash(student_data.password)
+    except PasswordHasherBusy:
+        raise hashing_busy()
+    
+    # Create new student
+    await run_in_threadpool(_create_student, db, student_data, hashed_password)
     
     # Create access and refresh tokens
     access_token = create_access_token(data={"sub": student_data.username})
@@ -72,21 +114,27 @@ def register(request: Request, student_data: StudentCreate, db: Session = Depend
 
 @router.post("/login", response_model=Token)
 @limiter.limit("100/minute")  # Increased for development/testing
-def login(request: Request, credentials: StudentLogin, db: Session = Depends(get_db)):
-    """Login student and return JWT token"""
+async def login(request: Request, credentials: StudentLogin, db: Session = Depends(get_db)):
+    """Login student and return JWT token (lookup on the thread pool, bcrypt in the hashing pool)"""
     
     # Find student by username
-    student = db.query(Student).filter(Student.username == credentials.username).first()
+    found = await run_in_threadpool(_find_credentials, db, credentials.username)
     
-    if not student or not verify_password(credentials.password, student.hashed_password):
+    try:
+        password_ok = found is not None and await password_hasher.verify(credentials.password, found[1])
+    except PasswordHasherBusy:
+        raise hashing_busy()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
     # Create access and refresh tokens
-    access_token = create_access_token(data={"sub": student.username})
-    refresh_token = create_refresh_token(data={"sub": student.username})
+    username = found[0]
+    access_token = create_access_token(data={"sub": username})
+    refresh_token = create_refresh_token(data={"sub": username})
     
     return {
         "access_token": access_token,
@@ -101,6 +149,12 @@ def get_current_student_profile(current_student: Student = Depends(get_current_s
     return current_student
 
 
+@router.get("/hashing/stats")
+def get_hashing_stats(current_student: Student = Depends(get_current_student)):
+    """Password hashing pool admission counters and queue/run-time percentiles (authenticated)"""
+    return password_hasher.stats()
+
+
 @router.post("/refresh", response_model=Token)
 def refresh_access_token(refresh_token: str, db: Session = Depends(get_db)):
     """Refresh access token using refresh token"""
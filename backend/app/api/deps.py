@@ -8,7 +8,7 @@ from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
-from app.models.models import Student
+from app.services.principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
@@ -16,14 +16,23 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 def get_current_student(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> Student:
-    """Get current authenticated student from JWT token (sub contains username)"""
+) -> Principal:
+    """
+    Get current authenticated student from JWT token (sub contains username)
+
+    A token seen before is answered from the principal cache without
+    decoding it or querying the students table.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    student = principal_cache.by_token(token)
+    if student is not None:
+        return student
+
     try:
         payload = jwt.decode(
             token,
@@ -36,8 +45,19 @@ def get_current_student(
     except JWTError:
         raise credentials_exception
 
-    student = db.query(Student).filter(Student.username == username).first()
+    student = principal_cache.by_username(db, username)
     if student is None:
         raise credentials_exception
 
+    principal_cache.remember_token(token, student, payload.get("exp"))
     return student
+
+
+def get_current_admin(current_student: Principal = Depends(get_current_student)) -> Principal:
+    """Get the current student if they are an administrator (settings.ADMIN_USERNAMES)"""
+    if current_student.username not in settings.ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required"
+        )
+    return current_student
@@ -3,13 +3,13 @@ Learning Pace API Endpoints
 Tracks and analyzes student learning speed and adjusts difficulty accordingly
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import statistics
 
-from app.core.database import get_db
+from app.core.database import AsyncDBSession, get_async_db
 from app.models.models import Student, LearningSession
 from app.models.learning_pace import LearningPace, ConceptTimeLog
 from app.api.auth import get_current_student
@@ -40,7 +40,7 @@ BASELINE_TIMES = {
 }
 
 
-def calculate_pace_metrics(student_id: int, db: Session) -> Dict[str, Any]:
+async def calculate_pace_metrics(student_id: int, db: AsyncDBSession) -> Dict[str, Any]:
     """
     Calculate learning pace metrics from session history
     
@@ -48,9 +48,9 @@ def calculate_pace_metrics(student_id: int, db: Session) -> Dict[str, Any]:
         Dict with avg_speed, avg_time, completion_rate, time_by_concept
     """
     # Get all sessions for student
-    sessions = db.query(LearningSession).filter(
+    sessions = (await db.scalars(select(LearningSession).where(
         LearningSession.student_id == student_id
-    ).all()
+    ))).all()
     
     if not sessions:
         return {
@@ -125,7 +125,7 @@ def calculate_pace_metrics(student_id: int, db: Session) -> Dict[str, Any]:
 @router.post("/analyze")
 async def analyze_learning_pace(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Analyze student's learning pace and create/update LearningPace profile
@@ -137,12 +137,12 @@ async def analyze_learning_pace(
     - Recommended difficulty adjustment
     """
     # Calculate pace metrics
-    metrics = calculate_pace_metrics(current_student.id, db)
+    metrics = await calculate_pace_metrics(current_student.id, db)
     
     # Get or create LearningPace record
-    pace = db.query(LearningPace).filter(
+    pace = await db.scalar(select(LearningPace).where(
         LearningPace.student_id == current_student.id
-    ).first()
+    ))
     
     if not pace:
         pace = LearningPace(student_id=current_student.id)
@@ -180,8 +180,8 @@ async def analyze_learning_pace(
         })
     
     pace.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(pace)
+    await db.commit()
+    await db.refresh(pace)
     
     return {
         "student_id": current_student.id,
@@ -204,21 +204,21 @@ async def analyze_learning_pace(
 @router.get("/profile")
 async def get_learning_pace_profile(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Get learning pace profile for the current authenticated student
     """
-    pace = db.query(LearningPace).filter(
+    pace = await db.scalar(select(LearningPace).where(
         LearningPace.student_id == current_student.id
-    ).first()
+    ))
     
     if not pace:
         # Create default pace profile
         pace = LearningPace(student_id=current_student.id)
         db.add(pace)
-        db.commit()
-        db.refresh(pace)
+        await db.commit()
+        await db.refresh(pace)
     
     return {
         "student_id": pace.student_id,
@@ -240,7 +240,7 @@ async def get_learning_pace_profile(
 async def get_learning_pace(
     student_id: int,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Get learning pace profile for a student
@@ -252,16 +252,16 @@ async def get_learning_pace(
             detail="Not authorized to access this student's pace data"
         )
     
-    pace = db.query(LearningPace).filter(
+    pace = await db.scalar(select(LearningPace).where(
         LearningPace.student_id == student_id
-    ).first()
+    ))
     
     if not pace:
         # Create default pace profile
         pace = LearningPace(student_id=student_id)
         db.add(pace)
-        db.commit()
-        db.refresh(pace)
+        await db.commit()
+        await db.refresh(pace)
     
     return {
         "student_id": pace.student_id,
@@ -288,15 +288,15 @@ async def update_preferences(
     deep_dive_mode: Optional[bool] = None,
     difficulty_preference: Optional[int] = None,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Update the current authenticated student's learning pace preferences
     """
     # Get or create pace profile
-    pace = db.query(LearningPace).filter(
+    pace = await db.scalar(select(LearningPace).where(
         LearningPace.student_id == current_student.id
-    ).first()
+    ))
     
     if not pace:
         pace = LearningPace(student_id=current_student.id)
@@ -317,8 +317,8 @@ async def update_preferences(
         pace.difficulty_preference = difficulty_preference
     
     pace.last_updated = datetime.now()
-    db.commit()
-    db.refresh(pace)
+    await db.commit()
+    await db.refresh(pace)
     
     return {"message": "Preferences updated", "pace": pace}
 
@@ -330,7 +330,7 @@ async def update_pace_preferences(
     deep_dive_mode: Optional[bool] = None,
     difficulty_preference: Optional[int] = None,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Update student's learning pace preferences
@@ -348,9 +348,9 @@ async def update_pace_preferences(
         )
     
     # Get or create pace profile
-    pace = db.query(LearningPace).filter(
+    pace = await db.scalar(select(LearningPace).where(
         LearningPace.student_id == student_id
-    ).first()
+    ))
     
     if not pace:
         pace = LearningPace(student_id=student_id)
@@ -376,8 +376,8 @@ async def update_pace_preferences(
         pace.difficulty_preference = difficulty_preference
     
     pace.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(pace)
+    await db.commit()
+    await db.refresh(pace)
     
     return {
         "message": "Preferences updated successfully",
@@ -391,7 +391,7 @@ async def update_pace_preferences(
 @router.get("/difficulty-adjustment")
 async def get_difficulty_adjustment(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Get recommended difficulty adjustment based on recent performance
@@ -403,21 +403,21 @@ async def get_difficulty_adjustment(
         - should_increase
         - should_decrease
     """
-    pace = db.query(LearningPace).filter(
+    pace = await db.scalar(select(LearningPace).where(
         LearningPace.student_id == current_student.id
-    ).first()
+    ))
     
     if not pace:
         # Analyze pace first
-        metrics = calculate_pace_metrics(current_student.id, db)
+        metrics = await calculate_pace_metrics(current_student.id, db)
         pace = LearningPace(
             student_id=current_student.id,
             avg_speed=metrics["avg_speed"],
             completion_rate=metrics["completion_rate"]
         )
         db.add(pace)
-        db.commit()
-        db.refresh(pace)
+        await db.commit()
+        await db.refresh(pace)
     
     should_increase = pace.should_increase_difficulty()
     should_decrease = pace.should_decrease_difficulty()
@@ -448,7 +448,7 @@ async def get_difficulty_adjustment(
 @router.get("/time-analytics")
 async def get_time_analytics(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db),
+    db: AsyncDBSession = Depends(get_async_db),
     days: int = 7
 ):
     """
@@ -462,10 +462,14 @@ async def get_time_analytics(
     """
     # Get sessions from last N days
     cutoff_date = datetime.utcnow() - timedelta(days=days)
-    sessions = db.query(LearningSession).filter(
-        LearningSession.student_id == current_student.id,
-        LearningSession.timestamp >= cutoff_date
-    ).all()
+    sessions = (await db.scalars(
+        select(LearningSession)
+        .options(selectinload(LearningSession.content))
+        .where(
+            LearningSession.student_id == current_student.id,
+            LearningSession.timestamp >= cutoff_date
+        )
+    )).all()
     
     if not sessions:
         return {
@@ -2,19 +2,114 @@
 Recommendations API Endpoints
 Provides personalized content recommendations based on RL agent and learning style
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.models import Student, Content
+from app.models.models import Student, Content, LearningSession
 from app.models.learning_style import LearningStyleProfile
 from app.api.deps import get_current_student
-from app.services.rl_agent import agent
+from app.models.recommendation_cache import PrecomputedRecommendation
+from app.services.content_catalog import catalog_index
+from app.services.linear_agent import recommender
+from app.services.recommendation_precompute import difficulty_mask
 from app.services.student_model import StudentModelService
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
 
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Timezone-aware timestamps (PostgreSQL) as naive UTC, comparable with utcnow()"""
+    if moment is not None and moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _precomputed_is_fresh(db: Session, student_id: int, precomputed: PrecomputedRecommendation) -> bool:
+    """
+    Whether a nightly list still describes the student
+    
+    A list is stale once it is older than PRECOMPUTED_RECOMMENDATION_TTL, or
+    once the student answered anything after it was generated: the
+    knowledge state it was ranked from has changed since.
+    """
+    generated_at = _naive_utc(precomputed.generated_at)
+    if generated_at is None:
+        return False
+    if datetime.utcnow() - generated_at > timedelta(seconds=settings.PRECOMPUTED_RECOMMENDATION_TTL):
+        return False
+    last_session = _naive_utc(db.query(func.max(LearningSession.timestamp)).filter(
+        LearningSession.student_id == student_id
+    ).scalar())
+    return last_session is None or last_session <= generated_at
+
+
+def get_ranked_content(db: Session, student_id: int, knowledge_state: Dict, k: int = 10) -> Dict[str, Any]:
+    """
+    Top-k content for a student, best first
+    
+    Uses the list written by the nightly precompute job while it is fresh
+    (see _precomputed_is_fresh); otherwise ranks the catalog snapshot live
+    with one recommend_top_k call, under the job's difficulty window.
+    """
+    precomputed = db.query(PrecomputedRecommendation).filter(
+        PrecomputedRecommendation.student_id == student_id
+    ).first()
+    
+    if precomputed and precomputed.content_ids and _precomputed_is_fresh(db, student_id, precomputed):
+        content_ids = precomputed.content_ids[:k]
+        scores = precomputed.scores[:k]
+        source = "precomputed"
+    else:
+        catalog = catalog_index.get(db)
+        content_ids, scores = [], []
+        if len(catalog):
+            # Same candidates as the nightly job: content near the preferred difficulty
+            preferred = np.array([knowledge_state.get('preferred_difficulty') or 2], dtype=np.int64)
+            mask = difficulty_mask(preferred, catalog.id_difficulties, settings.RECOMMENDATION_DIFFICULTY_WINDOW)
+            top_ids, top_scores = recommender.recommend_top_k([knowledge_state], catalog.ids, k=k,
+                                                              candidate_mask=mask)
+            ranked = top_ids[0] >= 0
+            content_ids = top_ids[0][ranked].tolist()
+            scores = top_scores[0][ranked].tolist()
+        source = "live"
+    
+    contents = {c.id: c for c in db.query(Content).filter(Content.id.in_(content_ids)).all()}
+    items = [
+        {
+            "id": content_id,
+            "title": contents[content_id].title,
+            "topic": contents[content_id].topic,
+            "difficulty": contents[content_id].difficulty,
+            "confidence": float(score)
+        }
+        for content_id, score in zip(content_ids, scores)
+        if content_id in contents
+    ]
+    return {
+        "items": items,
+        "source": source,
+        "generated_at": precomputed.generated_at if source == "precomputed" else None
+    }
+
+
+@router.get("/ranked")
+def get_ranked_recommendations(
+    k: int = Query(10, ge=1, le=100),
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get the student's top-k ranked content list
+    """
+    knowledge_state = StudentModelService.get_knowledge_state(db, current_student.id)
+    return get_ranked_content(db, current_student.id, knowledge_state, k=k)
+
+
 @router.get("/dashboard")
 def get_dashboard_recommendations(
     current_student: Student = Depends(get_current_student),
@@ -32,34 +127,17 @@ def get_dashboard_recommendations(
         LearningStyleProfile.student_id == current_student.id
     ).first()
     
-    # Get all available content
-    available_content = db.query(Content).limit(20).all()
-    content_ids = [c.id for c in available_content]
-    
-    # Get RL recommendations
+    # Get RL-ranked content (nightly precomputed list, else ranked live)
+    learning_style = learning_style_profile.dominant_style if learning_style_profile else None
     recommendations = []
-    if content_ids:
-        learning_style = learning_style_profile.dominant_style if learning_style_profile else None
-        
-        try:
-            recommended_id, confidence = agent.get_recommended_content(
-                knowledge_state,
-                content_ids,
-                learning_style=learning_style
-            )
-            
-            recommended_content = db.query(Content).filter(Content.id == recommended_id).first()
-            if recommended_content:
-                recommendations.append({
-                    "id": recommended_content.id,
-                    "title": recommended_content.title,
-                    "topic": recommended_content.topic,
-                    "difficulty": recommended_content.difficulty,
-                    "confidence": confidence,
-                    "reason": f"Recommended based on your {learning_style or 'current'} learning style"
-                })
-        except Exception as e:
-            print(f"RL recommendation error: {e}")
+    try:
+        for item in get_ranked_content(db, current_student.id, knowledge_state, k=5)["items"]:
+            recommendations.append({
+                **item,
+                "reason": f"Recommended based on your {learning_style or 'current'} learning style"
+            })
+    except Exception as e:
+        print(f"RL recommendation error: {e}")
     
     # Get study tips based on learning style
     study_tips = []
@@ -0,0 +1,61 @@
+"""
+RL Model Registry API endpoints
+Publish, list, hot-swap and roll back Q-table policy versions
+"""
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from typing import Any, Dict, Optional
+from app.api.deps import get_current_admin, get_current_student
+from app.core.config import settings
+from app.models.models import Student
+from app.services.model_registry import ModelRegistry, ModelRegistryError
+from app.services.rl_agent import agent
+
+router = APIRouter(prefix="/rl-models", tags=["rl-models"])
+
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+
+
+@router.get("")
+def list_policy_versions(current_student: Student = Depends(get_current_student)) -> Dict[str, Any]:
+    """List stored policy versions and the active one"""
+    return {
+        "current_version": model_registry.current_version(),
+        "versions": model_registry.list_versions()
+    }
+
+
+@router.post("/publish")
+def publish_policy_version(
+    metadata: Optional[Dict[str, Any]] = Body(default=None),
+    current_admin: Student = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """Store the running agent's policy as a new version"""
+    if agent.q_table is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sharded agents are not versioned through the registry"
+        )
+    return model_registry.publish(agent, metadata=metadata)
+
+
+@router.post("/{version}/activate")
+def activate_policy_version(
+    version: int,
+    current_admin: Student = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """Hot-swap the running agent to a stored version"""
+    try:
+        manifest = model_registry.activate(agent, version)
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"message": f"Policy version {version} is now active", "manifest": manifest}
+
+
+@router.post("/rollback")
+def rollback_policy_version(current_admin: Student = Depends(get_current_admin)) -> Dict[str, Any]:
+    """Swap back to the policy that was active before the last activation"""
+    try:
+        version = model_registry.rollback(agent)
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"message": "Rolled back", "current_version": version}
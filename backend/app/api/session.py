@@ -1,31 +1,65 @@
 """
 Learning session API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.core.database import get_db
-from app.models.models import Student, Content, LearningSession, StudentKnowledge
+from app.models.models import LearningSession, StudentKnowledge
 from app.models.learning_style import LearningStyleProfile
 from app.models.mastery import MasterySkill
 from app.models.schemas import SessionStart, AnswerSubmit, SessionResponse, ContentResponse
 from app.services.rl_agent import agent
+from app.services.linear_agent import linear_agent, recommender
+from app.services.decision_log import decision_log
+from app.services.content_catalog import catalog_index, load_content
+from app.services.content_payloads import content_payloads, embed_payload
+from app.services.session_writer import session_writer
+from app.services.lookahead_queue import lookahead_queue
+from app.services.principal_cache import principal_cache
 from app.services.student_model import StudentModelService
 from typing import Optional
 import random
-import json
 
 router = APIRouter(prefix="/session", tags=["learning-session"])
 
 
 def get_current_student_id(username: str, db: Session) -> int:
-    """Helper to get student ID from username"""
-    student = db.query(Student).filter(Student.username == username).first()
+    """Helper to get student ID from username (served from the principal cache)"""
+    student = principal_cache.by_username(db, username)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student.id
 
 
+def _serving_decision(propensity: float, candidate_count: int, candidate_scope: dict, catalog) -> dict:
+    """
+    How a served item was chosen, stored in action_taken for off-policy evaluation
+    
+    The candidate set is logged as the catalog filter that produced it
+    (catalog.candidates keyword arguments), its size and the catalog
+    version, not as the list of IDs; off-policy evaluation rebuilds it.
+    """
+    return {
+        'propensity': propensity,
+        'epsilon': recommender.epsilon,
+        'candidate_scope': candidate_scope,
+        'candidate_count': candidate_count,
+        'catalog_version': catalog.version,
+        'policy': 'linear' if recommender is linear_agent else 'tabular'
+    }
+
+
+def _policy_fill(knowledge_state: dict, candidate_scope: dict, catalog, learning_style: str = None):
+    """One epsilon-greedy draw of the serving policy, used to fill the lookahead queue"""
+    def fill(content_ids: list):
+        content_id, _, propensity = recommender.select_content(
+            knowledge_state, content_ids, learning_style=learning_style
+        )
+        return content_id, _serving_decision(propensity, len(content_ids), candidate_scope, catalog)
+    return fill
+
+
 @router.post("/start", response_model=ContentResponse)
 def start_session(session_data: SessionStart, username: str, db: Session = Depends(get_db)):
     """
@@ -78,35 +112,25 @@ def start_session(session_data: SessionStart, username: str, db: Session = Depen
     # Get student's knowledge state
     knowledge_state = StudentModelService.get_knowledge_state(db, student_id)
     
-    # Get available content
-    query = db.query(Content)
-    
-    # Filter by topic if specified
-    if session_data.topic:
-        query = query.filter(Content.topic == session_data.topic)
+    # Get available content from the in-memory catalog index (no database round trip)
+    catalog = catalog_index.get(db)
     
     # Filter by difficulty if specified
     if session_data.difficulty:
-        query = query.filter(Content.difficulty == session_data.difficulty)
+        difficulty_filter = {'difficulty': session_data.difficulty}
     else:
         # Use preferred difficulty from knowledge state (scale 1-10)
         # Start with moderate difficulty (5-6) for new students
         preferred_diff = knowledge_state.get('preferred_difficulty', 5)
         
         # Get content within ±2 difficulty levels for variety
-        query = query.filter(Content.difficulty.between(
-            max(1, preferred_diff - 2),
-            min(10, preferred_diff + 2)
-        ))
+        difficulty_filter = {'difficulty_range': (max(1, preferred_diff - 2), min(10, preferred_diff + 2))}
     
-    available_content = query.all()
-    
-    if not available_content:
+    candidate_scope = {'topic': session_data.topic, **difficulty_filter}
+    if not len(catalog.candidates(**candidate_scope)):
         # If no content in preferred range, get any available content
-        available_content = db.query(Content).all()
-        
-    if not available_content:
-        raise HTTPException(status_code=404, detail="No content available")
+        candidate_scope = {'topic': None}
+    candidate_ids = lambda: catalog.candidates(**candidate_scope).tolist()
     
     # Get student's learning style
     learning_style_profile = db.query(LearningStyleProfile).filter(
@@ -115,41 +139,51 @@ def start_session(session_data: SessionStart, username: str, db: Session = Depen
     
     learning_style = learning_style_profile.dominant_style if learning_style_profile else None
     
-    # Use RL agent to recommend content
-    content_ids = [c.id for c in available_content]
-    
-    try:
-        recommended_id, confidence = agent.get_recommended_content(
-            knowledge_state, 
-            content_ids,
-            learning_style=learning_style
-        )
-        recommended_content = db.query(Content).filter(Content.id == recommended_id).first()
-    except:
-        # Fallback to random selection if agent fails
-        recommended_content = random.choice(available_content)
-    
-    # Parse options from JSON string to list if needed
-    if recommended_content and isinstance(recommended_content.options, str):
+    # Serve the next precomputed item if the student's lookahead queue has one
+    scope = ('start', session_data.topic, tuple(difficulty_filter.items()))
+    queued = lookahead_queue.pop(student_id, scope, knowledge_state)
+    if queued and queued[0] in catalog:
+        recommended_id, decision = queued
+    else:
+        content_ids = candidate_ids()
+        if not content_ids:
+            raise HTTPException(status_code=404, detail="No content available")
+        
+        # Use RL agent to recommend content
         try:
-            recommended_content.options = json.loads(recommended_content.options)
+            recommended_id, confidence, propensity = recommender.select_content(
+                knowledge_state, 
+                content_ids,
+                learning_style=learning_style
+            )
         except:
-            pass  # Keep as string if JSON parsing fails
+            # Fallback to random selection if agent fails
+            recommended_id = random.choice(content_ids)
+            propensity = 1.0 / len(content_ids)
+        decision = _serving_decision(propensity, len(content_ids), candidate_scope, catalog)
+    
+    # Pre-serialized response bytes for the served item (loaded and encoded once per edit)
+    payload = content_payloads.get(db, recommended_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Content not found")
     
-    # Parse tags from JSON string to list if needed
-    if recommended_content and isinstance(recommended_content.tags, str):
-        try:
-            recommended_content.tags = json.loads(recommended_content.tags)
-        except:
-            pass
+    decision_log.record(student_id, recommended_id, decision)
     
-    return recommended_content
+    # Choose the following items in the background
+    lookahead_queue.refill(student_id, scope, knowledge_state, candidate_ids,
+                           _policy_fill(knowledge_state, candidate_scope, catalog, learning_style))
+    
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("/answer", response_model=SessionResponse)
 def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depends(get_db)):
     """
     Submit an answer and get feedback with next content
+    
+    The whole answer is one unit of work: the knowledge row is loaded
+    once, state_after is computed in memory and the knowledge update and
+    LearningSession insert are written by a single commit.
     """
     student_id = get_current_student_id(username, db)
     
@@ -158,7 +192,7 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
     # For MVP, we'll use content_id directly
     content_id = answer_data.session_id  # Simplified for MVP
     
-    content = db.query(Content).filter(Content.id == content_id).first()
+    content = load_content(db, content_id)
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
@@ -166,7 +200,8 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
     is_correct = answer_data.student_answer.strip().lower() == content.correct_answer.strip().lower()
     
     # Get current knowledge state (before update)
-    state_before = StudentModelService.get_knowledge_state(db, student_id)
+    knowledge = StudentModelService.load_knowledge(db, student_id)
+    state_before = StudentModelService.knowledge_to_state(knowledge)
     
     # Calculate reward using RL agent
     reward = agent.calculate_reward(
@@ -176,21 +211,18 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
         student_level=state_before.get('accuracy_rate', 0.5)
     )
     
-    # Update student knowledge
-    updated_knowledge = StudentModelService.update_knowledge(
-        db=db,
-        student_id=student_id,
+    # Update student knowledge in memory and derive the state after the update
+    StudentModelService.apply_interaction(
+        knowledge,
         topic=content.topic,
         is_correct=is_correct,
         difficulty=content.difficulty,
         time_spent=answer_data.time_spent
     )
-    
-    # Get state after update
-    state_after = StudentModelService.get_knowledge_state(db, student_id)
+    state_after = StudentModelService.knowledge_to_state(knowledge)
     
     # Create learning session record
-    session = LearningSession(
+    session_row = dict(
         student_id=student_id,
         content_id=content.id,
         student_answer=answer_data.student_answer,
@@ -198,50 +230,77 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
         time_spent=answer_data.time_spent,
         attempts=1,
         state_before=state_before,
-        action_taken={'content_id': content.id, 'difficulty': content.difficulty},
+        action_taken={
+            'content_id': content.id,
+            'difficulty': content.difficulty,
+            **(decision_log.pop(student_id, content.id) or {})
+        },
         reward=reward,
         state_after=state_after
     )
     
-    db.add(session)
+    # Write-behind mode queues the row for a background bulk insert (no ID yet);
+    # otherwise, or when the queue is full, it is written with this transaction
+    session_id = None
+    if not session_writer.submit(session_row):
+        session = LearningSession(**session_row)
+        db.add(session)
+        db.flush()
+        session_id = session.id
+    
+    # Read what the response needs before the commit expires the loaded rows
+    content_id, topic, difficulty = content.id, content.topic, content.difficulty
+    content_type = content.content_type
+    explanation = content.explanation if not is_correct else "Correct! Well done!"
     db.commit()
     
     # Update RL agent Q-table
     state_idx = agent._discretize_state(state_before)
     next_state_idx = agent._discretize_state(state_after)
-    agent.update_q_value(state_idx, content.id % agent.num_actions, reward, next_state_idx)
-    
-    # Get next recommended content
-    available_content = db.query(Content).filter(Content.topic == content.topic).all()
-    content_ids = [c.id for c in available_content]
-    
-    try:
-        next_content_id, _ = agent.get_recommended_content(state_after, content_ids)
-        next_content = db.query(Content).filter(Content.id == next_content_id).first()
-    except:
-        next_content = random.choice(available_content) if available_content else None
-    
-    # Parse options and tags from JSON string to list if needed
-    if next_content:
-        if isinstance(next_content.options, str):
-            try:
-                next_content.options = json.loads(next_content.options)
-            except:
-                pass
-        if isinstance(next_content.tags, str):
-            try:
-                next_content.tags = json.loads(next_content.tags)
-            except:
-                pass
-    
-    return SessionResponse(
-        id=session.id,
-        content_id=content.id,
-        is_correct=is_correct,
-        reward=reward,
-        explanation=content.explanation if not is_correct else "Correct! Well done!",
-        next_content=next_content
+    agent.update_q_value(state_idx, agent.action_index(content_id), reward, next_state_idx)
+    if recommender is linear_agent:
+        linear_agent.register_content([content_id], [topic], [difficulty], [content_type])
+        linear_agent.update(state_before, content_id, reward, state_after)
+    
+    # Get next recommended content, from the lookahead queue when it has one
+    catalog = catalog_index.get(db)
+    candidate_scope = {'topic': topic}
+    candidate_ids = lambda: catalog.candidates(**candidate_scope).tolist()
+    scope = ('topic', topic)
+    
+    queued = lookahead_queue.pop(student_id, scope, state_after)
+    if queued and queued[0] in catalog:
+        next_content_id, decision = queued
+    else:
+        content_ids = candidate_ids()
+        try:
+            next_content_id, _, propensity = recommender.select_content(state_after, content_ids)
+        except:
+            next_content_id = random.choice(content_ids) if content_ids else None
+            propensity = 1.0 / len(content_ids) if content_ids else 1.0
+        decision = _serving_decision(propensity, len(content_ids), candidate_scope, catalog)
+    next_payload = content_payloads.get(db, next_content_id) if next_content_id is not None else None
+    
+    if next_payload is not None:
+        decision_log.record(student_id, next_content_id, decision)
+    
+    # Choose the following items in the background
+    lookahead_queue.refill(student_id, scope, state_after, candidate_ids,
+                           _policy_fill(state_after, candidate_scope, catalog))
+    
+    # The next item's cached bytes are embedded without re-encoding
+    body = embed_payload(
+        {
+            'id': session_id,
+            'content_id': content_id,
+            'is_correct': is_correct,
+            'reward': float(reward),
+            'explanation': explanation
+        },
+        'next_content',
+        next_payload
     )
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/progress")
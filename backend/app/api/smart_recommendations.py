@@ -4,12 +4,12 @@ Includes Multi-Armed Bandit, Collaborative Filtering, and Spaced Repetition endp
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import and_, select
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
-from app.core.database import get_db
+from app.core.database import AsyncDBSession, get_async_db
 from app.models.models import Student, Content, LearningSession
 from app.models.smart_recommendations import (
     BanditState, UserInteraction, SimilarStudent,
@@ -29,7 +29,7 @@ router = APIRouter(prefix="/smart-recommendations", tags=["smart-recommendations
 @router.get("/content-type")
 async def get_recommended_content_type(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Get recommended content type using Multi-Armed Bandit
@@ -38,16 +38,16 @@ async def get_recommended_content_type(
     based on student's historical performance with each type
     """
     # Get or create bandit state
-    bandit_state = db.query(BanditState).filter(
+    bandit_state = await db.scalar(select(BanditState).where(
         BanditState.student_id == current_student.id
-    ).first()
+    ))
     
     if not bandit_state:
         # Create new bandit state
         bandit_state = BanditState(student_id=current_student.id)
         db.add(bandit_state)
-        db.commit()
-        db.refresh(bandit_state)
+        await db.commit()
+        await db.refresh(bandit_state)
     
     # Initialize bandit and load state
     bandit = ContentBandit(epsilon=bandit_state.epsilon)
@@ -77,7 +77,7 @@ async def update_content_type_performance(
     time_spent: float,
     engagement_score: Optional[float] = None,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Update bandit state after content interaction
@@ -96,9 +96,9 @@ async def update_content_type_performance(
         )
     
     # Get or create bandit state
-    bandit_state = db.query(BanditState).filter(
+    bandit_state = await db.scalar(select(BanditState).where(
         BanditState.student_id == current_student.id
-    ).first()
+    ))
     
     if not bandit_state:
         bandit_state = BanditState(student_id=current_student.id)
@@ -113,8 +113,8 @@ async def update_content_type_performance(
     bandit.update(content_type, reward)
     bandit.save_state(bandit_state)
     
-    db.commit()
-    db.refresh(bandit_state)
+    await db.commit()
+    await db.refresh(bandit_state)
     
     return {
         "message": "Bandit updated successfully",
@@ -129,12 +129,12 @@ async def update_content_type_performance(
 @router.get("/bandit-stats")
 async def get_bandit_statistics(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Get detailed statistics about content type preferences"""
-    bandit_state = db.query(BanditState).filter(
+    bandit_state = await db.scalar(select(BanditState).where(
         BanditState.student_id == current_student.id
-    ).first()
+    ))
     
     if not bandit_state:
         return {
@@ -168,6 +168,13 @@ async def get_bandit_statistics(
 # COLLABORATIVE FILTERING ENDPOINTS
 # ============================================================================
 
+def _collaborative_filtering(db: Session) -> CollaborativeFiltering:
+    """Collaborative filtering engine with its interaction matrix built (synchronous session)"""
+    cf = CollaborativeFiltering(db)
+    cf.build_interaction_matrix()
+    return cf
+
+
 @router.post("/interactions")
 async def record_content_interaction(
     content_id: int,
@@ -177,7 +184,7 @@ async def record_content_interaction(
     completed: bool = False,
     score: Optional[float] = None,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Record a content interaction for collaborative filtering
@@ -218,8 +225,8 @@ async def record_content_interaction(
     )
     
     db.add(interaction)
-    db.commit()
-    db.refresh(interaction)
+    await db.commit()
+    await db.refresh(interaction)
     
     return {
         "message": "Interaction recorded",
@@ -232,22 +239,20 @@ async def record_content_interaction(
 async def get_peer_based_recommendations(
     top_k: int = 5,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Get content recommendations based on similar students
     
     Uses collaborative filtering to find what similar students liked
     """
-    # Initialize collaborative filtering
-    cf = CollaborativeFiltering(db)
-    cf.build_interaction_matrix()
-    
-    # Get recommendations
-    recommendations = cf.recommend_content(
-        student_id=current_student.id,
-        top_k=top_k,
-        exclude_seen=True
+    # Build the interaction matrix and score on the session's worker
+    recommendations = await db.run_sync(
+        lambda sync_db: _collaborative_filtering(sync_db).recommend_content(
+            student_id=current_student.id,
+            top_k=top_k,
+            exclude_seen=True
+        )
     )
     
     if not recommendations:
@@ -258,7 +263,7 @@ async def get_peer_based_recommendations(
     
     # Fetch content details
     content_ids = [rec[0] for rec in recommendations]
-    content_items = db.query(Content).filter(Content.id.in_(content_ids)).all()
+    content_items = (await db.scalars(select(Content).where(Content.id.in_(content_ids)))).all()
     content_map = {c.id: c for c in content_items}
     
     result = []
@@ -286,17 +291,15 @@ async def get_peer_based_recommendations(
 async def find_similar_students(
     top_k: int = 5,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Find students with similar learning patterns"""
-    # Initialize collaborative filtering
-    cf = CollaborativeFiltering(db)
-    cf.build_interaction_matrix()
-    
     # Find similar students
-    similar_students = cf.find_similar_students(
-        student_id=current_student.id,
-        top_k=top_k
+    similar_students = await db.run_sync(
+        lambda sync_db: _collaborative_filtering(sync_db).find_similar_students(
+            student_id=current_student.id,
+            top_k=top_k
+        )
     )
     
     if not similar_students:
@@ -307,7 +310,7 @@ async def find_similar_students(
     
     # Get student details
     student_ids = [s[0] for s in similar_students]
-    students = db.query(Student).filter(Student.id.in_(student_ids)).all()
+    students = (await db.scalars(select(Student).where(Student.id.in_(student_ids)))).all()
     student_map = {s.id: s for s in students}
     
     result = []
@@ -330,20 +333,18 @@ async def find_similar_students(
 async def get_peer_learning_insights(
     top_k: int = 5,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Get insights from similar students
     Shows what content similar students struggled with or excelled at
     """
-    # Initialize collaborative filtering
-    cf = CollaborativeFiltering(db)
-    cf.build_interaction_matrix()
-    
     # Get insights
-    insights = cf.get_peer_insights(
-        student_id=current_student.id,
-        top_k=top_k
+    insights = await db.run_sync(
+        lambda sync_db: _collaborative_filtering(sync_db).get_peer_insights(
+            student_id=current_student.id,
+            top_k=top_k
+        )
     )
     
     if not insights:
@@ -359,7 +360,7 @@ async def get_peer_learning_insights(
     
     # Get content details
     all_content_ids = list(set([i['content_id'] for i in insights]))
-    content_items = db.query(Content).filter(Content.id.in_(all_content_ids)).all()
+    content_items = (await db.scalars(select(Content).where(Content.id.in_(all_content_ids)))).all()
     content_map = {c.id: c for c in content_items}
     
     def format_insight(insight):
@@ -405,7 +406,7 @@ class FlashcardCreateRequest(BaseModel):
 async def create_flashcard(
     request: FlashcardCreateRequest,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Create a new flashcard for spaced repetition"""
     flashcard = FlashCard(
@@ -419,8 +420,8 @@ async def create_flashcard(
     )
     
     db.add(flashcard)
-    db.commit()
-    db.refresh(flashcard)
+    await db.commit()
+    await db.refresh(flashcard)
     
     return {
         "message": "Flashcard created",
@@ -432,17 +433,17 @@ async def create_flashcard(
 @router.get("/flashcards/due")
 async def get_due_flashcards(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Get all flashcards due for review"""
     now = datetime.utcnow()
     
-    due_cards = db.query(FlashCard).filter(
+    due_cards = (await db.scalars(select(FlashCard).where(
         and_(
             FlashCard.student_id == current_student.id,
             FlashCard.next_review_date <= now
         )
-    ).order_by(FlashCard.next_review_date).all()
+    ).order_by(FlashCard.next_review_date))).all()
     
     return {
         "student_id": current_student.id,
@@ -472,7 +473,7 @@ async def review_flashcard(
     flashcard_id: int,
     review: ReviewRequest,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     Review a flashcard and update SM-2 scheduling
@@ -487,12 +488,12 @@ async def review_flashcard(
           - 5: Perfect response
     """
     # Get flashcard
-    flashcard = db.query(FlashCard).filter(
+    flashcard = await db.scalar(select(FlashCard).where(
         and_(
             FlashCard.id == flashcard_id,
             FlashCard.student_id == current_student.id
         )
-    ).first()
+    ))
     
     if not flashcard:
         raise HTTPException(
@@ -513,8 +514,8 @@ async def review_flashcard(
     
     next_review = flashcard.calculate_sm2_next_review(review.quality)
     
-    db.commit()
-    db.refresh(flashcard)
+    await db.commit()
+    await db.refresh(flashcard)
     
     return {
         "message": "Review recorded",
@@ -535,19 +536,19 @@ async def review_flashcard(
 async def get_upcoming_reviews(
     days: int = 7,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Get upcoming flashcard reviews for next N days"""
     now = datetime.utcnow()
     future = now + timedelta(days=days)
     
-    upcoming = db.query(FlashCard).filter(
+    upcoming = (await db.scalars(select(FlashCard).where(
         and_(
             FlashCard.student_id == current_student.id,
             FlashCard.next_review_date > now,
             FlashCard.next_review_date <= future
         )
-    ).order_by(FlashCard.next_review_date).all()
+    ).order_by(FlashCard.next_review_date))).all()
     
     # Group by day
     reviews_by_day = {}
@@ -573,13 +574,13 @@ async def get_upcoming_reviews(
 @router.get("/flashcards/stats")
 async def get_flashcard_statistics(
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Get overall flashcard statistics"""
     # Get all flashcards
-    cards = db.query(FlashCard).filter(
+    cards = (await db.scalars(select(FlashCard).where(
         FlashCard.student_id == current_student.id
-    ).all()
+    ))).all()
     
     if not cards:
         return {
@@ -622,15 +623,15 @@ async def get_flashcard_statistics(
 async def delete_flashcard(
     flashcard_id: int,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """Delete a flashcard"""
-    flashcard = db.query(FlashCard).filter(
+    flashcard = await db.scalar(select(FlashCard).where(
         and_(
             FlashCard.id == flashcard_id,
             FlashCard.student_id == current_student.id
         )
-    ).first()
+    ))
     
     if not flashcard:
         raise HTTPException(
@@ -638,7 +639,7 @@ async def delete_flashcard(
             detail="Flashcard not found"
         )
     
-    db.delete(flashcard)
-    db.commit()
+    await db.delete(flashcard)
+    await db.commit()
     
     return {"message": "Flashcard deleted"}
@@ -1,11 +1,17 @@
 """
 Students API endpoints
-Provides student-specific routes such as /me
+Provides student-specific routes such as /me and bulk onboarding
 """
-from fastapi import APIRouter, Depends
-from app.api.deps import get_current_student
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.api.deps import get_current_admin, get_current_student
+from app.core.config import settings
+from app.core.database import get_db
 from app.models.models import Student
 from app.models.schemas import StudentResponse
+from app.services.student_import import ImportBusy, RecordParser, StudentImporter, aiter_lines, import_pool
 
 router = APIRouter(prefix="/students", tags=["students"])
 
@@ -14,3 +20,39 @@ router = APIRouter(prefix="/students", tags=["students"])
 def read_current_student_profile(current_student: Student = Depends(get_current_student)):
     """Return the profile of the currently authenticated student"""
     return current_student
+
+
+@router.post("/import")
+async def import_students(
+    request: Request,
+    format: Optional[str] = None,
+    current_admin: Student = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-create students from a streamed CSV (with header row) or JSONL body (administrators only)
+
+    Each record needs username, email and password (full_name optional).
+    The format defaults to jsonl for JSON/NDJSON content types, else csv.
+    Records are processed in chunks as the body arrives; existing or
+    repeated usernames/emails are skipped and reported, not fatal.
+    """
+    if format is None:
+        format = "jsonl" if "json" in request.headers.get("content-type", "") else "csv"
+    try:
+        parser = RecordParser(format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    try:
+        with import_pool.admit() as executor:
+            importer = StudentImporter(db, chunk_size=settings.STUDENT_IMPORT_CHUNK_SIZE, executor=executor)
+            async for line in aiter_lines(request.stream()):
+                parsed = parser.feed(line)
+                if parsed is not None and importer.add(*parsed):
+                    await run_in_threadpool(importer.flush)
+            await run_in_threadpool(importer.flush)
+    except ImportBusy as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    
+    return importer.report()
@@ -18,11 +18,30 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./rl_tutor.db"
+    DB_PERFORMANCE_PROFILE: bool = True  # Apply the connection tuning below (False: driver defaults)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # Readers don't block the writer and vice versa
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # fsync at checkpoints only; safe with WAL
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # Bytes of the database file memory-mapped per connection
+    SQLITE_CACHE_SIZE: int = -64000  # Page cache per connection (negative = KiB)
+    SQLITE_BUSY_TIMEOUT: int = 5000  # Milliseconds a writer waits for the lock before "database is locked"
+    SQLITE_POOL_SIZE: int = 8  # Pooled SQLite connections kept open (each keeps its cache and mmap)
+    SQLITE_MAX_OVERFLOW: int = 16
+    DB_POOL_SIZE: int = 10  # PostgreSQL connections kept open per worker process
+    DB_MAX_OVERFLOW: int = 20  # Extra connections allowed under bursts
+    DB_POOL_PRE_PING: bool = True  # Test pooled connections before use (survives server restarts)
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DB_ASYNC_MODE: str = "auto"  # auto: AsyncEngine if aiosqlite/asyncpg is installed, else "threadpool"
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours default, override via env var
+    PASSWORD_HASH_WORKERS: int = 2  # bcrypt worker processes (0 hashes on the default thread pool)
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Hashes queued or running before register/login answer 503
+    STUDENT_IMPORT_CHUNK_SIZE: int = 1000  # Records per uniqueness query and insert batch in bulk onboarding
+    STUDENT_IMPORT_HASH_WORKERS: int = 0  # Hashing processes shared by bulk imports (0 = one per CPU core)
+    STUDENT_IMPORT_MAX_CONCURRENT: int = 1  # Bulk imports running at once per process; more answer 503
+    ADMIN_USERNAMES: list = []  # Students allowed to publish, activate and roll back RL policies
     
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
@@ -37,6 +56,46 @@ class Settings(BaseSettings):
     EPSILON: float = 0.1  # Exploration rate
     LEARNING_RATE: float = 0.1
     DISCOUNT_FACTOR: float = 0.95
+    STATE_ENCODER: str = "hashed_bins"  # "hashed_bins" (13 topics + difficulty) or legacy "average"
+    STATE_BINS: int = 3  # Bins per topic score for hashed_bins
+    Q_TABLE_NUM_STATES: int = 100  # Q-table rows, independent of the number of topics
+    RL_POLICY: str = "tabular"  # "tabular" Q-table or "linear" feature-based agent
+    LINEAR_AGENT_PATH: str = "models/linear_agent.npz"
+    
+    # Q-table storage
+    Q_TABLE_SHARDED: bool = False  # Partition the Q-table by content topic
+    Q_TABLE_SHARD_DIR: str = "models/shards"
+    Q_TABLE_PATH: str = "models/q_table.npy"
+    Q_TABLE_LOG_PATH: str = "models/q_table.wal"  # Append-only log of online updates
+    Q_TABLE_SNAPSHOT_INTERVAL: int = 300  # Seconds between background snapshots
+    Q_TABLE_LOG_FLUSH_INTERVAL: float = 1.0  # Seconds between update log flushes (bounds what a crash loses)
+    Q_TABLE_LOG_FSYNC: bool = False  # Also fsync the log on each flush (survives power loss)
+    MODEL_REGISTRY_DIR: str = "models/registry"  # Versioned policies for hot swap
+    Q_TABLE_SHARED_MEMORY: bool = False  # One Q-table shared by all worker processes
+    Q_TABLE_SHM_NAME: str = "rl_tutor_q_table"
+    Q_TABLE_SHM_MAX_ACTIONS: int = 16384  # Fixed column capacity of the shared segment
+    Q_TABLE_LOCK_STRIPES: int = 16  # Cross-process row locks for shared updates
+    Q_UPDATE_BUFFERED: bool = True  # Queue online updates per thread, apply them in batches
+    Q_UPDATE_FLUSH_INTERVAL: float = 0.5  # Seconds between batched applies
+    Q_UPDATE_FLUSH_SIZE: int = 256  # Queued updates in one thread that force an early apply
+    
+    # Learning session writes
+    SESSION_WRITE_BEHIND: bool = False  # Queue LearningSession rows and bulk-insert them in the background
+    SESSION_FLUSH_INTERVAL: float = 0.05  # Seconds between bulk inserts
+    SESSION_FLUSH_SIZE: int = 500  # Queued rows that force an early insert
+    SESSION_QUEUE_SIZE: int = 10000  # Rows held in memory before answers block (backpressure)
+    SESSION_ENQUEUE_TIMEOUT: float = 1.0  # Seconds an answer waits for queue room before writing inline
+    PRECOMPUTED_RECOMMENDATION_TTL: int = 36 * 3600  # Seconds a nightly top-k list is served before ranking live
+    RECOMMENDATION_DIFFICULTY_WINDOW: int = 2  # Ranked lists keep content within this many levels of the preferred one
+    LOOKAHEAD_DEPTH: int = 0  # Next items precomputed per student (0: off; off-policy evaluation skips queued items)
+    LOOKAHEAD_STATE_THRESHOLD: float = 0.25  # Per-feature knowledge change that discards queued items
+    CONTENT_CATALOG_TTL: float = 60.0  # Seconds before the catalog index is rebuilt (picks up other workers' edits)
+    CONTENT_PAYLOAD_CACHE_SIZE: int = 10000  # Pre-serialized content responses kept in memory
+    CONTENT_PAYLOAD_CACHE_TTL: float = 60.0  # Seconds a cached content response is served (other workers' edits)
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Authenticated students cached per key type (0 disables)
+    # Seconds a cached student is trusted without a database check. Invalidation only reaches this process:
+    # a student deleted or renamed by another worker (or by a Core statement) stays authenticated this long
+    PRINCIPAL_CACHE_TTL: float = 30.0
     
     class Config:
         env_file = ".env"
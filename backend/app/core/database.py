@@ -1,16 +1,111 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+import importlib.util
+from typing import Callable, Dict, List, Optional, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+except ImportError:  # greenlet missing: install sqlalchemy[asyncio] for the AsyncEngine path
+    AsyncSession = async_sessionmaker = create_async_engine = None
+
+# Async DBAPI driver per backend (dialect suffix, importable module)
+ASYNC_DRIVERS = {
+    'sqlite': ("aiosqlite", "aiosqlite"),
+    'postgresql': ("asyncpg", "asyncpg")
+}
+
+
+def sqlite_pragmas() -> Dict[str, object]:
+    """PRAGMAs applied to every new SQLite connection by the performance profile"""
+    return {
+        'journal_mode': settings.SQLITE_JOURNAL_MODE,
+        'synchronous': settings.SQLITE_SYNCHRONOUS,
+        'mmap_size': settings.SQLITE_MMAP_SIZE,
+        'cache_size': settings.SQLITE_CACHE_SIZE,
+        'busy_timeout': settings.SQLITE_BUSY_TIMEOUT
+    }
+
+
+def engine_options(url: str, profile: bool = True) -> Dict:
+    """
+    create_engine() keyword arguments for a database URL
+
+    Args:
+        url: Database URL
+        profile: Apply the tuned pool settings (False: driver defaults)
+
+    Returns:
+        Keyword arguments for create_engine
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        options = {'connect_args': {"check_same_thread": False}}
+        if profile and parsed.database not in (None, "", ":memory:"):
+            options.update(
+                pool_size=settings.SQLITE_POOL_SIZE,
+                max_overflow=settings.SQLITE_MAX_OVERFLOW
+            )
+        return options
+    if profile and backend == "postgresql":
+        return {
+            'pool_size': settings.DB_POOL_SIZE,
+            'max_overflow': settings.DB_MAX_OVERFLOW,
+            'pool_pre_ping': settings.DB_POOL_PRE_PING,
+            'pool_recycle': settings.DB_POOL_RECYCLE
+        }
+    return {}
+
+
+def _apply_pragmas(dbapi_connection, pragmas: Dict[str, object]):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: Optional[str] = None, profile: Optional[bool] = None) -> Engine:
+    """
+    Create an engine with the database performance profile
+
+    SQLite connections get WAL journaling, synchronous=NORMAL, a memory
+    map, a larger page cache and a busy timeout as soon as they are
+    opened; PostgreSQL gets a sized, pre-pinged, recycled pool.
+
+    Args:
+        url: Database URL (default settings.DATABASE_URL)
+        profile: Apply the profile (default settings.DB_PERFORMANCE_PROFILE)
+
+    Returns:
+        SQLAlchemy Engine
+    """
+    url = url or settings.DATABASE_URL
+    profile = settings.DB_PERFORMANCE_PROFILE if profile is None else profile
+    db_engine = create_engine(url, **engine_options(url, profile))
+
+    if profile and db_engine.dialect.name == "sqlite":
+        pragmas = sqlite_pragmas()
+        if make_url(url).database in (None, "", ":memory:"):
+            del pragmas['journal_mode']  # in-memory databases have no WAL
+
+        @event.listens_for(db_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            _apply_pragmas(dbapi_connection, pragmas)
+
+    return db_engine
+
+
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = create_db_engine()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -28,6 +123,174 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialize database - create all tables"""
+class ThreadedSession:
+    """
+    AsyncSession-compatible wrapper that runs a synchronous Session on the thread pool
+
+    Used by get_async_db when no async driver is installed: every awaitable
+    method hops to a worker thread, so the event loop keeps serving other
+    requests while the query runs. Results are fully buffered before they
+    come back, like AsyncSession's.
+    """
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def run_sync(self, fn: Callable, *args, **kwargs):
+        """Call fn(sync_session, *args, **kwargs) on the thread pool"""
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement, params=None, **kwargs):
+        def buffered(session: Session):
+            result = session.execute(statement, params, **kwargs)
+            return result.freeze()() if getattr(result, "returns_rows", True) else result
+
+        return await self.run_sync(buffered)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await self.run_sync(lambda session: session.scalar(statement, params, **kwargs))
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await self.run_sync(lambda session: session.get(entity, ident, **kwargs))
+
+    async def refresh(self, instance, attribute_names=None):
+        await self.run_sync(lambda session: session.refresh(instance, attribute_names))
+
+    async def delete(self, instance):
+        await self.run_sync(lambda session: session.delete(instance))
+
+    async def flush(self):
+        await self.run_sync(lambda session: session.flush())
+
+    async def commit(self):
+        await self.run_sync(lambda session: session.commit())
+
+    async def rollback(self):
+        await self.run_sync(lambda session: session.rollback())
+
+    async def close(self):
+        await self.run_sync(lambda session: session.close())
+
+
+# Annotation for sessions yielded by get_async_db
+AsyncDBSession = ThreadedSession if AsyncSession is None else Union[AsyncSession, ThreadedSession]
+
+
+def async_database_url(url: str) -> str:
+    """Database URL with the backend's async driver (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS or parsed.get_driver_name() == ASYNC_DRIVERS[backend][0]:
+        return url
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend][0]}").render_as_string(hide_password=False)
+
+
+def async_driver_available(url: Optional[str] = None) -> bool:
+    """True when SQLAlchemy's asyncio extension and the backend's async driver are installed"""
+    backend = make_url(url or settings.DATABASE_URL).get_backend_name()
+    if AsyncSession is None or backend not in ASYNC_DRIVERS:
+        return False
+    return importlib.util.find_spec(ASYNC_DRIVERS[backend][1]) is not None
+
+
+def create_async_db_engine(url: Optional[str] = None, profile: Optional[bool] = None):
+    """
+    Create an AsyncEngine with the same pool settings and SQLite PRAGMAs as create_db_engine
+
+    Args:
+        url: Database URL (default settings.DATABASE_URL, mapped to its async driver)
+        profile: Apply the profile (default settings.DB_PERFORMANCE_PROFILE)
+
+    Returns:
+        SQLAlchemy AsyncEngine
+    """
+    url = url or settings.DATABASE_URL
+    profile = settings.DB_PERFORMANCE_PROFILE if profile is None else profile
+    db_engine = create_async_engine(async_database_url(url), **engine_options(url, profile))
+
+    if profile and db_engine.dialect.name == "sqlite":
+        pragmas = sqlite_pragmas()
+        if make_url(url).database in (None, "", ":memory:"):
+            del pragmas['journal_mode']
+
+        @event.listens_for(db_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            _apply_pragmas(dbapi_connection, pragmas)
+
+    return db_engine
+
+
+_async_session_factory = None
+
+
+def async_session_factory():
+    """
+    Session factory behind get_async_db, created on first use
+
+    Returns:
+        async_sessionmaker bound to the AsyncEngine, or None when the
+        thread-pool fallback is in use (DB_ASYNC_MODE="threadpool" or no
+        async driver installed)
+    """
+    global _async_session_factory
+    if _async_session_factory is None and settings.DB_ASYNC_MODE != "threadpool" and async_driver_available():
+        _async_session_factory = async_sessionmaker(
+            create_async_db_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+async def get_async_db():
+    """Dependency for getting an async database session (AsyncSession or ThreadedSession)"""
+    factory = async_session_factory()
+    if factory is not None:
+        async with factory() as db:
+            yield db
+        return
+    db = ThreadedSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def create_missing_indexes(bind: Optional[Engine] = None) -> List[str]:
+    """
+    Create declared indexes that existing tables lack
+
+    create_all() only emits CREATE INDEX together with CREATE TABLE, so
+    databases created before an index was added to a model never get it.
+
+    Args:
+        bind: Engine to inspect (default: the application engine)
+
+    Returns:
+        Names of the indexes created
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
+                created.append(index.name)
+    return created
+
+
+def init_db() -> List[str]:
+    """Initialize database - create all tables, then any indexes missing from existing tables"""
     Base.metadata.create_all(bind=engine)
+    return create_missing_indexes(engine)
@@ -1,8 +1,16 @@
 """
 Security utilities for authentication
 """
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
+import numpy as np
 from jose import JWTError, jwt
 import bcrypt
 from app.core.config import settings
@@ -20,6 +28,138 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+def _timed(fn, *args):
+    """Run fn in a hashing worker and report when it started (for queue-time metrics)"""
+    started = time.time()
+    return fn(*args), started
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when more password hashes are pending than the admission limit allows"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool, off the API threads
+
+    hash() and verify() are awaited by async endpoints, so a request
+    waiting for bcrypt holds neither a thread-pool slot nor the GIL. At
+    most `max_pending` hashes may be queued or running at once; beyond
+    that PasswordHasherBusy is raised immediately instead of letting a
+    login burst build an unbounded backlog. Queue time (submit to worker
+    start) and run time of recent hashes are kept for stats().
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64, window: int = 1000):
+        """
+        Initialize PasswordHasher
+
+        Args:
+            workers: Worker processes (0 runs bcrypt on the event loop's default thread pool)
+            max_pending: Hashes queued or running before new ones are refused
+            window: Recent hashes kept for the latency percentiles
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # Counters and recent latencies (seconds) for monitoring
+        self.completed = 0
+        self.rejected = 0
+        self.queue_times = deque(maxlen=window)
+        self.run_times = deque(maxlen=window)
+
+    @property
+    def pending(self) -> int:
+        """Hashes queued or running right now"""
+        return self._pending
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the API process's threads and locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self._pending} password hashes pending")
+            self._pending += 1
+
+        submitted = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                result, started = await loop.run_in_executor(self._pool(), _timed, fn, *args)
+            except BrokenProcessPool as e:
+                # A worker died: start a fresh pool next time, and answer this request from a thread
+                print(f"[ERROR] Password hashing pool failed, hashing on a thread: {e}")
+                with self._lock:
+                    self._executor = None
+                result, started = await loop.run_in_executor(None, _timed, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        finished = time.time()
+        with self._lock:
+            self.completed += 1
+            self.queue_times.append(max(0.0, started - submitted))
+            self.run_times.append(finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """get_password_hash() in a hashing worker"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password() in a hashing worker"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict:
+        """Admission counters and p50/p99 queue and run time (ms) of recent hashes"""
+        with self._lock:
+            queue_times = np.array(self.queue_times) * 1e3
+            run_times = np.array(self.run_times) * 1e3
+
+        def percentile(values: np.ndarray, q: float) -> float:
+            return round(float(np.percentile(values, q)), 2) if len(values) else 0.0
+
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'pending': self._pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'queue_ms_p50': percentile(queue_times, 50),
+            'queue_ms_p99': percentile(queue_times, 99),
+            'run_ms_p50': percentile(run_times, 50),
+            'run_ms_p99': percentile(run_times, 99)
+        }
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -9,6 +9,7 @@ from app.models.smart_recommendations import (
 from app.models.mastery import (
     MasterySkill, StudentMastery, Badge, StudentBadge, StudyPlan
 )
+from app.models.recommendation_cache import PrecomputedRecommendation
 
 __all__ = [
     "Student",
@@ -31,5 +32,6 @@ __all__ = [
     "StudentMastery",
     "Badge",
     "StudentBadge",
-    "StudyPlan"
+    "StudyPlan",
+    "PrecomputedRecommendation"
 ]
@@ -5,7 +5,7 @@ Phase 13: Mastery-Based Progression Models
 - Personalized study plans
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, JSON, Table
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, JSON, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Set
@@ -13,6 +13,14 @@ import json
 
 from app.core.database import Base
 
+# (mastery level, minimum accuracy %, minimum attempts), highest level first
+MASTERY_THRESHOLDS = [
+    (5, 95, 20),  # Master
+    (4, 85, 15),  # Advanced
+    (3, 75, 10),  # Proficient
+    (2, 60, 5),   # Developing
+]
+
 
 # Association table for skill prerequisites (many-to-many)
 skill_prerequisites = Table(
@@ -101,6 +109,9 @@ class StudentMastery(Base):
     Mastery levels: 0=Not Started, 1=Beginner, 2=Developing, 3=Proficient, 4=Advanced, 5=Master
     """
     __tablename__ = "student_mastery"
+    __table_args__ = (
+        Index("ix_student_mastery_student_id_skill_id", "student_id", "skill_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -159,20 +170,13 @@ class StudentMastery(Base):
         self.total_practice_time += time_spent
         
         # Calculate mastery level based on accuracy and attempts
-        if self.accuracy >= 95 and self.total_attempts >= 20:
-            self.mastery_level = 5  # Master
-            if not self.mastered_at:
-                self.mastered_at = datetime.now()
-        elif self.accuracy >= 85 and self.total_attempts >= 15:
-            self.mastery_level = 4  # Advanced
-        elif self.accuracy >= 75 and self.total_attempts >= 10:
-            self.mastery_level = 3  # Proficient
-        elif self.accuracy >= 60 and self.total_attempts >= 5:
-            self.mastery_level = 2  # Developing
-        elif self.total_attempts >= 1:
-            self.mastery_level = 1  # Beginner
-        else:
-            self.mastery_level = 0  # Not Started
+        self.mastery_level = 1 if self.total_attempts >= 1 else 0  # Beginner / Not Started
+        for level, min_accuracy, min_attempts in MASTERY_THRESHOLDS:
+            if self.accuracy >= min_accuracy and self.total_attempts >= min_attempts:
+                self.mastery_level = level
+                break
+        if self.mastery_level == 5 and not self.mastered_at:
+            self.mastered_at = datetime.now()
         
         # Update progress percentage (normalized to 0-100)
         self.progress_percentage = min(100, (self.mastery_level / 5.0) * 100)
@@ -332,6 +336,9 @@ class StudyPlan(Base):
     Can be goal-based (e.g., "Master Calculus in 3 months") or time-based.
     """
     __tablename__ = "study_plans"
+    __table_args__ = (
+        Index("ix_study_plans_student_id_is_active", "student_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
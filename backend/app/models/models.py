@@ -1,7 +1,7 @@
 """
 Database models for RL Educational Tutor
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -33,6 +33,9 @@ class Student(Base):
 class Content(Base):
     """Educational content (questions, materials)"""
     __tablename__ = "content"
+    __table_args__ = (
+        Index("ix_content_topic_difficulty", "topic", "difficulty"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -54,6 +57,9 @@ class Content(Base):
 class LearningSession(Base):
     """Track individual learning interactions"""
     __tablename__ = "learning_sessions"
+    __table_args__ = (
+        Index("ix_learning_sessions_student_id_timestamp", "student_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -0,0 +1,31 @@
+"""
+Precomputed Recommendation Models
+Ranked content lists produced in bulk by the nightly recommendation job
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class PrecomputedRecommendation(Base):
+    """
+    Top-k ranked content for one student
+    
+    Attributes:
+        student_id: Foreign key to Student (one row per student)
+        content_ids: Recommended content IDs, best first
+        scores: Agent scores aligned with content_ids
+        policy: Agent that produced the ranking ("tabular" or "linear")
+        generated_at: When the nightly job wrote the row
+    """
+    __tablename__ = "precomputed_recommendations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), unique=True, nullable=False)
+    content_ids = Column(JSON, default=list)
+    scores = Column(JSON, default=list)
+    policy = Column(String, default="tabular")
+    generated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PrecomputedRecommendation(student_id={self.student_id}, items={len(self.content_ids or [])})>"
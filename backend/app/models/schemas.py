@@ -86,7 +86,7 @@ class AnswerSubmit(BaseModel):
 
 class SessionResponse(BaseModel):
     """Learning session response"""
-    id: int
+    id: Optional[int] = None  # None while the session row is queued for write-behind
     content_id: int
     is_correct: bool
     reward: float
@@ -2,7 +2,7 @@
 Skill Gap Analysis Model
 Tracks identified skill gaps and learning prerequisites
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -11,6 +11,9 @@ from app.core.database import Base
 class SkillGap(Base):
     """Student skill gap assessment"""
     __tablename__ = "skill_gaps"
+    __table_args__ = (
+        Index("ix_skill_gaps_student_id_topic", "student_id", "topic"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
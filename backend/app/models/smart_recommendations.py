@@ -2,7 +2,7 @@
 Smart Recommendations Models
 Includes Multi-Armed Bandit, Collaborative Filtering, and Spaced Repetition
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, JSON, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, JSON, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from app.core.database import Base
@@ -87,6 +87,9 @@ class UserInteraction(Base):
     Track user interactions with content for collaborative filtering
     """
     __tablename__ = "user_interactions"
+    __table_args__ = (
+        Index("ix_user_interactions_student_id_content_id", "student_id", "content_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -148,6 +151,9 @@ class FlashCard(Base):
     Spaced Repetition System (SRS) flashcards using SM-2 algorithm
     """
     __tablename__ = "flashcards"
+    __table_args__ = (
+        Index("ix_flashcards_student_id_next_review_date", "student_id", "next_review_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -0,0 +1,121 @@
+"""
+Action Registry - Dense Content ID to Q-Table Column Mapping
+Gives every content item its own action index so Q-values never alias
+"""
+import os
+import threading
+import numpy as np
+from typing import Dict, Iterable, List
+
+
+class ActionRegistry:
+    """
+    Persistent mapping from content IDs to dense action indices
+
+    Indices are assigned in registration order (0, 1, 2, ...) and never
+    reused, so a Q-table column always belongs to exactly one content item.
+    """
+
+    def __init__(self, content_ids: Iterable[int] = None):
+        """
+        Initialize ActionRegistry
+
+        Args:
+            content_ids: Optional content IDs to register up front, in order
+        """
+        self._index: Dict[int, int] = {}
+        self._content_ids: List[int] = []
+        self._lock = threading.Lock()
+        if content_ids is not None:
+            self.register(content_ids)
+
+    def __len__(self) -> int:
+        return len(self._content_ids)
+
+    def __contains__(self, content_id: int) -> bool:
+        return int(content_id) in self._index
+
+    def register(self, content_ids: Iterable[int]) -> int:
+        """
+        Register content IDs that do not have an action index yet
+
+        Args:
+            content_ids: Content IDs to register
+
+        Returns:
+            Registry size after registration
+        """
+        with self._lock:
+            for content_id in content_ids:
+                content_id = int(content_id)
+                if content_id not in self._index:
+                    self._index[content_id] = len(self._content_ids)
+                    self._content_ids.append(content_id)
+            return len(self._content_ids)
+
+    def index_of(self, content_id: int, register: bool = True) -> int:
+        """
+        Get the action index for one content ID
+
+        Args:
+            content_id: Content ID
+            register: Assign a new index if the content is unknown
+
+        Returns:
+            Action index
+
+        Raises:
+            KeyError: If the content is unknown and register is False
+        """
+        index = self._index.get(int(content_id))
+        if index is None:
+            if not register:
+                raise KeyError(f"Content {content_id} has no action index")
+            self.register([content_id])
+            index = self._index[int(content_id)]
+        return index
+
+    def indices_for(self, content_ids: Iterable[int], register: bool = True) -> np.ndarray:
+        """
+        Get action indices for a list of candidates (O(len(content_ids)))
+
+        Args:
+            content_ids: Candidate content IDs
+            register: Assign new indices to unknown content
+
+        Returns:
+            Array of action indices aligned with content_ids
+        """
+        content_ids = [int(c) for c in content_ids]
+        lookup = self._index.get
+        indices = [lookup(c, -1) for c in content_ids]
+
+        if -1 in indices:
+            if not register:
+                missing = [c for c, i in zip(content_ids, indices) if i == -1]
+                raise KeyError(f"Content {missing[:5]} has no action index")
+            self.register(content_ids)
+            indices = [self._index[c] for c in content_ids]
+
+        return np.asarray(indices, dtype=np.intp)
+
+    def content_id_at(self, index: int) -> int:
+        """Get the content ID that owns an action index"""
+        return self._content_ids[index]
+
+    @property
+    def content_ids(self) -> np.ndarray:
+        """Registered content IDs ordered by action index"""
+        return np.asarray(self._content_ids, dtype=np.int64)
+
+    def save(self, filepath: str):
+        """Save registry to a .npy file of content IDs ordered by index"""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        np.save(filepath, self.content_ids)
+
+    @classmethod
+    def load(cls, filepath: str) -> "ActionRegistry":
+        """Load registry saved by save(); missing file gives an empty registry"""
+        if os.path.exists(filepath):
+            return cls(np.load(filepath).tolist())
+        return cls()
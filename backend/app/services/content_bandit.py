@@ -225,3 +225,30 @@ def calculate_content_reward(
         reward += engagement_score * 0.2
     
     return min(1.0, reward)  # Cap at 1.0
+
+
+def calculate_content_rewards(
+    is_correct: np.ndarray,
+    time_spent: np.ndarray,
+    engagement_score: np.ndarray = None
+) -> np.ndarray:
+    """
+    Vectorized calculate_content_reward over arrays of interactions
+    
+    Args:
+        is_correct: Whether each answer was correct
+        time_spent: Time spent on each item (seconds)
+        engagement_score: Optional engagement metric of each item (0-1)
+    
+    Returns:
+        Array of reward values (0-1 scale)
+    """
+    is_correct = np.asarray(is_correct, dtype=bool)
+    time_spent = np.asarray(time_spent, dtype=np.float64)
+    
+    reward = np.where(is_correct, 0.6, 0.1)
+    reward += np.select([(time_spent >= 60) & (time_spent <= 300), time_spent < 60], [0.2, 0.1], 0.15)
+    if engagement_score is not None:
+        reward += np.asarray(engagement_score, dtype=np.float64) * 0.2
+    
+    return np.minimum(1.0, reward)
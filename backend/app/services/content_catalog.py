@@ -0,0 +1,210 @@
+"""
+In-Memory Content Catalog Index
+Immutable arrays of content IDs bucketed by (topic, difficulty) for database-free candidate generation
+"""
+import threading
+import time
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Content
+
+
+def _frozen(values, dtype=np.int64) -> np.ndarray:
+    array = np.array(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+class ContentCatalog:
+    """
+    Immutable snapshot of the content catalog's routing columns
+
+    Only id, topic, difficulty and content_type are held; the Text columns
+    (question, explanation, ...) stay in the database and are loaded for
+    the single item actually served (see load_content). A snapshot is never
+    modified after construction, so request threads read it without locks
+    and a rebuild simply replaces the whole object.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str, Optional[int], Optional[str]]], version: int = 0):
+        """
+        Initialize ContentCatalog
+
+        Args:
+            rows: (id, topic, difficulty, content_type) per content item
+            version: Monotonic build number
+        """
+        rows = sorted(rows, key=lambda row: row[0])
+        self.version = version
+        self.built_at = time.time()
+        self.ids = _frozen([row[0] for row in rows])
+        # Difficulty of each item in ids (0 when unset), for vectorized difficulty masks
+        self.id_difficulties = _frozen([row[2] if row[2] is not None else 0 for row in rows])
+        self._meta = {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+        buckets: Dict[Tuple[str, int], list] = {}
+        topics: Dict[str, list] = {}
+        for content_id, topic, difficulty, _ in rows:
+            buckets.setdefault((topic, difficulty), []).append(content_id)
+            topics.setdefault(topic, []).append(content_id)
+        self._buckets = {key: _frozen(ids) for key, ids in buckets.items()}
+        self._topics = {topic: _frozen(ids) for topic, ids in topics.items()}
+        self._difficulties = sorted({difficulty for _, difficulty in buckets if difficulty is not None})
+
+        # Range queries are a handful of distinct (topic, low, high) keys; memoize them
+        self._cache: Dict[tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, content_id: int) -> bool:
+        return content_id in self._meta
+
+    def metadata(self, content_id: int) -> Optional[Tuple[str, Optional[int], Optional[str]]]:
+        """(topic, difficulty, content_type) of one item, or None if unknown"""
+        return self._meta.get(content_id)
+
+    def candidates(self,
+                   topic: Optional[str] = None,
+                   difficulty: Optional[int] = None,
+                   difficulty_range: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Content IDs matching a topic and an exact difficulty or inclusive range
+
+        Equivalent to filtering Content by topic and difficulty; results are
+        read-only arrays in content-ID order.
+
+        Args:
+            topic: Topic to match (None for all topics)
+            difficulty: Exact difficulty (takes precedence over the range)
+            difficulty_range: (low, high) inclusive difficulty bounds
+
+        Returns:
+            Array of content IDs (possibly empty)
+        """
+        if difficulty is not None:
+            difficulty_range = (difficulty, difficulty)
+        key = (topic, difficulty_range)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if difficulty_range is None:
+            result = self.ids if topic is None else self._topics.get(topic, _frozen([]))
+        else:
+            low, high = difficulty_range
+            topics = self._topics if topic is None else [topic]
+            parts = [
+                self._buckets[(t, d)]
+                for t in topics for d in self._difficulties
+                if low <= d <= high and (t, d) in self._buckets
+            ]
+            result = _frozen(np.sort(np.concatenate(parts))) if parts else _frozen([])
+
+        self._cache[key] = result
+        return result
+
+    @classmethod
+    def build(cls, db: Session, version: int = 0) -> "ContentCatalog":
+        """Read the routing columns of every content row (no Text columns)"""
+        rows = db.execute(
+            select(Content.id, Content.topic, Content.difficulty, Content.content_type)
+        ).all()
+        return cls([tuple(row) for row in rows], version=version)
+
+
+def load_content(db: Session, content_id: int) -> Optional[Content]:
+    """Full Content row for the one item being served (identity-map aware primary-key get)"""
+    return db.get(Content, content_id)
+
+
+class CatalogIndex:
+    """
+    Process-wide holder of the current ContentCatalog snapshot
+
+    get() returns the current snapshot, building it on first use, after
+    invalidate(), or once it is older than `ttl` seconds. A rebuild
+    constructs a new snapshot off to the side and then swaps one
+    reference, so readers see either the old or the new catalog, never a
+    half-built one. Content inserts, updates and deletes made through the
+    ORM invalidate the index when their transaction commits; bulk
+    statements that bypass the ORM must call invalidate(). Neither reaches
+    other worker processes, which pick such changes up when their
+    snapshot expires.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        Initialize CatalogIndex
+
+        Args:
+            ttl: Seconds a snapshot is served before get() rebuilds it (0: until invalidated)
+        """
+        self.ttl = ttl
+        self._catalog: Optional[ContentCatalog] = None
+        self._stale = True
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark the snapshot stale; the next get() rebuilds it"""
+        self._stale = True
+
+    def _build(self, db: Session) -> ContentCatalog:
+        """Build and swap in a snapshot (caller holds _lock)"""
+        self._stale = False  # edits committed during the build mark it stale again
+        self._version += 1
+        catalog = ContentCatalog.build(db, version=self._version)
+        self._catalog = catalog
+        return catalog
+
+    def rebuild(self, db: Session) -> ContentCatalog:
+        """Build a fresh snapshot and swap it in"""
+        with self._lock:
+            return self._build(db)
+
+    def _expired(self, catalog: ContentCatalog) -> bool:
+        return self.ttl > 0 and time.time() - catalog.built_at > self.ttl
+
+    def get(self, db: Session) -> ContentCatalog:
+        """Current snapshot, rebuilt first if content changed since it was built or it expired"""
+        catalog = self._catalog
+        if catalog is None or self._stale or self._expired(catalog):
+            with self._lock:
+                current = self._catalog
+                if current is not catalog and current is not None and not self._stale:
+                    return current  # another request rebuilt it while this one waited
+                catalog = self._build(db)
+        return catalog
+
+    def metadata(self, content_id: int) -> Optional[Tuple[str, Optional[int], Optional[str]]]:
+        """(topic, difficulty, content_type) from the last built snapshot, without a database (None if unknown)"""
+        catalog = self._catalog
+        return catalog.metadata(content_id) if catalog is not None else None
+
+
+# Global catalog index instance
+catalog_index = CatalogIndex(ttl=settings.CONTENT_CATALOG_TTL)
+
+
+@event.listens_for(Content, "after_insert")
+@event.listens_for(Content, "after_update")
+@event.listens_for(Content, "after_delete")
+def _content_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info['content_changed'] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop('content_changed', False):
+        catalog_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop('content_changed', None)
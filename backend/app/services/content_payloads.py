@@ -0,0 +1,166 @@
+"""
+Pre-Serialized Content Payload Cache
+Ready-to-send ContentResponse JSON bytes per content item, invalidated when content is edited
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Content
+from app.models.schemas import ContentResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    """Encode to compact JSON bytes with orjson when installed, else the json module"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _parse_json_list(value):
+    """options/tags may be stored as a JSON string; parse it once, keep the raw string if it is not JSON"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def content_payload(content: Content) -> bytes:
+    """
+    Serialize one Content row exactly as the ContentResponse model would
+
+    Args:
+        content: Content row
+
+    Returns:
+        JSON bytes of the ContentResponse for this row
+    """
+    fields = {name: getattr(content, name) for name in ContentResponse.model_fields}
+    fields['options'] = _parse_json_list(fields['options'])
+    return dumps(ContentResponse.model_validate(fields).model_dump(mode="json"))
+
+
+def embed_payload(fields: Dict, key: str, payload: Optional[bytes]) -> bytes:
+    """
+    Encode `fields` as a JSON object with a pre-serialized value under `key`
+
+    The cached bytes are spliced in as-is instead of being decoded and
+    re-encoded. `fields` must be non-empty and must not contain `key`.
+    """
+    head = dumps(fields)[:-1]
+    return head + b',' + dumps(key) + b':' + (payload if payload is not None else b'null') + b'}'
+
+
+class ContentPayloadCache:
+    """
+    Bounded LRU map of content ID -> pre-serialized ContentResponse bytes
+
+    get() returns the cached bytes, or loads the row, normalizes its JSON
+    columns, validates it against ContentResponse once and caches the
+    encoded result. Content inserts, updates and deletes made through the
+    ORM drop the affected entries when their transaction commits; bulk
+    statements that bypass the ORM must call invalidate(). Neither reaches
+    other worker processes, so every entry also expires after `ttl`
+    seconds.
+    """
+
+    def __init__(self, max_items: int = 10000, ttl: float = 60.0):
+        """
+        Initialize ContentPayloadCache
+
+        Args:
+            max_items: Payloads kept before the least recently used is evicted
+            ttl: Seconds a payload is served before the row is read again
+        """
+        self.max_items = max_items
+        self.ttl = ttl
+        self._payloads: "OrderedDict[int, tuple]" = OrderedDict()  # content ID -> (expiry, bytes)
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation; stale builds are not stored
+
+        # Counters for monitoring and the benchmark
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def get(self, db: Session, content_id: int) -> Optional[bytes]:
+        """
+        Serialized ContentResponse for one content item
+
+        Returns:
+            JSON bytes, or None if the content does not exist
+        """
+        with self._lock:
+            entry = self._payloads.get(content_id)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > time.time():
+                    self._payloads.move_to_end(content_id)
+                    self.hits += 1
+                    return payload
+                del self._payloads[content_id]
+            self.misses += 1
+            generation = self._generation
+
+        content = db.get(Content, content_id)
+        if content is None:
+            return None
+        payload = content_payload(content)
+
+        with self._lock:
+            if generation == self._generation:
+                self._payloads[content_id] = (time.time() + self.ttl, payload)
+                while len(self._payloads) > self.max_items:
+                    self._payloads.popitem(last=False)
+        return payload
+
+    def invalidate(self, content_ids=None):
+        """Drop the given content IDs, or every payload when None"""
+        with self._lock:
+            self._generation += 1
+            if content_ids is None:
+                self._payloads.clear()
+            else:
+                for content_id in content_ids:
+                    self._payloads.pop(content_id, None)
+
+
+# Global content payload cache instance
+content_payloads = ContentPayloadCache(
+    max_items=settings.CONTENT_PAYLOAD_CACHE_SIZE,
+    ttl=settings.CONTENT_PAYLOAD_CACHE_TTL
+)
+
+
+@event.listens_for(Content, "after_insert")
+@event.listens_for(Content, "after_update")
+@event.listens_for(Content, "after_delete")
+def _payload_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_content_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    changed = session.info.pop('changed_content_ids', None)
+    if changed:
+        content_payloads.invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop('changed_content_ids', None)
@@ -0,0 +1,49 @@
+"""
+Serving Decision Log
+Remembers how each served item was chosen until its answer is logged with the LearningSession
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class DecisionLog:
+    """
+    Bounded map of (student_id, content_id) -> serving decision
+
+    /session/start and /session/answer serve content; the matching answer
+    arrives in a later request. The decision made at serving time
+    (propensity, epsilon, candidate set, policy) is parked here and merged
+    into LearningSession.action_taken when that answer is recorded, which
+    is what off-policy evaluation needs.
+
+    The log is per process: with several workers an answer landing on a
+    different worker simply has no propensity and is skipped by OPE.
+    Oldest entries are evicted once `capacity` decisions are pending.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._decisions: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+    def record(self, student_id: int, content_id: int, decision: Dict):
+        """Park the decision that served `content_id` to `student_id`"""
+        key = (student_id, content_id)
+        with self._lock:
+            self._decisions.pop(key, None)
+            self._decisions[key] = decision
+            while len(self._decisions) > self.capacity:
+                self._decisions.popitem(last=False)
+
+    def pop(self, student_id: int, content_id: int) -> Optional[Dict]:
+        """Take the pending decision for an answered item, if one was recorded"""
+        with self._lock:
+            return self._decisions.pop((student_id, content_id), None)
+
+
+# Global decision log instance
+decision_log = DecisionLog()
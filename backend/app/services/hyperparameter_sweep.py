@@ -0,0 +1,256 @@
+"""
+Parallel Hyperparameter Sweep for the Q-Learning Agent
+Trains and evaluates EPSILON / LEARNING_RATE / DISCOUNT_FACTOR configurations over a process pool
+
+Usage:
+    python -m app.services.hyperparameter_sweep --epsilon 0.05 0.1 0.2 --learning-rate 0.05 0.1 0.3 --discount 0.0 0.9
+    python -m app.services.hyperparameter_sweep --random 24 --data logged --workers 8 --output sweep.json
+"""
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy.orm import Session
+from app.services.off_policy_eval import EpsilonGreedyPolicy, LoggedDecisions, evaluate_policy, load_logged_decisions
+from app.services.offline_trainer import ReplayBuffer, load_transitions, train_offline
+from app.services.rl_agent import QLearningAgent
+from app.services.student_simulator import SimulatedCatalog, StudentSimulator, run_policy
+
+HYPERPARAMETERS = ('epsilon', 'learning_rate', 'discount_factor')
+
+# (low, high) for random search; learning rates are drawn log-uniformly
+RANDOM_RANGES = {
+    'epsilon': (0.01, 0.3),
+    'learning_rate': (0.01, 0.5),
+    'discount_factor': (0.0, 0.99)
+}
+
+
+def grid_configurations(epsilons: Sequence[float],
+                        learning_rates: Sequence[float],
+                        discount_factors: Sequence[float]) -> List[Dict]:
+    """Every combination of the given values"""
+    return [
+        dict(zip(HYPERPARAMETERS, values))
+        for values in itertools.product(epsilons, learning_rates, discount_factors)
+    ]
+
+
+def random_configurations(count: int, seed: Optional[int] = None, ranges: Dict = None) -> List[Dict]:
+    """`count` configurations sampled from RANDOM_RANGES (or `ranges`)"""
+    ranges = {**RANDOM_RANGES, **(ranges or {})}
+    rng = np.random.default_rng(seed)
+    low, high = ranges['learning_rate']
+    learning_rates = np.exp(rng.uniform(np.log(low), np.log(high), size=count))
+    epsilons = rng.uniform(*ranges['epsilon'], size=count)
+    discounts = rng.uniform(*ranges['discount_factor'], size=count)
+    return [
+        {'epsilon': float(e), 'learning_rate': float(a), 'discount_factor': float(g)}
+        for e, a, g in zip(epsilons, learning_rates, discounts)
+    ]
+
+
+def _limit_worker_threads():
+    """Pool initializer: one BLAS/OpenMP thread per worker so workers don't oversubscribe cores"""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(1)
+
+
+def evaluate_simulated(config: Dict,
+                       students: int = 2000,
+                       items: int = 200,
+                       train_steps: int = 50,
+                       eval_steps: int = 10,
+                       seed: int = 0) -> Dict:
+    """
+    Train a fresh agent on simulated students, then score its greedy policy
+
+    Every configuration sees the same catalog and the same training and
+    evaluation populations, so differences come from the hyperparameters.
+    """
+    agent = QLearningAgent(**config)
+    catalog = SimulatedCatalog.synthetic(items, seed=seed)
+    training = run_policy(agent, StudentSimulator(students, catalog, seed=seed + 1),
+                          train_steps, epsilon=agent.epsilon)
+    evaluation = run_policy(agent, StudentSimulator(students, catalog, seed=seed + 2),
+                            eval_steps, epsilon=0.0, learn=False)
+    return {
+        'score': evaluation['mean_reward'],
+        'accuracy': evaluation['accuracy'],
+        'train_reward': training['mean_reward']
+    }
+
+
+@lru_cache(maxsize=2)
+def _load_logged_data(path: str):
+    """Replay buffer and logged decisions exported by prepare_logged_data (cached per worker)"""
+    with np.load(path) as data:
+        buffer = ReplayBuffer(data['states'], data['actions'], data['rewards'], data['next_states'])
+        logs = LoggedDecisions.from_arrays(data['features'], data['log_actions'], data['log_rewards'],
+                                           data['propensities'], data['candidates'],
+                                           data['candidate_sizes'], data['candidate_groups'])
+        return buffer, logs, data['content_ids'].tolist()
+
+
+def evaluate_logged(config: Dict, data_path: str, epochs: int = 20, seed: int = 0) -> Dict:
+    """
+    Train a fresh agent offline on logged transitions, then score it with off-policy evaluation
+
+    The score is the doubly robust estimate of the epsilon-greedy policy
+    (with the configuration's own epsilon) on the logged decisions.
+    """
+    buffer, logs, content_ids = _load_logged_data(data_path)
+    agent = QLearningAgent(**config)
+    agent.register_content(content_ids)  # same column order as the exported actions
+    train_offline(agent, buffer, epochs=epochs, seed=seed)
+    report = evaluate_policy(logs, EpsilonGreedyPolicy(agent, agent.epsilon))
+    return {
+        'score': report['dr'],
+        'score_stderr': report['dr_stderr'],
+        'snips': report['snips'],
+        'effective_sample_size': report['effective_sample_size']
+    }
+
+
+def prepare_logged_data(db: Session, path: str, chunk_size: int = 5000) -> Dict:
+    """
+    Export logged sessions once so every worker can load them without the database
+
+    Args:
+        db: Database session
+        path: Destination .npz file
+        chunk_size: Rows fetched per database round trip
+
+    Returns:
+        Counts of exported transitions and decisions
+    """
+    agent = QLearningAgent()
+    buffer = load_transitions(db, agent, chunk_size=chunk_size)
+    logs = load_logged_decisions(db, chunk_size=chunk_size)
+    if not len(buffer) or not len(logs):
+        raise ValueError("Logged sweep needs sessions with rewards and logged propensities")
+
+    np.savez(
+        path,
+        states=buffer.states, actions=buffer.actions, rewards=buffer.rewards, next_states=buffer.next_states,
+        content_ids=agent.registry.content_ids,
+        features=logs.features, log_actions=logs.actions, log_rewards=logs.rewards,
+        propensities=logs.propensities, **logs.candidate_arrays()
+    )
+    return {'transitions': len(buffer), 'decisions': len(logs)}
+
+
+def _run_one(task) -> Dict:
+    """Worker entry point: evaluate one configuration and time it"""
+    evaluate, config, options = task
+    started = time.perf_counter()
+    result = evaluate(config, **options)
+    return {**config, **result, 'elapsed_seconds': round(time.perf_counter() - started, 3)}
+
+
+def run_sweep(configurations: List[Dict],
+              evaluate=evaluate_simulated,
+              workers: Optional[int] = None,
+              **options) -> List[Dict]:
+    """
+    Evaluate every configuration in a process pool and rank the results
+
+    Each configuration is one independent task, so wall-clock time drops
+    roughly linearly with workers until there are fewer tasks than cores.
+
+    Args:
+        configurations: Hyperparameter dicts (see grid_configurations / random_configurations)
+        evaluate: evaluate_simulated or evaluate_logged (any picklable module-level function)
+        workers: Pool size (default: os.cpu_count()); 1 runs in-process
+        options: Keyword arguments passed to `evaluate`
+
+    Returns:
+        One result per configuration, best score first, with a 1-based 'rank'
+    """
+    tasks = [(evaluate, config, options) for config in configurations]
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+
+    if workers == 1:
+        results = [_run_one(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_limit_worker_threads) as pool:
+            results = list(pool.map(_run_one, tasks))
+
+    results.sort(key=lambda result: result['score'], reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result['rank'] = rank
+    return results
+
+
+def format_report(results: List[Dict], top: int = 10) -> str:
+    """Ranked results as a plain-text table"""
+    lines = [f"{'rank':>4}  {'epsilon':>8}  {'lr':>8}  {'gamma':>6}  {'score':>9}  {'seconds':>8}"]
+    for result in results[:top]:
+        lines.append(
+            f"{result['rank']:>4}  {result['epsilon']:>8.4f}  {result['learning_rate']:>8.4f}  "
+            f"{result['discount_factor']:>6.3f}  {result['score']:>9.4f}  {result['elapsed_seconds']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the Q-learning agent")
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.05, 0.1, 0.2])
+    parser.add_argument("--learning-rate", type=float, nargs="+", default=[0.05, 0.1, 0.3])
+    parser.add_argument("--discount", type=float, nargs="+", default=[0.0, 0.5, 0.9])
+    parser.add_argument("--random", type=int, default=0, help="Sample N random configurations instead of the grid")
+    parser.add_argument("--data", default="simulated", choices=["simulated", "logged"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--students", type=int, default=2000, help="Simulated students")
+    parser.add_argument("--items", type=int, default=200, help="Simulated catalog size")
+    parser.add_argument("--train-steps", type=int, default=50, help="Simulated training rounds")
+    parser.add_argument("--epochs", type=int, default=20, help="Offline epochs over logged data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the full ranked report as JSON")
+    args = parser.parse_args()
+
+    if args.random:
+        configurations = random_configurations(args.random, seed=args.seed)
+    else:
+        configurations = grid_configurations(args.epsilon, args.learning_rate, args.discount)
+
+    started = time.perf_counter()
+    if args.data == "logged":
+        from app.core.database import SessionLocal
+        import app.models  # noqa: F401 - register all mappers
+
+        with tempfile.TemporaryDirectory() as workdir:
+            data_path = os.path.join(workdir, "logged.npz")
+            db = SessionLocal()
+            try:
+                counts = prepare_logged_data(db, data_path)
+            finally:
+                db.close()
+            print(f"[OK] Exported {counts['transitions']} transitions and {counts['decisions']} logged decisions")
+            results = run_sweep(configurations, evaluate_logged, args.workers,
+                                data_path=data_path, epochs=args.epochs, seed=args.seed)
+    else:
+        results = run_sweep(configurations, evaluate_simulated, args.workers,
+                            students=args.students, items=args.items,
+                            train_steps=args.train_steps, seed=args.seed)
+
+    print(f"[OK] Evaluated {len(results)} configurations in {time.perf_counter() - started:.1f}s")
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"[OK] Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
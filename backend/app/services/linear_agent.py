@@ -0,0 +1,321 @@
+"""
+Linear Function-Approximation Agent for Content Selection
+Scores candidate content from student and content features instead of a per-content Q-table column
+"""
+import os
+import threading
+import zlib
+import numpy as np
+from typing import Dict, List, Tuple
+from app.core.config import settings
+from app.services.action_registry import ActionRegistry
+from app.services.rl_agent import QLearningAgent, agent, epsilon_greedy, rank_candidates
+from app.services.state_encoder import STATE_FEATURE_KEYS, KnowledgeStates, state_features
+from app.services.streaming_stats import RewardRingBuffer
+
+DEFAULT_DIFFICULTY = 3  # Mid-scale feature for content registered without metadata
+MAX_DIFFICULTY = 5
+
+
+def _bucket(value: str, buckets: int) -> int:
+    """Stable hash bucket of a categorical value (identical in every process)"""
+    return zlib.crc32((value or "").strip().lower().encode()) % buckets
+
+
+class LinearQAgent:
+    """
+    Q-learning with a bilinear Q-function: Q(s, c) = x(s)^T W f(c)
+
+    x(s): the 14 knowledge features of state_encoder.state_features, plus a bias
+    f(c): hashed topic one-hot, hashed content_type one-hot, difficulty,
+          difficulty squared, and a bias
+
+    W couples every student feature with every content feature, so the
+    model learns e.g. "low mechanics score prefers easy mechanics items"
+    and generalizes to content it has never served. Memory is one small
+    feature row per content item instead of a column per state. Scoring all
+    candidates is a single (n x d) @ (d,) matrix-vector product.
+    """
+
+    def __init__(self,
+                 learning_rate: float = 0.01,
+                 discount_factor: float = None,
+                 epsilon: float = None,
+                 topic_buckets: int = 32,
+                 type_buckets: int = 8,
+                 initial_capacity: int = 1024):
+        """
+        Initialize LinearQAgent
+
+        Args:
+            learning_rate: SGD step size
+            discount_factor: Discount factor (gamma)
+            epsilon: Exploration rate when serving content
+            topic_buckets: Width of the hashed topic one-hot
+            type_buckets: Width of the hashed content_type one-hot
+            initial_capacity: Content rows allocated up front (doubles as needed)
+        """
+        self.learning_rate = learning_rate
+        self.discount_factor = settings.DISCOUNT_FACTOR if discount_factor is None else discount_factor
+        self.epsilon = settings.EPSILON if epsilon is None else epsilon
+        self.topic_buckets = topic_buckets
+        self.type_buckets = type_buckets
+
+        self.student_dim = len(STATE_FEATURE_KEYS) + 1
+        self.content_dim = topic_buckets + type_buckets + 3
+        self.weights = np.zeros((self.student_dim, self.content_dim))
+
+        # Content ID -> row of self.content_features
+        self.registry = ActionRegistry()
+        self.content_features = np.zeros((initial_capacity, self.content_dim), dtype=np.float32)
+        self._lock = threading.Lock()
+
+        # Training statistics
+        self.total_updates = 0
+        self.reward_stats = RewardRingBuffer(capacity=1000)
+
+    # Reward shaping and the reward-history view are shared with the tabular agent
+    calculate_reward = QLearningAgent.calculate_reward
+    episode_rewards = QLearningAgent.episode_rewards
+
+    def student_vectors(self, knowledge_states: KnowledgeStates) -> np.ndarray:
+        """(n, student_dim) student feature matrix including the bias column"""
+        features = state_features(knowledge_states)
+        return np.hstack([features, np.ones((len(features), 1))])
+
+    def content_vectors(self,
+                        topics: List[str],
+                        difficulties: List[int],
+                        content_types: List[str]) -> np.ndarray:
+        """(n, content_dim) content feature matrix"""
+        n = len(topics)
+        rows = np.zeros((n, self.content_dim), dtype=np.float32)
+        positions = np.arange(n)
+        rows[positions, [_bucket(t, self.topic_buckets) for t in topics]] = 1.0
+        rows[positions, [self.topic_buckets + _bucket(t, self.type_buckets) for t in content_types]] = 1.0
+
+        difficulty = np.array(
+            [DEFAULT_DIFFICULTY if d is None else d for d in difficulties], dtype=np.float32
+        ) / MAX_DIFFICULTY
+        rows[:, -3] = difficulty
+        rows[:, -2] = difficulty ** 2
+        rows[:, -1] = 1.0
+        return rows
+
+    def _ensure_capacity(self, size: int):
+        capacity = len(self.content_features)
+        if size > capacity:
+            grown = np.zeros((max(size, capacity * 2), self.content_dim), dtype=np.float32)
+            grown[:capacity] = self.content_features
+            self.content_features = grown
+
+    def register_content(self,
+                         content_ids: List[int],
+                         topics: List[str] = None,
+                         difficulties: List[int] = None,
+                         content_types: List[str] = None):
+        """
+        Record feature rows for content
+
+        Content passed without metadata keeps the features it already has;
+        brand-new content without metadata gets a neutral row.
+
+        Args:
+            content_ids: Content IDs
+            topics: Content.topic of each item
+            difficulties: Content.difficulty of each item
+            content_types: Content.content_type of each item
+        """
+        content_ids = list(content_ids)
+        with self._lock:
+            known = len(self.registry)
+            indices = self.registry.indices_for(content_ids)
+            self._ensure_capacity(len(self.registry))
+            n = len(content_ids)
+            if topics is None and difficulties is None and content_types is None:
+                new = indices >= known
+                if new.any():
+                    self.content_features[indices[new]] = self.content_vectors(
+                        [None] * int(new.sum()), [None] * int(new.sum()), [None] * int(new.sum())
+                    )
+                return
+            self.content_features[indices] = self.content_vectors(
+                topics if topics is not None else [None] * n,
+                difficulties if difficulties is not None else [None] * n,
+                content_types if content_types is not None else [None] * n
+            )
+
+    def _candidate_rows(self, content_ids: List[int]) -> np.ndarray:
+        """Feature rows of candidates, registering unseen content with neutral features"""
+        try:
+            indices = self.registry.indices_for(content_ids, register=False)
+        except KeyError:
+            self.register_content(content_ids)
+            indices = self.registry.indices_for(content_ids, register=False)
+        return self.content_features[indices]
+
+    def score(self, knowledge_state: Dict, content_ids: List[int]) -> np.ndarray:
+        """
+        Q-values of candidate content for one student (one matrix-vector product)
+
+        Args:
+            knowledge_state: Student knowledge state
+            content_ids: Candidate content IDs
+
+        Returns:
+            Array of Q-values aligned with content_ids
+        """
+        x = self.student_vectors([knowledge_state])[0]
+        projection = (self.weights.T @ x).astype(np.float32)
+        return self._candidate_rows(content_ids) @ projection
+
+    def score_batch(self, knowledge_states: KnowledgeStates, content_ids: List[int]) -> np.ndarray:
+        """
+        Q-values of one candidate set for many students (one matrix multiply)
+
+        Returns:
+            (n_students, n_candidates) array
+        """
+        projections = (self.student_vectors(knowledge_states) @ self.weights).astype(np.float32)
+        return projections @ self._candidate_rows(content_ids).T
+
+    def recommend_top_k(self,
+                        knowledge_states: KnowledgeStates,
+                        candidate_ids: np.ndarray,
+                        k: int = 10,
+                        candidate_mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank candidates for many students at once (see QLearningAgent.recommend_top_k)
+
+        Shared candidates are scored with one matrix multiply; a padded
+        per-student candidate matrix with one batched einsum.
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        projections = (self.student_vectors(knowledge_states) @ self.weights).astype(np.float32)
+
+        unique_ids, inverse = np.unique(candidate_ids, return_inverse=True)
+        rows = np.zeros((len(unique_ids), self.content_dim), dtype=np.float32)
+        real = unique_ids >= 0
+        rows[real] = self._candidate_rows(unique_ids[real].tolist())
+        rows = rows[inverse.reshape(candidate_ids.shape)]
+
+        if candidate_ids.ndim == 1:
+            scores = projections @ rows.T
+        else:
+            scores = np.einsum('nd,nmd->nm', projections, rows)
+        return rank_candidates(scores.astype(np.float64), candidate_ids, k, candidate_mask)
+
+    def get_recommended_content(self,
+                                knowledge_state: Dict,
+                                available_content_ids: List[int],
+                                learning_style: str = None,
+                                pace_profile: Dict = None) -> Tuple[int, float]:
+        """
+        Get recommended content for student
+
+        Same contract as QLearningAgent.get_recommended_content; the style
+        and pace arguments are accepted for compatibility only, since the
+        features already describe the student and the content.
+
+        Returns:
+            Tuple of (content_id, confidence_score)
+        """
+        q_values = self.score(knowledge_state, available_content_ids)
+        best_idx = int(np.argmax(q_values))
+        return available_content_ids[best_idx], float(q_values[best_idx])
+
+    def select_content(self,
+                       knowledge_state: Dict,
+                       available_content_ids: List[int],
+                       learning_style: str = None,
+                       pace_profile: Dict = None) -> Tuple[int, float, float]:
+        """
+        Choose content epsilon-greedily (see QLearningAgent.select_content)
+
+        Returns:
+            Tuple of (content_id, confidence_score, propensity)
+        """
+        q_values = self.score(knowledge_state, available_content_ids)
+        chosen, propensity = epsilon_greedy(q_values, self.epsilon)
+        return available_content_ids[chosen], float(q_values[chosen]), propensity
+
+    def update(self, state_before: Dict, content_id: int, reward: float, state_after: Dict) -> float:
+        """
+        One incremental SGD step on the TD error (called from /session/answer)
+
+        The bootstrap target maxes over every registered content item, which
+        is one more matrix-vector product over the content feature matrix.
+
+        Returns:
+            TD error before the step
+        """
+        if content_id not in self.registry:
+            self.register_content([content_id])
+        x = self.student_vectors([state_before])[0]
+        x_next = self.student_vectors([state_after])[0]
+        with self._lock:
+            f = self.content_features[self.registry.index_of(content_id, register=False)].astype(np.float64)
+            q = x @ self.weights @ f
+            next_q = self.content_features[:len(self.registry)] @ (self.weights.T @ x_next).astype(np.float32)
+            td_error = reward + self.discount_factor * float(next_q.max()) - q
+
+            # Gradient of x^T W f with respect to W is the outer product x f^T
+            self.weights += self.learning_rate * td_error * np.outer(x, f)
+            self.total_updates += 1
+            self.reward_stats.append(reward)
+        return float(td_error)
+
+    def save_model(self, filepath: str = "models/linear_agent.npz"):
+        """Save weights and content features (written to a temp file, then renamed)"""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        tmp_path = filepath + ".tmp.npz"
+        n = len(self.registry)
+        np.savez(
+            tmp_path,
+            weights=self.weights,
+            content_ids=self.registry.content_ids,
+            content_features=self.content_features[:n],
+            total_updates=self.total_updates,
+            episode_rewards=np.asarray(self.episode_rewards, dtype=np.float64)
+        )
+        os.replace(tmp_path, filepath)
+
+    def load_model(self, filepath: str = "models/linear_agent.npz"):
+        """Load a model saved by save_model (ignored if the feature layout differs)"""
+        if not os.path.exists(filepath):
+            return
+        with np.load(filepath) as data:
+            if data['weights'].shape != self.weights.shape:
+                print(f"[ERROR] {filepath} has weights {data['weights'].shape}, "
+                      f"expected {self.weights.shape}; starting untrained")
+                return
+            self.weights = data['weights'].copy()
+            self.registry = ActionRegistry(data['content_ids'].tolist())
+            self.content_features = np.zeros((0, self.content_dim), dtype=np.float32)
+            self._ensure_capacity(max(len(self.registry), 1))
+            self.content_features[:len(self.registry)] = data['content_features']
+            self.total_updates = int(data['total_updates'])
+            self.episode_rewards = data['episode_rewards'].tolist()
+
+    def get_statistics(self) -> Dict:
+        """Get agent training statistics"""
+        return {
+            'total_updates': self.total_updates,
+            'weights_shape': list(self.weights.shape),
+            'content_items': len(self.registry),
+            'model_bytes': int(self.weights.nbytes + self.content_features.nbytes),
+            'learning_rate': self.learning_rate,
+            'avg_reward': self.reward_stats.mean
+        }
+
+
+# Global linear agent (used when settings.RL_POLICY == "linear")
+linear_agent = LinearQAgent()
+
+try:
+    linear_agent.load_model(settings.LINEAR_AGENT_PATH)
+except Exception:
+    pass  # Start untrained if no usable model exists
+
+# Agent that picks content; the tabular agent keeps learning either way
+recommender = linear_agent if settings.RL_POLICY == "linear" else agent
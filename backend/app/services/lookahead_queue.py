@@ -0,0 +1,166 @@
+"""
+Per-Student Lookahead Queue of Recommended Content
+Next items are chosen in the background after each answer and popped in O(1) on the request path
+"""
+import threading
+import numpy as np
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+from app.services.state_encoder import state_features
+
+# fill(candidate_ids) -> (content_id, serving decision) for one draw of the policy
+FillFunction = Callable[[List[int]], Tuple[int, Dict]]
+
+
+class LookaheadQueue:
+    """
+    Bounded map of (student_id, scope) -> queue of upcoming content choices
+
+    scope identifies the candidate set the items were drawn from (e.g. the
+    requested topic/difficulty, or the topic just answered). refill()
+    schedules a background job that tops the queue up to `depth` items by
+    drawing from the policy without replacement; each item remembers the
+    knowledge-state features it was chosen under. pop() hands out the
+    oldest item unless the student's state has since moved more than
+    `threshold` on any feature, in which case the queue is dropped and the
+    caller falls back to choosing synchronously.
+
+    Queued decisions are tagged with 'source': 'lookahead', the features
+    they were chosen under and the IDs excluded from their draw, because
+    their propensity holds for that state and the reduced candidate set,
+    not for the state they are served in (see
+    off_policy_eval.load_logged_decisions). Evaluation skips them by
+    default, which would leave mostly queue-miss decisions in its data, so
+    the queue is off unless LOOKAHEAD_DEPTH is set.
+
+    Jobs run on a single worker thread, so refills for one student apply
+    in the order they were scheduled. Queues are per process.
+    """
+
+    def __init__(self, depth: int = 5, threshold: float = 0.1, max_students: int = 100_000):
+        """
+        Initialize LookaheadQueue
+
+        Args:
+            depth: Items kept ready per (student, scope)
+            threshold: Largest per-feature state change (features in [0, 1]) an item survives
+            max_students: (student, scope) queues kept before the least recently used is dropped
+        """
+        self.depth = depth
+        self.threshold = threshold
+        self.max_students = max_students
+        self._queues: "OrderedDict[tuple, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lookahead")
+
+        # Counters for monitoring and the latency benchmark
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def _drifted(self, chosen_under: np.ndarray, features: np.ndarray) -> bool:
+        return float(np.abs(chosen_under - features).max()) > self.threshold
+
+    def pop(self, student_id: int, scope: Hashable, knowledge_state: Dict) -> Optional[Tuple[int, Dict]]:
+        """
+        Take the next queued item for this student and scope
+
+        Returns:
+            (content_id, serving decision), or None when the queue is empty
+            or was invalidated by a knowledge-state change
+        """
+        key = (student_id, scope)
+        with self._lock:
+            items = self._queues.get(key)
+            if not items:
+                self.misses += 1
+                return None
+            content_id, decision, chosen_under = items.popleft()
+            self._queues.move_to_end(key)
+
+        if self._drifted(chosen_under, state_features([knowledge_state])[0]):
+            self.invalidate(student_id, scope)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return content_id, decision
+
+    def invalidate(self, student_id: int, scope: Hashable = None):
+        """Drop one queue of a student, or all of them when scope is None"""
+        with self._lock:
+            keys = [(student_id, scope)] if scope is not None else [
+                key for key in self._queues if key[0] == student_id
+            ]
+            for key in keys:
+                if self._queues.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def refill(self,
+               student_id: int,
+               scope: Hashable,
+               knowledge_state: Dict,
+               candidates: Callable[[], List[int]],
+               fill: FillFunction):
+        """
+        Schedule a background top-up of this student's queue (returns immediately)
+
+        Args:
+            student_id: Student ID
+            scope: Candidate-set key the items are drawn for
+            knowledge_state: State the new items are chosen under
+            candidates: Returns the candidate content IDs (called on the worker)
+            fill: One policy draw over the remaining candidates
+        """
+        if self.enabled:
+            self._executor.submit(self._refill, student_id, scope, knowledge_state, candidates, fill)
+
+    def _refill(self, student_id, scope, knowledge_state, candidates, fill):
+        try:
+            key = (student_id, scope)
+            content_ids = candidates()
+            features = state_features([knowledge_state])[0]
+            with self._lock:
+                kept = [item for item in self._queues.get(key, ()) if not self._drifted(item[2], features)]
+
+            queued = {item[0] for item in kept}
+            remaining = [content_id for content_id in content_ids if content_id not in queued]
+            drawn = queued.intersection(content_ids)  # candidates this draw cannot choose
+            added = []
+            while len(kept) + len(added) < self.depth and remaining:
+                content_id, decision = fill(remaining)
+                decision = {**decision, 'source': 'lookahead', 'chosen_under': features.tolist(),
+                            'excluded': sorted(drawn)}
+                added.append((content_id, decision, features))
+                remaining.remove(content_id)
+                drawn.add(content_id)
+
+            with self._lock:
+                # Items popped (or invalidated) while the policy ran are not put back
+                current = {item[0] for item in self._queues.get(key, ())}
+                self._queues[key] = deque([item for item in kept if item[0] in current] + added)
+                self._queues.move_to_end(key)
+                while len(self._queues) > self.max_students:
+                    self._queues.popitem(last=False)
+        except Exception as e:
+            print(f"[ERROR] Lookahead refill failed for student {student_id}: {e}")
+
+    def wait(self):
+        """Block until every refill scheduled so far has run"""
+        self._executor.submit(lambda: None).result()
+
+    def shutdown(self):
+        """Stop the background worker (pending refills are discarded)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global lookahead queue instance
+lookahead_queue = LookaheadQueue(
+    depth=settings.LOOKAHEAD_DEPTH,
+    threshold=settings.LOOKAHEAD_STATE_THRESHOLD
+)
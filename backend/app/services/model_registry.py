@@ -0,0 +1,308 @@
+"""
+Versioned Q-Table Model Registry
+Numbered, checksummed policy versions with zero-downtime hot swap and rollback
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.services.action_registry import ActionRegistry
+from app.services.rl_agent import QLearningAgent, QPolicy, snapshot_encoder
+
+
+class ModelRegistryError(Exception):
+    """Raised for missing or corrupt policy versions"""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Store of numbered Q-table versions
+
+    Layout:
+        <root>/v0001/q_table.npy           Q-table (memory-mapped on activate)
+        <root>/v0001/q_table_actions.npy   content IDs ordered by column
+        <root>/v0001/q_table_meta.json     agent metadata from save_model
+        <root>/v0001/manifest.json         version, checksums, user metadata
+        <root>/CURRENT                     active version number
+    """
+
+    TABLE_FILE = "q_table.npy"
+    ACTIONS_FILE = "q_table_actions.npy"
+    META_FILE = "q_table_meta.json"
+
+    def __init__(self, root: str = "models/registry", max_history: int = 3, persistence=None):
+        """
+        Initialize ModelRegistry
+
+        Args:
+            root: Registry directory (created if missing)
+            max_history: Swapped-out policies kept in memory for instant rollback
+            persistence: QTablePersistence of the swapped agent; activate and
+                rollback snapshot through it so a crash cannot replay the
+                update log onto the policy that was swapped out
+        """
+        self.root = root
+        self.max_history = max_history
+        self.persistence = persistence
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._previous: List[tuple] = []  # (version, QPolicy) swapped out, newest last
+
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version:04d}")
+
+    def list_versions(self) -> List[Dict]:
+        """Get manifests of all versions, oldest first"""
+        manifests = []
+        for name in sorted(os.listdir(self.root)):
+            manifest_path = os.path.join(self.root, name, "manifest.json")
+            if name.startswith("v") and os.path.exists(manifest_path):
+                with open(manifest_path, 'r') as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    def get_manifest(self, version: int) -> Dict:
+        """Get one version's manifest"""
+        manifest_path = os.path.join(self._version_dir(version), "manifest.json")
+        if not os.path.exists(manifest_path):
+            raise ModelRegistryError(f"Policy version {version} does not exist")
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+
+    def current_version(self) -> Optional[int]:
+        """Get the active version number, if any"""
+        current_path = os.path.join(self.root, "CURRENT")
+        if not os.path.exists(current_path):
+            return None
+        with open(current_path, 'r') as f:
+            return int(f.read().strip())
+
+    def _set_current(self, version: int):
+        current_path = os.path.join(self.root, "CURRENT")
+        with open(current_path + ".tmp", 'w') as f:
+            f.write(str(version))
+        os.replace(current_path + ".tmp", current_path)
+
+    def publish(self, agent: QLearningAgent, metadata: Dict = None) -> Dict:
+        """
+        Save the agent's current policy as a new version
+
+        Args:
+            agent: Agent to snapshot
+            metadata: Free-form metadata stored in the manifest
+
+        Returns:
+            Manifest of the new version
+        """
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            agent.save_model(os.path.join(staging, self.TABLE_FILE))
+            return self._commit(staging, metadata)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def publish_snapshot(self, snapshot_path: str, metadata: Dict = None) -> Dict:
+        """
+        Import a snapshot written by QLearningAgent.save_model (e.g. offline training)
+
+        Args:
+            snapshot_path: Path of the .npy Q-table snapshot
+            metadata: Free-form metadata stored in the manifest
+
+        Returns:
+            Manifest of the new version
+        """
+        if not os.path.exists(snapshot_path):
+            raise ModelRegistryError(f"Snapshot {snapshot_path} not found")
+
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            shutil.copyfile(snapshot_path, os.path.join(staging, self.TABLE_FILE))
+            for suffix, name in (('_actions.npy', self.ACTIONS_FILE), ('_meta.json', self.META_FILE)):
+                source = snapshot_path.replace('.npy', suffix)
+                if os.path.exists(source):
+                    shutil.copyfile(source, os.path.join(staging, name))
+            return self._commit(staging, metadata)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _commit(self, staging: str, metadata: Optional[Dict]) -> Dict:
+        """Checksum a staged version and rename it into place"""
+        checksums = {
+            name: _sha256(os.path.join(staging, name))
+            for name in (self.TABLE_FILE, self.ACTIONS_FILE)
+            if os.path.exists(os.path.join(staging, name))
+        }
+        agent_meta = {}
+        meta_path = os.path.join(staging, self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                agent_meta = json.load(f)
+        agent_meta.pop('episode_rewards', None)
+
+        with self._lock:
+            existing = [m['version'] for m in self.list_versions()]
+            version = max(existing, default=0) + 1
+            manifest = {
+                'version': version,
+                'created_at': datetime.utcnow().isoformat(),
+                'checksums': checksums,
+                'shape': list(np.load(os.path.join(staging, self.TABLE_FILE), mmap_mode='r').shape),
+                'agent': agent_meta,
+                'metadata': metadata or {}
+            }
+            with open(os.path.join(staging, "manifest.json"), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging, self._version_dir(version))
+        return manifest
+
+    def verify(self, version: int) -> bool:
+        """Check a version's files against the checksums in its manifest"""
+        manifest = self.get_manifest(version)
+        version_dir = self._version_dir(version)
+        for name, expected in manifest['checksums'].items():
+            path = os.path.join(version_dir, name)
+            if not os.path.exists(path) or _sha256(path) != expected:
+                return False
+        return True
+
+    def check_compatible(self, agent: QLearningAgent, manifest: Dict):
+        """
+        Refuse a version the running agent would index with the wrong states
+
+        Raises:
+            ModelRegistryError: If the version's row count or state encoder
+                (see snapshot_encoder) is not the agent's
+        """
+        version = manifest['version']
+        shape = manifest.get('shape') or [None]
+        if shape[0] != agent.num_states:
+            raise ModelRegistryError(
+                f"Policy version {version} has {shape[0]} states, the running agent has {agent.num_states}"
+            )
+        encoder = snapshot_encoder(manifest.get('agent', {}))
+        if encoder != agent.state_encoder.name:
+            raise ModelRegistryError(
+                f"Policy version {version} was trained with the {encoder} state encoder, "
+                f"the running agent uses {agent.state_encoder.name}"
+            )
+
+    def load_policy(self, version: int, verify: bool = True, agent: QLearningAgent = None) -> QPolicy:
+        """
+        Open a version as a policy without reading the table into memory
+
+        The Q-table is memory-mapped copy-on-write: opening it is O(1), pages
+        are read on demand, and online updates never modify the stored file.
+
+        Args:
+            version: Version number
+            verify: Check checksums before opening
+            agent: Agent the policy is for; its shape and encoder are checked (see check_compatible)
+
+        Returns:
+            QPolicy backed by the version's files
+        """
+        if agent is not None:
+            self.check_compatible(agent, self.get_manifest(version))
+        if verify and not self.verify(version):
+            raise ModelRegistryError(f"Policy version {version} failed checksum verification")
+
+        version_dir = self._version_dir(version)
+        return QPolicy(
+            np.load(os.path.join(version_dir, self.TABLE_FILE), mmap_mode='c'),
+            ActionRegistry.load(os.path.join(version_dir, self.ACTIONS_FILE))
+        )
+
+    def activate(self, agent: QLearningAgent, version: int, verify: bool = True) -> Dict:
+        """
+        Hot-swap the agent to a version without restarting
+
+        Only this process's agent is swapped: other worker processes keep
+        serving their policy until they restart, when restore_current()
+        brings them to the CURRENT version.
+
+        Args:
+            agent: Running agent
+            version: Version to activate
+            verify: Check checksums before swapping
+
+        Returns:
+            Manifest of the activated version
+        """
+        if not agent.hot_swappable:
+            raise ModelRegistryError(f"{type(agent).__name__} cannot be hot-swapped from the registry")
+
+        manifest = self.get_manifest(version)
+        policy = self.load_policy(version, verify=verify, agent=agent)
+        with self._lock, self._update_lock(agent):
+            previous = agent.swap_policy(policy)
+            self._previous.append((agent.policy_version, previous))
+            del self._previous[:-self.max_history]
+            agent.policy_version = version
+            self._set_current(version)
+        self._snapshot()
+        return manifest
+
+    @staticmethod
+    def _update_lock(agent: QLearningAgent):
+        """Hold off logged updates so none is applied to one policy and replayed on another"""
+        return agent.update_log.lock if agent.update_log is not None else nullcontext()
+
+    def _snapshot(self):
+        """Snapshot the swapped policy and compact the update log written against the old one"""
+        if self.persistence is not None and self.persistence.log is not None:
+            self.persistence.snapshot(force=True)
+
+    def rollback(self, agent: QLearningAgent) -> Optional[int]:
+        """
+        Swap back to the policy that was active before the last activate()
+
+        The previous policy is still held in memory, so this is a reference
+        swap with no disk I/O apart from the snapshot that makes it durable.
+
+        Returns:
+            The version now active (None if it predates the registry)
+        """
+        with self._lock, self._update_lock(agent):
+            if not self._previous:
+                raise ModelRegistryError("No previous policy to roll back to")
+            version, policy = self._previous.pop()
+            agent.swap_policy(policy)
+            agent.policy_version = version
+            if version is not None:
+                self._set_current(version)
+            elif os.path.exists(os.path.join(self.root, "CURRENT")):
+                os.remove(os.path.join(self.root, "CURRENT"))
+        self._snapshot()
+        return version
+
+    def restore_current(self, agent: QLearningAgent) -> Optional[int]:
+        """
+        Activate the CURRENT version at startup unless the agent's snapshot already derives from it
+
+        A snapshot taken after an activation records its version, so the
+        online updates learnt since then are kept; a worker that missed
+        the activation (or a snapshot from before it) is swapped over.
+
+        Returns:
+            The version activated, or None if nothing changed
+        """
+        version = self.current_version()
+        if version is None or not agent.hot_swappable or agent.policy_version == version:
+            return None
+        self.activate(agent, version)
+        return version
@@ -0,0 +1,465 @@
+"""
+Off-Policy Evaluation for Content-Selection Policies
+Estimates how a candidate policy would have done on logged sessions (IPS, SNIPS, doubly robust)
+
+Usage:
+    python -m app.services.off_policy_eval --snapshot models/q_table_offline.npy [--fail-below 0.1]
+    python -m app.services.off_policy_eval --simulate 20000 --steps 50 [--fail-below 0.1]
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.models import LearningSession
+from app.services.content_catalog import ContentCatalog
+from app.services.rl_agent import QLearningAgent
+from app.services.state_encoder import HashedBinEncoder, StateEncoder, state_features
+from app.services.student_simulator import StudentSimulator
+
+
+class LoggedDecisions:
+    """
+    Logged serving decisions held as parallel NumPy arrays
+
+    candidates is either one (n_candidates,) array shared by every
+    decision, or a list of candidate sets with `groups` giving the set
+    each decision chose from. Logs repeat a few sets (one per topic and
+    difficulty filter), so every set is stored and scored once.
+    """
+
+    def __init__(self,
+                 features: np.ndarray,
+                 actions: np.ndarray,
+                 rewards: np.ndarray,
+                 propensities: np.ndarray,
+                 candidates,
+                 groups: np.ndarray = None):
+        self.features = features
+        self.actions = actions
+        self.rewards = rewards
+        self.propensities = propensities
+        self.candidates = candidates
+        self.groups = groups
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def candidate_counts(self) -> np.ndarray:
+        """Number of candidates each decision chose from"""
+        if self.groups is None:
+            return np.full(len(self), len(self.candidates), dtype=np.int64)
+        sizes = np.array([len(candidates) for candidates in self.candidates], dtype=np.int64)
+        return sizes[self.groups]
+
+    def candidate_sets(self) -> List[Tuple[Union[slice, np.ndarray], np.ndarray]]:
+        """(decision indices, candidates) for every distinct candidate set"""
+        if self.groups is None:
+            return [(slice(None), self.candidates)]
+        order = np.argsort(self.groups, kind="stable")
+        bounds = np.cumsum(np.bincount(self.groups, minlength=len(self.candidates)))[:-1]
+        return [
+            (indices, self.candidates[group])
+            for group, indices in enumerate(np.split(order, bounds)) if len(indices)
+        ]
+
+    def candidate_arrays(self) -> Dict[str, np.ndarray]:
+        """Candidate sets as flat arrays for np.savez (read back by from_arrays)"""
+        sets = [self.candidates] if self.groups is None else list(self.candidates)
+        groups = np.zeros(len(self), dtype=np.int64) if self.groups is None else self.groups
+        return {
+            'candidates': np.concatenate(sets) if sets else np.empty(0, dtype=np.int64),
+            'candidate_sizes': np.array([len(candidates) for candidates in sets], dtype=np.int64),
+            'candidate_groups': groups
+        }
+
+    @classmethod
+    def from_arrays(cls, features, actions, rewards, propensities,
+                    candidates, candidate_sizes, candidate_groups) -> "LoggedDecisions":
+        """Inverse of candidate_arrays"""
+        sets = np.split(candidates, np.cumsum(candidate_sizes)[:-1]) if len(candidate_sizes) else []
+        return cls(features, actions, rewards, propensities, sets, candidate_groups)
+
+
+def _scope_key(scope: Dict) -> Tuple:
+    """catalog.candidates arguments of a logged candidate_scope (JSON turns tuples into lists)"""
+    difficulty_range = scope.get('difficulty_range')
+    return (scope.get('topic'), scope.get('difficulty'), tuple(difficulty_range) if difficulty_range else None)
+
+
+def load_logged_decisions(db: Session,
+                          chunk_size: int = 5000,
+                          catalog: ContentCatalog = None,
+                          include_lookahead: bool = False) -> LoggedDecisions:
+    """
+    Stream sessions that carry a logged propensity out of the database
+
+    Only rows whose action_taken records the serving decision (propensity
+    and candidate scope, see app.api.session._serving_decision) can be
+    used for importance weighting; older rows are skipped. Candidate sets
+    are rebuilt from the catalog filter each decision logged, once per
+    distinct filter. A decision whose rebuilt set no longer has the logged
+    size, or no longer holds the served item, chose from a different
+    catalog and is skipped too. Rows from before scopes were logged carry
+    an explicit 'candidates' list, which is used as is.
+
+    Items served from the lookahead queue were drawn without replacement
+    under the state of an earlier answer, so their propensity does not hold
+    for the logged state_before. They are skipped unless include_lookahead
+    is set, in which case they are evaluated under the features they were
+    chosen under, against the scope's set minus the IDs excluded from the
+    draw (one candidate set per distinct exclusion, so slower).
+
+    Args:
+        db: Database session
+        chunk_size: Rows fetched per database round trip
+        catalog: Catalog to rebuild candidate sets from (default: built from db)
+        include_lookahead: Evaluate lookahead-served decisions instead of skipping them
+
+    Returns:
+        LoggedDecisions with one entry per usable session
+    """
+    if catalog is None:
+        catalog = ContentCatalog.build(db)
+
+    query = select(
+        LearningSession.state_before,
+        LearningSession.action_taken,
+        LearningSession.reward
+    ).where(
+        LearningSession.reward.isnot(None),
+        LearningSession.state_before.isnot(None)
+    ).order_by(LearningSession.id).execution_options(yield_per=chunk_size)
+
+    set_index: Dict[Tuple, int] = {}
+    candidate_sets: List[np.ndarray] = []
+    members: List[frozenset] = []
+
+    def resolve(decision: Dict) -> Optional[int]:
+        """Index of the decision's candidate set, None when it cannot be rebuilt"""
+        if 'candidates' in decision:
+            key = ('ids',) + tuple(decision['candidates'])
+        elif 'candidate_scope' in decision:
+            key = ('scope',) + _scope_key(decision['candidate_scope']) + (tuple(decision.get('excluded', ())),)
+        else:
+            return None
+        group = set_index.get(key)
+        if group is None:
+            if key[0] == 'ids':
+                candidates = np.array(key[1:], dtype=np.int64)
+            else:
+                candidates = np.setdiff1d(catalog.candidates(*key[1:4]), np.array(key[4], dtype=np.int64))
+            group = set_index[key] = len(candidate_sets)
+            candidate_sets.append(candidates)
+            members.append(frozenset(candidates.tolist()))
+        if decision.get('candidate_count', len(candidate_sets[group])) != len(candidate_sets[group]):
+            return None
+        return group if decision['content_id'] in members[group] else None
+
+    feature_chunks, action_chunks, reward_chunks, propensity_chunks, group_chunks = [], [], [], [], []
+
+    for rows in db.execute(query).partitions(chunk_size):
+        usable, groups = [], []
+        for row in rows:
+            decision = row.action_taken or {}
+            if decision.get('source') == 'lookahead' and not include_lookahead:
+                continue
+            group = resolve(decision) if decision.get('propensity') else None
+            if group is not None:
+                usable.append(row)
+                groups.append(group)
+        if not usable:
+            continue
+
+        features = state_features([row.state_before for row in usable]).astype(np.float32)
+        for i, row in enumerate(usable):
+            if 'chosen_under' in row.action_taken:
+                features[i] = row.action_taken['chosen_under']
+        feature_chunks.append(features)
+        action_chunks.append(np.array([row.action_taken['content_id'] for row in usable], dtype=np.int64))
+        reward_chunks.append(np.array([row.reward for row in usable], dtype=np.float64))
+        propensity_chunks.append(np.array([row.action_taken['propensity'] for row in usable], dtype=np.float64))
+        group_chunks.append(np.array(groups, dtype=np.int64))
+
+    if not feature_chunks:
+        return LoggedDecisions(np.empty((0, 14), dtype=np.float32), np.empty(0, dtype=np.int64),
+                               np.empty(0), np.empty(0), [], np.empty(0, dtype=np.int64))
+
+    return LoggedDecisions(
+        np.concatenate(feature_chunks),
+        np.concatenate(action_chunks),
+        np.concatenate(reward_chunks),
+        np.concatenate(propensity_chunks),
+        candidate_sets,
+        np.concatenate(group_chunks)
+    )
+
+
+def simulate_logged_decisions(simulator: StudentSimulator,
+                              steps: int,
+                              logging_agent: QLearningAgent = None,
+                              epsilon: float = 1.0) -> LoggedDecisions:
+    """
+    Log decisions of an epsilon-greedy policy serving simulated students
+
+    Gives CI a reproducible log without a production database. With no
+    logging_agent every item is served uniformly at random.
+
+    Args:
+        simulator: Simulated population; every decision chooses from its whole catalog
+        steps: Rounds to run (one decision per student per round)
+        logging_agent: Agent whose greedy choice is served with probability 1 - epsilon
+        epsilon: Exploration rate of the logging policy
+
+    Returns:
+        LoggedDecisions over steps x num_students decisions
+    """
+    catalog = simulator.catalog
+    n, m = simulator.num_students, len(catalog)
+    if logging_agent is None:
+        epsilon = 1.0
+
+    feature_chunks, action_chunks, reward_chunks, propensity_chunks = [], [], [], []
+    for _ in range(steps):
+        features = simulator.knowledge_features()
+        explore = simulator.rng.random(n) < epsilon
+        positions = simulator.rng.integers(m, size=n)
+        greedy = positions
+        if logging_agent is not None:
+            top_ids, _ = logging_agent.recommend_top_k(features, catalog.content_ids, k=1)
+            greedy = catalog.positions_of(top_ids[:, 0])
+            positions = np.where(explore, positions, greedy)
+
+        result = simulator.step(positions)
+        feature_chunks.append(features.astype(np.float32))
+        action_chunks.append(result.content_ids.astype(np.int64))
+        reward_chunks.append(result.reward)
+        propensity_chunks.append(epsilon / m + (1.0 - epsilon) * (positions == greedy))
+
+    return LoggedDecisions(
+        np.concatenate(feature_chunks),
+        np.concatenate(action_chunks),
+        np.concatenate(reward_chunks),
+        np.concatenate(propensity_chunks),
+        catalog.content_ids.astype(np.int64)
+    )
+
+
+class EpsilonGreedyPolicy:
+    """
+    Target policy: an agent's greedy choice with epsilon-uniform exploration
+
+    Greedy choices come from recommend_top_k(k=1) in chunks, so the
+    learning-style/pace bonuses of get_recommended_content are not
+    modelled. top_k breaks ties by lowest position like the np.argmax in
+    epsilon_greedy, so on tied Q-values the evaluated greedy action is
+    the one serving chose. Candidates the agent has never seen are registered with
+    zero Q-values, exactly as serving would.
+    """
+
+    def __init__(self, agent, epsilon: float = 0.0, chunk_size: int = 200_000):
+        self.agent = agent
+        self.epsilon = epsilon
+        self.chunk_size = chunk_size
+
+    def greedy_actions(self, logs: LoggedDecisions) -> np.ndarray:
+        """The agent's top choice for every logged decision"""
+        greedy = np.empty(len(logs), dtype=np.int64)
+        for indices, candidates in logs.candidate_sets():
+            features = logs.features[indices]
+            chosen = np.empty(len(features), dtype=np.int64)
+            for start in range(0, len(features), self.chunk_size):
+                stop = min(start + self.chunk_size, len(features))
+                top_ids, _ = self.agent.recommend_top_k(features[start:stop], candidates, k=1)
+                chosen[start:stop] = top_ids[:, 0]
+            greedy[indices] = chosen
+        return greedy
+
+    def action_probabilities(self, logs: LoggedDecisions, greedy: np.ndarray) -> np.ndarray:
+        """Probability the policy would have served each logged action"""
+        return self.epsilon / logs.candidate_counts() + (1.0 - self.epsilon) * (logs.actions == greedy)
+
+
+class RewardModel:
+    """
+    Direct-method reward model: mean logged reward per (state bin, content)
+
+    A dense (num_states, n_content) table filled with np.bincount, shrunk
+    towards each item's overall mean by `prior_strength` pseudo-counts.
+    Content IDs map to columns through a dense lookup array, so predicting
+    for millions of (state, content) pairs is plain fancy indexing.
+    Content never seen in the logs falls back to the global mean.
+    """
+
+    def __init__(self, encoder: StateEncoder = None, prior_strength: float = 1.0):
+        self.encoder = encoder or HashedBinEncoder(1024)
+        self.prior_strength = prior_strength
+        self.table = np.zeros((self.encoder.num_states, 1))
+        self.columns = np.zeros(1, dtype=np.int64)
+        self.global_mean = 0.0
+
+    def fit(self, logs: LoggedDecisions, states: np.ndarray = None) -> "RewardModel":
+        """
+        Fit on logged decisions
+
+        Args:
+            logs: Logged decisions
+            states: Precomputed encoder.encode_batch(logs.features), if available
+        """
+        if states is None:
+            states = self.encoder.encode_batch(logs.features)
+        content_ids, columns = np.unique(logs.actions, return_inverse=True)
+        width = len(content_ids)
+        cells = states * width + columns
+        size = self.encoder.num_states * width
+
+        sums = np.bincount(cells, weights=logs.rewards, minlength=size).reshape(-1, width)
+        counts = np.bincount(cells, minlength=size).reshape(-1, width)
+        self.global_mean = float(logs.rewards.mean()) if len(logs) else 0.0
+        content_mean = np.divide(sums.sum(axis=0), counts.sum(axis=0),
+                                 out=np.full(width, self.global_mean), where=counts.sum(axis=0) > 0)
+        table = (sums + self.prior_strength * content_mean) / (counts + self.prior_strength)
+
+        # Last column holds the global mean for unseen content; the last
+        # lookup slot catches IDs past the largest logged one (and -1 padding)
+        self.table = np.hstack([table, np.full((len(table), 1), self.global_mean)])
+        top = int(content_ids[-1]) if width else 0
+        self.columns = np.full(top + 2, width, dtype=np.int64)
+        self.columns[content_ids[content_ids >= 0]] = np.flatnonzero(content_ids >= 0)
+        return self
+
+    def predict(self, states: np.ndarray, content_ids: np.ndarray) -> np.ndarray:
+        """Predicted reward for broadcastable arrays of state bins and content IDs"""
+        content_ids = np.asarray(content_ids)
+        lookup = np.where((content_ids >= 0) & (content_ids < len(self.columns)), content_ids, -1)
+        return self.table[states, self.columns[lookup]]
+
+
+def _candidate_mean(reward_model: RewardModel, states: np.ndarray, logs: LoggedDecisions) -> np.ndarray:
+    """Mean predicted reward over each decision's candidate set"""
+    # One mean per (candidate set, state bin), then a lookup
+    all_states = np.arange(reward_model.encoder.num_states)[:, None]
+    means = np.empty(len(logs))
+    for indices, candidates in logs.candidate_sets():
+        per_state = reward_model.predict(all_states, candidates[None, :]).mean(axis=1)
+        means[indices] = per_state[states[indices]]
+    return means
+
+
+def evaluate_policy(logs: LoggedDecisions,
+                    policy: EpsilonGreedyPolicy,
+                    reward_model: RewardModel = None,
+                    clip: Optional[float] = None) -> Dict:
+    """
+    Estimate the target policy's mean reward per decision from logged data
+
+    - IPS: mean of w * r with w = pi(a|x) / mu(a|x)
+    - SNIPS: IPS normalised by the mean weight (lower variance, slightly biased)
+    - DM: the reward model's value of the policy's action distribution
+    - DR: DM plus the IPS-weighted residual of the reward model
+
+    Every estimator is a handful of vectorized passes over the arrays.
+
+    Args:
+        logs: Logged decisions with the propensity they were served with
+        policy: Target policy
+        reward_model: Fitted reward model for DM/DR (fitted on `logs` if omitted)
+        clip: Optional cap on importance weights
+
+    Returns:
+        Estimates, standard errors and weight diagnostics
+    """
+    started = time.perf_counter()
+    n = len(logs)
+    if not n:
+        return {'decisions': 0}
+
+    greedy = policy.greedy_actions(logs)
+    weights = policy.action_probabilities(logs, greedy) / logs.propensities
+    if clip is not None:
+        weights = np.minimum(weights, clip)
+
+    if reward_model is None:
+        reward_model = RewardModel()
+        states = reward_model.encoder.encode_batch(logs.features)
+        reward_model.fit(logs, states)
+    else:
+        states = reward_model.encoder.encode_batch(logs.features)
+    dm_terms = ((1.0 - policy.epsilon) * reward_model.predict(states, greedy)
+                + policy.epsilon * _candidate_mean(reward_model, states, logs))
+    ips_terms = weights * logs.rewards
+    dr_terms = dm_terms + weights * (logs.rewards - reward_model.predict(states, logs.actions))
+    weight_sum = float(weights.sum())
+
+    return {
+        'decisions': n,
+        'logging_policy_value': float(logs.rewards.mean()),
+        'ips': float(ips_terms.mean()),
+        'snips': float(ips_terms.sum() / weight_sum) if weight_sum else 0.0,
+        'dm': float(dm_terms.mean()),
+        'dr': float(dr_terms.mean()),
+        'ips_stderr': float(ips_terms.std() / np.sqrt(n)),
+        'dr_stderr': float(dr_terms.std() / np.sqrt(n)),
+        'effective_sample_size': weight_sum ** 2 / float(np.square(weights).sum()) if weight_sum else 0.0,
+        'match_rate': float((greedy == logs.actions).mean()),
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Off-policy evaluation of a Q-table snapshot")
+    parser.add_argument("--snapshot", default=None, help="Q-table snapshot to evaluate (default: current model)")
+    parser.add_argument("--epsilon", type=float, default=0.0, help="Exploration rate of the evaluated policy")
+    parser.add_argument("--clip", type=float, default=None, help="Cap on importance weights")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--include-lookahead", action="store_true",
+                        help="Evaluate items served from the lookahead queue (skipped by default)")
+    parser.add_argument("--simulate", type=int, default=0,
+                        help="Evaluate on N simulated students instead of the database")
+    parser.add_argument("--steps", type=int, default=20, help="Simulated rounds per student")
+    parser.add_argument("--items", type=int, default=200, help="Simulated catalog size")
+    parser.add_argument("--metric", default="dr", choices=["ips", "snips", "dm", "dr"])
+    parser.add_argument("--fail-below", type=float, default=None,
+                        help="Exit non-zero when the chosen estimate is below this value (for CI)")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+
+    agent = QLearningAgent()
+    agent.load_model(args.snapshot or settings.Q_TABLE_PATH)
+
+    if args.simulate:
+        from app.services.student_simulator import SimulatedCatalog
+
+        catalog = SimulatedCatalog.synthetic(args.items, seed=0)
+        logs = simulate_logged_decisions(StudentSimulator(args.simulate, catalog, seed=0), args.steps)
+    else:
+        from app.core.database import SessionLocal
+        import app.models  # noqa: F401 - register all mappers
+
+        db = SessionLocal()
+        try:
+            logs = load_logged_decisions(db, chunk_size=args.chunk_size, include_lookahead=args.include_lookahead)
+        finally:
+            db.close()
+
+    report = evaluate_policy(logs, EpsilonGreedyPolicy(agent, args.epsilon), clip=args.clip)
+    if not report['decisions']:
+        print("[ERROR] No logged decisions with propensities to evaluate")
+        sys.exit(1)
+
+    print(f"[OK] Evaluated {report['decisions']} decisions in {report['elapsed_seconds']}s")
+    print(f"[INFO] logging={report['logging_policy_value']:.4f}  ips={report['ips']:.4f}  "
+          f"snips={report['snips']:.4f}  dm={report['dm']:.4f}  "
+          f"dr={report['dr']:.4f} (+/- {1.96 * report['dr_stderr']:.4f})  "
+          f"ess={report['effective_sample_size']:.0f}")
+
+    if args.fail_below is not None and report[args.metric] < args.fail_below:
+        print(f"[ERROR] {args.metric}={report[args.metric]:.4f} is below {args.fail_below}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
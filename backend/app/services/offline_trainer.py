@@ -0,0 +1,219 @@
+"""
+Offline Experience-Replay Trainer for the Q-Learning Agent
+Retrains the content-selection policy from logged LearningSession rows
+
+Usage:
+    python -m app.services.offline_trainer --epochs 50 --output models/q_table_offline.npy [--publish]
+"""
+import argparse
+import time
+import numpy as np
+from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import LearningSession
+from app.services.rl_agent import QLearningAgent
+
+
+class ReplayBuffer:
+    """Logged transitions held as parallel NumPy arrays"""
+
+    def __init__(self,
+                 states: np.ndarray,
+                 actions: np.ndarray,
+                 rewards: np.ndarray,
+                 next_states: np.ndarray):
+        self.states = states
+        self.actions = actions
+        self.rewards = rewards
+        self.next_states = next_states
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+
+def load_transitions(db: Session,
+                     agent: QLearningAgent,
+                     chunk_size: int = 5000) -> ReplayBuffer:
+    """
+    Stream logged sessions out of the database and convert them to arrays
+
+    Rows are fetched `chunk_size` at a time so the ORM never materializes
+    the whole table; each chunk is encoded into fixed-width arrays with
+    one batched state-encoder call per side of the transition.
+
+    Args:
+        db: Database session
+        agent: Agent whose state discretization and action mapping to use
+        chunk_size: Rows fetched per database round trip
+
+    Returns:
+        ReplayBuffer with one entry per usable session
+    """
+    query = select(
+        LearningSession.state_before,
+        LearningSession.action_taken,
+        LearningSession.reward,
+        LearningSession.state_after
+    ).where(
+        LearningSession.reward.isnot(None),
+        LearningSession.state_before.isnot(None),
+        LearningSession.state_after.isnot(None)
+    ).order_by(LearningSession.id).execution_options(yield_per=chunk_size)
+
+    state_chunks, action_chunks, reward_chunks, next_chunks = [], [], [], []
+
+    for rows in db.execute(query).partitions(chunk_size):
+        rows = [row for row in rows if (row.action_taken or {}).get('content_id') is not None]
+        if not rows:
+            continue
+
+        # One vectorized encoder call per chunk for each side of the transition
+        state_chunks.append(agent.discretize_states([row.state_before for row in rows]).astype(np.int32))
+        next_chunks.append(agent.discretize_states([row.state_after for row in rows]).astype(np.int32))
+        action_chunks.append(agent.action_indices([row.action_taken['content_id'] for row in rows]).astype(np.int32))
+        reward_chunks.append(np.array([row.reward for row in rows], dtype=np.float64))
+
+    if not state_chunks:
+        empty_int = np.empty(0, dtype=np.int32)
+        return ReplayBuffer(empty_int, empty_int, np.empty(0), empty_int)
+
+    return ReplayBuffer(
+        np.concatenate(state_chunks),
+        np.concatenate(action_chunks),
+        np.concatenate(reward_chunks),
+        np.concatenate(next_chunks)
+    )
+
+
+def train_offline(agent: QLearningAgent,
+                  buffer: ReplayBuffer,
+                  epochs: int = 50,
+                  batch_size: int = 4096,
+                  seed: Optional[int] = None) -> Dict:
+    """
+    Replay logged transitions through vectorized batched Q-updates
+
+    Args:
+        agent: Agent to train in place
+        buffer: Logged transitions
+        epochs: Number of passes over the buffer
+        batch_size: Transitions per batched update
+        seed: Seed for the per-epoch shuffle
+
+    Returns:
+        Training summary dictionary
+    """
+    rng = np.random.default_rng(seed)
+    n = len(buffer)
+    started = time.perf_counter()
+
+    for _ in range(epochs if n else 0):
+        order = rng.permutation(n)
+        for start in range(0, n, batch_size):
+            idx = order[start:start + batch_size]
+            agent.batch_update(
+                buffer.states[idx],
+                buffer.actions[idx],
+                buffer.rewards[idx],
+                buffer.next_states[idx]
+            )
+
+    if n:
+        agent.reward_stats.reset(buffer.rewards)
+
+    return {
+        'transitions': n,
+        'epochs': epochs,
+        'batch_size': batch_size,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'mean_q_value': agent.q_table_aggregates().mean,
+        'max_q_value': agent.q_table_aggregates().max
+    }
+
+
+def run_offline_training(db: Session,
+                         output_path: str,
+                         epochs: int = 50,
+                         batch_size: int = 4096,
+                         chunk_size: int = 5000,
+                         warm_start_path: Optional[str] = None,
+                         seed: Optional[int] = None) -> Dict:
+    """
+    Library entry point: load sessions, train a fresh agent, save a snapshot
+
+    The agent is a plain QLearningAgent sized and encoded like the serving
+    one (Q_TABLE_NUM_STATES, STATE_ENCODER), so the snapshot is loadable by
+    it; it never attaches to the live shared-memory table.
+
+    Args:
+        db: Database session
+        output_path: Where to write the new Q-table snapshot (.npy)
+        epochs: Number of passes over the logged sessions
+        batch_size: Transitions per batched update
+        chunk_size: Rows fetched per database round trip
+        warm_start_path: Optional existing Q-table to start from
+        seed: Seed for the per-epoch shuffle
+
+    Returns:
+        Training summary dictionary
+    """
+    agent = QLearningAgent(num_states=settings.Q_TABLE_NUM_STATES)
+    if warm_start_path:
+        agent.load_model(warm_start_path)
+
+    buffer = load_transitions(db, agent, chunk_size=chunk_size)
+    summary = train_offline(agent, buffer, epochs=epochs, batch_size=batch_size, seed=seed)
+
+    agent.save_model(output_path)
+    summary['output_path'] = output_path
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the Q-table from logged learning sessions")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--output", default="models/q_table_offline.npy")
+    parser.add_argument("--warm-start", default=None, help="Existing Q-table to start from")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--publish", action="store_true",
+                        help="Also publish the snapshot as a new model-registry version")
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal
+    import app.models  # noqa: F401 - register all mappers
+
+    db = SessionLocal()
+    try:
+        summary = run_offline_training(
+            db,
+            output_path=args.output,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            chunk_size=args.chunk_size,
+            warm_start_path=args.warm_start,
+            seed=args.seed
+        )
+    finally:
+        db.close()
+
+    print(f"[OK] Trained on {summary['transitions']} transitions "
+          f"x {summary['epochs']} epochs in {summary['elapsed_seconds']}s")
+    print(f"[OK] Snapshot written to {summary['output_path']}")
+
+    if args.publish:
+        from app.services.model_registry import ModelRegistry
+
+        manifest = ModelRegistry(settings.MODEL_REGISTRY_DIR).publish_snapshot(
+            args.output,
+            metadata={'source': 'offline_trainer', 'epochs': args.epochs,
+                      'transitions': summary['transitions']}
+        )
+        print(f"[OK] Published as policy version {manifest['version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Authenticated-Principal Cache
+Bounded TTL/LRU map from access-token signature and username to a lightweight student record
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Student
+
+
+class Principal(NamedTuple):
+    """Read-only student record for request authentication (no ORM session attached)"""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    created_at: Optional[datetime]
+
+
+def load_principal(db: Session, username: str) -> Optional[Principal]:
+    """Student columns for one username, without loading an ORM instance"""
+    row = db.execute(
+        select(Student.id, Student.username, Student.email, Student.full_name, Student.created_at)
+        .where(Student.username == username)
+    ).first()
+    return Principal(*row) if row is not None else None
+
+
+def token_signature(token: str) -> str:
+    """Signature segment of a JWT, used as its cache key"""
+    return token.rsplit(".", 1)[-1]
+
+
+class PrincipalCache:
+    """
+    Process-wide cache of authenticated students
+
+    Entries are keyed by username and by access-token signature, so a
+    repeated bearer token skips both JWT decoding and the students query.
+    Every entry expires after `ttl` seconds, and a token entry no later
+    than the token's own `exp` claim; the least recently used entries are
+    evicted beyond `max_items` per key type. Unknown usernames are never
+    cached. Student updates and deletes made through the ORM invalidate
+    the student's entries when their transaction commits; other writes to
+    the students table must call invalidate(). Both only reach this
+    process's cache: changes made by another worker are seen once the
+    entry expires, so `ttl` bounds how long a deleted or changed student
+    stays authenticated there.
+    """
+
+    def __init__(self, max_items: int = 10000, ttl: float = 30.0):
+        """
+        Initialize PrincipalCache
+
+        Args:
+            max_items: Entries kept per key type (usernames, tokens)
+            ttl: Seconds an entry is trusted before the database is asked again
+        """
+        self.max_items = max_items
+        self.ttl = ttl
+        self._by_username: "OrderedDict[str, tuple]" = OrderedDict()  # username -> (expiry, Principal)
+        self._by_token: "OrderedDict[str, tuple]" = OrderedDict()  # signature -> (expiry, (token, Principal))
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation; stale lookups are not stored
+
+        # Counters for monitoring and the load test
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0 and self.ttl > 0
+
+    def _get(self, entries: OrderedDict, key: str):
+        with self._lock:
+            entry = entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del entries[key]
+            self.misses += 1
+            return None
+
+    def _put(self, entries: OrderedDict, key: str, value, expires_at: float, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            entries[key] = (expires_at, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_items:
+                entries.popitem(last=False)
+
+    def by_username(self, db: Session, username: str) -> Optional[Principal]:
+        """
+        Student record for a username
+
+        Returns:
+            Principal, or None if no student has this username
+        """
+        if not self.enabled:
+            return load_principal(db, username)
+        principal = self._get(self._by_username, username)
+        if principal is None:
+            generation = self._generation
+            principal = load_principal(db, username)
+            if principal is not None:
+                self._put(self._by_username, username, principal, time.time() + self.ttl, generation)
+        return principal
+
+    def by_token(self, token: str) -> Optional[Principal]:
+        """Principal previously authenticated with this exact token, if still valid"""
+        if not self.enabled:
+            return None
+        entry = self._get(self._by_token, token_signature(token))
+        # The signature is the key; the whole token must match so a reused signature on other claims misses
+        if entry is not None and entry[0] == token:
+            return entry[1]
+        return None
+
+    def remember_token(self, token: str, principal: Principal, token_expires_at: Optional[float] = None):
+        """
+        Cache the principal a verified token resolved to
+
+        Args:
+            token: Encoded JWT that was just verified
+            principal: Student the token authenticates
+            token_expires_at: The token's `exp` claim (epoch seconds), if any
+        """
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        self._put(self._by_token, token_signature(token), (token, principal), expires_at, self._generation)
+
+    def invalidate(self, student_id: Optional[int] = None, username: Optional[str] = None):
+        """Drop every entry for one student (by ID and/or username), or the whole cache when both are None"""
+        with self._lock:
+            self._generation += 1
+            if student_id is None and username is None:
+                self._by_username.clear()
+                self._by_token.clear()
+                return
+            stale = [
+                (self._by_username, key) for key, (_, principal) in self._by_username.items()
+                if principal.id == student_id or principal.username == username
+            ] + [
+                (self._by_token, key) for key, (_, (_, principal)) in self._by_token.items()
+                if principal.id == student_id or principal.username == username
+            ]
+            for entries, key in stale:
+                del entries[key]
+
+    def __len__(self) -> int:
+        return len(self._by_username) + len(self._by_token)
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    max_items=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+
+@event.listens_for(Student, "after_update")
+@event.listens_for(Student, "after_delete")
+def _student_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_students', set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    # Matching by ID also drops entries cached under a username the student just changed
+    for student_id in session.info.pop('changed_students', ()):
+        principal_cache.invalidate(student_id=student_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop('changed_students', None)
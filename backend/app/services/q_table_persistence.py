@@ -0,0 +1,257 @@
+"""
+Crash-Safe Q-Table Persistence
+Append-only update log on the hot path, compacted by periodic atomic snapshots
+"""
+import os
+import struct
+import threading
+import time
+import numpy as np
+from typing import Callable, Optional
+
+
+# One fixed-width record per Q-update. The action is logged as its content
+# ID so replay does not depend on the order actions were registered in.
+LOG_RECORD = struct.Struct('<iqdi')
+LOG_DTYPE = np.dtype([
+    ('state', '<i4'),
+    ('content_id', '<i8'),
+    ('reward', '<f8'),
+    ('next_state', '<i4')
+])
+
+
+def read_log_records(path: str) -> np.ndarray:
+    """Read every complete record of a log file (a torn final record is ignored)"""
+    if not os.path.exists(path):
+        return np.empty(0, dtype=LOG_DTYPE)
+    return np.fromfile(path, dtype=LOG_DTYPE, count=os.path.getsize(path) // LOG_RECORD.size)
+
+
+class UpdateLog:
+    """
+    Append-only binary log of (state, action, reward, next_state) records
+
+    Appends are buffered writes of a 24-byte packed record; QTablePersistence
+    flushes them to the OS on a short timer. `lock` must be held around
+    "apply update + append" so a snapshot never sees one without the other.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize UpdateLog
+
+        Args:
+            path: Log file (created if missing)
+        """
+        self.path = path
+        self.lock = threading.RLock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._drop_torn_tail()
+        self._file = open(path, 'ab')
+
+    def _drop_torn_tail(self):
+        """Truncate a partially written final record left by a crash"""
+        if os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            whole = size - size % LOG_RECORD.size
+            if whole != size:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(whole)
+
+    def append(self, state: int, content_id: int, reward: float, next_state: int):
+        """Append one record (caller holds `lock`)"""
+        self._file.write(LOG_RECORD.pack(state, content_id, reward, next_state))
+
+    def append_many(self,
+                    states: np.ndarray,
+                    content_ids: np.ndarray,
+                    rewards: np.ndarray,
+                    next_states: np.ndarray):
+        """Append a batch of records in one write (caller holds `lock`)"""
+        records = np.empty(len(states), dtype=LOG_DTYPE)
+        records['state'] = states
+        records['content_id'] = content_ids
+        records['reward'] = rewards
+        records['next_state'] = next_states
+        self._file.write(records.tobytes())
+
+    def flush(self, sync: bool = False):
+        """Push buffered records to the OS (and to disk if sync)"""
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def sync(self):
+        """fsync records already flushed (no lock needed outside of compact)"""
+        os.fsync(self._file.fileno())
+
+    def size(self) -> int:
+        """Bytes written so far, including buffered records"""
+        return self._file.tell()
+
+    def read(self) -> np.ndarray:
+        """Read every complete record as a structured array"""
+        self.flush()
+        return read_log_records(self.path)
+
+    def compact(self, offset: int):
+        """
+        Drop the first `offset` bytes (already captured by a snapshot)
+
+        The surviving tail is written to a temp file that replaces the log
+        with an atomic rename. Caller holds `lock`.
+        """
+        self.flush()
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        """Flush and close the log"""
+        self.flush(sync=True)
+        self._file.close()
+
+
+class QTablePersistence:
+    """
+    Keeps the global agent's Q-table durable across restarts and crashes
+
+    - every online Q-update is appended to an UpdateLog
+    - a background thread flushes the log every `flush_interval` seconds,
+      so a crash loses at most that much, and periodically writes an
+      atomic snapshot and compacts the log down to the records that
+      arrived after it
+    - start() replays the log tail on top of the last snapshot (unless the
+      agent already did so itself, see SharedQLearningAgent)
+    - stop() takes a final snapshot on shutdown
+    """
+
+    def __init__(self,
+                 agent,
+                 log_path: str,
+                 snapshot_path: Optional[str] = None,
+                 interval: float = 300.0,
+                 flush_interval: float = 1.0,
+                 fsync: bool = False):
+        """
+        Initialize QTablePersistence
+
+        Args:
+            agent: QLearningAgent to persist
+            log_path: Update log file
+            snapshot_path: Where agent.save_model writes (None = its default)
+            interval: Seconds between background snapshots
+            flush_interval: Seconds between log flushes (0 flushes only at snapshots)
+            fsync: Also fsync the log on every timed flush (survives power loss, not just crashes)
+        """
+        self.agent = agent
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.log: Optional[UpdateLog] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot_lock = threading.Lock()
+
+    def _replay(self) -> int:
+        """Apply every logged update on top of the agent's loaded snapshot"""
+        records = self.log.read()
+        for record in records:
+            action = self.agent.action_index(int(record['content_id']))
+            self.agent._apply_update(
+                int(record['state']), action, float(record['reward']), int(record['next_state'])
+            )
+        self.agent.total_updates += len(records)
+        self.agent.reward_stats.extend(records['reward'])
+        return len(records)
+
+    def start(self) -> int:
+        """
+        Recover from the log, attach it to the agent and start snapshotting
+
+        Returns:
+            Number of replayed updates
+        """
+        self.log = UpdateLog(self.log_path)
+        replayed = self._replay() if self.agent.replays_update_log else 0
+        self.agent.update_log = self.log
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="q-table-snapshots", daemon=True)
+        self._thread.start()
+        return replayed
+
+    def _run(self):
+        tick = min(self.flush_interval, self.interval) if self.flush_interval > 0 else self.interval
+        next_snapshot = time.monotonic() + self.interval
+        while not self._stop.wait(tick):
+            try:
+                if time.monotonic() >= next_snapshot:
+                    next_snapshot = time.monotonic() + self.interval
+                    self.snapshot()
+                else:
+                    self.flush()
+            except Exception as e:
+                print(f"[ERROR] Q-table log flush or snapshot failed: {e}")
+
+    def flush(self):
+        """Push buffered log records to the OS (and fsync them if configured)"""
+        with self.log.lock:
+            self.log.flush()
+        if self.fsync:
+            self.log.sync()
+
+    def snapshot(self, force: bool = False):
+        """
+        Write an atomic snapshot and compact the log it covers
+
+        Args:
+            force: Save even when no updates were logged since the last snapshot
+        """
+        if self.log is None:
+            self._capture()()
+            return
+
+        with self._snapshot_lock:
+            # Copy under the lock, write outside it: updates keep being
+            # applied and logged while the snapshot goes to disk
+            with self.log.lock:
+                offset = self.log.size()
+                if offset == 0 and not force:
+                    return
+                write = self._capture()
+            write()
+            with self.log.lock:
+                self.log.compact(offset)
+
+    def _capture(self) -> Callable[[], None]:
+        """Copy the agent's model; returns a function that writes the snapshot"""
+        write = self.agent.capture_model()
+        if self.snapshot_path:
+            return lambda: write(self.snapshot_path)
+        return write
+
+    def stop(self):
+        """Stop the snapshot thread and flush everything to disk"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+        if self.log is not None:
+            self.snapshot(force=True)
+            self.agent.update_log = None
+            self.log.close()
+            self.log = None
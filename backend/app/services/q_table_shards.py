@@ -0,0 +1,172 @@
+"""
+Topic-Partitioned Q-Table Shards
+Each Content.topic gets its own memory-mapped .npy shard, opened on first use
+"""
+import os
+import re
+import threading
+import numpy as np
+from typing import Callable, Dict, List
+from app.services.action_registry import ActionRegistry
+
+
+def _save_atomic(path: str, array: np.ndarray):
+    """np.save to a temp file, then rename over `path`"""
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class QTableShard:
+    """
+    Q-table columns for the content of a single topic
+
+    The table is opened with mmap_mode='c' (copy-on-write): pages stay in
+    the OS page cache and are shared by every worker process that maps the
+    same file, and only pages this process writes to become private.
+    """
+
+    def __init__(self, topic: str, path: str, num_states: int, initial_capacity: int = 16):
+        """
+        Initialize QTableShard
+
+        Args:
+            topic: Content topic this shard holds
+            path: Shard .npy file (created on first save if missing)
+            num_states: Number of discretized states (rows)
+            initial_capacity: Action columns allocated for a brand-new shard
+        """
+        self.topic = topic
+        self.path = path
+        self.actions_path = path.replace('.q.npy', '.actions.npy')
+        self.registry = ActionRegistry.load(self.actions_path)
+
+        if os.path.exists(path):
+            self.q_table = np.load(path, mmap_mode='c')
+        else:
+            self.q_table = np.zeros((num_states, max(initial_capacity, len(self.registry), 1)))
+        self.dirty = False
+
+    @property
+    def width(self) -> int:
+        """Number of columns that belong to registered content"""
+        return len(self.registry)
+
+    def columns(self, content_ids: List[int]) -> np.ndarray:
+        """
+        Get local column indices for content IDs, registering unknown ones
+
+        Args:
+            content_ids: Content IDs of this topic
+
+        Returns:
+            Array of column indices aligned with content_ids
+        """
+        known = len(self.registry)
+        columns = self.registry.indices_for(content_ids)
+        if len(self.registry) != known:
+            self.ensure_capacity(len(self.registry))
+            self.dirty = True
+        return columns
+
+    def ensure_capacity(self, size: int):
+        """Grow the shard (doubling) so it has at least `size` columns"""
+        capacity = self.q_table.shape[1]
+        if size <= capacity:
+            return
+        grown = np.zeros((self.q_table.shape[0], max(size, capacity * 2)))
+        grown[:, :capacity] = self.q_table
+        self.q_table = grown
+        self.dirty = True
+
+    def save(self):
+        """
+        Atomically write the shard (temp files + rename) and re-map it
+
+        Processes that still map the previous file keep reading it until
+        they reopen the shard; the rename never exposes a partial write.
+        """
+        self.capture()()
+        self.remap()
+
+    def capture(self) -> Callable[[], None]:
+        """
+        Copy the table and registry and mark the shard clean
+
+        Returns:
+            Function that writes the copy: the table first, then the
+            registry, so a crash in between never leaves registered
+            columns the table file lacks
+        """
+        q_table, content_ids = np.array(self.q_table), self.registry.content_ids
+        self.dirty = False
+
+        def write():
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                _save_atomic(self.path, q_table)
+                _save_atomic(self.actions_path, content_ids)
+            except Exception:
+                self.dirty = True
+                raise
+        return write
+
+    def remap(self):
+        """Re-map the saved file, unless the shard changed since it was captured"""
+        if not self.dirty:
+            self.q_table = np.load(self.path, mmap_mode='c')
+
+
+class TopicShardStore:
+    """Lazily opened collection of per-topic Q-table shards"""
+
+    def __init__(self, shard_dir: str, num_states: int, initial_capacity: int = 16):
+        """
+        Initialize TopicShardStore
+
+        Args:
+            shard_dir: Directory holding <topic>.q.npy shard files
+            num_states: Number of discretized states (rows in every shard)
+            initial_capacity: Action columns allocated for a brand-new shard
+        """
+        self.shard_dir = shard_dir
+        self.num_states = num_states
+        self.initial_capacity = initial_capacity
+        self._shards: Dict[str, QTableShard] = {}
+        self._lock = threading.Lock()
+
+    def _path_for(self, topic: str) -> str:
+        safe_name = re.sub(r'[^A-Za-z0-9_-]', '_', topic) or "_"
+        return os.path.join(self.shard_dir, f"{safe_name}.q.npy")
+
+    def shard(self, topic: str) -> QTableShard:
+        """Get the shard for a topic, opening its file on first request"""
+        shard = self._shards.get(topic)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.get(topic)
+                if shard is None:
+                    shard = QTableShard(
+                        topic, self._path_for(topic), self.num_states, self.initial_capacity
+                    )
+                    self._shards[topic] = shard
+        return shard
+
+    @property
+    def loaded_topics(self) -> List[str]:
+        """Topics whose shard is currently open in this process"""
+        return list(self._shards)
+
+    def loaded_shards(self) -> List[QTableShard]:
+        """Shards currently open in this process"""
+        return list(self._shards.values())
+
+    def save(self):
+        """Persist every open shard that changed since it was last saved"""
+        for shard in self.loaded_shards():
+            if shard.dirty:
+                shard.save()
+
+    def capture(self) -> List[Callable[[], None]]:
+        """Copy every changed shard (see QTableShard.capture); returns their writers"""
+        return [shard.capture() for shard in self.loaded_shards() if shard.dirty]
@@ -0,0 +1,151 @@
+"""
+Nightly Recommendation Precompute Job
+Ranks content for every student in bulk with the agent's batch top-k API
+
+Usage:
+    python -m app.services.recommendation_precompute --k 10 --chunk-size 1000
+"""
+import argparse
+import time
+import numpy as np
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Student, Content, StudentKnowledge
+from app.models.recommendation_cache import PrecomputedRecommendation
+from app.services.student_model import StudentModelService
+
+
+def load_catalog(db: Session):
+    """Content IDs and difficulties of the whole catalog as arrays"""
+    rows = db.execute(select(Content.id, Content.difficulty).order_by(Content.id)).all()
+    content_ids = np.array([row.id for row in rows], dtype=np.int64)
+    difficulties = np.array([row.difficulty if row.difficulty is not None else 0 for row in rows], dtype=np.int64)
+    return content_ids, difficulties
+
+
+def difficulty_mask(preferred: np.ndarray, difficulties: np.ndarray, window: int) -> np.ndarray:
+    """
+    (n_students, n_content) mask of content within `window` levels of each student's preferred difficulty
+
+    Students with no content in their window may choose from the whole catalog.
+    """
+    mask = np.abs(difficulties[None, :] - preferred[:, None]) <= window
+    mask[~mask.any(axis=1)] = True
+    return mask
+
+
+def precompute_recommendations(db: Session,
+                               recommender,
+                               k: int = 10,
+                               chunk_size: int = 1000,
+                               difficulty_window: int = None,
+                               policy: str = "tabular") -> Dict:
+    """
+    Write the top-k ranked content of every student to precomputed_recommendations
+
+    Students are processed `chunk_size` at a time: their knowledge rows are
+    loaded with one query, the agent ranks the whole chunk with a single
+    recommend_top_k call, and the chunk's rows are replaced in one commit.
+
+    Args:
+        db: Database session
+        recommender: Agent exposing recommend_top_k (tabular or linear)
+        k: Items stored per student
+        chunk_size: Students per batch
+        difficulty_window: Allowed distance from the preferred difficulty
+            (default settings.RECOMMENDATION_DIFFICULTY_WINDOW, shared with live ranking)
+        policy: Name recorded with each row
+
+    Returns:
+        Job summary dictionary
+    """
+    started = time.perf_counter()
+    if difficulty_window is None:
+        difficulty_window = settings.RECOMMENDATION_DIFFICULTY_WINDOW
+    content_ids, difficulties = load_catalog(db)
+    if len(content_ids) == 0:
+        return {'students': 0, 'content_items': 0, 'k': k, 'elapsed_seconds': 0.0}
+
+    students = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Student.id, StudentKnowledge)
+            .outerjoin(StudentKnowledge, StudentKnowledge.student_id == Student.id)
+            .where(Student.id > last_id)
+            .order_by(Student.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        student_ids = [row.id for row in rows]
+        states = [
+            StudentModelService.knowledge_to_state(row.StudentKnowledge) if row.StudentKnowledge else {}
+            for row in rows
+        ]
+        preferred = np.array([state.get('preferred_difficulty') or 2 for state in states], dtype=np.int64)
+        top_ids, top_scores = recommender.recommend_top_k(
+            states, content_ids, k=k,
+            candidate_mask=difficulty_mask(preferred, difficulties, difficulty_window)
+        )
+
+        generated_at = datetime.utcnow()
+        db.query(PrecomputedRecommendation).filter(
+            PrecomputedRecommendation.student_id.in_(student_ids)
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(PrecomputedRecommendation, [
+            {
+                'student_id': student_id,
+                'content_ids': ids[ids >= 0].tolist(),
+                'scores': scores[ids >= 0].round(6).tolist(),
+                'policy': policy,
+                'generated_at': generated_at
+            }
+            for student_id, ids, scores in zip(student_ids, top_ids, top_scores)
+        ])
+        db.commit()
+        students += len(student_ids)
+
+    return {
+        'students': students,
+        'content_items': int(len(content_ids)),
+        'k': k,
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute ranked recommendations for every student")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--difficulty-window", type=int, default=settings.RECOMMENDATION_DIFFICULTY_WINDOW)
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal
+    from app.services.linear_agent import recommender
+    import app.models  # noqa: F401 - register all mappers
+
+    db = SessionLocal()
+    try:
+        summary = precompute_recommendations(
+            db,
+            recommender,
+            k=args.k,
+            chunk_size=args.chunk_size,
+            difficulty_window=args.difficulty_window,
+            policy=settings.RL_POLICY
+        )
+    finally:
+        db.close()
+
+    print(f"[OK] Ranked {summary['content_items']} items for {summary['students']} students "
+          f"(top {summary['k']}) in {summary['elapsed_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,208 @@ Q-Learning Agent for Adaptive Content Selection
 import numpy as np
 import json
 import os
-from typing import Dict, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
 from app.core.config import settings
+from app.services.action_registry import ActionRegistry
+from app.services.content_catalog import catalog_index
+from app.services.q_table_persistence import read_log_records
+from app.services.q_table_shards import TopicShardStore
+from app.services.shared_q_table import SharedQTable
+from app.services.state_encoder import AverageScoreEncoder, StateEncoder, create_state_encoder
+from app.services.streaming_stats import QTableAggregates, RewardRingBuffer
+
+
+def _max_q(q_table: np.ndarray, width: int, rows: np.ndarray) -> np.ndarray:
+    """Max Q-value over the first `width` action columns for each row"""
+    width = width or q_table.shape[1]
+    unique_rows, inverse = np.unique(rows, return_inverse=True)
+    return q_table[unique_rows, :width].max(axis=1)[inverse]
+
+
+def _batched_q_update(q_table: np.ndarray,
+                      width: int,
+                      states: np.ndarray,
+                      actions: np.ndarray,
+                      rewards: np.ndarray,
+                      next_states: np.ndarray,
+                      learning_rate: float,
+                      discount_factor: float,
+                      accumulate: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Apply one vectorized Q-learning step to `q_table` in place
+    
+    All TD targets are computed against the current table, then the TD
+    errors for each (state, action) pair are averaged so repeated
+    transitions move Q(s,a) by one learning-rate step, not N of them.
+    
+    With `accumulate`, the n transitions of a cell are applied one after
+    another in batch order, in closed form:
+    
+        Q_n = (1-α)^n Q_0 + Σ_i α (1-α)^(n-1-i) target_i
+    
+    which matches n sequential update_q_value calls exactly when no row
+    used for bootstrapping is written by the same batch (always for γ = 0),
+    and otherwise bootstraps from the table as it was before the batch.
+    
+    Returns:
+        (flat indices of the distinct cells written, their values before the step)
+    """
+    max_next_q = _max_q(q_table, width, next_states)
+    targets = rewards + discount_factor * max_next_q
+    
+    # Group duplicate (state, action) pairs on their flat index
+    flat = states * q_table.shape[1] + actions
+    pairs, inverse = np.unique(flat, return_inverse=True)
+    previous = q_table.flat[pairs]
+    counts = np.bincount(inverse, minlength=len(pairs))
+    
+    if accumulate:
+        # Updates still to come for the same cell after each transition
+        order = np.argsort(inverse, kind="stable")
+        rank = np.empty(len(inverse), dtype=np.intp)
+        rank[order] = np.arange(len(inverse)) - np.repeat(np.cumsum(counts) - counts, counts)
+        later = counts[inverse] - 1 - rank
+        
+        weights = learning_rate * (1.0 - learning_rate) ** later
+        q_table.flat[pairs] = (
+            (1.0 - learning_rate) ** counts * previous
+            + np.bincount(inverse, weights=weights * targets, minlength=len(pairs))
+        )
+        return pairs, previous
+    
+    td_errors = targets - q_table[states, actions]
+    td_sum = np.bincount(inverse, weights=td_errors, minlength=len(pairs))
+    
+    q_table.flat[pairs] = previous + learning_rate * td_sum / counts
+    return pairs, previous
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions and values of the k largest entries of every row, best first
+    
+    np.partition finds each row's k-th largest score in O(m); only the
+    k entries above it are then sorted, so ranking never sorts the whole
+    candidate set. Ties are broken by lowest position, both at the
+    threshold and in the final order, so column 0 is always np.argmax.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.intp), np.empty((len(scores), 0))
+    threshold = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+    above = scores > threshold
+    ties = scores == threshold
+    selected = above | ties
+    # Rows with more tied scores than free slots keep only the first tied positions
+    needed = k - above.sum(axis=1)
+    crowded = np.flatnonzero(ties.sum(axis=1) > needed)
+    if len(crowded):
+        crowded_ties = ties[crowded]
+        selected[crowded] = above[crowded] | (crowded_ties & (np.cumsum(crowded_ties, axis=1) <= needed[crowded, None]))
+    partitioned = np.nonzero(selected)[1].reshape(len(scores), k)
+    partitioned_scores = np.take_along_axis(scores, partitioned, axis=1)
+    order = np.argsort(-partitioned_scores, axis=1, kind='stable')
+    return (np.take_along_axis(partitioned, order, axis=1),
+            np.take_along_axis(partitioned_scores, order, axis=1))
+
+
+def rank_candidates(scores: np.ndarray,
+                    candidate_ids: np.ndarray,
+                    k: int,
+                    candidate_mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k content IDs per student from an (n_students, n_candidates) score matrix
+    
+    Args:
+        scores: Q-values, one row per student
+        candidate_ids: (n_candidates,) shared candidates or (n_students, n_candidates)
+            per-student candidates, padded with -1
+        k: Items to return per student
+        candidate_mask: Optional boolean matrix of allowed candidates per student
+    
+    Returns:
+        (content_ids, scores), each (n_students, k); slots with no eligible
+        candidate hold content ID -1 and score -inf
+    """
+    candidate_ids = np.broadcast_to(candidate_ids, scores.shape)
+    valid = candidate_ids >= 0
+    if candidate_mask is not None:
+        valid = valid & candidate_mask
+    positions, top_scores = top_k(np.where(valid, scores, -np.inf), k)
+    top_ids = np.take_along_axis(candidate_ids, positions, axis=1).copy()
+    top_ids[np.isneginf(top_scores)] = -1
+    return top_ids, top_scores
+
+
+def calculate_rewards(is_correct: np.ndarray,
+                      time_spent: np.ndarray,
+                      difficulty: np.ndarray,
+                      student_level: np.ndarray) -> np.ndarray:
+    """
+    Vectorized QLearningAgent.calculate_reward over arrays of interactions
+    
+    Same components and thresholds, evaluated with array selects so a
+    batch of simulated or logged interactions is scored in one pass.
+    
+    Returns:
+        Array of reward values
+    """
+    is_correct = np.asarray(is_correct, dtype=bool)
+    time_spent = np.asarray(time_spent, dtype=np.float64)
+    
+    time_bonus = np.select([time_spent < 30, time_spent < 60], [0.2, 0.1], 0.0)
+    reward = np.where(is_correct, 1.0 + time_bonus, -0.5)
+    
+    expected_difficulty = 1 + np.asarray(student_level, dtype=np.float64) * 4
+    difficulty_diff = np.abs(np.asarray(difficulty, dtype=np.float64) - expected_difficulty)
+    reward += np.select([difficulty_diff < 1, difficulty_diff > 2], [0.3, -0.2], 0.0)
+    return reward
+
+
+def epsilon_greedy(q_values: np.ndarray, epsilon: float) -> Tuple[int, float]:
+    """
+    Epsilon-greedy choice over candidate Q-values, with its selection probability
+    
+    The greedy candidate (first argmax) is chosen with probability
+    1 - epsilon + epsilon / n and every other one with epsilon / n; the
+    returned propensity is what off-policy evaluation divides by.
+    
+    Returns:
+        (position of the chosen candidate, probability it had of being chosen)
+    """
+    n = len(q_values)
+    greedy = int(np.argmax(q_values))
+    chosen = int(np.random.randint(n)) if np.random.random() < epsilon else greedy
+    propensity = epsilon / n + (1.0 - epsilon if chosen == greedy else 0.0)
+    return chosen, float(propensity)
+
+
+def _read_snapshot_metadata(meta_path: str) -> Dict:
+    """Metadata written next to a snapshot by save_model ({} if missing)"""
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, 'r') as f:
+        return json.load(f)
+
+
+def snapshot_encoder(metadata: Dict) -> str:
+    """State encoder a snapshot was written with (snapshots that predate the field used the average encoder)"""
+    return metadata.get('state_encoder', AverageScoreEncoder.name)
+
+
+class QPolicy:
+    """
+    A Q-table together with the registry that names its columns
+    
+    The agent holds exactly one QPolicy reference, so replacing the whole
+    policy (e.g. a model-registry hot swap) is a single atomic assignment.
+    """
+    
+    __slots__ = ('q_table', 'registry')
+    
+    def __init__(self, q_table: np.ndarray, registry: ActionRegistry):
+        self.q_table = q_table
+        self.registry = registry
 
 
 class QLearningAgent:
@@ -14,34 +214,97 @@ class QLearningAgent:
     Uses Q-learning to learn optimal content selection policy.
     """
     
+    # The model registry may replace this agent's policy in place
+    hot_swappable = True
+    # QTablePersistence replays the update log into this agent on start
+    replays_update_log = True
+    
     def __init__(self, 
                  num_states: int = 100, 
                  num_actions: int = 20,
                  learning_rate: float = None,
                  discount_factor: float = None,
-                 epsilon: float = None):
+                 epsilon: float = None,
+                 state_encoder: StateEncoder = None):
         """
         Initialize Q-learning agent
         
         Args:
-            num_states: Number of discretized states (knowledge levels)
-            num_actions: Number of possible actions (content items)
+            num_states: Number of discretized states (Q-table rows)
+            num_actions: Initial action capacity; grows as content is registered
             learning_rate: Learning rate (alpha)
             discount_factor: Discount factor (gamma)
             epsilon: Exploration rate
+            state_encoder: Knowledge state -> row encoder (default from settings)
         """
         self.num_states = num_states
+        self.state_encoder = state_encoder or create_state_encoder(
+            settings.STATE_ENCODER, num_states, bins=settings.STATE_BINS
+        )
         self.num_actions = num_actions
         self.learning_rate = learning_rate or settings.LEARNING_RATE
-        self.discount_factor = discount_factor or settings.DISCOUNT_FACTOR
-        self.epsilon = epsilon or settings.EPSILON
+        self.discount_factor = settings.DISCOUNT_FACTOR if discount_factor is None else discount_factor
+        self.epsilon = settings.EPSILON if epsilon is None else epsilon
         
-        # Initialize Q-table
-        self.q_table = np.zeros((num_states, num_actions))
+        # Initialize Q-table and the content ID -> column mapping
+        self.policy = QPolicy(np.zeros((num_states, num_actions)), ActionRegistry())
+        # Model registry version the active policy was activated from (None: not from the registry)
+        self.policy_version: Optional[int] = None
         
-        # Training statistics
+        # Write-ahead log of online updates (attached by QTablePersistence)
+        self.update_log = None
+        # Per-thread update buffer (attached by BufferedQUpdater)
+        self.update_buffer = None
+        
+        # Training statistics (rewards in a ring buffer, Q-table aggregates per table)
         self.total_updates = 0
-        self.episode_rewards = []
+        self.reward_stats = RewardRingBuffer(capacity=1000)
+        self._q_aggregates: Dict[str, QTableAggregates] = {}
+    
+    @property
+    def episode_rewards(self) -> List[float]:
+        """Most recent rewards, oldest first"""
+        return self.reward_stats.tolist()
+    
+    @episode_rewards.setter
+    def episode_rewards(self, rewards: List[float]):
+        self.reward_stats.reset(rewards)
+    
+    @property
+    def q_table(self) -> np.ndarray:
+        """Q-table of the active policy"""
+        return self.policy.q_table
+    
+    @q_table.setter
+    def q_table(self, value: np.ndarray):
+        self.policy.q_table = value
+    
+    @property
+    def registry(self) -> ActionRegistry:
+        """Action registry of the active policy"""
+        return self.policy.registry
+    
+    @registry.setter
+    def registry(self, value: ActionRegistry):
+        self.policy.registry = value
+    
+    def swap_policy(self, policy: QPolicy) -> QPolicy:
+        """
+        Atomically replace the active Q-table and registry
+        
+        Args:
+            policy: New policy
+        
+        Returns:
+            The policy that was active before the swap
+        """
+        previous, self.policy = self.policy, policy
+        self.num_actions = policy.q_table.shape[1]
+        return previous
+    
+    def claim_persistence(self) -> bool:
+        """Whether this process should write the update log and snapshots"""
+        return True
     
     def _discretize_state(self, knowledge_state: Dict) -> int:
         """
@@ -53,22 +316,19 @@ class QLearningAgent:
         Returns:
             Discrete state index (0 to num_states-1)
         """
-        # Extract knowledge scores
-        scores = [
-            knowledge_state.get('algebra_score', 0.5),
-            knowledge_state.get('calculus_score', 0.5),
-            knowledge_state.get('geometry_score', 0.5),
-            knowledge_state.get('statistics_score', 0.5)
-        ]
-        
-        # Create composite score (average)
-        avg_score = np.mean(scores)
+        return self.state_encoder.encode(knowledge_state)
+    
+    def discretize_states(self, knowledge_states: List[Dict]) -> np.ndarray:
+        """
+        Convert a batch of knowledge states to state indices in one vectorized pass
         
-        # Discretize to state index
-        state_index = int(avg_score * (self.num_states - 1))
-        state_index = max(0, min(state_index, self.num_states - 1))
+        Args:
+            knowledge_states: List of knowledge-state dicts
         
-        return state_index
+        Returns:
+            Array of state indices
+        """
+        return self.state_encoder.encode_batch(knowledge_states)
     
     def select_action(self, state: int, available_actions: List[int] = None) -> int:
         """
@@ -76,7 +336,7 @@ class QLearningAgent:
         
         Args:
             state: Current state index
-            available_actions: List of valid action indices (content IDs)
+            available_actions: List of valid action indices
         
         Returns:
             Selected action index
@@ -90,7 +350,7 @@ class QLearningAgent:
             return np.random.choice(available_actions)
         else:
             # Exploit: best known action
-            q_values = self.q_table[state, available_actions]
+            q_values = self._q_values(state, np.asarray(available_actions, dtype=np.intp))
             best_action_idx = np.argmax(q_values)
             return available_actions[best_action_idx]
     
@@ -106,22 +366,256 @@ class QLearningAgent:
             reward: Reward received
             next_state: Next state after action
         """
-        current_q = self.q_table[state, action]
-        max_next_q = np.max(self.q_table[next_state])
+        if self.update_buffer is not None:
+            self.update_buffer.submit(state, self.registry.content_id_at(action), reward, next_state)
+            return
+        
+        if self.update_log is None:
+            self._apply_update(state, action, reward, next_state)
+        else:
+            with self.update_log.lock:
+                self._apply_update(state, action, reward, next_state)
+                self.update_log.append(state, self.registry.content_id_at(action), reward, next_state)
+        self.total_updates += 1
+        
+        # Track reward for statistics
+        self.reward_stats.append(reward)
+    
+    def _q_values(self, state: int, actions: np.ndarray) -> np.ndarray:
+        """Q-values of `actions` in `state`"""
+        return self.q_table[state, actions]
+    
+    def candidate_q_values(self, state: int, content_ids: List[int]) -> np.ndarray:
+        """
+        Q-values of candidate content in `state`
+        
+        The policy reference is read once, so a concurrent hot swap cannot
+        pair one policy's column indices with another policy's Q-table.
+        
+        Args:
+            state: State index
+            content_ids: Candidate content IDs
+        
+        Returns:
+            Array of Q-values aligned with content_ids
+        """
+        policy = self.policy
+        columns = policy.registry.indices_for(content_ids)
+        self._ensure_capacity(len(policy.registry), policy)
+        return policy.q_table[state, columns]
+    
+    def candidate_columns(self, candidate_ids: np.ndarray) -> np.ndarray:
+        """
+        Action columns for a vector or padded matrix of candidate content IDs
+        
+        Each distinct ID is looked up once; -1 padding maps to column 0 and
+        must be masked by the caller.
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        unique_ids, inverse = np.unique(candidate_ids, return_inverse=True)
+        columns = np.zeros(len(unique_ids), dtype=np.intp)
+        real = unique_ids >= 0
+        columns[real] = self.action_indices(unique_ids[real].tolist())
+        return columns[inverse].reshape(candidate_ids.shape)
+    
+    def _q_matrix(self, states: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """(n_states, n_candidates) Q-values; `columns` is 1-D (shared) or 2-D (per state)"""
+        return self.q_table[states[:, None], np.atleast_2d(columns)]
+    
+    def recommend_top_k(self,
+                        knowledge_states: List[Dict],
+                        candidate_ids: np.ndarray,
+                        k: int = 10,
+                        candidate_mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank candidates for many students at once
+        
+        States are encoded in one batch, Q-values are gathered into one
+        (n_students, n_candidates) matrix and each row's top k is picked
+        with np.argpartition. Learning-style/pace bonuses of
+        get_recommended_content are not applied.
+        
+        Args:
+            knowledge_states: Knowledge state of each student
+            candidate_ids: (n_candidates,) shared candidates, or an
+                (n_students, n_candidates) matrix padded with -1
+            k: Items to return per student
+            candidate_mask: Optional boolean (n_students, n_candidates) filter
+        
+        Returns:
+            (content_ids, scores), each (n_students, k), best first; empty
+            slots hold content ID -1 and score -inf
+        """
+        states = np.asarray(self.discretize_states(knowledge_states), dtype=np.intp)
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        columns = self.candidate_columns(candidate_ids)
+        if candidate_ids.ndim == 1 and candidate_mask is None:
+            # Shared candidates: students in the same state share a ranking,
+            # so rank each distinct state once (at most num_states rows)
+            unique_states, inverse = np.unique(states, return_inverse=True)
+            top_ids, top_scores = rank_candidates(self._q_matrix(unique_states, columns), candidate_ids, k)
+            return top_ids[inverse], top_scores[inverse]
+        return rank_candidates(self._q_matrix(states, columns), candidate_ids, k, candidate_mask)
+    
+    def _aggregates_for(self, q_table: np.ndarray, width: int = None, key: str = None) -> QTableAggregates:
+        """
+        Running aggregates of `q_table`, rebuilt with one full scan only when
+        the table object (or tracked width) changes: a resize, load or hot swap
+        """
+        aggregates = self._q_aggregates.get(key)
+        if aggregates is None or not aggregates.tracks(q_table, width):
+            aggregates = QTableAggregates(q_table, width)
+            self._q_aggregates[key] = aggregates
+        return aggregates
+    
+    def q_table_aggregates(self) -> QTableAggregates:
+        """Running sum/mean/max of the active Q-table"""
+        return self._aggregates_for(self.q_table)
+    
+    def _apply_update(self, state: int, action: int, reward: float, next_state: int):
+        """Apply one Q-learning step to the Q-table"""
+        q_table = self.q_table
+        aggregates = self._aggregates_for(q_table)
+        current_q = q_table[state, action]
+        max_next_q = _max_q(q_table, len(self.registry), np.array([next_state]))[0]
         
         # Q-learning update
         new_q = current_q + self.learning_rate * (
             reward + self.discount_factor * max_next_q - current_q
         )
         
-        self.q_table[state, action] = new_q
-        self.total_updates += 1
+        q_table[state, action] = new_q
+        aggregates.record(state, current_q, new_q)
+    
+    def _apply_batch(self,
+                     states: np.ndarray,
+                     actions: np.ndarray,
+                     rewards: np.ndarray,
+                     next_states: np.ndarray,
+                     accumulate: bool = False):
+        """Apply one vectorized Q-learning step to the Q-table"""
+        q_table = self.q_table
+        aggregates = self._aggregates_for(q_table)
+        cells, previous = _batched_q_update(
+            q_table, len(self.registry), states, actions, rewards, next_states,
+            self.learning_rate, self.discount_factor, accumulate
+        )
+        aggregates.record_many(cells // q_table.shape[1], previous, q_table.flat[cells])
+    
+    def _ensure_capacity(self, size: int, policy: QPolicy = None):
+        """
+        Grow the Q-table so it has at least `size` action columns
         
-        # Track reward for statistics
-        self.episode_rewards.append(reward)
-        # Keep only last 1000 rewards to avoid memory issues
-        if len(self.episode_rewards) > 1000:
-            self.episode_rewards = self.episode_rewards[-1000:]
+        Capacity doubles on each resize, so registering N content items
+        costs amortized O(1) copies per item.
+        """
+        policy = policy or self.policy
+        capacity = policy.q_table.shape[1]
+        if size <= capacity:
+            return
+        
+        new_capacity = max(size, capacity * 2, 1)
+        grown = np.zeros((policy.q_table.shape[0], new_capacity), dtype=policy.q_table.dtype)
+        grown[:, :capacity] = policy.q_table
+        policy.q_table = grown
+        self.num_actions = new_capacity
+    
+    def register_content(self, content_ids: List[int], topics: List[str] = None):
+        """
+        Give every content ID a dense action index, growing the Q-table as needed
+        
+        Args:
+            content_ids: Content IDs to register (already-known IDs are skipped)
+            topics: Optional topic of each content item (used by sharded storage)
+        """
+        self._ensure_capacity(self.registry.register(content_ids))
+    
+    def action_index(self, content_id: int) -> int:
+        """
+        Map a content ID to its action (Q-table column) index
+        
+        Unknown content is registered on first use.
+        
+        Args:
+            content_id: Content ID
+        
+        Returns:
+            Action index
+        """
+        index = self.registry.index_of(content_id)
+        self._ensure_capacity(len(self.registry))
+        return index
+    
+    def action_indices(self, content_ids: List[int]) -> np.ndarray:
+        """
+        Map candidate content IDs to action indices in O(len(content_ids))
+        
+        Args:
+            content_ids: Candidate content IDs
+        
+        Returns:
+            Array of action indices aligned with content_ids
+        """
+        indices = self.registry.indices_for(content_ids)
+        self._ensure_capacity(len(self.registry))
+        return indices
+    
+    def batch_update(self,
+                     states: np.ndarray,
+                     actions: np.ndarray,
+                     rewards: np.ndarray,
+                     next_states: np.ndarray,
+                     accumulate: bool = False):
+        """
+        Apply one vectorized Q-learning update over a batch of transitions
+        
+        Repeated (state, action) pairs within the batch are averaged, so
+        they move Q(s,a) by one learning-rate step, not N of them.
+        
+        Args:
+            states: Array of state indices
+            actions: Array of action indices
+            rewards: Array of rewards
+            next_states: Array of next-state indices
+            accumulate: Apply repeated pairs one after another instead of averaging
+        """
+        states = np.asarray(states, dtype=np.intp)
+        actions = np.asarray(actions, dtype=np.intp)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        next_states = np.asarray(next_states, dtype=np.intp)
+        if len(states) == 0:
+            return
+        
+        if self.update_log is None:
+            self._apply_batch(states, actions, rewards, next_states, accumulate)
+        else:
+            content_ids = self.registry.content_ids[actions]
+            with self.update_log.lock:
+                self._apply_batch(states, actions, rewards, next_states, accumulate)
+                self.update_log.append_many(states, content_ids, rewards, next_states)
+        self.total_updates += len(states)
+    
+    def apply_buffered_updates(self,
+                               states: np.ndarray,
+                               content_ids: np.ndarray,
+                               rewards: np.ndarray,
+                               next_states: np.ndarray):
+        """
+        Apply online updates drained from a BufferedQUpdater
+        
+        Repeated (state, content) cells are stepped once per transition in
+        drain order, as sequential update_q_value calls would. The reward
+        history is extended here, by the single flusher, rather than by
+        every request thread.
+        
+        Args:
+            states: Array of state indices
+            content_ids: Array of content IDs (mapped to action columns here)
+            rewards: Array of rewards
+            next_states: Array of next-state indices
+        """
+        self.batch_update(states, self.action_indices(content_ids), rewards, next_states, accumulate=True)
+        self.reward_stats.extend(rewards)
     
     def calculate_reward(self, 
                         is_correct: bool, 
@@ -188,10 +682,38 @@ class QLearningAgent:
         Returns:
             Tuple of (content_id, confidence_score)
         """
+        q_values = self._scored_candidates(knowledge_state, available_content_ids, learning_style, pace_profile)
+        best_idx = np.argmax(q_values)
+        return available_content_ids[best_idx], float(q_values[best_idx])
+    
+    def select_content(self,
+                       knowledge_state: Dict,
+                       available_content_ids: List[int],
+                       learning_style: str = None,
+                       pace_profile: Dict = None) -> Tuple[int, float, float]:
+        """
+        Choose content epsilon-greedily and report the selection probability
+        
+        Same scoring as get_recommended_content; with probability epsilon a
+        uniformly random candidate is served instead of the best one.
+        
+        Returns:
+            Tuple of (content_id, confidence_score, propensity)
+        """
+        q_values = self._scored_candidates(knowledge_state, available_content_ids, learning_style, pace_profile)
+        chosen, propensity = epsilon_greedy(q_values, self.epsilon)
+        return available_content_ids[chosen], float(q_values[chosen]), propensity
+    
+    def _scored_candidates(self,
+                           knowledge_state: Dict,
+                           available_content_ids: List[int],
+                           learning_style: str = None,
+                           pace_profile: Dict = None) -> np.ndarray:
+        """Candidate Q-values with the learning-style and pace adjustments applied"""
         state = self._discretize_state(knowledge_state)
         
         # Get Q-values for available actions
-        q_values = self.q_table[state, available_content_ids]
+        q_values = self.candidate_q_values(state, available_content_ids)
         
         # Apply learning style bonus if provided
         if learning_style and learning_style != "Multimodal":
@@ -220,70 +742,501 @@ class QLearningAgent:
             difficulty_scale = (difficulty_pref - 5) / 10  # -0.5 to +0.5
             q_values = q_values + difficulty_scale
         
-        # Select best action
-        best_idx = np.argmax(q_values)
-        recommended_content_id = available_content_ids[best_idx]
-        confidence = q_values[best_idx]
-        
-        return recommended_content_id, float(confidence)
+        return q_values
     
     def save_model(self, filepath: str = "models/q_table.npy"):
-        """Save Q-table to file"""
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        np.save(filepath, self.q_table)
+        """Save Q-table to file (each file is written to a temp path, then renamed)"""
+        self.capture_model()(filepath)
+    
+    def capture_model(self) -> Callable[..., None]:
+        """
+        Copy everything save_model writes
         
-        # Save metadata
+        Returns a function that writes the copy to a path, so callers only
+        hold their update lock while copying (see QTablePersistence.snapshot).
+        """
+        q_table = np.array(self._snapshot_table())
+        content_ids = self.registry.content_ids
         metadata = {
             'num_states': self.num_states,
             'num_actions': self.num_actions,
             'learning_rate': self.learning_rate,
             'discount_factor': self.discount_factor,
             'epsilon': self.epsilon,
+            'state_encoder': self.state_encoder.name,
+            'policy_version': self.policy_version,
             'total_updates': self.total_updates,
-            'episode_rewards': self.episode_rewards  # Save rewards history
+            'episode_rewards': list(self.episode_rewards)  # Save rewards history
         }
-        with open(filepath.replace('.npy', '_meta.json'), 'w') as f:
-            json.dump(metadata, f, indent=2)
+        
+        def write(filepath: str = "models/q_table.npy"):
+            os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+            actions_path = filepath.replace('.npy', '_actions.npy')
+            np.save(actions_path + '.tmp.npy', content_ids)
+            os.replace(actions_path + '.tmp.npy', actions_path)
+            np.save(filepath + '.tmp.npy', q_table)
+            os.replace(filepath + '.tmp.npy', filepath)
+            
+            meta_path = filepath.replace('.npy', '_meta.json')
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump(metadata, f, indent=2)
+            os.replace(meta_path + '.tmp', meta_path)
+        return write
+    
+    def _snapshot_table(self) -> np.ndarray:
+        """The Q-table array written by save_model"""
+        return self.q_table
     
     def load_model(self, filepath: str = "models/q_table.npy"):
-        """Load Q-table from file"""
+        """
+        Load Q-table from file
+        
+        A snapshot with a different number of states or written under a
+        different state encoder is skipped (its rows would mean other
+        states), and so is the update log tail that belongs to it.
+        """
         if os.path.exists(filepath):
-            self.q_table = np.load(filepath)
+            metadata = _read_snapshot_metadata(filepath.replace('.npy', '_meta.json'))
+            policy = QPolicy(
+                np.load(filepath),
+                ActionRegistry.load(filepath.replace('.npy', '_actions.npy'))
+            )
+            if not self._snapshot_compatible(filepath, policy.q_table.shape[0], metadata):
+                # The update log's states were encoded like the skipped snapshot's
+                self.replays_update_log = False
+                return
+            self._ensure_capacity(len(policy.registry), policy)
+            self.swap_policy(policy)
             
-            # Load metadata
-            meta_path = filepath.replace('.npy', '_meta.json')
-            if os.path.exists(meta_path):
-                with open(meta_path, 'r') as f:
-                    metadata = json.load(f)
-                    self.total_updates = metadata.get('total_updates', 0)
-                    self.episode_rewards = metadata.get('episode_rewards', [])
+            if metadata:
+                self.total_updates = metadata.get('total_updates', 0)
+                self.episode_rewards = metadata.get('episode_rewards', [])
+                self.policy_version = metadata.get('policy_version')
+    
+    def _snapshot_compatible(self, source: str, num_states: int, metadata: Dict) -> bool:
+        """Whether a snapshot's rows were encoded like this agent's states (reports why not)"""
+        encoder = snapshot_encoder(metadata)
+        if num_states != self.num_states:
+            problem = f"has {num_states} states, expected {self.num_states}"
+        elif encoder != self.state_encoder.name:
+            problem = f"was written with the {encoder} state encoder, expected {self.state_encoder.name}"
+        else:
+            return True
+        print(f"[ERROR] {source} {problem}; starting from an empty Q-table")
+        return False
     
     def get_statistics(self) -> Dict:
-        """Get agent training statistics"""
-        q_table_size = self.q_table.shape[0] * self.q_table.shape[1] if len(self.q_table.shape) > 1 else 0
+        """
+        Get agent training statistics
         
-        # Calculate average reward from tracked rewards
-        avg_reward = float(np.mean(self.episode_rewards)) if len(self.episode_rewards) > 0 else 0.0
+        O(1): Q-table aggregates and reward moments are maintained as
+        updates are applied, not recomputed here.
+        """
+        aggregates = self.q_table_aggregates()
         
         return {
             'total_sessions': self.total_updates,
             'total_updates': self.total_updates,
-            'q_table_size': q_table_size,
-            'q_table_shape': list(self.q_table.shape),
-            'mean_q_value': float(np.mean(self.q_table)),
-            'max_q_value': float(np.max(self.q_table)),
+            'q_table_size': aggregates.size,
+            'q_table_shape': [aggregates.q_table.shape[0], aggregates.width],
+            'mean_q_value': aggregates.mean,
+            'max_q_value': aggregates.max,
             'learning_rate': self.learning_rate,
             'epsilon': self.epsilon,
             'exploration_rate': self.epsilon,  # Frontend expects this
-            'avg_reward': avg_reward
+            'avg_reward': self.reward_stats.mean,
+            'reward_std': self.reward_stats.std
+        }
+
+
+class ShardedQLearningAgent(QLearningAgent):
+    """
+    Q-learning agent whose Q-table is partitioned by Content.topic
+    
+    Each topic's columns live in their own memory-mapped shard that is
+    opened the first time that topic is touched, so resident memory scales
+    with the topics in active use. Action indices stay global; they are
+    routed to (shard, local column) through each content item's topic.
+    The content -> topic map is saved with the shards (topics.json), and
+    content first seen at runtime gets its topic from catalog_index.
+    """
+    
+    DEFAULT_TOPIC = "general"
+    hot_swappable = False
+    
+    def __init__(self,
+                 shard_dir: str = "models/shards",
+                 num_states: int = 100,
+                 num_actions: int = 16,
+                 learning_rate: float = None,
+                 discount_factor: float = None,
+                 epsilon: float = None):
+        """
+        Initialize sharded agent
+        
+        Args:
+            shard_dir: Directory holding one <topic>.q.npy file per topic
+            num_states: Number of discretized states (knowledge levels)
+            num_actions: Initial action capacity of a new shard
+            learning_rate: Learning rate (alpha)
+            discount_factor: Discount factor (gamma)
+            epsilon: Exploration rate
+        """
+        super().__init__(num_states, num_actions, learning_rate, discount_factor, epsilon)
+        self.q_table = None  # No global table; see self.shards
+        self.shards = TopicShardStore(shard_dir, num_states, initial_capacity=num_actions)
+        self.content_topics: Dict[int, str] = {}
+    
+    def _ensure_capacity(self, size: int, policy: QPolicy = None):
+        """Shards grow individually as their content is registered"""
+    
+    def candidate_q_values(self, state: int, content_ids: List[int]) -> np.ndarray:
+        """Q-values of candidate content in `state`, gathered from their shards"""
+        return self._q_values(state, self.action_indices(content_ids))
+    
+    def register_content(self, content_ids: List[int], topics: List[str] = None):
+        """
+        Register content IDs and remember which topic shard each belongs to
+        
+        Args:
+            content_ids: Content IDs to register
+            topics: Topic of each content item; unknown topics use DEFAULT_TOPIC
+        """
+        super().register_content(content_ids)
+        if topics is not None:
+            for content_id, topic in zip(content_ids, topics):
+                self.content_topics[int(content_id)] = topic or self.DEFAULT_TOPIC
+    
+    def _resolve_topic(self, content_id: int) -> str:
+        """Topic of content registered without one, looked up in the catalog index"""
+        metadata = catalog_index.metadata(content_id)
+        if metadata is None or not metadata[0]:
+            return self.DEFAULT_TOPIC  # not in the catalog (yet); not remembered
+        self.content_topics[content_id] = metadata[0]
+        return metadata[0]
+    
+    def _route(self, actions: np.ndarray):
+        """
+        Group global action indices by shard
+        
+        Yields:
+            (shard, positions into `actions`, local column indices)
+        """
+        groups: Dict[str, Tuple[List[int], List[int]]] = {}
+        for position, action in enumerate(np.atleast_1d(actions)):
+            content_id = self.registry.content_id_at(int(action))
+            topic = self.content_topics.get(content_id) or self._resolve_topic(content_id)
+            positions, content_ids = groups.setdefault(topic, ([], []))
+            positions.append(position)
+            content_ids.append(content_id)
+        
+        for topic, (positions, content_ids) in groups.items():
+            shard = self.shards.shard(topic)
+            yield shard, np.asarray(positions, dtype=np.intp), shard.columns(content_ids)
+    
+    def _q_values(self, state: int, actions: np.ndarray) -> np.ndarray:
+        """Q-values of `actions` in `state`, gathered from their shards"""
+        q_values = np.empty(len(actions))
+        for shard, positions, columns in self._route(actions):
+            q_values[positions] = shard.q_table[state, columns]
+        return q_values
+    
+    def _q_matrix(self, states: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """(n_states, n_candidates) Q-values gathered shard by shard"""
+        columns = np.broadcast_to(np.atleast_2d(columns), (len(states), np.shape(columns)[-1]))
+        rows = np.broadcast_to(states[:, None], columns.shape)
+        unique_columns, inverse = np.unique(columns, return_inverse=True)
+        inverse = inverse.reshape(columns.shape)
+        
+        q_values = np.empty(columns.shape)
+        for shard, positions, local_columns in self._route(unique_columns):
+            local = np.full(len(unique_columns), -1, dtype=np.intp)
+            local[positions] = local_columns
+            selected = local[inverse] >= 0
+            q_values[selected] = shard.q_table[rows[selected], local[inverse][selected]]
+        return q_values
+    
+    def _apply_update(self, state: int, action: int, reward: float, next_state: int):
+        """Apply one Q-learning step inside the action's topic shard"""
+        for shard, _, columns in self._route(np.array([action])):
+            column = columns[0]
+            q_table = shard.q_table
+            aggregates = self._aggregates_for(q_table, shard.width, shard.topic)
+            current_q = q_table[state, column]
+            max_next_q = _max_q(q_table, shard.width, np.array([next_state]))[0]
+            new_q = current_q + self.learning_rate * (
+                reward + self.discount_factor * max_next_q - current_q
+            )
+            q_table[state, column] = new_q
+            aggregates.record(state, current_q, new_q)
+            shard.dirty = True
+    
+    def _apply_batch(self,
+                     states: np.ndarray,
+                     actions: np.ndarray,
+                     rewards: np.ndarray,
+                     next_states: np.ndarray,
+                     accumulate: bool = False):
+        """Apply one vectorized Q-learning step per touched shard"""
+        for shard, positions, columns in self._route(actions):
+            q_table = shard.q_table
+            aggregates = self._aggregates_for(q_table, shard.width, shard.topic)
+            cells, previous = _batched_q_update(
+                q_table, shard.width, states[positions], columns,
+                rewards[positions], next_states[positions],
+                self.learning_rate, self.discount_factor, accumulate
+            )
+            aggregates.record_many(cells // q_table.shape[1], previous, q_table.flat[cells])
+            shard.dirty = True
+    
+    def save_model(self, filepath: str = None):
+        """Save changed shards and the global registry/metadata to the shard directory"""
+        saved = [shard for shard in self.shards.loaded_shards() if shard.dirty]
+        self.capture_model()(filepath)
+        for shard in saved:
+            shard.remap()
+    
+    def capture_model(self) -> Callable[..., None]:
+        """Copy the changed shards, registry and metadata; returns a function that writes the copy"""
+        shard_writers = self.shards.capture()
+        content_ids = self.registry.content_ids
+        content_topics = {str(content_id): topic for content_id, topic in self.content_topics.items()}
+        metadata = {
+            'num_states': self.num_states,
+            'learning_rate': self.learning_rate,
+            'discount_factor': self.discount_factor,
+            'epsilon': self.epsilon,
+            'state_encoder': self.state_encoder.name,
+            'total_updates': self.total_updates,
+            'episode_rewards': list(self.episode_rewards)
+        }
+        
+        def write(filepath: str = None):
+            shard_dir = filepath or self.shards.shard_dir
+            os.makedirs(shard_dir, exist_ok=True)
+            for write_shard in shard_writers:
+                write_shard()
+            registry_path = os.path.join(shard_dir, "registry.npy")
+            np.save(registry_path + '.tmp.npy', content_ids)
+            os.replace(registry_path + '.tmp.npy', registry_path)
+            
+            topics_path = os.path.join(shard_dir, "topics.json")
+            with open(topics_path + '.tmp', 'w') as f:
+                json.dump(content_topics, f)
+            os.replace(topics_path + '.tmp', topics_path)
+            
+            meta_path = os.path.join(shard_dir, "meta.json")
+            with open(meta_path + '.tmp', 'w') as f:
+                json.dump(metadata, f, indent=2)
+            os.replace(meta_path + '.tmp', meta_path)
+        return write
+    
+    def load_model(self, filepath: str = None):
+        """Load the registry, topic map and metadata; shards themselves open lazily"""
+        shard_dir = filepath or self.shards.shard_dir
+        self.registry = ActionRegistry.load(os.path.join(shard_dir, "registry.npy"))
+        
+        topics_path = os.path.join(shard_dir, "topics.json")
+        if os.path.exists(topics_path):
+            with open(topics_path, 'r') as f:
+                saved_topics = {int(content_id): topic for content_id, topic in json.load(f).items()}
+            self.content_topics = {**saved_topics, **self.content_topics}
+        
+        meta_path = os.path.join(shard_dir, "meta.json")
+        if os.path.exists(meta_path):
+            metadata = _read_snapshot_metadata(meta_path)
+            if snapshot_encoder(metadata) != self.state_encoder.name:
+                # Shards open lazily from this directory, so they cannot be skipped here
+                raise ValueError(
+                    f"Shards in {shard_dir} were written with the {snapshot_encoder(metadata)} state encoder, "
+                    f"expected {self.state_encoder.name}; set STATE_ENCODER accordingly or move the shards"
+                )
+            self.total_updates = metadata.get('total_updates', 0)
+            self.episode_rewards = metadata.get('episode_rewards', [])
+    
+    def get_statistics(self) -> Dict:
+        """Get agent training statistics over the shards open in this process"""
+        shard_aggregates = [
+            self._aggregates_for(shard.q_table, shard.width, shard.topic)
+            for shard in self.shards.loaded_shards() if shard.width
+        ]
+        q_table_size = sum(aggregates.size for aggregates in shard_aggregates)
+        
+        return {
+            'total_sessions': self.total_updates,
+            'total_updates': self.total_updates,
+            'q_table_size': q_table_size,
+            'q_table_shape': [self.num_states, sum(aggregates.width for aggregates in shard_aggregates)],
+            'mean_q_value': sum(aggregates.sum for aggregates in shard_aggregates) / q_table_size if q_table_size else 0.0,
+            'max_q_value': max(aggregates.max for aggregates in shard_aggregates) if shard_aggregates else 0.0,
+            'learning_rate': self.learning_rate,
+            'epsilon': self.epsilon,
+            'exploration_rate': self.epsilon,
+            'avg_reward': self.reward_stats.mean,
+            'reward_std': self.reward_stats.std,
+            'loaded_topics': self.shards.loaded_topics
         }
 
 
+class SharedQLearningAgent(QLearningAgent):
+    """
+    Q-learning agent whose Q-table lives in shared memory
+    
+    Every worker process maps the same SharedQTable segment, so an answer
+    handled by any worker updates the one policy all of them serve from.
+    Updates hold the striped lock of the row they write; reads take no lock.
+    
+    The worker that creates the segment fills it from the last snapshot and
+    replays the update log; afterwards one worker (claim_persistence) logs
+    its updates and snapshots the whole shared table. Updates made by the
+    other workers become durable with the next snapshot.
+    """
+    
+    hot_swappable = False
+    replays_update_log = False
+    
+    def __init__(self,
+                 name: str = "rl_tutor_q_table",
+                 num_states: int = 100,
+                 max_actions: int = 16384,
+                 snapshot_path: str = None,
+                 log_path: str = None,
+                 lock_stripes: int = 16,
+                 learning_rate: float = None,
+                 discount_factor: float = None,
+                 epsilon: float = None):
+        """
+        Initialize shared-memory agent
+        
+        Args:
+            name: Shared-memory segment name
+            num_states: Number of discretized states (knowledge levels)
+            max_actions: Fixed action capacity of the segment
+            snapshot_path: Snapshot loaded when this process creates the segment
+            log_path: Update log replayed when this process creates the segment
+            lock_stripes: Row-lock stripes (0 disables locking; benchmarks only)
+            learning_rate: Learning rate (alpha)
+            discount_factor: Discount factor (gamma)
+            epsilon: Exploration rate
+        """
+        super().__init__(num_states, 1, learning_rate, discount_factor, epsilon)
+        self.shared = SharedQTable(name, num_states, max_actions, lock_stripes=lock_stripes)
+        self.policy = QPolicy(self.shared.q_table, self.shared.registry)
+        self.num_states, self.num_actions = self.q_table.shape
+        if self.state_encoder.num_states != self.num_states:
+            # Attached to a segment created with a different height
+            self.state_encoder = create_state_encoder(
+                self.state_encoder.name, self.num_states, bins=settings.STATE_BINS
+            )
+        
+        if self.shared.created:
+            try:
+                self._initialize(snapshot_path, log_path)
+            except Exception:
+                self.close(unlink=True)
+                raise
+            self.shared.mark_ready()
+    
+    def _initialize(self, snapshot_path: str, log_path: str):
+        """Fill a freshly created segment from the snapshot plus the log tail"""
+        if snapshot_path and os.path.exists(snapshot_path):
+            table = np.load(snapshot_path, mmap_mode='r')
+            metadata = _read_snapshot_metadata(snapshot_path.replace('.npy', '_meta.json'))
+            if not self._snapshot_compatible(snapshot_path, table.shape[0], metadata):
+                return
+            content_ids = ActionRegistry.load(snapshot_path.replace('.npy', '_actions.npy')).content_ids
+            width = min(len(content_ids), table.shape[1])
+            self.registry.register(content_ids[:width])
+            rows = min(table.shape[0], self.num_states)
+            self.q_table[:rows, :width] = table[:rows, :width]
+        
+        if log_path:
+            for record in read_log_records(log_path):
+                action = self.action_index(int(record['content_id']))
+                self._apply_update(
+                    int(record['state']), action, float(record['reward']), int(record['next_state'])
+                )
+    
+    def claim_persistence(self) -> bool:
+        """Only one live worker writes the update log and snapshots"""
+        return self.shared.claim_owner()
+    
+    def _ensure_capacity(self, size: int, policy: QPolicy = None):
+        """The segment cannot grow; registration fails once it is full"""
+    
+    def _apply_update(self, state: int, action: int, reward: float, next_state: int):
+        """Apply one Q-learning step while holding the row's stripe lock"""
+        with self.shared.rows_locked([state]):
+            super()._apply_update(state, action, reward, next_state)
+    
+    def _apply_batch(self,
+                     states: np.ndarray,
+                     actions: np.ndarray,
+                     rewards: np.ndarray,
+                     next_states: np.ndarray,
+                     accumulate: bool = False):
+        """Apply one vectorized Q-learning step while holding every touched row's lock"""
+        with self.shared.rows_locked(np.unique(states)):
+            super()._apply_batch(states, actions, rewards, next_states, accumulate)
+    
+    def _snapshot_table(self) -> np.ndarray:
+        """Only the registered columns; the rest of the fixed capacity is empty"""
+        return self.q_table[:, :max(len(self.registry), 1)]
+    
+    def q_table_aggregates(self) -> QTableAggregates:
+        """
+        Aggregates over the registered columns, scanned on every call
+        
+        Other worker processes write to the same segment, so aggregates
+        maintained by this process's own updates would drift from the table.
+        """
+        return QTableAggregates(self.q_table, max(len(self.registry), 1))
+    
+    def load_model(self, filepath: str = "models/q_table.npy"):
+        """Load metadata only; the table was filled when the segment was created"""
+        meta_path = filepath.replace('.npy', '_meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                metadata = json.load(f)
+                self.total_updates = metadata.get('total_updates', 0)
+                self.episode_rewards = metadata.get('episode_rewards', [])
+    
+    def close(self, unlink: bool = False) -> bool:
+        """
+        Detach from the shared segment
+        
+        Args:
+            unlink: Remove the segment once the last worker detaches, so the
+                next start rebuilds it from disk
+        
+        Returns:
+            True if this call removed the segment
+        """
+        self.policy = QPolicy(np.zeros((self.num_states, 1)), ActionRegistry())
+        return self.shared.close(unlink=unlink)
+
+
+def create_agent() -> QLearningAgent:
+    """Build the process-wide agent for the configured Q-table storage"""
+    if settings.Q_TABLE_SHARDED:
+        return ShardedQLearningAgent(shard_dir=settings.Q_TABLE_SHARD_DIR, num_states=settings.Q_TABLE_NUM_STATES)
+    if settings.Q_TABLE_SHARED_MEMORY:
+        return SharedQLearningAgent(
+            name=settings.Q_TABLE_SHM_NAME,
+            num_states=settings.Q_TABLE_NUM_STATES,
+            max_actions=settings.Q_TABLE_SHM_MAX_ACTIONS,
+            snapshot_path=settings.Q_TABLE_PATH,
+            log_path=settings.Q_TABLE_LOG_PATH,
+            lock_stripes=settings.Q_TABLE_LOCK_STRIPES
+        )
+    return QLearningAgent(num_states=settings.Q_TABLE_NUM_STATES)
+
+
 # Global agent instance
-agent = QLearningAgent()
+agent = create_agent()
 
 # Try to load existing model
 try:
-    agent.load_model()
+    agent.load_model() if settings.Q_TABLE_SHARDED else agent.load_model(settings.Q_TABLE_PATH)
 except:
     pass  # Use new Q-table if no saved model exists
@@ -0,0 +1,177 @@
+"""
+Write-Behind Buffer for LearningSession Inserts
+Request threads enqueue session rows; one background writer bulk-inserts them
+"""
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import LearningSession
+
+
+class SessionWriteBehind:
+    """
+    Bounded queue of LearningSession rows flushed in bulk by a background thread
+
+    - submit() puts one row dict on the queue; when the queue is full it
+      blocks for up to `enqueue_timeout` seconds (backpressure) and then
+      reports failure so the caller can write the row itself
+    - the writer inserts whatever is queued every `flush_interval` seconds,
+      or as soon as `flush_size` rows are waiting, with one executemany
+      INSERT and one commit per batch
+    - stop() drains the queue completely before returning
+
+    Rows reach the table up to `flush_interval` seconds after the answer,
+    and a process that dies without stop() loses what is still queued.
+    """
+
+    def __init__(self,
+                 session_factory: Callable,
+                 flush_interval: float = 0.05,
+                 flush_size: int = 500,
+                 max_queue: int = 10000,
+                 enqueue_timeout: float = 1.0):
+        """
+        Initialize SessionWriteBehind
+
+        Args:
+            session_factory: Callable returning a new database session (e.g. SessionLocal)
+            flush_interval: Seconds between bulk inserts
+            flush_size: Queued rows that trigger an early insert
+            max_queue: Rows held in memory before submit() blocks
+            enqueue_timeout: Seconds submit() waits for room before giving up
+        """
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._submit_lock = threading.Condition()
+        self._accepting = False
+        self._submitting = 0  # submit() calls between the _accepting check and their put
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters for monitoring and the throughput benchmark
+        self.batches_written = 0
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.rows_failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    @property
+    def pending(self) -> int:
+        """Rows queued but not written yet"""
+        return self._queue.qsize()
+
+    def submit(self, row: Dict) -> bool:
+        """
+        Queue one LearningSession row (column name -> value)
+
+        Returns:
+            True if queued; False if the writer is stopped or the queue
+            stayed full for enqueue_timeout seconds
+        """
+        # Only the check is made under the lock, so a submitter blocked on a
+        # full queue never holds up the others; stop() waits for the ones
+        # already past the check before its final drain
+        with self._submit_lock:
+            if not self._accepting:
+                return False
+            self._submitting += 1
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._submit_lock:
+                self.rows_rejected += 1
+            return False
+        finally:
+            with self._submit_lock:
+                self._submitting -= 1
+                if not self._submitting:
+                    self._submit_lock.notify_all()
+        if self._queue.qsize() >= self.flush_size:
+            self._wake.set()
+        return True
+
+    def _take(self, limit: int) -> List[Dict]:
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def flush(self) -> int:
+        """
+        Insert everything queued right now, `flush_size` rows per statement
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                rows = self._take(self.flush_size)
+                if not rows:
+                    return written
+                db = self.session_factory()
+                try:
+                    db.execute(insert(LearningSession), rows)
+                    db.commit()
+                    self.batches_written += 1
+                    self.rows_written += len(rows)
+                    written += len(rows)
+                except Exception as e:
+                    db.rollback()
+                    self.rows_failed += len(rows)
+                    print(f"[ERROR] Learning session write-behind dropped {len(rows)} rows: {e}")
+                finally:
+                    db.close()
+
+    def start(self):
+        """Start the background writer"""
+        self._stop.clear()
+        self._accepting = True
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Learning session flush failed: {e}")
+
+    def stop(self, timeout: float = None):
+        """Stop accepting rows and write everything still queued"""
+        with self._submit_lock:
+            self._accepting = False
+            # The writer is still running, so submitters waiting for queue room get it or time out
+            self._submit_lock.wait_for(lambda: not self._submitting)
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+
+# Global write-behind instance (started only when SESSION_WRITE_BEHIND is on)
+session_writer = SessionWriteBehind(
+    SessionLocal,
+    flush_interval=settings.SESSION_FLUSH_INTERVAL,
+    flush_size=settings.SESSION_FLUSH_SIZE,
+    max_queue=settings.SESSION_QUEUE_SIZE,
+    enqueue_timeout=settings.SESSION_ENQUEUE_TIMEOUT
+)
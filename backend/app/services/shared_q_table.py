@@ -0,0 +1,339 @@
+"""
+Shared-Memory Q-Table
+One Q-table and action registry shared by every uvicorn/gunicorn worker process
+"""
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from contextlib import contextmanager, nullcontext
+from multiprocessing import shared_memory
+from typing import Iterable, List
+from app.services.action_registry import ActionRegistry
+
+try:
+    import fcntl
+except ImportError:  # Windows: shared-memory mode is POSIX only
+    fcntl = None
+
+
+# Segment header (int64 slots)
+_READY, _NUM_STATES, _CAPACITY, _REGISTERED, _ATTACHED = range(5)
+_HEADER_SLOTS = 8
+_READY_MAGIC = 0x51544142  # "QTAB"
+_RETIRED_MAGIC = 0x44454144  # "DEAD": the last process detached and unlinked the name
+
+
+def _unlink_segment(segment: shared_memory.SharedMemory):
+    """Remove a segment opened by _open_segment"""
+    if getattr(segment, "_track", None) is None:
+        # Python < 3.13: unlink() also unregisters, so register it back first
+        from multiprocessing import resource_tracker
+        resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+def _open_segment(name: str, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    Create (size > 0) or attach to a segment without the resource tracker
+
+    The tracker unlinks every segment a process touched when that process
+    exits, which would tear the table away from the surviving workers.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=size > 0, size=size, track=False)
+    except TypeError:  # Python < 3.13 has no `track` argument
+        segment = shared_memory.SharedMemory(name=name, create=size > 0, size=size)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+class StripedLock:
+    """
+    Cross-process row locks
+
+    Rows are hashed onto `stripes` byte-range locks (fcntl.lockf) in one lock
+    file. POSIX record locks are held per process, so each stripe is also
+    guarded by a threading.Lock to serialize threads within a worker.
+    """
+
+    def __init__(self, path: str, stripes: int):
+        """
+        Initialize StripedLock
+
+        Args:
+            path: Lock file (created if missing)
+            stripes: Number of row stripes; one extra byte guards the registry
+        """
+        self.path = path
+        self.stripes = stripes
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_locks = [threading.Lock() for _ in range(stripes + 1)]
+
+    @contextmanager
+    def hold(self, stripes: Iterable[int]):
+        """Hold the given stripes (acquired in ascending order, so never deadlocks)"""
+        stripes = sorted(set(stripes))
+        acquired: List[int] = []
+        try:
+            for stripe in stripes:
+                self._thread_locks[stripe].acquire()
+                acquired.append(stripe)
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            yield
+        finally:
+            for stripe in reversed(acquired):
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+                self._thread_locks[stripe].release()
+
+    def rows(self, rows: Iterable[int]):
+        """Hold the stripes covering the given Q-table rows"""
+        return self.hold(int(row) % self.stripes for row in rows)
+
+    def registry(self):
+        """Hold the registry lock"""
+        return self.hold([self.stripes])
+
+    def close(self):
+        os.close(self._fd)
+
+
+class SharedActionRegistry(ActionRegistry):
+    """
+    ActionRegistry whose content IDs live in the shared segment
+
+    Each worker keeps its own dict for O(1) lookups and catches up with
+    IDs registered by other workers whenever it sees an unknown one.
+    """
+
+    def __init__(self, shared_ids: np.ndarray, header: np.ndarray, locks: StripedLock):
+        self._shared_ids = shared_ids
+        self._header = header
+        self._locks = locks
+        super().__init__()
+        self._sync()
+
+    def _sync_locked(self):
+        """Pull in IDs registered by other workers (caller holds self._lock)"""
+        registered = int(self._header[_REGISTERED])
+        for index in range(len(self._content_ids), registered):
+            content_id = int(self._shared_ids[index])
+            self._index[content_id] = index
+            self._content_ids.append(content_id)
+
+    def _sync(self):
+        if int(self._header[_REGISTERED]) != len(self._content_ids):
+            with self._lock:
+                self._sync_locked()
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._content_ids)
+
+    def content_id_at(self, index: int) -> int:
+        """Get the content ID that owns an action index"""
+        if index >= len(self._content_ids):
+            self._sync()
+        return self._content_ids[index]
+
+    @property
+    def content_ids(self) -> np.ndarray:
+        """Registered content IDs ordered by action index"""
+        self._sync()
+        return np.asarray(self._content_ids, dtype=np.int64)
+
+    def register(self, content_ids: Iterable[int]) -> int:
+        """
+        Register content IDs in the shared segment
+
+        Raises:
+            RuntimeError: If the segment has no free action columns left
+        """
+        content_ids = [int(c) for c in content_ids]
+        self._sync()
+        if all(c in self._index for c in content_ids):
+            return len(self._content_ids)
+
+        with self._lock, self._locks.registry():
+            self._sync_locked()
+            for content_id in content_ids:
+                if content_id in self._index:
+                    continue
+                registered = int(self._header[_REGISTERED])
+                if registered >= len(self._shared_ids):
+                    raise RuntimeError(
+                        f"Shared Q-table is full ({registered} actions); "
+                        "raise Q_TABLE_SHM_MAX_ACTIONS"
+                    )
+                # Publish the ID before the count so readers never see a gap
+                self._shared_ids[registered] = content_id
+                self._header[_REGISTERED] = registered + 1
+                self._index[content_id] = registered
+                self._content_ids.append(content_id)
+            return len(self._content_ids)
+
+
+class SharedQTable:
+    """
+    Q-table, action registry and header in one multiprocessing.shared_memory segment
+
+    Layout (int64/float64 slots):
+        header[8]                   ready flag, num_states, capacity, registered count,
+                                    attached processes
+        content_ids[capacity]       content ID of each action column
+        q_table[num_states, capacity]
+
+    The first process to open the name creates and initializes the segment;
+    the others attach and wait until it is marked ready. Capacity is fixed
+    at creation because a segment cannot be resized in place. The header
+    counts attached processes so that close(unlink=True) only removes the
+    name when the last one detaches.
+    """
+
+    def __init__(self,
+                 name: str,
+                 num_states: int,
+                 capacity: int,
+                 lock_stripes: int = 16,
+                 ready_timeout: float = 30.0):
+        """
+        Initialize SharedQTable
+
+        Args:
+            name: Segment name (shared by all workers of one deployment)
+            num_states: Number of discretized states (rows)
+            capacity: Maximum number of action columns
+            lock_stripes: Row-lock stripes; 0 disables locking (benchmarks only)
+            ready_timeout: Seconds an attaching worker waits for initialization
+        """
+        if fcntl is None:
+            raise RuntimeError("Shared-memory Q-table requires a POSIX platform")
+
+        self.name = name
+        self.locks = StripedLock(
+            os.path.join(tempfile.gettempdir(), f"{name}.locks"), max(lock_stripes, 1)
+        )
+        self.locking = lock_stripes > 0
+
+        size = 8 * (_HEADER_SLOTS + capacity + num_states * capacity)
+        while True:
+            try:
+                self.segment = _open_segment(name, size)
+                self.created = True
+            except FileExistsError:
+                self.segment = _open_segment(name)
+                self.created = False
+
+            self.header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self.segment.buf)
+            if self.created:
+                self.header[_NUM_STATES] = num_states
+                self.header[_CAPACITY] = capacity
+            elif not self._wait_ready(ready_timeout):
+                # Retired by the last process while we attached: create a fresh one
+                self.header = None
+                self.segment.close()
+                continue
+
+            with self.locks.registry():
+                if self.header[_READY] != _RETIRED_MAGIC:
+                    self.header[_ATTACHED] += 1
+                    break
+            self.header = None
+            self.segment.close()
+
+        if not self.created:
+            num_states = int(self.header[_NUM_STATES])
+            capacity = int(self.header[_CAPACITY])
+
+        offset = 8 * _HEADER_SLOTS
+        content_ids = np.ndarray((capacity,), dtype=np.int64, buffer=self.segment.buf, offset=offset)
+        offset += 8 * capacity
+        self.q_table = np.ndarray(
+            (num_states, capacity), dtype=np.float64, buffer=self.segment.buf, offset=offset
+        )
+        self.registry = SharedActionRegistry(content_ids, self.header, self.locks)
+        self._owner_fd = None
+
+    def _wait_ready(self, timeout: float) -> bool:
+        """Wait for the creator to finish; False if the segment was retired instead"""
+        deadline = time.monotonic() + timeout
+        while self.header[_READY] != _READY_MAGIC:
+            if self.header[_READY] == _RETIRED_MAGIC:
+                return False
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Shared Q-table '{self.name}' was never initialized")
+            time.sleep(0.01)
+        return True
+
+    @property
+    def attached(self) -> int:
+        """Processes currently attached to the segment"""
+        return int(self.header[_ATTACHED])
+
+    def mark_ready(self):
+        """Let attaching workers proceed (called by the creator after initialization)"""
+        self.header[_READY] = _READY_MAGIC
+
+    def rows_locked(self, rows: Iterable[int]):
+        """Context manager holding the row stripes for an update"""
+        if not self.locking:
+            return nullcontext()
+        return self.locks.rows(rows)
+
+    def claim_owner(self) -> bool:
+        """
+        Try to become the one worker that writes the update log and snapshots
+
+        Uses a non-blocking flock held until this process exits, so exactly
+        one live worker wins even when all of them were forked from a
+        preloading master.
+        """
+        if self._owner_fd is not None:
+            return True
+        fd = os.open(os.path.join(tempfile.gettempdir(), f"{self.name}.owner"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._owner_fd = fd
+        return True
+
+    def close(self, unlink: bool = False) -> bool:
+        """
+        Detach from the segment
+
+        Args:
+            unlink: Remove the segment name if this is the last attached
+                process (the next worker to start re-creates it from the
+                last snapshot); live segments are never unlinked
+
+        Returns:
+            True if the segment name was removed
+        """
+        if self.header is None:
+            return False  # already closed
+        with self.locks.registry():
+            self.header[_ATTACHED] -= 1
+            unlinked = unlink and int(self.header[_ATTACHED]) <= 0
+            if unlinked:
+                # Processes attaching right now see this and create a new segment
+                self.header[_READY] = _RETIRED_MAGIC
+                try:
+                    _unlink_segment(self.segment)
+                except FileNotFoundError:
+                    pass
+
+        self.registry = self.q_table = self.header = None
+        try:
+            self.segment.close()
+        except BufferError:
+            pass  # Views still alive elsewhere; the mapping goes away with them
+        self.locks.close()
+        if self._owner_fd is not None:
+            os.close(self._owner_fd)
+            self._owner_fd = None
+        return unlinked
+
@@ -0,0 +1,179 @@
+"""
+State Encoders for the Q-Learning Agent
+Map knowledge-state dictionaries to Q-table row indices, one student or a whole batch at a time
+"""
+import numpy as np
+from typing import Dict, Sequence, Union
+
+# Every StudentKnowledge topic score, in a fixed column order
+TOPIC_SCORE_KEYS = [
+    # Physics
+    'mechanics_score', 'electromagnetism_score', 'optics_score', 'modern_physics_score',
+    # Chemistry
+    'physical_chemistry_score', 'organic_chemistry_score', 'inorganic_chemistry_score',
+    # Mathematics
+    'algebra_score', 'calculus_score', 'coordinate_geometry_score',
+    'trigonometry_score', 'vectors_score', 'probability_score'
+]
+STATE_FEATURE_KEYS = TOPIC_SCORE_KEYS + ['preferred_difficulty']
+
+DEFAULT_SCORE = 0.5
+DEFAULT_DIFFICULTY = 2  # StudentKnowledge.preferred_difficulty default
+MAX_DIFFICULTY = 5
+
+# 64-bit Fibonacci hashing constant (2^64 / golden ratio)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+KnowledgeStates = Union[np.ndarray, Sequence[Dict]]
+
+
+def state_features(knowledge_states: KnowledgeStates) -> np.ndarray:
+    """
+    Stack knowledge states into an (n, 14) float matrix scaled to [0, 1]
+
+    Columns follow STATE_FEATURE_KEYS; preferred_difficulty (1-5) is
+    rescaled to [0, 1]. An ndarray is assumed to be in this layout already.
+
+    Args:
+        knowledge_states: List of knowledge-state dicts, or an (n, 14) array
+
+    Returns:
+        Feature matrix
+    """
+    if isinstance(knowledge_states, np.ndarray):
+        return np.clip(np.atleast_2d(knowledge_states).astype(np.float64), 0.0, 1.0)
+
+    features = np.array([
+        [state.get(key, DEFAULT_SCORE) for key in TOPIC_SCORE_KEYS]
+        + [state.get('preferred_difficulty', DEFAULT_DIFFICULTY)]
+        for state in knowledge_states
+    ], dtype=np.float64).reshape(-1, len(STATE_FEATURE_KEYS))
+    # Missing (None) values come through as NaN
+    features[:, :-1] = np.where(np.isnan(features[:, :-1]), DEFAULT_SCORE, features[:, :-1])
+    features[:, -1] = np.where(np.isnan(features[:, -1]), DEFAULT_DIFFICULTY, features[:, -1])
+    features[:, -1] = (features[:, -1] - 1) / (MAX_DIFFICULTY - 1)
+    return np.clip(features, 0.0, 1.0)
+
+
+class StateEncoder:
+    """Base class: subclasses implement encode_batch over a feature matrix"""
+
+    name = "base"
+
+    def __init__(self, num_states: int):
+        """
+        Initialize StateEncoder
+
+        Args:
+            num_states: Number of Q-table rows to encode into
+        """
+        self.num_states = num_states
+
+    def encode(self, knowledge_state: Dict) -> int:
+        """Encode one knowledge state to a row index"""
+        return int(self.encode_batch([knowledge_state])[0])
+
+    def encode_batch(self, knowledge_states: KnowledgeStates) -> np.ndarray:
+        """
+        Encode many knowledge states in one vectorized pass
+
+        Args:
+            knowledge_states: List of knowledge-state dicts, or an (n, 14) feature array
+
+        Returns:
+            Array of row indices in [0, num_states)
+        """
+        raise NotImplementedError
+
+
+class AverageScoreEncoder(StateEncoder):
+    """
+    Legacy encoder: the mean of four math scores, scaled to a row index
+
+    Kept so Q-tables trained before the multi-dimensional encoder still
+    line up with their rows (STATE_ENCODER=average).
+    """
+
+    name = "average"
+    KEYS = ['algebra_score', 'calculus_score', 'geometry_score', 'statistics_score']
+
+    def encode_batch(self, knowledge_states: KnowledgeStates) -> np.ndarray:
+        if isinstance(knowledge_states, np.ndarray):
+            raise TypeError("AverageScoreEncoder encodes knowledge-state dicts only")
+        scores = np.array(
+            [[state.get(key, DEFAULT_SCORE) for key in self.KEYS] for state in knowledge_states],
+            dtype=np.float64
+        ).reshape(-1, len(self.KEYS))
+        indices = (scores.mean(axis=1) * (self.num_states - 1)).astype(np.int64)
+        return np.clip(indices, 0, self.num_states - 1)
+
+
+class HashedBinEncoder(StateEncoder):
+    """
+    Bins every topic score and the preferred difficulty, then hashes the bin vector
+
+    Bin edges are precomputed once, so a batch of students is binned with a
+    single np.digitize over the (n, 14) feature matrix. The bin vector is
+    folded into one integer and spread over `num_states` rows with Fibonacci
+    hashing, so the Q-table height is chosen independently of the number of
+    topics; similar students share a row only when their bins collide.
+    """
+
+    name = "hashed_bins"
+
+    def __init__(self, num_states: int, bins: int = 3, difficulty_bins: int = MAX_DIFFICULTY):
+        """
+        Initialize HashedBinEncoder
+
+        Args:
+            num_states: Number of Q-table rows to hash into
+            bins: Equal-width bins per topic score
+            difficulty_bins: Bins for preferred_difficulty (5 keeps every level apart)
+        """
+        super().__init__(num_states)
+        self.bins = bins
+        self.difficulty_bins = difficulty_bins
+        self.topic_edges = np.linspace(0.0, 1.0, bins + 1)[1:-1]
+        self.difficulty_edges = np.linspace(0.0, 1.0, difficulty_bins + 1)[1:-1]
+
+        # Mixed-radix place value of each feature's bin in the folded code
+        radices = np.array([bins] * len(TOPIC_SCORE_KEYS) + [difficulty_bins], dtype=np.uint64)
+        self.place_values = np.concatenate(([1], np.cumprod(radices[:-1]))).astype(np.uint64)
+
+    def bin_codes(self, knowledge_states: KnowledgeStates) -> np.ndarray:
+        """(n, 14) matrix of per-feature bin numbers"""
+        features = state_features(knowledge_states)
+        codes = np.empty(features.shape, dtype=np.uint64)
+        codes[:, :-1] = np.digitize(features[:, :-1], self.topic_edges)
+        codes[:, -1] = np.digitize(features[:, -1], self.difficulty_edges)
+        return codes
+
+    def encode_batch(self, knowledge_states: KnowledgeStates) -> np.ndarray:
+        folded = self.bin_codes(knowledge_states) @ self.place_values
+        hashed = (folded * _GOLDEN) >> np.uint64(32)
+        return (hashed % np.uint64(self.num_states)).astype(np.int64)
+
+
+STATE_ENCODERS = {
+    AverageScoreEncoder.name: AverageScoreEncoder,
+    HashedBinEncoder.name: HashedBinEncoder
+}
+
+
+def create_state_encoder(name: str, num_states: int, bins: int = 3) -> StateEncoder:
+    """
+    Build a state encoder by name
+
+    Args:
+        name: One of STATE_ENCODERS
+        num_states: Number of Q-table rows
+        bins: Bins per topic score (hashed_bins only)
+
+    Returns:
+        StateEncoder instance
+    """
+    if name == HashedBinEncoder.name:
+        return HashedBinEncoder(num_states, bins=bins)
+    if name == AverageScoreEncoder.name:
+        return AverageScoreEncoder(num_states)
+    raise ValueError(f"Unknown state encoder '{name}' (expected one of {sorted(STATE_ENCODERS)})")
@@ -0,0 +1,187 @@
+"""
+Streaming Agent Statistics
+Fixed-size reward history and incrementally maintained Q-table aggregates, each readable in O(1)
+"""
+import numpy as np
+from typing import Iterable, List
+
+
+class RewardRingBuffer:
+    """
+    The last `capacity` rewards in a preallocated NumPy ring
+
+    Mean and variance of the window are kept with Welford's update; once
+    the ring is full, each append swaps the evicted reward for the new one
+    in the same O(1) step, so nothing is ever re-sliced or re-summed.
+    """
+
+    def __init__(self, capacity: int = 1000, rewards: Iterable[float] = ()):
+        """
+        Initialize RewardRingBuffer
+
+        Args:
+            capacity: Number of most recent rewards kept
+            rewards: Initial history, oldest first (only the last `capacity` are kept)
+        """
+        self.capacity = capacity
+        self._values = np.zeros(capacity)
+        self.reset(rewards)
+
+    def reset(self, rewards: Iterable[float] = ()):
+        """Replace the whole history"""
+        self._head = 0  # Next slot to write
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.extend(rewards)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, reward: float):
+        """Add one reward, evicting the oldest once the ring is full"""
+        reward = float(reward)
+        if self._count < self.capacity:
+            self._count += 1
+            delta = reward - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (reward - self._mean)
+        else:
+            evicted = float(self._values[self._head])
+            previous_mean = self._mean
+            self._mean += (reward - evicted) / self._count
+            self._m2 += (reward - evicted) * (reward - self._mean + evicted - previous_mean)
+            self._m2 = max(self._m2, 0.0)
+        self._values[self._head] = reward
+        self._head = (self._head + 1) % self.capacity
+
+    def extend(self, rewards: Iterable[float]):
+        """
+        Add a batch of rewards (oldest first)
+
+        The batch is merged into the running moments in one vectorized step
+        (Chan et al.'s pairwise update), after first removing the rewards it
+        evicts the same way.
+        """
+        batch = np.asarray(list(rewards) if not isinstance(rewards, np.ndarray) else rewards,
+                           dtype=np.float64).ravel()[-self.capacity:]
+        n = len(batch)
+        if n == 0:
+            return
+
+        evicted_count = max(self._count + n - self.capacity, 0)
+        if evicted_count:
+            evicted = self._values[(self._head - self._count + np.arange(evicted_count)) % self.capacity]
+            self._merge(evicted, sign=-1)
+        self._merge(batch, sign=1)
+
+        self._values[(self._head + np.arange(n)) % self.capacity] = batch
+        self._head = (self._head + n) % self.capacity
+
+    def _merge(self, batch: np.ndarray, sign: int):
+        """Add (sign=1) or remove (sign=-1) a batch's moments from the running ones"""
+        n_batch = len(batch)
+        batch_mean = float(batch.mean())
+        batch_m2 = float(((batch - batch_mean) ** 2).sum())
+        if sign > 0:
+            total = self._count + n_batch
+            delta = batch_mean - self._mean
+            self._m2 += batch_m2 + delta * delta * self._count * n_batch / total
+            self._mean += delta * n_batch / total
+        else:
+            total = self._count - n_batch
+            if total <= 0:
+                self._count, self._mean, self._m2 = 0, 0.0, 0.0
+                return
+            remaining_mean = (self._mean * self._count - batch_mean * n_batch) / total
+            delta = batch_mean - remaining_mean
+            self._m2 = max(self._m2 - batch_m2 - delta * delta * total * n_batch / self._count, 0.0)
+            self._mean = remaining_mean
+        self._count = total
+
+    @property
+    def mean(self) -> float:
+        """Mean of the rewards in the window (0.0 when empty)"""
+        return self._mean if self._count else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Population variance of the rewards in the window"""
+        return self._m2 / self._count if self._count else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    def values(self) -> np.ndarray:
+        """Rewards in the window, oldest first"""
+        start = (self._head - self._count) % self.capacity
+        return self._values[(start + np.arange(self._count)) % self.capacity]
+
+    def tolist(self) -> List[float]:
+        return self.values().tolist()
+
+
+class QTableAggregates:
+    """
+    Running sum and max of a Q-table (optionally only its first `width` columns)
+
+    Writers report each cell they change; the sum moves by the delta and a
+    per-row max array is patched, so reading mean/max is O(1). A row's max
+    is rescanned only when the write lowered the value that held it.
+    """
+
+    def __init__(self, q_table: np.ndarray, width: int = None):
+        """
+        Initialize QTableAggregates with one full scan of the table
+
+        Args:
+            q_table: Table to aggregate
+            width: Aggregate only columns [0, width) (default: every column)
+        """
+        self.q_table = q_table
+        self.width = q_table.shape[1] if width is None else width
+        self.size = q_table.shape[0] * self.width
+        view = q_table[:, :self.width]
+        self.sum = float(view.sum()) if self.size else 0.0
+        self.row_max = view.max(axis=1) if self.size else np.zeros(q_table.shape[0])
+        self._max_row = int(np.argmax(self.row_max)) if len(self.row_max) else 0
+        self.max = float(self.row_max[self._max_row]) if self.size else 0.0
+
+    def tracks(self, q_table: np.ndarray, width: int = None) -> bool:
+        """Whether these aggregates describe `q_table` (same array, same width)"""
+        return self.q_table is q_table and self.width == (q_table.shape[1] if width is None else width)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.size if self.size else 0.0
+
+    def record(self, row: int, old: float, new: float):
+        """Account for one cell in `row` changing from `old` to `new`"""
+        self.sum += new - old
+        if new >= self.row_max[row]:
+            self.row_max[row] = new
+        elif old >= self.row_max[row]:
+            self.row_max[row] = self.q_table[row, :self.width].max()
+        self._refresh_max(row, self.row_max[row])
+
+    def record_many(self, rows: np.ndarray, old: np.ndarray, new: np.ndarray):
+        """Account for a batch of distinct cells changing from `old` to `new`"""
+        if len(rows) == 0:
+            return
+        self.sum += float(np.sum(new - old))
+        lowered = (new < old) & (old >= self.row_max[rows])
+        np.maximum.at(self.row_max, rows, new)
+        if lowered.any():
+            rescan = np.unique(rows[lowered])
+            self.row_max[rescan] = self.q_table[rescan, :self.width].max(axis=1)
+        best = rows[np.argmax(self.row_max[rows])]
+        self._refresh_max(int(best), self.row_max[best])
+
+    def _refresh_max(self, row: int, row_max: float):
+        if row_max >= self.max:
+            self.max, self._max_row = float(row_max), row
+        elif self.row_max[self._max_row] < self.max:
+            # The row holding the global max was lowered
+            self._max_row = int(np.argmax(self.row_max))
+            self.max = float(self.row_max[self._max_row])
@@ -0,0 +1,339 @@
+"""
+Bulk Student Onboarding
+Streams CSV/JSONL student records into Student and StudentKnowledge rows in large batches
+"""
+import csv
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.models import Student, StudentKnowledge
+from app.models.schemas import StudentCreate
+from app.services.student_model import StudentModelService
+
+FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 100
+
+
+async def aiter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks (e.g. a request body) into decoded lines without line endings"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+class RecordParser:
+    """
+    Incremental CSV or JSONL parser: feed() one line, get (line number, record) back
+
+    CSV input needs a header row naming the columns (username, email,
+    password, full_name); quoted fields must not span lines. Blank lines
+    are skipped. A line that cannot be parsed yields a record of None.
+    """
+
+    def __init__(self, format: str):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown import format '{format}' (expected one of {', '.join(FORMATS)})")
+        self.format = format
+        self.line_number = 0
+        self._header: Optional[List[str]] = None
+
+    def feed(self, line: str) -> Optional[Tuple[int, Optional[Dict]]]:
+        self.line_number += 1
+        if not line.strip():
+            return None
+        if self.format == "jsonl":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return self.line_number, None
+            return self.line_number, record if isinstance(record, dict) else None
+
+        fields = next(csv.reader([line]))
+        if self._header is None:
+            self._header = [field.strip().lower() for field in fields]
+            return None
+        if len(fields) != len(self._header):
+            return self.line_number, None
+        return self.line_number, dict(zip(self._header, fields))
+
+
+class StudentImporter:
+    """
+    Creates students in chunks of `chunk_size` records
+
+    Per chunk: rows are validated against StudentCreate, duplicates within
+    the import are dropped, one set-based query finds usernames/emails
+    that already exist, the remaining passwords are hashed in parallel
+    across the process pool, and Student plus StudentKnowledge rows are
+    written with two executemany INSERTs and a single commit.
+    """
+
+    def __init__(self,
+                 db: Session,
+                 chunk_size: int = 1000,
+                 executor: Optional[Executor] = None,
+                 hash_password: Callable[[str], str] = get_password_hash):
+        """
+        Initialize StudentImporter
+
+        Args:
+            db: Database session
+            chunk_size: Records validated, hashed and inserted together
+            executor: Pool the password hashes are spread over (None hashes inline)
+            hash_password: Picklable password hashing function
+        """
+        self.db = db
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.hash_password = hash_password
+        self._chunk: List[Tuple[int, Dict]] = []
+        self._seen_usernames = set()
+        self._seen_emails = set()
+        template = StudentModelService.new_knowledge(0)
+        self._knowledge_template = {
+            column.key: getattr(template, column.key)
+            for column in StudentKnowledge.__table__.columns
+            if column.key not in ("id", "student_id") and getattr(template, column.key) is not None
+        }
+
+        # Report
+        self.created = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.chunks = 0
+        self.errors: List[Dict] = []
+
+    def _reject(self, line: int, reason: str, duplicate: bool = False):
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'reason': reason})
+
+    def add(self, line: int, record: Optional[Dict]) -> bool:
+        """
+        Queue one parsed record
+
+        Returns:
+            True when the chunk is full and flush() should be called
+        """
+        if record is None:
+            self._reject(line, "unparseable record")
+        else:
+            self._chunk.append((line, record))
+        return len(self._chunk) >= self.chunk_size
+
+    def _validate(self, chunk) -> List[Tuple[int, StudentCreate]]:
+        valid = []
+        for line, record in chunk:
+            try:
+                student = StudentCreate.model_validate(
+                    {key: value for key, value in record.items() if value not in ("", None)}
+                )
+            except ValidationError as e:
+                reasons = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]
+                self._reject(line, "; ".join(reasons))
+                continue
+            if not student.username.strip() or not student.password:
+                self._reject(line, "username and password are required")
+                continue
+            if student.username in self._seen_usernames or student.email in self._seen_emails:
+                self._reject(line, "duplicate username or email in import", duplicate=True)
+                continue
+            self._seen_usernames.add(student.username)
+            self._seen_emails.add(student.email)
+            valid.append((line, student))
+        return valid
+
+    def _drop_existing(self, valid: List[Tuple[int, StudentCreate]]) -> List[Tuple[int, StudentCreate]]:
+        if not valid:
+            return valid
+        usernames = [student.username for _, student in valid]
+        emails = [student.email for _, student in valid]
+        existing_usernames, existing_emails = set(), set()
+        for username, email in self.db.execute(
+            select(Student.username, Student.email).where(
+                or_(Student.username.in_(usernames), Student.email.in_(emails))
+            )
+        ):
+            existing_usernames.add(username)
+            existing_emails.add(email)
+
+        remaining = []
+        for line, student in valid:
+            if student.username in existing_usernames:
+                self._reject(line, "username already taken", duplicate=True)
+            elif student.email in existing_emails:
+                self._reject(line, "email already registered", duplicate=True)
+            else:
+                remaining.append((line, student))
+        return remaining
+
+    def _hash(self, passwords: List[str]) -> List[str]:
+        if self.executor is None:
+            return [self.hash_password(password) for password in passwords]
+        return list(self.executor.map(self.hash_password, passwords))
+
+    def _insert(self, students: List[Tuple[int, StudentCreate]], hashes: List[str]):
+        rows = [
+            {'username': student.username, 'email': student.email,
+             'hashed_password': hashed, 'full_name': student.full_name}
+            for (_, student), hashed in zip(students, hashes)
+        ]
+        ids = self.db.execute(insert(Student).returning(Student.id), rows).scalars().all()
+        self.db.execute(insert(StudentKnowledge), [
+            {**self._knowledge_template, 'student_id': student_id} for student_id in ids
+        ])
+        self.db.commit()
+        self.created += len(ids)
+
+    def flush(self):
+        """Validate, de-duplicate, hash and insert the buffered chunk"""
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+        self.chunks += 1
+        students = self._drop_existing(self._validate(chunk))
+        if not students:
+            return
+        hashes = self._hash([student.password for _, student in students])
+        hashed = {student.username: hashed for (_, student), hashed in zip(students, hashes)}
+        while students:
+            try:
+                self._insert(students, [hashed[student.username] for _, student in students])
+                return
+            except IntegrityError:
+                # Students registered concurrently: report them as duplicates and insert the rest
+                self.db.rollback()
+                remaining = self._drop_existing(students)
+                if len(remaining) == len(students):
+                    # The conflicting rows are not visible yet (uncommitted elsewhere); skip the chunk
+                    for line, _ in remaining:
+                        self._reject(line, "username or email registered concurrently", duplicate=True)
+                    return
+                students = remaining
+
+    def report(self) -> Dict:
+        """Counts of created, duplicate and invalid records, with the first errors by line"""
+        return {
+            'created': self.created,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'chunks': self.chunks,
+            'errors': self.errors
+        }
+
+
+class ImportBusy(RuntimeError):
+    """Raised when more bulk imports are running than the admission limit allows"""
+
+
+class HashingPool:
+    """
+    Process pool shared by every bulk import in this process
+
+    The pool is created on first use and kept until shutdown(), so an
+    import neither spawns nor tears down worker processes. At most
+    `max_imports` imports may hold it at once; admit() raises ImportBusy
+    beyond that instead of queueing more chunks behind the running ones.
+    """
+
+    def __init__(self, workers: int = 0, max_imports: int = 1):
+        """
+        Initialize HashingPool
+
+        Args:
+            workers: Worker processes (0: one per CPU core)
+            max_imports: Imports allowed to hash at the same time
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_imports = max_imports
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        """Imports holding the pool right now"""
+        return self._active
+
+    @contextmanager
+    def admit(self) -> Iterator[ProcessPoolExecutor]:
+        """Hold the shared executor for one import, or raise ImportBusy"""
+        with self._lock:
+            if self._active >= self.max_imports:
+                raise ImportBusy(f"{self._active} student imports running")
+            self._active += 1
+            if self._executor is None:
+                # spawn: workers must not inherit the API process's threads and locks
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            executor = self._executor
+        try:
+            yield executor
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def import_students(db: Session,
+                    lines: Iterable[str],
+                    format: str = "csv",
+                    chunk_size: int = 1000,
+                    workers: int = 0) -> Dict:
+    """
+    Import students from CSV or JSONL lines
+
+    Args:
+        db: Database session
+        lines: Input lines (e.g. an open file)
+        format: "csv" (with header row) or "jsonl"
+        chunk_size: Records per uniqueness query and insert batch
+        workers: Hashing processes (0: one per CPU core)
+
+    Returns:
+        Import report (see StudentImporter.report)
+    """
+    parser = RecordParser(format)
+    pool = HashingPool(workers)
+    try:
+        with pool.admit() as executor:
+            importer = StudentImporter(db, chunk_size=chunk_size, executor=executor)
+            for line in lines:
+                parsed = parser.feed(line.rstrip("\r\n"))
+                if parsed is not None and importer.add(*parsed):
+                    importer.flush()
+            importer.flush()
+    finally:
+        pool.shutdown()
+    return importer.report()
+
+
+# Global pool for imports through the API
+import_pool = HashingPool(
+    workers=settings.STUDENT_IMPORT_HASH_WORKERS,
+    max_imports=settings.STUDENT_IMPORT_MAX_CONCURRENT
+)
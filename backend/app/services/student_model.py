@@ -21,7 +21,24 @@ class StudentModelService:
         Returns:
             StudentKnowledge object
         """
-        knowledge = StudentKnowledge(
+        knowledge = StudentModelService.new_knowledge(student_id)
+        db.add(knowledge)
+        db.commit()
+        db.refresh(knowledge)
+        return knowledge
+    
+    @staticmethod
+    def new_knowledge(student_id: int) -> StudentKnowledge:
+        """
+        Build (but do not add) the initial knowledge row for a student
+        
+        Args:
+            student_id: Student ID
+        
+        Returns:
+            Transient StudentKnowledge object
+        """
+        return StudentKnowledge(
             student_id=student_id,
             # Physics topics
             mechanics_score=0.5,
@@ -46,9 +63,30 @@ class StudentModelService:
             preferred_difficulty=2,
             learning_style="balanced"
         )
-        db.add(knowledge)
-        db.commit()
-        db.refresh(knowledge)
+    
+    @staticmethod
+    def load_knowledge(db: Session, student_id: int) -> StudentKnowledge:
+        """
+        Load the student's knowledge row for a unit of work, without committing
+        
+        A missing row is created and added to the session; it is written
+        by the caller's commit together with everything else.
+        
+        Args:
+            db: Database session
+            student_id: Student ID
+        
+        Returns:
+            StudentKnowledge object
+        """
+        knowledge = db.query(StudentKnowledge).filter(
+            StudentKnowledge.student_id == student_id
+        ).first()
+        
+        if not knowledge:
+            knowledge = StudentModelService.new_knowledge(student_id)
+            db.add(knowledge)
+        
         return knowledge
     
     @staticmethod
@@ -70,6 +108,19 @@ class StudentModelService:
         if not knowledge:
             knowledge = StudentModelService.initialize_knowledge(db, student_id)
         
+        return StudentModelService.knowledge_to_state(knowledge)
+    
+    @staticmethod
+    def knowledge_to_state(knowledge: StudentKnowledge) -> Dict:
+        """
+        Convert a loaded StudentKnowledge row to the knowledge state dictionary
+        
+        Args:
+            knowledge: StudentKnowledge object
+        
+        Returns:
+            Knowledge state dictionary
+        """
         return {
             # Physics
             'mechanics_score': knowledge.mechanics_score,
@@ -123,6 +174,32 @@ class StudentModelService:
         if not knowledge:
             knowledge = StudentModelService.initialize_knowledge(db, student_id)
         
+        StudentModelService.apply_interaction(knowledge, topic, is_correct, difficulty, time_spent)
+        
+        db.commit()
+        db.refresh(knowledge)
+        
+        return knowledge
+    
+    @staticmethod
+    def apply_interaction(knowledge: StudentKnowledge,
+                          topic: str,
+                          is_correct: bool,
+                          difficulty: int,
+                          time_spent: float) -> StudentKnowledge:
+        """
+        Apply one learning interaction to a knowledge row in memory (no database access)
+        
+        Args:
+            knowledge: StudentKnowledge object to update
+            topic: Topic of content (algebra, calculus, etc.)
+            is_correct: Whether answer was correct
+            difficulty: Content difficulty (1-5)
+            time_spent: Time spent on content
+        
+        Returns:
+            The same StudentKnowledge object
+        """
         # Update attempt counters
         knowledge.total_attempts += 1
         if is_correct:
@@ -173,9 +250,6 @@ class StudentModelService:
         else:
             knowledge.average_time = (knowledge.average_time * 0.9 + time_spent * 0.1)
         
-        db.commit()
-        db.refresh(knowledge)
-        
         return knowledge
     
     @staticmethod
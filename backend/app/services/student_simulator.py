@@ -0,0 +1,420 @@
+"""
+Vectorized Synthetic Student Simulator
+Thousands of simulated students held in NumPy arrays, stepped all at once, for training and
+benchmarking the tutor policy without real users
+
+Usage (from backend/):
+    python -m app.services.student_simulator --students 10000 --steps 200 --items 500
+"""
+import argparse
+import time
+import numpy as np
+from typing import Dict, List
+from app.models.mastery import MASTERY_THRESHOLDS
+from app.services.content_bandit import ContentBandit, calculate_content_rewards
+from app.services.rl_agent import QLearningAgent, calculate_rewards
+from app.services.state_encoder import (
+    DEFAULT_DIFFICULTY, DEFAULT_SCORE, MAX_DIFFICULTY, TOPIC_SCORE_KEYS
+)
+
+TOPICS = [key[:-len('_score')] for key in TOPIC_SCORE_KEYS]
+
+# Content.content_type values that correspond to a ContentBandit arm
+CONTENT_TYPE_ARMS = {'question': 'quiz', 'lesson': 'text'}
+
+
+class SimulatedCatalog:
+    """Content items as parallel arrays (topic column, difficulty, bandit arm)"""
+
+    def __init__(self,
+                 content_ids: List[int],
+                 topics: List[str],
+                 difficulties: List[int],
+                 content_types: List[str] = None):
+        """
+        Initialize SimulatedCatalog
+
+        Args:
+            content_ids: Content IDs
+            topics: Content.topic of each item (topics without a knowledge score map to -1)
+            difficulties: Content.difficulty of each item (1-5)
+            content_types: Content.content_type of each item
+        """
+        self.content_ids = np.asarray(content_ids, dtype=np.int64)
+        self.topic_index = np.array([TOPICS.index(t) if t in TOPICS else -1 for t in topics], dtype=np.intp)
+        self.difficulty = np.array(
+            [DEFAULT_DIFFICULTY if d is None else d for d in difficulties], dtype=np.float64
+        )
+        content_types = content_types or ['question'] * len(self.content_ids)
+        self.arm_index = np.array([
+            ContentBandit.CONTENT_TYPES.index(CONTENT_TYPE_ARMS.get(t, t))
+            if CONTENT_TYPE_ARMS.get(t, t) in ContentBandit.CONTENT_TYPES else 1  # text
+            for t in content_types
+        ], dtype=np.intp)
+
+        # Content ID -> catalog position lookups via a sorted copy of the IDs
+        self._order = np.argsort(self.content_ids, kind='stable')
+        self._sorted_ids = self.content_ids[self._order]
+
+    def __len__(self) -> int:
+        return len(self.content_ids)
+
+    def positions_of(self, content_ids: np.ndarray) -> np.ndarray:
+        """Catalog positions of content IDs (every ID must be in the catalog)"""
+        return self._order[np.searchsorted(self._sorted_ids, content_ids)]
+
+    @classmethod
+    def synthetic(cls, num_items: int, seed: int = None) -> 'SimulatedCatalog':
+        """Random catalog spread over every knowledge topic and difficulty"""
+        rng = np.random.default_rng(seed)
+        return cls(
+            list(range(1, num_items + 1)),
+            [TOPICS[i] for i in rng.integers(len(TOPICS), size=num_items)],
+            rng.integers(1, MAX_DIFFICULTY + 1, size=num_items).tolist(),
+            [['question', 'lesson', 'quiz'][i] for i in rng.integers(3, size=num_items)]
+        )
+
+    @classmethod
+    def from_db(cls, db) -> 'SimulatedCatalog':
+        """Catalog of every Content row"""
+        from app.models.models import Content
+
+        rows = db.query(Content.id, Content.topic, Content.difficulty, Content.content_type).all()
+        return cls([r.id for r in rows], [r.topic for r in rows],
+                   [r.difficulty for r in rows], [r.content_type for r in rows])
+
+
+class StepResult:
+    """One simulated interaction per student, as parallel arrays"""
+
+    def __init__(self, **arrays):
+        self.content_positions = arrays['content_positions']
+        self.content_ids = arrays['content_ids']
+        self.is_correct = arrays['is_correct']
+        self.time_spent = arrays['time_spent']
+        self.engagement = arrays['engagement']
+        self.reward = arrays['reward']
+        self.content_reward = arrays['content_reward']
+        self.state_before = arrays['state_before']
+        self.state_after = arrays['state_after']
+
+    def __len__(self) -> int:
+        return len(self.content_ids)
+
+
+class StudentSimulator:
+    """
+    Synthetic students with latent topic skills, answering content of a catalog
+
+    Answers follow a three-parameter logistic (IRT) model on the 1-5
+    difficulty scale: ability = 1 + 4 * skill, and
+    P(correct) = guess + (1 - guess - slip) * sigmoid(discrimination * (ability - difficulty)).
+    Time on task grows with difficulty and each student's pace. Latent
+    skills grow fastest on content slightly above the student's ability.
+
+    The observable knowledge state (topic scores, accuracy, preferred
+    difficulty) is updated with the same rules as
+    StudentModelService.update_knowledge, so the agent sees what it would
+    see in production while the simulator keeps the ground truth.
+    """
+
+    def __init__(self,
+                 num_students: int,
+                 catalog: SimulatedCatalog,
+                 seed: int = None,
+                 guess: float = 0.2,
+                 slip: float = 0.05,
+                 discrimination: float = 1.5,
+                 learning_gain: float = 0.02,
+                 base_time: float = 20.0):
+        """
+        Initialize StudentSimulator
+
+        Args:
+            num_students: Number of simulated students
+            catalog: Content the students answer
+            seed: Random seed (fixes the population and every step)
+            guess: Probability of a correct guess far above ability
+            slip: Probability of a wrong answer far below ability
+            discrimination: Steepness of the answer curve around ability == difficulty
+            learning_gain: Latent skill growth per well-matched interaction
+            base_time: Median seconds per difficulty level
+        """
+        self.num_students = num_students
+        self.catalog = catalog
+        self.rng = np.random.default_rng(seed)
+        self.guess = guess
+        self.slip = slip
+        self.discrimination = discrimination
+        self.learning_gain = learning_gain
+        self.base_time = base_time
+        n, topics = num_students, len(TOPIC_SCORE_KEYS)
+
+        # Latent ground truth
+        self.skills = self.rng.beta(2.0, 2.5, size=(n, topics))
+        self.pace = self.rng.lognormal(0.0, 0.3, size=n)
+        self.arm_affinity = self.rng.beta(2.0, 2.0, size=(n, len(ContentBandit.CONTENT_TYPES)))
+
+        # Observable knowledge state (StudentKnowledge defaults)
+        self.scores = np.full((n, topics), DEFAULT_SCORE)
+        self.preferred_difficulty = np.full(n, DEFAULT_DIFFICULTY, dtype=np.int64)
+        self.total_attempts = np.zeros(n, dtype=np.int64)
+        self.correct_answers = np.zeros(n, dtype=np.int64)
+
+        # Per-topic attempt counts for mastery levels
+        self.topic_attempts = np.zeros((n, topics), dtype=np.int64)
+        self.topic_correct = np.zeros((n, topics), dtype=np.int64)
+
+        self.interactions = 0
+        self._students = np.arange(n)
+
+    @property
+    def accuracy_rate(self) -> np.ndarray:
+        return np.divide(self.correct_answers, self.total_attempts,
+                         out=np.zeros(self.num_students), where=self.total_attempts > 0)
+
+    def knowledge_features(self) -> np.ndarray:
+        """(n_students, 14) observable state in state_encoder.state_features layout"""
+        features = np.empty((self.num_students, len(TOPIC_SCORE_KEYS) + 1))
+        features[:, :-1] = self.scores
+        features[:, -1] = (self.preferred_difficulty - 1) / (MAX_DIFFICULTY - 1)
+        return features
+
+    def knowledge_states(self) -> List[Dict]:
+        """Observable state as knowledge-state dicts (slow; for dict-only consumers)"""
+        accuracy = self.accuracy_rate
+        return [
+            {**dict(zip(TOPIC_SCORE_KEYS, self.scores[i].tolist())),
+             'preferred_difficulty': int(self.preferred_difficulty[i]),
+             'accuracy_rate': float(accuracy[i]),
+             'total_attempts': int(self.total_attempts[i]),
+             'correct_answers': int(self.correct_answers[i])}
+            for i in range(self.num_students)
+        ]
+
+    def _topic_skill(self, topic_index: np.ndarray) -> np.ndarray:
+        """Latent skill of every student on the given topic columns (mean skill for -1)"""
+        known = topic_index >= 0
+        return np.where(known, self.skills[self._students, np.maximum(topic_index, 0)], self.skills.mean(axis=1))
+
+    def answer_probability(self, content_positions: np.ndarray) -> np.ndarray:
+        """P(correct) of every student on the content at `content_positions`"""
+        ability = 1 + 4 * self._topic_skill(self.catalog.topic_index[content_positions])
+        margin = self.discrimination * (ability - self.catalog.difficulty[content_positions])
+        return self.guess + (1 - self.guess - self.slip) / (1 + np.exp(-margin))
+
+    def step(self, content_positions: np.ndarray, arms: np.ndarray = None) -> StepResult:
+        """
+        Every student answers one item
+
+        Args:
+            content_positions: (n_students,) catalog position served to each student
+            arms: Optional (n_students,) ContentBandit arm index each item is
+                presented as (default: the item's own content type)
+
+        Returns:
+            StepResult with outcomes, both rewards and the states around the step
+        """
+        positions = np.asarray(content_positions, dtype=np.intp)
+        topic = self.catalog.topic_index[positions]
+        difficulty = self.catalog.difficulty[positions]
+        arms = self.catalog.arm_index[positions] if arms is None else np.asarray(arms, dtype=np.intp)
+        state_before = self.knowledge_features()
+        accuracy_before = self.accuracy_rate
+
+        ability = 1 + 4 * self._topic_skill(topic)
+        p_correct = self.answer_probability(positions)
+        is_correct = self.rng.random(self.num_students) < p_correct
+        time_spent = (self.base_time * difficulty * self.pace * np.where(is_correct, 0.8, 1.0)
+                      * self.rng.lognormal(0.0, 0.25, size=self.num_students))
+        engagement = np.clip(
+            self.arm_affinity[self._students, arms] + self.rng.normal(0.0, 0.1, size=self.num_students), 0.0, 1.0
+        )
+
+        # Both production reward functions, vectorized; student_level is the
+        # pre-answer accuracy, as in /session/answer
+        reward = calculate_rewards(is_correct, time_spent, difficulty, accuracy_before)
+        content_reward = calculate_content_rewards(is_correct, time_spent, engagement)
+
+        # Latent learning peaks just above current ability
+        known = topic >= 0
+        rows, columns = self._students[known], topic[known]
+        zone = np.exp(-0.5 * (difficulty[known] - ability[known] - 0.5) ** 2)
+        gain = self.learning_gain * zone * np.where(is_correct[known], 1.0, 0.5)
+        self.skills[rows, columns] += gain * (1 - self.skills[rows, columns])
+
+        self._observe(rows, columns, is_correct, difficulty, known)
+
+        self.interactions += self.num_students
+        return StepResult(
+            content_positions=positions,
+            content_ids=self.catalog.content_ids[positions],
+            is_correct=is_correct,
+            time_spent=time_spent,
+            engagement=engagement,
+            reward=reward,
+            content_reward=content_reward,
+            state_before=state_before,
+            state_after=self.knowledge_features()
+        )
+
+    def _observe(self,
+                 rows: np.ndarray,
+                 columns: np.ndarray,
+                 is_correct: np.ndarray,
+                 difficulty: np.ndarray,
+                 known: np.ndarray):
+        """Vectorized StudentModelService.update_knowledge for every student"""
+        self.total_attempts += 1
+        self.correct_answers += is_correct
+        accuracy = self.accuracy_rate
+
+        score_change = 0.2 * np.where(is_correct[known], 1.0, -0.3)
+        self.scores[rows, columns] = np.clip(self.scores[rows, columns] + score_change, 0.0, 1.0)
+        self.topic_attempts[rows, columns] += 1
+        self.topic_correct[rows, columns] += is_correct[known]
+
+        at_level = difficulty == self.preferred_difficulty
+        harder = is_correct & at_level & (accuracy > 0.75)
+        easier = ~is_correct & (difficulty <= self.preferred_difficulty) & (accuracy < 0.50)
+        self.preferred_difficulty = np.clip(self.preferred_difficulty + harder - easier, 1, MAX_DIFFICULTY)
+
+    def mastery_levels(self) -> np.ndarray:
+        """(n_students, n_topics) StudentMastery level (0-5) from per-topic attempts"""
+        accuracy = np.divide(100 * self.topic_correct, self.topic_attempts,
+                             out=np.zeros(self.topic_attempts.shape), where=self.topic_attempts > 0)
+        conditions = [(accuracy >= min_accuracy) & (self.topic_attempts >= min_attempts)
+                      for _, min_accuracy, min_attempts in MASTERY_THRESHOLDS]
+        levels = [level for level, _, _ in MASTERY_THRESHOLDS]
+        return np.select(conditions + [self.topic_attempts >= 1], levels + [1], 0)
+
+
+def run_policy(agent: QLearningAgent,
+               simulator: StudentSimulator,
+               steps: int,
+               epsilon: float = 0.1,
+               learn: bool = True) -> Dict:
+    """
+    Serve the agent's top recommendation to every student for `steps` rounds
+
+    Each round ranks the whole catalog for all students with one
+    recommend_top_k call, explores with probability `epsilon`, steps the
+    simulator and (with `learn`) applies every transition in one
+    batch_update. Any agent with recommend_top_k can be evaluated with
+    learn=False.
+
+    Returns:
+        Summary dictionary (mean reward, accuracy, throughput)
+    """
+    catalog = simulator.catalog
+    if learn:
+        agent.register_content(catalog.content_ids.tolist())
+    rewards, correct = 0.0, 0
+    started = time.perf_counter()
+
+    for _ in range(steps):
+        top_ids, _ = agent.recommend_top_k(simulator.knowledge_features(), catalog.content_ids, k=1)
+        positions = catalog.positions_of(top_ids[:, 0])
+        explore = simulator.rng.random(simulator.num_students) < epsilon
+        positions[explore] = simulator.rng.integers(len(catalog), size=int(explore.sum()))
+
+        result = simulator.step(positions)
+        if learn:
+            agent.batch_update(
+                agent.discretize_states(result.state_before),
+                agent.action_indices(result.content_ids),
+                result.reward,
+                agent.discretize_states(result.state_after),
+                accumulate=True
+            )
+            agent.reward_stats.extend(result.reward)
+        rewards += float(result.reward.sum())
+        correct += int(result.is_correct.sum())
+
+    elapsed = time.perf_counter() - started
+    interactions = steps * simulator.num_students
+    return {
+        'interactions': interactions,
+        'mean_reward': rewards / interactions if interactions else 0.0,
+        'accuracy': correct / interactions if interactions else 0.0,
+        'mean_latent_skill': float(simulator.skills.mean()),
+        'elapsed_seconds': round(elapsed, 3),
+        'interactions_per_minute': int(60 * interactions / elapsed) if elapsed else 0
+    }
+
+
+def run_bandit(simulator: StudentSimulator,
+               steps: int,
+               epsilon: float = 0.1,
+               content_positions: np.ndarray = None) -> Dict:
+    """
+    Run one ContentBandit per student, vectorized over the population
+
+    Arm values, pulls and rewards are (n_students, n_arms) arrays updated
+    with ContentBandit's epsilon-greedy selection and running average;
+    rewards come from calculate_content_reward.
+
+    Args:
+        simulator: Student population
+        steps: Rounds to run
+        epsilon: Exploration rate of every bandit
+        content_positions: Item served each round (default: uniformly random)
+
+    Returns:
+        Summary dictionary with the mean arm values and how often each
+        student's best learned arm matches its true best arm
+    """
+    n, num_arms = simulator.num_students, len(ContentBandit.CONTENT_TYPES)
+    values = np.full((n, num_arms), 0.5)
+    pulls = np.zeros((n, num_arms), dtype=np.int64)
+    totals = np.zeros((n, num_arms))
+    students = np.arange(n)
+    rng = simulator.rng
+
+    for _ in range(steps):
+        arms = np.argmax(values, axis=1)
+        explore = rng.random(n) < epsilon
+        arms[explore] = rng.integers(num_arms, size=int(explore.sum()))
+        positions = (rng.integers(len(simulator.catalog), size=n)
+                     if content_positions is None else content_positions)
+
+        result = simulator.step(positions, arms=arms)
+        pulls[students, arms] += 1
+        totals[students, arms] += result.content_reward
+        values[students, arms] = totals[students, arms] / pulls[students, arms]
+
+    return {
+        'interactions': steps * n,
+        'arm_values': dict(zip(ContentBandit.CONTENT_TYPES, values.mean(axis=0).round(4).tolist())),
+        'best_arm_found': float(np.mean(np.argmax(values, axis=1) == np.argmax(simulator.arm_affinity, axis=1)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the Q-learning policy on synthetic students")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--epsilon", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    catalog = SimulatedCatalog.synthetic(args.items, seed=args.seed)
+    agent = QLearningAgent()
+    training = run_policy(agent, StudentSimulator(args.students, catalog, seed=args.seed),
+                          args.steps, epsilon=args.epsilon)
+    evaluation = run_policy(agent, StudentSimulator(args.students, catalog, seed=args.seed + 1),
+                            args.steps, epsilon=0.0, learn=False)
+    baseline = run_policy(QLearningAgent(), StudentSimulator(args.students, catalog, seed=args.seed + 1),
+                          args.steps, epsilon=1.0, learn=False)
+
+    print(f"[OK] Trained on {training['interactions']} interactions "
+          f"({training['interactions_per_minute']:,} / min)")
+    print(f"[INFO] Greedy policy: mean reward {evaluation['mean_reward']:.3f}, "
+          f"accuracy {evaluation['accuracy']:.3f}, latent skill {evaluation['mean_latent_skill']:.3f}")
+    print(f"[INFO] Random policy: mean reward {baseline['mean_reward']:.3f}, "
+          f"accuracy {baseline['accuracy']:.3f}, latent skill {baseline['mean_latent_skill']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
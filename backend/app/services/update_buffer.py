@@ -0,0 +1,134 @@
+"""
+Buffered Online Q-Updates
+Request threads only append to a thread-local buffer; one flusher applies the
+buffered updates to the agent in vectorized batches
+"""
+import threading
+import numpy as np
+from collections import deque
+from typing import List, Optional
+
+
+class BufferedQUpdater:
+    """
+    Collects online Q-updates per thread and applies them in batches
+
+    - submit() appends one record to the calling thread's deque (no lock)
+    - a background thread drains every deque every `flush_interval`
+      seconds, or as soon as one deque holds `flush_size` records
+    - each drain is applied as one vectorized batch (repeated cells stepped
+      in order, as sequential updates would) inside a single short
+      critical section, which also owns total_updates/episode_rewards
+
+    deque.append and deque.popleft are atomic, so a record appended while
+    a drain is running is either taken by it or left for the next one.
+    """
+
+    def __init__(self, agent, flush_interval: float = 0.5, flush_size: int = 256):
+        """
+        Initialize BufferedQUpdater
+
+        Args:
+            agent: QLearningAgent to update
+            flush_interval: Seconds between background flushes
+            flush_size: Records in one thread's buffer that trigger an early flush
+        """
+        self.agent = agent
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._local = threading.local()
+        self._buffers: List[deque] = []
+        self._buffers_lock = threading.Lock()
+        self._apply_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters for monitoring and the stress benchmark
+        self.batches_applied = 0
+        self.updates_applied = 0
+
+    def _buffer(self) -> deque:
+        """The calling thread's buffer, created on its first submit"""
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = deque()
+            with self._buffers_lock:
+                self._buffers.append(buffer)
+            self._local.buffer = buffer
+            return buffer
+
+    def submit(self, state: int, content_id: int, reward: float, next_state: int):
+        """
+        Queue one Q-update (the only cost paid on the request path)
+
+        The action is queued as its content ID and mapped to a column when
+        the batch is applied, so a policy hot swap in between cannot send
+        it to the wrong column.
+        """
+        buffer = self._buffer()
+        buffer.append((state, content_id, reward, next_state))
+        if len(buffer) >= self.flush_size:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        """Updates queued but not applied yet"""
+        with self._buffers_lock:
+            return sum(len(buffer) for buffer in self._buffers)
+
+    def flush(self) -> int:
+        """
+        Drain every thread buffer and apply the records as one batch
+
+        Returns:
+            Number of updates applied
+        """
+        with self._apply_lock:
+            with self._buffers_lock:
+                buffers = list(self._buffers)
+
+            records = []
+            for buffer in buffers:
+                for _ in range(len(buffer)):
+                    records.append(buffer.popleft())
+            if not records:
+                return 0
+
+            states, content_ids, rewards, next_states = zip(*records)
+            self.agent.apply_buffered_updates(
+                np.array(states, dtype=np.intp),
+                np.array(content_ids, dtype=np.int64),
+                np.array(rewards, dtype=np.float64),
+                np.array(next_states, dtype=np.intp)
+            )
+            self.batches_applied += 1
+            self.updates_applied += len(records)
+            return len(records)
+
+    def start(self):
+        """Route the agent's online updates through this buffer and start flushing"""
+        self._stop.clear()
+        self.agent.update_buffer = self
+        self._thread = threading.Thread(target=self._run, name="q-update-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Buffered Q-update flush failed: {e}")
+
+    def stop(self):
+        """Detach from the agent and apply everything still queued"""
+        self.agent.update_buffer = None
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
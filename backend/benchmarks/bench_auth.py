@@ -0,0 +1,99 @@
+"""
+Authentication Load Test
+Steady-state students-table queries and latency per request for bearer-token and username-resolved
+endpoints with the principal cache disabled versus enabled.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth --requests 3000 --students 200
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import app.api.deps as deps
+import app.api.session as session_api
+from app.core.database import Base, get_db
+from app.core.security import create_access_token
+from app.models.models import Student
+from app.services.principal_cache import PrincipalCache
+from main import app as api
+
+
+def _run(cache: PrincipalCache, requests: int, students: int, workdir: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, name)}.db",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        db.bulk_insert_mappings(Student, [
+            {'id': i, 'username': f"s{i}", 'email': f"s{i}@x.io", 'hashed_password': "x"}
+            for i in range(1, students + 1)
+        ])
+        db.commit()
+
+    def override_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    api.dependency_overrides[get_db] = override_db
+    deps.principal_cache = session_api.principal_cache = cache
+    tokens = [create_access_token({"sub": f"s{i}"}) for i in range(1, students + 1)]
+
+    counts = {'students': 0}
+
+    def count(conn, cursor, statement, *args):
+        if "FROM students" in statement:
+            counts['students'] += 1
+
+    client = TestClient(api)
+
+    def request(i: int, student: int):
+        if i % 2 == 0:
+            response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {tokens[student]}"})
+        else:
+            response = client.get(f"/api/v1/session/progress?username=s{student + 1}")
+        assert response.status_code == 200, response.text
+
+    # Warm-up: every student logs in and checks progress once
+    for student in range(students):
+        request(0, student)
+        request(1, student)
+
+    event.listen(engine, "before_cursor_execute", count)
+    rng = np.random.default_rng(0)
+    latencies = np.empty(requests)
+    for i in range(requests):
+        student = int(rng.integers(students))
+        started = time.perf_counter()
+        request(i, student)
+        latencies[i] = time.perf_counter() - started
+
+    api.dependency_overrides.clear()
+    engine.dispose()
+    return counts['students'] / requests, latencies * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test authenticated endpoints")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--students", type=int, default=200)
+    args = parser.parse_args()
+
+    originals = deps.principal_cache, session_api.principal_cache
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, cache in [("uncached", PrincipalCache(max_items=0)), ("cached", PrincipalCache())]:
+            queries, latencies = _run(cache, args.requests, args.students, workdir, name)
+            print(f"[INFO] {name:<9s} students queries/request={queries:5.3f}  "
+                  f"p50={np.percentile(latencies, 50):6.2f} ms  p99={np.percentile(latencies, 99):6.2f} ms")
+    deps.principal_cache, session_api.principal_cache = originals
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Content Catalog Benchmark
+Latency of start_session's candidate generation: the per-request Content
+query (topic + difficulty window, full rows) versus the in-memory catalog index.
+
+Usage (from backend/):
+    python -m benchmarks.bench_content_catalog --items 1000 10000 50000
+"""
+import argparse
+import time
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+import app.models  # noqa: F401 - register all mappers
+from app.models.models import Content
+from app.services.content_catalog import ContentCatalog
+
+TOPICS = ["mechanics", "optics", "algebra", "calculus", "organic_chemistry", "probability"]
+
+
+def _latency_us(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return 1e6 * (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog candidate generation")
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for items in args.items:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.bulk_insert_mappings(Content, [
+            {'id': i, 'title': f"Q{i}", 'topic': TOPICS[int(rng.integers(len(TOPICS)))],
+             'difficulty': int(rng.integers(1, 6)), 'content_type': "question",
+             'question_text': "x" * 800, 'explanation': "y" * 800, 'correct_answer': "a"}
+            for i in range(1, items + 1)
+        ])
+        db.commit()
+
+        def query_rows():
+            rows = db.query(Content).filter(Content.topic == "optics", Content.difficulty.between(1, 4)).all()
+            db.expunge_all()
+            return [row.id for row in rows]
+
+        started = time.perf_counter()
+        catalog = ContentCatalog.build(db)
+        build_ms = 1e3 * (time.perf_counter() - started)
+
+        query_us = _latency_us(query_rows, args.repeats)
+        index_us = _latency_us(lambda: catalog.candidates("optics", difficulty_range=(1, 4)).tolist(),
+                               args.repeats * 100)
+        print(f"[INFO] {items:6d} items  query={query_us:10.1f} us  index={index_us:7.2f} us  "
+              f"(rebuild {build_ms:.1f} ms)")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Content Payload Benchmark
+Per-response cost of the served content item: loading the row, parsing its JSON columns and
+validating/serializing ContentResponse per request versus returning the cached bytes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_content_payloads --requests 20000 --items 2000
+"""
+import argparse
+import json
+import time
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+import app.models  # noqa: F401 - register all mappers
+from app.models.models import Content
+from app.models.schemas import ContentResponse
+from app.services.content_payloads import ContentPayloadCache, orjson
+
+
+def per_request_payload(db, content_id: int) -> bytes:
+    """What a response_model endpoint did for every request"""
+    content = db.get(Content, content_id)
+    if isinstance(content.options, str):
+        content.options = json.loads(content.options)
+    if isinstance(content.tags, str):
+        content.tags = json.loads(content.tags)
+    validated = ContentResponse.model_validate(content)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the content payload cache")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.bulk_insert_mappings(Content, [
+        {'id': i, 'title': f"Q{i}", 'topic': "algebra", 'difficulty': 1 + i % 5, 'content_type': "question",
+         'question_text': "x" * 800, 'explanation': "y" * 800, 'correct_answer': "a",
+         'options': json.dumps([f"option {k}" for k in range(4)]), 'tags': json.dumps(["t1", "t2"])}
+        for i in range(1, args.items + 1)
+    ])
+    db.commit()
+
+    rng = np.random.default_rng(0)
+    ids = rng.integers(1, args.items + 1, size=args.requests).tolist()
+    cache = ContentPayloadCache(max_items=args.items)
+
+    for name, fn in [("per-request", per_request_payload), ("cached", cache.get)]:
+        latencies = np.empty(args.requests)
+        for i, content_id in enumerate(ids):
+            started = time.perf_counter()
+            fn(db, content_id)
+            latencies[i] = time.perf_counter() - started
+            db.expunge_all()  # each request starts with a fresh session
+        latencies *= 1e6
+        print(f"[INFO] {name:<12s} p50={np.percentile(latencies, 50):8.1f} us  "
+              f"p99={np.percentile(latencies, 99):8.1f} us  mean={latencies.mean():8.1f} us")
+    print(f"[INFO] encoder={'orjson' if orjson is not None else 'json'}  cache hit rate="
+          f"{cache.hits / max(1, cache.hits + cache.misses):.3f}")
+
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Database Profile Benchmark
+Throughput, p99 latency and "database is locked" errors of a mixed read/write workload on a
+file SQLite database, with driver defaults versus the performance profile (WAL, synchronous=NORMAL,
+mmap, page cache, busy timeout, tuned pool).
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_profile --threads 16 --seconds 10 --write-ratio 0.2
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, create_db_engine
+import app.models  # noqa: F401 - register all mappers
+from app.models.models import Content, LearningSession, Student, StudentKnowledge
+from app.services.student_model import StudentModelService
+
+
+def _seed(factory, students: int, items: int):
+    with factory() as db:
+        db.bulk_insert_mappings(Student, [
+            {'id': i, 'username': f"s{i}", 'email': f"s{i}@x.io", 'hashed_password': "x"}
+            for i in range(1, students + 1)
+        ])
+        db.bulk_insert_mappings(Content, [
+            {'id': i, 'title': f"Q{i}", 'topic': "algebra", 'difficulty': 1 + i % 5, 'content_type': "question"}
+            for i in range(1, items + 1)
+        ])
+        for i in range(1, students + 1):
+            db.add(StudentModelService.new_knowledge(i))
+        db.commit()
+
+
+def _worker(factory, students, items, write_ratio, stop, seed, results):
+    rng = random.Random(seed)
+    latencies, writes, errors = [], 0, 0
+    while time.perf_counter() < stop:
+        student_id = rng.randint(1, students)
+        started = time.perf_counter()
+        db = factory()
+        try:
+            if rng.random() < write_ratio:
+                # answer: one session row and the knowledge update in one transaction
+                db.add(LearningSession(student_id=student_id, content_id=rng.randint(1, items),
+                                       is_correct=True, time_spent=20.0, reward=1.0))
+                db.execute(update(StudentKnowledge).where(StudentKnowledge.student_id == student_id)
+                           .values(total_attempts=StudentKnowledge.total_attempts + 1))
+                db.commit()
+                writes += 1
+            else:
+                # dashboard: knowledge row plus recent activity
+                db.execute(select(StudentKnowledge).where(StudentKnowledge.student_id == student_id)).first()
+                db.execute(select(func.count(LearningSession.id))
+                           .where(LearningSession.student_id == student_id)).scalar()
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    results.append((latencies, writes, errors))
+
+
+def _run(profile: bool, args, workdir: str):
+    url = f"sqlite:///{os.path.join(workdir, 'profile' if profile else 'default')}.db"
+    engine = create_db_engine(url, profile=profile)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    _seed(factory, args.students, args.items)
+
+    results = []
+    stop = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=_worker, args=(factory, args.students, args.items, args.write_ratio, stop, i, results))
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies = np.concatenate([np.array(r[0]) for r in results]) * 1e3
+    writes = sum(r[1] for r in results)
+    errors = sum(r[2] for r in results)
+    return len(latencies) / args.seconds, writes / args.seconds, errors, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite performance profile")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, profile in [("defaults", False), ("profile", True)]:
+            ops, writes, errors, latencies = _run(profile, args, workdir)
+            print(f"[INFO] {name:<9s} ops/s={ops:7.0f}  writes/s={writes:6.0f}  locked errors={errors:5d}  "
+                  f"p50={np.percentile(latencies, 50):6.2f} ms  p99={np.percentile(latencies, 99):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
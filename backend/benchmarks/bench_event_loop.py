@@ -0,0 +1,142 @@
+"""
+Event Loop Stall Benchmark
+Latency of a trivial async endpoint while clients hammer /learning-pace/time-analytics, with the
+router's queries run inline on the event loop (previous sync Session in async def, reproduced by
+an inline session) versus awaited through get_async_db.
+
+Usage (from backend/):
+    python -m benchmarks.bench_event_loop --sessions 20000 --concurrency 16 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from app.api import learning_pace
+from app.api.deps import get_current_student
+from app.core.database import Base, ThreadedSession, create_db_engine, get_async_db
+import app.models  # noqa: F401 - register all mappers
+from app.models.models import Content, LearningSession, Student
+from app.services.principal_cache import Principal
+
+
+class InlineSession(ThreadedSession):
+    """Runs every query on the calling thread: the event loop, as before the port"""
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
+def build_app(factory, mode: dict) -> FastAPI:
+    api = FastAPI()
+    api.include_router(learning_pace.router)
+
+    async def override_async_db():
+        session_class = InlineSession if mode['inline'] else ThreadedSession
+        db = session_class(factory(expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    api.dependency_overrides[get_async_db] = override_async_db
+    api.dependency_overrides[get_current_student] = lambda: Principal(1, "bench", "bench@x.io", None, None)
+
+    @api.get("/ping")
+    async def ping():
+        """Does no I/O: its latency is the time spent waiting for the event loop"""
+        return {"ok": True}
+
+    return api
+
+
+def _seed(factory, sessions: int):
+    with factory() as db:
+        db.add(Student(id=1, username="bench", email="bench@x.io", hashed_password="x"))
+        db.add_all([
+            Content(id=i, title=f"Q{i}", topic="algebra", difficulty=1 + i % 5, content_type="question")
+            for i in range(1, 51)
+        ])
+        db.flush()
+        db.execute(insert(LearningSession), [
+            {'student_id': 1, 'content_id': 1 + i % 50, 'is_correct': i % 3 != 0,
+             'time_spent_seconds': 30 + i % 120, 'concept_name': "algebra"}
+            for i in range(sessions)
+        ])
+        db.commit()
+
+
+async def _load(base: str, concurrency: int, seconds: float):
+    stop = time.perf_counter() + seconds
+    completed = 0
+    probes = []
+
+    async def analytics_loop(client):
+        nonlocal completed
+        while time.perf_counter() < stop:
+            response = await client.get("/learning-pace/time-analytics")
+            assert response.status_code == 200
+            completed += 1
+
+    async def probe_loop(client):
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = await client.get("/ping")
+            assert response.status_code == 200
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    limits = httpx.Limits(max_connections=concurrency + 8)
+    async with httpx.AsyncClient(base_url=base, timeout=None, limits=limits) as client:
+        await client.get("/ping")  # warm the connection pool
+        await asyncio.gather(probe_loop(client), *[analytics_loop(client) for _ in range(concurrency)])
+    return completed, np.array(probes) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event loop stalls from synchronous queries")
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'loop.db')}")
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _seed(factory, args.sessions)
+
+        mode = {'inline': True}
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(build_app(factory, mode), host="127.0.0.1", port=port,
+                                               log_level="error"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        base = f"http://127.0.0.1:{port}"
+        for name, inline in [("inline (sync)", True), ("get_async_db", False)]:
+            mode['inline'] = inline
+            completed, probes = asyncio.run(_load(base, args.concurrency, args.seconds))
+            print(f"[INFO] {name:<14s} analytics/s={completed / args.seconds:6.1f}  /ping n={len(probes):5d}  "
+                  f"p50={np.percentile(probes, 50):7.1f} ms  p99={np.percentile(probes, 99):7.1f} ms  "
+                  f"max={probes.max():7.1f} ms")
+
+        server.should_exit = True
+        thread.join()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Linear vs Tabular Agent Benchmark
+Recommendation/update latency and model memory of LinearQAgent and QLearningAgent
+with a large content catalog.
+
+Usage (from backend/):
+    python -m benchmarks.bench_linear_vs_tabular --items 100000
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from app.services.linear_agent import LinearQAgent
+from app.services.rl_agent import QLearningAgent
+from app.services.state_encoder import TOPIC_SCORE_KEYS
+
+TOPICS = [key[:-len('_score')] for key in TOPIC_SCORE_KEYS]
+CONTENT_TYPES = ["question", "lesson", "quiz"]
+
+
+def _students(n: int, rng) -> list:
+    return [
+        {**dict(zip(TOPIC_SCORE_KEYS, rng.random(len(TOPIC_SCORE_KEYS)).tolist())),
+         'preferred_difficulty': int(rng.integers(1, 6))}
+        for _ in range(n)
+    ]
+
+
+def _latency_ms(fn, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(1e3 * (time.perf_counter() - started))
+    return {'p50': float(np.percentile(samples, 50)), 'p99': float(np.percentile(samples, 99))}
+
+
+def _peak_mb(fn) -> float:
+    """Peak extra memory (MB) allocated while fn runs"""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the linear and tabular agents")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--candidates", type=int, default=500, help="Size of a typical filtered candidate set")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    content_ids = list(range(1, args.items + 1))
+    topics = [TOPICS[i] for i in rng.integers(len(TOPICS), size=args.items)]
+    difficulties = rng.integers(1, 6, size=args.items).tolist()
+    content_types = [CONTENT_TYPES[i] for i in rng.integers(len(CONTENT_TYPES), size=args.items)]
+    students = _students(args.repeats, rng)
+    subset = rng.choice(content_ids, size=args.candidates, replace=False).tolist()
+
+    tabular = QLearningAgent(num_states=100, num_actions=20)
+    linear = LinearQAgent()
+    agents = {'tabular': tabular, 'linear': linear}
+
+    build = {
+        'tabular': lambda: tabular.register_content(content_ids, topics),
+        'linear': lambda: linear.register_content(content_ids, topics, difficulties, content_types)
+    }
+    model_bytes = {
+        'tabular': lambda: tabular.q_table.nbytes,
+        'linear': lambda: linear.weights.nbytes + linear.content_features.nbytes
+    }
+    update = {
+        'tabular': lambda s: tabular.update_q_value(
+            tabular._discretize_state(s), tabular.action_index(subset[0]), 1.0, tabular._discretize_state(s)),
+        'linear': lambda s: linear.update(s, subset[0], 1.0, s)
+    }
+
+    print(f"{args.items} content items, {args.candidates}-item candidate subset, {args.repeats} students")
+    for name, agent in agents.items():
+        started = time.perf_counter()
+        build[name]()
+        build_ms = 1e3 * (time.perf_counter() - started)
+
+        it = iter(students * 3)
+        full = _latency_ms(lambda: agent.get_recommended_content(next(it), content_ids), args.repeats)
+        small = _latency_ms(lambda: agent.get_recommended_content(next(it), subset), args.repeats)
+        upd = _latency_ms(lambda: update[name](students[0]), args.repeats)
+        peak = _peak_mb(lambda: agent.get_recommended_content(students[0], content_ids))
+
+        print(f"[INFO] {name:8s} model={model_bytes[name]() / 2 ** 20:7.1f} MB  build={build_ms:7.1f} ms  "
+              f"recommend(all) p50={full['p50']:.2f} p99={full['p99']:.2f} ms  "
+              f"recommend({args.candidates}) p50={small['p50']:.3f} ms  "
+              f"update p50={upd['p50']:.3f} ms  scoring peak={peak:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
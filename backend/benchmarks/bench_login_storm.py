@@ -0,0 +1,136 @@
+"""
+Login Storm Benchmark
+Throughput and p99 latency of an unrelated endpoint while a burst of logins runs, with bcrypt
+on the API thread pool (previous sync handler, reproduced here) versus the hashing process pool.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login_storm --concurrency 64 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+import app.api.auth as auth_api
+from app.core.database import Base, get_db
+from app.core.security import PasswordHasher, get_password_hash, verify_password
+from app.models.models import Student
+from app.models.schemas import StudentLogin
+
+
+def build_app(factory) -> FastAPI:
+    api = FastAPI()
+    api.include_router(auth_api.router)
+
+    def override_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    api.dependency_overrides[get_db] = override_db
+
+    @api.post("/legacy/login")
+    def legacy_login(credentials: StudentLogin, db: Session = Depends(get_db)):
+        """The login handler before hashing moved off the API threads"""
+        student = db.query(Student).filter(Student.username == credentials.username).first()
+        if not student or not verify_password(credentials.password, student.hashed_password):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @api.get("/ping")
+    def ping(db: Session = Depends(get_db)):
+        """Unrelated sync endpoint: one small query on the API thread pool"""
+        return {"students": db.execute(text("SELECT COUNT(*) FROM students")).scalar()}
+
+    return api
+
+
+async def _storm(base: str, login_path: str, concurrency: int, seconds: float, probe_timeout: float = 30.0):
+    stop = time.perf_counter() + seconds
+    logins = {'ok': 0, 'refused': 0}
+    probes = []
+    timeouts = 0
+
+    async def login_loop(client):
+        while time.perf_counter() < stop:
+            response = await client.post(login_path, json={"username": "storm", "password": "pw123456"})
+            logins['ok' if response.status_code == 200 else 'refused'] += 1
+            if response.status_code == 503:
+                await asyncio.sleep(0.05)
+
+    async def probe_loop(client):
+        nonlocal timeouts
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            try:
+                response = await client.get("/ping", timeout=probe_timeout)
+                assert response.status_code == 200
+            except httpx.TimeoutException:
+                timeouts += 1  # counted at the timeout in the percentiles
+            probes.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency + 8)
+    async with httpx.AsyncClient(base_url=base, timeout=None, limits=limits) as client:
+        await client.get("/ping")  # warm the connection pool
+        await asyncio.gather(probe_loop(client), *[login_loop(client) for _ in range(concurrency)])
+    return logins, np.array(probes) * 1e3, timeouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark unrelated endpoints during a login storm")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--probe-timeout", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'storm.db')}",
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with factory() as db:
+            db.add(Student(username="storm", email="storm@x.io", hashed_password=get_password_hash("pw123456")))
+            db.commit()
+
+        hasher = PasswordHasher(workers=args.workers, max_pending=args.concurrency)
+        auth_api.password_hasher = hasher
+        auth_api.limiter.enabled = False
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(build_app(factory), host="127.0.0.1", port=port, log_level="error"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+
+        base = f"http://127.0.0.1:{port}"
+        for name, path in [("thread-pool", "/legacy/login"), ("process-pool", "/auth/login")]:
+            logins, probes, timeouts = asyncio.run(
+                _storm(base, path, args.concurrency, args.seconds, args.probe_timeout)
+            )
+            print(f"[INFO] {name:<12s} logins/s={logins['ok'] / args.seconds:6.1f}  refused={logins['refused']:5d}  "
+                  f"/ping req/s={len(probes) / args.seconds:7.1f}  p50={np.percentile(probes, 50):8.1f} ms  "
+                  f"p99={np.percentile(probes, 99):8.1f} ms  timeouts={timeouts}")
+        print(f"[INFO] hashing stats: {hasher.stats()}")
+
+        server.should_exit = True
+        thread.join()
+        hasher.shutdown()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Lookahead Queue Benchmark
+Request-path cost of choosing the next content item: a synchronous policy call over
+the topic's candidates versus popping a precomputed item from the lookahead queue.
+
+Usage (from backend/):
+    python -m benchmarks.bench_lookahead --requests 5000 --items 20000
+"""
+import argparse
+import time
+import numpy as np
+from app.services.lookahead_queue import LookaheadQueue
+from app.services.rl_agent import QLearningAgent
+
+
+def _state(rng) -> dict:
+    return {
+        'mechanics_score': float(rng.random()), 'optics_score': float(rng.random()),
+        'algebra_score': float(rng.random()), 'calculus_score': float(rng.random()),
+        'preferred_difficulty': int(rng.integers(1, 11)), 'accuracy_rate': float(rng.random()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lookahead queue")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    policy = QLearningAgent(epsilon=0.1)
+    content_ids = list(range(1, args.items + 1))
+    states = {student_id: _state(rng) for student_id in range(args.students)}
+    states_for_fill = [None]  # state the background fill draws for
+
+    def fill(candidates):
+        content_id, _, propensity = policy.select_content(states_for_fill[0], candidates)
+        return content_id, {'propensity': propensity}
+
+    # Synchronous: the policy runs on every request
+    latencies = np.empty(args.requests)
+    for i in range(args.requests):
+        state = states[i % args.students]
+        started = time.perf_counter()
+        policy.select_content(state, content_ids)
+        latencies[i] = time.perf_counter() - started
+    sync = latencies * 1e3
+
+    # Lookahead: requests pop; refills run on the background worker
+    queue = LookaheadQueue(depth=args.depth, threshold=0.25)
+    for student_id, state in states.items():
+        states_for_fill[0] = state
+        queue.refill(student_id, 'topic', state, lambda: content_ids, fill)
+        queue.wait()
+
+    latencies = np.empty(args.requests)
+    for i in range(args.requests):
+        student_id = i % args.students
+        started = time.perf_counter()
+        queued = queue.pop(student_id, 'topic', states[student_id])
+        if queued is None:
+            policy.select_content(states[student_id], content_ids)
+        latencies[i] = time.perf_counter() - started
+        if student_id == args.students - 1:
+            # Between rounds of requests the worker tops every queue back up
+            for refill_id, state in states.items():
+                states_for_fill[0] = state
+                queue.refill(refill_id, 'topic', state, lambda: content_ids, fill)
+                queue.wait()
+    lookahead = latencies * 1e3
+    queue.shutdown()
+
+    for name, values in [("synchronous", sync), ("lookahead", lookahead)]:
+        print(f"[INFO] {name:<12s} p50={np.percentile(values, 50):7.3f} ms  "
+              f"p99={np.percentile(values, 99):7.3f} ms  mean={values.mean():7.3f} ms")
+    print(f"[INFO] hit rate={queue.hits / max(1, queue.hits + queue.misses):.3f}  "
+          f"p50 speedup={np.percentile(sync, 50) / max(1e-9, np.percentile(lookahead, 50)):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+RL Statistics Benchmark
+Latency of QLearningAgent.get_statistics (the /analytics/rl-stats payload) and of
+online updates as the Q-table grows, with incrementally maintained aggregates
+versus a full np.mean/np.max scan.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rl_stats --actions 1000 10000 100000
+"""
+import argparse
+import time
+import numpy as np
+from app.services.rl_agent import QLearningAgent
+
+
+def _latency_us(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return 1e6 * (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark O(1) agent statistics")
+    parser.add_argument("--actions", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--states", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for num_actions in args.actions:
+        agent = QLearningAgent(num_states=args.states, num_actions=num_actions)
+        agent.register_content(list(range(1, num_actions + 1)))
+        agent.get_statistics()  # first call scans the table once
+
+        states = rng.integers(args.states, size=args.repeats)
+        actions = rng.integers(num_actions, size=args.repeats)
+        it = iter(range(args.repeats))
+
+        def update():
+            i = next(it)
+            agent.update_q_value(int(states[i]), int(actions[i]), float(rng.normal()), int(states[i]))
+
+        update_us = _latency_us(update, args.repeats)
+        stats_us = _latency_us(agent.get_statistics, args.repeats)
+        scan_us = _latency_us(lambda: (float(np.mean(agent.q_table)), float(np.max(agent.q_table))), args.repeats)
+
+        print(f"[INFO] {args.states}x{num_actions:<7d} get_statistics={stats_us:8.1f} us  "
+              f"full scan={scan_us:10.1f} us  update_q_value={update_us:7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
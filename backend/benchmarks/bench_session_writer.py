@@ -0,0 +1,117 @@
+"""
+Learning Session Write-Behind Benchmark
+Sustained LearningSession insert throughput from concurrent request threads on
+file-backed SQLite: one INSERT + commit per answer versus queued bulk inserts,
+both for bare inserts and for the full submit_answer pipeline.
+
+Usage (from backend/):
+    python -m benchmarks.bench_session_writer --threads 8 --answers 4000
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+import app.models  # noqa: F401 - register all mappers
+import app.api.session as session_api
+from app.models.models import Content, LearningSession, Student
+from app.models.schemas import AnswerSubmit
+from app.services.content_catalog import catalog_index
+from app.services.session_writer import SessionWriteBehind
+from app.services.student_model import StudentModelService
+
+STATE = {f"topic_{i}_score": 0.5 for i in range(13)}
+
+
+def _row(i: int) -> dict:
+    return dict(student_id=1 + i % 50, content_id=1 + i % 100, student_answer="a", is_correct=True,
+                time_spent=30.0, attempts=1, reward=1.0, state_before=STATE, state_after=STATE,
+                action_taken={'content_id': 1 + i % 100, 'propensity': 0.9, 'candidate_count': 28,
+                              'candidate_scope': {'topic': "algebra", 'difficulty_range': (1, 3)}})
+
+
+def _database(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = factory()
+    db.bulk_insert_mappings(Student, [
+        {'id': i, 'username': f"s{i}", 'email': f"s{i}@x.io", 'hashed_password': "x"} for i in range(1, 51)
+    ])
+    db.bulk_insert_mappings(Content, [
+        {'id': i, 'title': f"Q{i}", 'topic': "algebra", 'difficulty': 1 + i % 5, 'content_type': "question",
+         'question_text': "x" * 500, 'correct_answer': "a", 'explanation': "y"} for i in range(1, 101)
+    ])
+    db.commit()
+    for student_id in range(1, 51):
+        StudentModelService.initialize_knowledge(db, student_id)
+    catalog_index.rebuild(db)
+    db.close()
+    return engine, factory
+
+
+def _insert_row_at_a_time(factory, i: int):
+    db = factory()
+    try:
+        db.add(LearningSession(**_row(i)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _answer(factory, i: int):
+    db = factory()
+    try:
+        session_api.submit_answer(AnswerSubmit(session_id=1 + i % 100, student_answer="a", time_spent=30),
+                                  f"s{1 + i % 50}", db)
+    finally:
+        db.close()
+
+
+def _throughput(workdir: str, name: str, answers: int, threads: int, write_behind: bool, full: bool) -> float:
+    engine, factory = _database(os.path.join(workdir, f"{name}.db"))
+    writer = SessionWriteBehind(factory, flush_interval=0.05, flush_size=500)
+    session_api.session_writer = writer
+    if write_behind:
+        writer.start()
+
+    if full:
+        work = lambda i: _answer(factory, i)
+    elif write_behind:
+        work = lambda i: writer.submit(_row(i)) or _insert_row_at_a_time(factory, i)
+    else:
+        work = lambda i: _insert_row_at_a_time(factory, i)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(work, range(answers)))
+    writer.stop()  # rows only count once they are in the table
+    elapsed = time.perf_counter() - started
+
+    db = factory()
+    assert db.query(LearningSession).count() == answers
+    db.close()
+    engine.dispose()
+    return answers / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark write-behind LearningSession inserts")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--answers", type=int, default=4000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for full in (False, True):
+            label = "submit_answer" if full else "insert only  "
+            sync = _throughput(workdir, f"sync{full}", args.answers, args.threads, False, full)
+            behind = _throughput(workdir, f"behind{full}", args.answers, args.threads, True, full)
+            print(f"[INFO] {label} row-at-a-time={sync:8.0f}/s  write-behind={behind:8.0f}/s  "
+                  f"speedup={behind / sync:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
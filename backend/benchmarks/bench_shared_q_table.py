@@ -0,0 +1,121 @@
+"""
+Shared-Memory Q-Table Benchmark
+Drives the /session/answer RL path from several worker processes at once and
+checks that the shared table ends up exactly where a serial run would.
+
+Usage (from backend/):
+    python -m benchmarks.bench_shared_q_table --workers 4 --answers 20000
+    python -m benchmarks.bench_shared_q_table --no-locks   # show lost updates
+"""
+import argparse
+import multiprocessing
+import time
+import uuid
+import numpy as np
+from app.services.rl_agent import SharedQLearningAgent
+
+NUM_STATES = 100
+CONTENT_IDS = list(range(1, 9))
+STATES = [10, 40, 70]
+
+
+def _reward(agent: SharedQLearningAgent, state: int, content_id: int) -> float:
+    """Deterministic reward per (state, content) so the expected table is order independent"""
+    return agent.calculate_reward(
+        is_correct=(state + content_id) % 3 != 0,
+        time_spent=25.0,
+        difficulty=content_id % 5 + 1,
+        student_level=state / (NUM_STATES - 1)
+    )
+
+
+def _new_agent(name: str, lock_stripes: int, learning_rate: float) -> SharedQLearningAgent:
+    agent = SharedQLearningAgent(name=name, num_states=NUM_STATES, max_actions=64,
+                                 lock_stripes=lock_stripes, learning_rate=learning_rate)
+    # gamma = 0: Q(s,a) after n updates with a constant reward r is r * (1 - (1 - lr)^n)
+    agent.discount_factor = 0.0
+    return agent
+
+
+def _worker(name, lock_stripes, learning_rate, answers, seed, counts_out, elapsed_out):
+    """One simulated worker process answering questions (recommend + update)"""
+    agent = _new_agent(name, lock_stripes, learning_rate)
+    rng = np.random.default_rng(seed)
+    states = rng.choice(STATES, size=answers)
+    counts = np.zeros((NUM_STATES, len(CONTENT_IDS)), dtype=np.int64)
+
+    started = time.perf_counter()
+    for state in states:
+        state = int(state)
+        content_id = CONTENT_IDS[int(rng.integers(len(CONTENT_IDS)))]
+        agent.candidate_q_values(state, CONTENT_IDS)  # what /session/start reads
+        agent.update_q_value(state, agent.action_index(content_id), _reward(agent, state, content_id), state)
+        counts[state, CONTENT_IDS.index(content_id)] += 1
+    elapsed_out.put(time.perf_counter() - started)
+    counts_out.put(counts)
+    agent.close()
+
+
+def run(workers: int, answers: int, lock_stripes: int, learning_rate: float) -> dict:
+    name = f"bench_q_{uuid.uuid4().hex[:12]}"
+    owner = _new_agent(name, lock_stripes, learning_rate)
+    owner.register_content(CONTENT_IDS)
+
+    context = multiprocessing.get_context("fork")
+    counts_out, elapsed_out = context.Queue(), context.Queue()
+    processes = [
+        context.Process(target=_worker,
+                        args=(name, lock_stripes, learning_rate, answers, seed, counts_out, elapsed_out))
+        for seed in range(workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    counts = sum(counts_out.get() for _ in processes)
+    worker_seconds = [elapsed_out.get() for _ in processes]
+    for process in processes:
+        process.join()
+    wall = time.perf_counter() - started
+
+    expected = np.zeros_like(counts, dtype=np.float64)
+    for state in STATES:
+        for column, content_id in enumerate(CONTENT_IDS):
+            reward = _reward(owner, state, content_id)
+            expected[state, column] = reward * (1.0 - (1.0 - learning_rate) ** counts[state, column])
+
+    columns = owner.action_indices(CONTENT_IDS)
+    actual = owner.q_table[:, columns]
+    error = float(np.max(np.abs(actual - expected)))
+    owner.close(unlink=True)
+
+    total = workers * answers
+    return {
+        'workers': workers,
+        'answers': total,
+        'wall_seconds': round(wall, 3),
+        'answers_per_second': round(total / max(wall, 1e-9)),
+        'slowest_worker_seconds': round(max(worker_seconds), 3),
+        'max_abs_error': error,
+        'correct': error < 1e-9
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent answer load against the shared Q-table")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--answers", type=int, default=20000, help="Answers per worker")
+    parser.add_argument("--stripes", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=0.001)
+    parser.add_argument("--no-locks", action="store_true", help="Disable row locks to expose lost updates")
+    args = parser.parse_args()
+
+    for workers in sorted({1, args.workers}):
+        result = run(workers, args.answers, 0 if args.no_locks else args.stripes, args.learning_rate)
+        status = "[OK]" if result['correct'] else "[ERROR]"
+        print(f"{status} workers={result['workers']} answers={result['answers']} "
+              f"wall={result['wall_seconds']}s throughput={result['answers_per_second']}/s "
+              f"max_abs_error={result['max_abs_error']:.3e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Student Simulator Benchmark
+Simulated interactions per minute for raw simulator steps and for a full tabular
+training loop (rank, explore, step, batch Q-update) at several population sizes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_simulator --students 1000 10000 100000 --items 500
+"""
+import argparse
+import time
+from app.services.rl_agent import QLearningAgent
+from app.services.student_simulator import SimulatedCatalog, StudentSimulator, run_bandit, run_policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized student simulator")
+    parser.add_argument("--students", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = SimulatedCatalog.synthetic(args.items, seed=0)
+    for students in args.students:
+        simulator = StudentSimulator(students, catalog, seed=0)
+        started = time.perf_counter()
+        for _ in range(args.steps):
+            simulator.step(simulator.rng.integers(len(catalog), size=students))
+        step_rate = 60 * students * args.steps / (time.perf_counter() - started)
+
+        training = run_policy(QLearningAgent(), StudentSimulator(students, catalog, seed=1), args.steps)
+
+        started = time.perf_counter()
+        run_bandit(StudentSimulator(students, catalog, seed=2), args.steps)
+        bandit_rate = 60 * students * args.steps / (time.perf_counter() - started)
+
+        print(f"[INFO] {students:7d} students  step={step_rate / 1e6:8.1f} M/min  "
+              f"train={training['interactions_per_minute'] / 1e6:7.1f} M/min  "
+              f"bandit={bandit_rate / 1e6:7.1f} M/min")
+
+
+if __name__ == "__main__":
+    main()
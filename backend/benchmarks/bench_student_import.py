@@ -0,0 +1,109 @@
+"""
+Student Onboarding Benchmark
+Students created per second by the register flow (per-student uniqueness queries and three
+commits, reproduced here) versus the chunked bulk importer, plus bcrypt throughput by pool size.
+
+Database paths use cheap bcrypt (4 rounds) so the numbers isolate the write pattern; the
+hashing section uses the production cost.
+
+Usage (from backend/):
+    python -m benchmarks.bench_student_import --students 5000 --hash-sample 16
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import bcrypt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+import app.models  # noqa: F401 - register all mappers
+from app.core.security import get_password_hash
+from app.models.models import Student
+from app.services.student_import import RecordParser, StudentImporter, HashingPool
+from app.services.student_model import StudentModelService
+
+
+def cheap_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+
+def legacy_register(db, record: dict):
+    """The database work /auth/register does for one student"""
+    if db.query(Student).filter(Student.email == record['email']).first():
+        return
+    if db.query(Student).filter(Student.username == record['username']).first():
+        return
+    student = Student(email=record['email'], username=record['username'],
+                      hashed_password=cheap_hash(record['password']), full_name=record['full_name'])
+    db.add(student)
+    db.commit()
+    db.refresh(student)
+    StudentModelService.initialize_knowledge(db, student.id)
+
+
+def _csv(students: int, prefix: str) -> str:
+    lines = ["username,email,password,full_name"]
+    lines += [f"{prefix}{i},{prefix}{i}@school.io,pw{i},Student {i}" for i in range(students)]
+    return "\n".join(lines) + "\n"
+
+
+def _session(workdir: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, name)}.db",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk student onboarding")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--hash-sample", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine, db = _session(workdir, "legacy")
+        records = RecordParser("csv")
+        started = time.perf_counter()
+        for line in io.StringIO(_csv(args.students, "l")):
+            parsed = records.feed(line.rstrip("\n"))
+            if parsed is not None:
+                legacy_register(db, parsed[1])
+        legacy = time.perf_counter() - started
+        db.close()
+        engine.dispose()
+
+        engine, db = _session(workdir, "bulk")
+        records = RecordParser("csv")
+        importer = StudentImporter(db, chunk_size=args.chunk_size, hash_password=cheap_hash)
+        started = time.perf_counter()
+        for line in io.StringIO(_csv(args.students, "b")):
+            parsed = records.feed(line.rstrip("\n"))
+            if parsed is not None and importer.add(*parsed):
+                importer.flush()
+        importer.flush()
+        bulk = time.perf_counter() - started
+        assert importer.created == args.students
+        db.close()
+        engine.dispose()
+
+    print(f"[INFO] register flow  {args.students / legacy:8.0f} students/s  ({legacy:6.2f} s)")
+    print(f"[INFO] bulk importer  {args.students / bulk:8.0f} students/s  ({bulk:6.2f} s, "
+          f"chunk={args.chunk_size})  speedup={legacy / bulk:.1f}x")
+
+    passwords = [f"pw{i}" for i in range(args.hash_sample)]
+    for workers in sorted({1, os.cpu_count() or 1}):
+        pool = HashingPool(workers)
+        with pool.admit() as executor:
+            executor.submit(int).result()  # start the workers before timing
+            started = time.perf_counter()
+            list(executor.map(get_password_hash, passwords))
+            elapsed = time.perf_counter() - started
+        pool.shutdown()
+        print(f"[INFO] bcrypt (cost 12) workers={workers:2d}  {args.hash_sample / elapsed:6.1f} hashes/s")
+
+
+if __name__ == "__main__":
+    main()
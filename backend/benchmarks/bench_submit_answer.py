@@ -0,0 +1,98 @@
+"""
+Answer Submission Benchmark
+SQL statements, commits and p50/p99 latency per answer for the single-transaction
+submit_answer versus the previous multi-commit flow (reproduced here).
+
+Usage (from backend/):
+    python -m benchmarks.bench_submit_answer --answers 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+import app.models  # noqa: F401 - register all mappers
+from app.api.session import submit_answer
+from app.models.models import Content, LearningSession, Student
+from app.models.schemas import AnswerSubmit
+from app.services.content_catalog import catalog_index
+from app.services.rl_agent import agent
+from app.services.student_model import StudentModelService
+
+TOPICS = ["mechanics", "optics", "algebra", "calculus"]
+
+
+def legacy_submit_answer(answer_data: AnswerSubmit, username: str, db):
+    """The database work submit_answer did before it became one unit of work"""
+    student_id = db.query(Student).filter(Student.username == username).first().id
+    content = db.query(Content).filter(Content.id == answer_data.session_id).first()
+    is_correct = answer_data.student_answer.strip().lower() == content.correct_answer.strip().lower()
+    state_before = StudentModelService.get_knowledge_state(db, student_id)
+    reward = agent.calculate_reward(is_correct, answer_data.time_spent, content.difficulty,
+                                    state_before.get('accuracy_rate', 0.5))
+    StudentModelService.update_knowledge(db, student_id, content.topic, is_correct,
+                                         content.difficulty, answer_data.time_spent)
+    state_after = StudentModelService.get_knowledge_state(db, student_id)
+    session = LearningSession(student_id=student_id, content_id=content.id,
+                              student_answer=answer_data.student_answer, is_correct=is_correct,
+                              time_spent=answer_data.time_spent, attempts=1, state_before=state_before,
+                              action_taken={'content_id': content.id, 'difficulty': content.difficulty},
+                              reward=reward, state_after=state_after)
+    db.add(session)
+    db.commit()
+    available = db.query(Content).filter(Content.topic == content.topic).all()
+    next_content = db.query(Content).filter(Content.id == available[0].id).first()
+    return session.id, next_content
+
+
+def _run(fn, answers: int, items: int, workdir: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, name)}.db",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.add(Student(id=1, username="bench", email="bench@x.io", hashed_password="x"))
+    db.bulk_insert_mappings(Content, [
+        {'id': i, 'title': f"Q{i}", 'topic': TOPICS[i % len(TOPICS)], 'difficulty': 1 + i % 5,
+         'content_type': "question", 'question_text': "x" * 800, 'explanation': "y" * 800, 'correct_answer': "a"}
+        for i in range(1, items + 1)
+    ])
+    db.commit()
+    catalog_index.rebuild(db)
+
+    counts = {'statements': 0, 'commits': 0}
+    event.listen(engine, "before_cursor_execute", lambda *args: counts.__setitem__('statements', counts['statements'] + 1))
+    event.listen(db, "after_commit", lambda session: counts.__setitem__('commits', counts['commits'] + 1))
+
+    rng = np.random.default_rng(0)
+    latencies = np.empty(answers)
+    for i in range(answers):
+        answer = AnswerSubmit(session_id=int(rng.integers(1, items + 1)),
+                              student_answer="a" if rng.random() < 0.6 else "b", time_spent=30)
+        started = time.perf_counter()
+        fn(answer, "bench", db)
+        latencies[i] = time.perf_counter() - started
+        db.expunge_all()  # each request starts with a fresh session
+
+    db.close()
+    engine.dispose()
+    return counts['statements'] / answers, counts['commits'] / answers, latencies * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the answer submission pipeline")
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, fn in [("legacy", legacy_submit_answer), ("single-tx", submit_answer)]:
+            statements, commits, latencies = _run(fn, args.answers, args.items, workdir, name)
+            print(f"[INFO] {name:<10s} statements/answer={statements:5.2f}  commits/answer={commits:4.2f}  "
+                  f"p50={np.percentile(latencies, 50):6.2f} ms  p99={np.percentile(latencies, 99):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
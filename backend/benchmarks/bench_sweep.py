@@ -0,0 +1,38 @@
+"""
+Hyperparameter Sweep Benchmark
+Wall-clock time of the same simulated grid sweep at several process-pool
+sizes, and the speedup over a single in-process worker.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sweep --workers 1 2 4 8 --students 2000
+"""
+import argparse
+import os
+import time
+from app.services.hyperparameter_sweep import evaluate_simulated, grid_configurations, run_sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel hyperparameter sweep")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--train-steps", type=int, default=30)
+    args = parser.parse_args()
+
+    configurations = grid_configurations([0.05, 0.1, 0.2, 0.3], [0.05, 0.1, 0.3, 0.5], [0.0, 0.9])
+    print(f"[INFO] {len(configurations)} configurations, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        started = time.perf_counter()
+        results = run_sweep(configurations, evaluate_simulated, workers, students=args.students,
+                            items=args.items, train_steps=args.train_steps)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"[INFO] workers={workers:<3d} {elapsed:7.2f}s  speedup={baseline / elapsed:5.2f}x  "
+              f"best score={results[0]['score']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Shared pytest fixtures for backend unit tests
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - register all mappers on Base.metadata
+from app.core.database import Base
+from app.services.principal_cache import principal_cache
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory SQLite database with every table created"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    principal_cache.invalidate()  # cached students belong to the previous test's database
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -8,12 +8,42 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.security import password_hasher
 from app.api import (
     auth, session, analytics, learning_style, students, 
-    recommendations, skill_gaps, learning_pace, smart_recommendations, mastery, placement
+    recommendations, skill_gaps, learning_pace, smart_recommendations, mastery, placement,
+    rl_models
 )
 from app.models.mastery import MasterySkill
 from app.models.models import Content
+from app.services.rl_agent import agent, SharedQLearningAgent
+from app.services.linear_agent import linear_agent
+from app.services.content_catalog import catalog_index
+from app.services.q_table_persistence import QTablePersistence
+from app.services.update_buffer import BufferedQUpdater
+from app.services.session_writer import session_writer
+from app.services.lookahead_queue import lookahead_queue
+from app.services.student_import import import_pool
+from app.services.model_registry import ModelRegistryError
+
+# Crash-safe persistence for online Q-table updates
+q_table_persistence = QTablePersistence(
+    agent,
+    log_path=settings.Q_TABLE_LOG_PATH,
+    snapshot_path=None if settings.Q_TABLE_SHARDED else settings.Q_TABLE_PATH,
+    interval=settings.Q_TABLE_SNAPSHOT_INTERVAL,
+    flush_interval=settings.Q_TABLE_LOG_FLUSH_INTERVAL,
+    fsync=settings.Q_TABLE_LOG_FSYNC
+)
+# Policy activations snapshot through it, so a crash cannot undo them
+rl_models.model_registry.persistence = q_table_persistence
+
+# Request threads queue Q-updates; one flusher applies them in batches
+q_update_buffer = BufferedQUpdater(
+    agent,
+    flush_interval=settings.Q_UPDATE_FLUSH_INTERVAL,
+    flush_size=settings.Q_UPDATE_FLUSH_SIZE
+)
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -56,6 +86,7 @@ app.include_router(learning_pace.router, prefix=settings.API_V1_STR)
 app.include_router(smart_recommendations.router, prefix=settings.API_V1_STR)
 app.include_router(mastery.router, prefix=settings.API_V1_STR)
 app.include_router(placement.router, prefix=settings.API_V1_STR)
+app.include_router(rl_models.router, prefix=settings.API_V1_STR)
 
 
 @app.on_event("startup")
@@ -63,8 +94,10 @@ def startup_event():
     """Initialize database on startup"""
     from app.core.database import SessionLocal
     
-    init_db()
+    created_indexes = init_db()
     print("[OK] Database initialized")
+    if created_indexes:
+        print(f"[OK] Created {len(created_indexes)} missing indexes: {', '.join(created_indexes)}")
     
     # Auto-seed skill tree if empty
     db = SessionLocal()
@@ -131,14 +164,77 @@ def startup_event():
                 print("[OK] IIT JEE PYQ content populated!")
             except Exception as e:
                 print(f"[ERROR] Error seeding JEE PYQ: {e}")
+        
+        # Build the in-memory catalog index used for candidate generation
+        catalog = catalog_index.rebuild(db)
+        print(f"[OK] Content catalog indexed ({len(catalog)} items)")
+        
+        # Give every content item its own RL action (Q-table column)
+        content_ids = catalog.ids.tolist()
+        metadata = [catalog.metadata(content_id) for content_id in content_ids]
+        agent.register_content(content_ids, [topic for topic, _, _ in metadata])
+        print(f"[OK] RL agent tracking {len(agent.registry)} content actions")
+        
+        if settings.RL_POLICY == "linear":
+            linear_agent.register_content(
+                content_ids,
+                [topic for topic, _, _ in metadata],
+                [difficulty for _, difficulty, _ in metadata],
+                [content_type for _, _, content_type in metadata]
+            )
+            print(f"[OK] Linear RL agent scoring {len(linear_agent.registry)} content items")
     except Exception as e:
         print(f"[ERROR] Error during startup: {e}")
     finally:
         db.close()
     
+    # Replay Q-updates logged since the last snapshot, then keep snapshotting
+    if agent.claim_persistence():
+        replayed = q_table_persistence.start()
+        print(f"[OK] Q-table restored ({replayed} logged updates replayed)")
+    else:
+        print("[INFO] Shared Q-table is persisted by another worker")
+    
+    # Pick up a policy activated after this worker's snapshot was taken
+    try:
+        version = rl_models.model_registry.restore_current(agent)
+        if version is not None:
+            print(f"[OK] Activated policy version {version} from the model registry")
+    except ModelRegistryError as e:
+        print(f"[ERROR] Could not activate the current policy version: {e}")
+    
+    if settings.Q_UPDATE_BUFFERED:
+        q_update_buffer.start()
+    
+    if settings.SESSION_WRITE_BEHIND:
+        session_writer.start()
+        print("[OK] Learning session write-behind enabled")
+    
     print(f"[OK] Server starting on {settings.API_V1_STR}")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Flush the Q-table to disk on shutdown"""
+    lookahead_queue.shutdown()
+    password_hasher.shutdown()
+    import_pool.shutdown()
+    session_writer.stop()  # Insert queued learning sessions
+    q_update_buffer.stop()  # Apply queued updates before the final snapshot
+    
+    if settings.RL_POLICY == "linear":
+        linear_agent.save_model(settings.LINEAR_AGENT_PATH)
+        print("[OK] Linear RL agent saved")
+    
+    if q_table_persistence.log is not None:  # None: another worker owns persistence of the shared Q-table
+        q_table_persistence.stop()
+        print("[OK] Q-table snapshot written")
+    
+    if isinstance(agent, SharedQLearningAgent) and agent.close(unlink=True):
+        # Last worker out: the next start rebuilds the segment from the snapshot
+        print("[OK] Shared Q-table segment removed")
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
@@ -0,0 +1,86 @@
+"""
+Unit Tests for the Action Registry and the growable Q-table
+"""
+import pytest
+import numpy as np
+from app.services.action_registry import ActionRegistry
+from app.services.rl_agent import QLearningAgent
+
+
+@pytest.fixture
+def agent():
+    """Fresh agent with a small initial action capacity"""
+    return QLearningAgent(num_states=10, num_actions=4, learning_rate=0.5, discount_factor=0.9, epsilon=0.1)
+
+
+class TestActionRegistry:
+    """Test suite for ActionRegistry"""
+
+    def test_indices_are_dense_and_stable(self):
+        """IDs get 0..N-1 in registration order and keep them"""
+        registry = ActionRegistry([105, 7, 42])
+        assert registry.indices_for([42, 105, 7]).tolist() == [2, 0, 1]
+        registry.register([7, 9000])
+        assert registry.index_of(9000) == 3
+        assert len(registry) == 4
+
+    def test_unknown_content_without_registration(self):
+        """Lookups that must not register raise KeyError"""
+        registry = ActionRegistry([1])
+        with pytest.raises(KeyError):
+            registry.index_of(2, register=False)
+        with pytest.raises(KeyError):
+            registry.indices_for([1, 2], register=False)
+
+    def test_save_and_load(self, tmp_path):
+        """Registry round-trips through a .npy file"""
+        path = str(tmp_path / "actions.npy")
+        ActionRegistry([3, 1, 2]).save(path)
+        restored = ActionRegistry.load(path)
+        assert restored.content_ids.tolist() == [3, 1, 2]
+        assert len(ActionRegistry.load(str(tmp_path / "missing.npy"))) == 0
+
+
+class TestGrowableQTable:
+    """Test suite for content registration on QLearningAgent"""
+
+    def test_no_aliasing_beyond_initial_capacity(self, agent):
+        """Content IDs that collided under id % num_actions get separate columns"""
+        first, second = agent.action_index(1), agent.action_index(5)
+        assert first != second
+        agent.update_q_value(0, first, 1.0, 0)
+        assert agent.q_table[0, second] == 0.0
+
+    def test_capacity_doubles(self, agent):
+        """Registering content grows the table geometrically, keeping values"""
+        agent.register_content([10, 11, 12, 13])
+        agent.q_table[2, 3] = 0.7
+        agent.register_content([14])
+        assert agent.q_table.shape == (10, 8)
+        assert agent.q_table[2, 3] == 0.7
+        agent.register_content(range(100, 120))
+        assert agent.q_table.shape[1] == 25
+        assert agent.num_actions == 25
+
+    def test_recommend_over_large_content_ids(self, agent):
+        """Raw content IDs far beyond the table width are recommended safely"""
+        catalog = list(range(50_000, 60_000))
+        agent.register_content(catalog)
+        state = agent._discretize_state({'algebra_score': 0.5})
+        agent.q_table[state, agent.action_index(55_555)] = 3.0
+
+        content_id, confidence = agent.get_recommended_content({'algebra_score': 0.5}, catalog)
+        assert content_id == 55_555
+        assert confidence == pytest.approx(3.0)
+
+    def test_save_and_load_keeps_mapping(self, agent, tmp_path):
+        """Snapshots carry the registry so columns keep their owners"""
+        path = str(tmp_path / "q_table.npy")
+        agent.register_content([30, 20, 10])
+        agent.q_table[1, agent.action_index(20)] = 0.9
+        agent.save_model(path)
+
+        restored = QLearningAgent(num_states=10, num_actions=4)
+        restored.load_model(path)
+        assert restored.q_table[1, restored.action_index(20)] == 0.9
+        assert np.array_equal(restored.registry.content_ids, [30, 20, 10])
@@ -0,0 +1,141 @@
+"""
+Unit Tests for the async database session and the routers ported to it
+"""
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+import app.core.database as database
+from app.api import learning_pace, smart_recommendations
+from app.api.deps import get_current_student
+from app.core.database import ThreadedSession, async_database_url, async_driver_available, get_async_db
+from app.models.models import Content, LearningSession, Student
+from app.services.principal_cache import Principal
+
+
+@pytest.fixture
+def client(db):
+    db.add(Student(id=1, username="async", email="async@x.io", hashed_password="x"))
+    db.add(Content(id=1, title="Q1", topic="algebra", difficulty=2, content_type="question"))
+    db.commit()
+
+    async def override_async_db():
+        yield ThreadedSession(db)
+
+    api = FastAPI()
+    api.include_router(learning_pace.router)
+    api.include_router(smart_recommendations.router)
+    api.dependency_overrides[get_current_student] = lambda: Principal(1, "async", "async@x.io", None, None)
+    api.dependency_overrides[get_async_db] = override_async_db
+    return TestClient(api)
+
+
+class TestAsyncSessionDependency:
+    """Driver selection and the thread-pool fallback"""
+
+    def test_async_database_url(self):
+        assert async_database_url("sqlite:///./rl_tutor.db") == "sqlite+aiosqlite:///./rl_tutor.db"
+        assert async_database_url("postgresql://u:p@db/tutor") == "postgresql+asyncpg://u:p@db/tutor"
+        assert async_database_url("postgresql+psycopg2://u:p@db/tutor") == "postgresql+asyncpg://u:p@db/tutor"
+        assert async_database_url("mysql://u:p@db/tutor") == "mysql://u:p@db/tutor"
+        assert not async_driver_available("mysql://u:p@db/tutor")
+
+    def test_threadpool_mode_yields_threaded_session(self, monkeypatch):
+        monkeypatch.setattr(database.settings, "DB_ASYNC_MODE", "threadpool")
+        monkeypatch.setattr(database, "_async_session_factory", None)
+
+        async def open_session():
+            sessions = get_async_db()
+            session = await sessions.__anext__()
+            await sessions.aclose()
+            return session
+
+        session = asyncio.run(open_session())
+        assert isinstance(session, ThreadedSession)
+        assert session.sync_session.expire_on_commit is False
+
+
+class TestThreadedSession:
+    """Awaited queries run off the event loop and come back buffered"""
+
+    def test_event_loop_keeps_running_during_query(self, db):
+        session = ThreadedSession(db)
+
+        def slow_query(sync_db):
+            time.sleep(0.3)
+            return sync_db.scalar(select(Student.id))
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await session.run_sync(slow_query)
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(run()) >= 10
+
+    def test_buffered_results(self, db):
+        session = ThreadedSession(db)
+
+        async def run():
+            session.add(Content(title="Q", topic="algebra", difficulty=1, content_type="question"))
+            await session.commit()
+            rows = (await session.execute(select(Content.title))).all()
+            contents = (await session.scalars(select(Content))).all()
+            return rows, contents, await session.get(Content, contents[0].id)
+
+        rows, contents, first = asyncio.run(run())
+        assert rows == [("Q",)] and len(contents) == 1 and first is contents[0]
+
+
+class TestPortedRouters:
+    """smart_recommendations and learning_pace on the async session"""
+
+    def test_flashcard_lifecycle(self, client):
+        created = client.post("/smart-recommendations/flashcards/create",
+                              json={"concept_name": "limits", "question": "?", "answer": "!"}).json()
+        card_id = created["flashcard_id"]
+        assert client.get("/smart-recommendations/flashcards/due").json()["due_count"] == 1
+        review = client.post(f"/smart-recommendations/flashcards/{card_id}/review", json={"quality": 5})
+        assert review.status_code == 200 and review.json()["new_interval"] >= 1
+        assert client.get("/smart-recommendations/flashcards/stats").json()["total_reviews"] == 1
+        assert client.get("/smart-recommendations/flashcards/upcoming").json()["total_upcoming"] == 1
+        assert client.delete(f"/smart-recommendations/flashcards/{card_id}").status_code == 200
+        assert client.delete(f"/smart-recommendations/flashcards/{card_id}").status_code == 404
+
+    def test_bandit_and_collaborative_filtering(self, client):
+        assert client.get("/smart-recommendations/bandit-stats").json()["initialized"] is False
+        assert client.get("/smart-recommendations/content-type").status_code == 200
+        feedback = client.post("/smart-recommendations/content-type/feedback",
+                               params={"content_type": "quiz", "is_correct": True, "time_spent": 30})
+        assert feedback.json()["pulls"] == 1
+        assert client.post("/smart-recommendations/interactions",
+                           params={"content_id": 1, "interaction_type": "complete",
+                                   "completed": True, "score": 0.9}).json()["implicit_rating"] == 5.0
+        assert client.get("/smart-recommendations/peer-recommendations").json()["recommendations"] == []
+        assert client.get("/smart-recommendations/similar-students").json()["similar_students"] == []
+
+    def test_learning_pace(self, client, db):
+        db.add_all([
+            LearningSession(student_id=1, content_id=1, is_correct=True, time_spent_seconds=90,
+                            concept_name="algebra")
+            for _ in range(3)
+        ])
+        db.commit()
+        assert client.get("/learning-pace/profile").json()["difficulty_preference"] == 5
+        analysis = client.post("/learning-pace/analyze").json()
+        assert analysis["total_concepts_completed"] == 3 and analysis["completion_rate"] == 100.0
+        assert analysis["adjustment_made"] and analysis["difficulty_preference"] == 6
+        analytics = client.get("/learning-pace/time-analytics").json()
+        assert analytics["total_time_seconds"] == 270
+        assert analytics["time_by_difficulty"] == {"2": {"seconds": 270, "minutes": 4.5}}
+        assert client.get("/learning-pace/students/2").status_code == 403
@@ -0,0 +1,93 @@
+"""
+Unit Tests for the in-memory content catalog index
+"""
+import time
+import pytest
+from sqlalchemy import delete
+from app.models.models import Content
+from app.services.content_catalog import CatalogIndex, ContentCatalog, catalog_index, load_content
+
+
+@pytest.fixture
+def seeded(db):
+    topics = ["algebra", "optics", "mechanics"]
+    for i in range(1, 61):
+        db.add(Content(id=i, title=f"Q{i}", topic=topics[i % 3], difficulty=1 + i % 5,
+                       content_type="question", question_text="x" * 500, correct_answer="a"))
+    db.commit()
+    return db
+
+
+class TestContentCatalog:
+    """Test suite for ContentCatalog candidate generation"""
+
+    @pytest.mark.parametrize("topic, difficulty, difficulty_range", [
+        (None, None, None),
+        ("optics", None, None),
+        ("optics", 3, None),
+        (None, 2, None),
+        ("algebra", None, (2, 4)),
+        (None, None, (4, 10)),
+        ("unknown", None, (1, 5)),
+    ])
+    def test_candidates_match_sql_filter(self, seeded, topic, difficulty, difficulty_range):
+        query = seeded.query(Content.id)
+        if topic:
+            query = query.filter(Content.topic == topic)
+        if difficulty:
+            query = query.filter(Content.difficulty == difficulty)
+        elif difficulty_range:
+            query = query.filter(Content.difficulty.between(*difficulty_range))
+        expected = sorted(row.id for row in query.all())
+
+        catalog = ContentCatalog.build(seeded)
+        result = catalog.candidates(topic, difficulty=difficulty, difficulty_range=difficulty_range)
+        assert result.tolist() == expected
+        assert catalog.candidates(topic, difficulty=difficulty, difficulty_range=difficulty_range) is result
+        assert not result.flags.writeable
+
+    def test_metadata_and_lazy_row(self, seeded):
+        catalog = ContentCatalog.build(seeded)
+        assert len(catalog) == 60 and 7 in catalog
+        assert catalog.metadata(7) == ("optics", 3, "question")
+        assert catalog.metadata(999) is None
+        assert load_content(seeded, 7).question_text == "x" * 500
+
+
+class TestCatalogIndex:
+    """Test suite for CatalogIndex rebuilds and invalidation"""
+
+    def test_commit_invalidates_and_rebuild_swaps(self, seeded):
+        index = CatalogIndex()
+        first = index.get(seeded)
+        assert index.get(seeded) is first
+
+        catalog_index.rebuild(seeded)
+        seeded.add(Content(id=100, title="new", topic="optics", difficulty=5))
+        seeded.commit()
+        # The global index listens for committed content changes
+        assert catalog_index.get(seeded).metadata(100) == ("optics", 5, None)
+
+        index.invalidate()
+        second = index.get(seeded)
+        assert second is not first and second.version == first.version + 1
+        assert 100 in second and 100 not in first  # old snapshot is untouched
+
+    def test_rolled_back_changes_do_not_invalidate(self, seeded):
+        catalog = catalog_index.rebuild(seeded)
+        seeded.add(Content(id=101, title="draft", topic="optics", difficulty=1))
+        seeded.flush()
+        seeded.rollback()
+        assert catalog_index.get(seeded) is catalog
+
+    def test_snapshot_expires(self, seeded):
+        """A delete this process never saw (another worker's) drops out once the snapshot expires"""
+        index = CatalogIndex(ttl=0.05)
+        first = index.get(seeded)
+        seeded.execute(delete(Content).where(Content.id == 1))
+        seeded.commit()
+        assert index.get(seeded) is first and 1 in first
+        time.sleep(0.06)
+        second = index.get(seeded)
+        assert second is not first and 1 not in second
+        assert CatalogIndex(ttl=0).get(seeded) is not None
@@ -0,0 +1,109 @@
+"""
+Unit Tests for the pre-serialized content payload cache
+"""
+import json
+import time
+import pytest
+from sqlalchemy import event, update
+import app.services.content_payloads as payloads_module
+from app.models.models import Content
+from app.models.schemas import ContentResponse, SessionResponse
+from app.services.content_payloads import ContentPayloadCache, content_payload, embed_payload
+
+
+@pytest.fixture
+def seeded(db):
+    db.add(Content(id=1, title="Q1", topic="algebra", difficulty=2, content_type="question",
+                   question_text="2x = 4?", options='["1", "2", "3"]', tags='["linear"]', correct_answer="2"))
+    db.add(Content(id=2, title="Q2", topic="optics", difficulty=3, content_type="question",
+                   options=["a", "b"], correct_answer="a"))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def statements(seeded):
+    counts = {'n': 0}
+
+    def count(*args):
+        counts['n'] += 1
+
+    event.listen(seeded.bind, "before_cursor_execute", count)
+    yield counts
+    event.remove(seeded.bind, "before_cursor_execute", count)
+
+
+class TestContentPayload:
+    """Serialization matches the ContentResponse model"""
+
+    def test_matches_pydantic_serialization(self, seeded):
+        content = seeded.get(Content, 1)
+        assert json.loads(content_payload(content)) == {
+            'id': 1, 'title': "Q1", 'description': None, 'topic': "algebra", 'difficulty': 2,
+            'content_type': "question", 'question_text': "2x = 4?", 'options': ["1", "2", "3"]
+        }
+        content = seeded.get(Content, 2)
+        expected = ContentResponse.model_validate(content).model_dump(mode="json")
+        assert json.loads(content_payload(content)) == expected
+
+    def test_json_fallback_encoder(self, seeded, monkeypatch):
+        content = seeded.get(Content, 1)
+        fast = content_payload(content)
+        monkeypatch.setattr(payloads_module, "orjson", None)
+        assert json.loads(content_payload(content)) == json.loads(fast)
+
+    def test_embed_payload(self, seeded):
+        payload = content_payload(seeded.get(Content, 2))
+        fields = {'id': None, 'content_id': 1, 'is_correct': True, 'reward': 1.5, 'explanation': "ok"}
+        body = json.loads(embed_payload(fields, 'next_content', payload))
+        assert SessionResponse.model_validate(body).next_content.options == ["a", "b"]
+        assert json.loads(embed_payload(fields, 'next_content', None))['next_content'] is None
+
+
+class TestContentPayloadCache:
+    """Test suite for ContentPayloadCache"""
+
+    def test_hit_needs_no_query(self, seeded, statements):
+        cache = ContentPayloadCache()
+        first = cache.get(seeded, 1)
+        seeded.expunge_all()
+        statements['n'] = 0
+        assert cache.get(seeded, 1) is first
+        assert statements['n'] == 0
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.get(seeded, 999) is None and len(cache) == 1
+
+    def test_lru_bound(self, seeded):
+        cache = ContentPayloadCache(max_items=1)
+        for content_id in (1, 1, 2, 1):
+            cache.get(seeded, content_id)
+        assert len(cache) == 1
+        assert (cache.hits, cache.misses) == (1, 3)  # 1 was evicted when 2 was cached
+
+    def test_orm_edit_invalidates_on_commit(self, seeded, monkeypatch):
+        cache = ContentPayloadCache()
+        monkeypatch.setattr(payloads_module, "content_payloads", cache)
+        cache.get(seeded, 1)
+        cache.get(seeded, 2)
+
+        seeded.get(Content, 1).title = "Q1 (edited)"
+        seeded.flush()
+        seeded.rollback()
+        assert len(cache) == 2  # rolled back: nothing dropped
+
+        seeded.get(Content, 1).title = "Q1 (edited)"
+        seeded.commit()
+        assert len(cache) == 1
+        assert json.loads(cache.get(seeded, 1))['title'] == "Q1 (edited)"
+
+
+    def test_entries_expire(self, seeded):
+        """An edit this process never saw (another worker's) is served once the entry expires"""
+        cache = ContentPayloadCache(ttl=0.05)
+        cache.get(seeded, 1)
+        seeded.execute(update(Content).where(Content.id == 1).values(title="Q1 (elsewhere)"))
+        seeded.commit()
+        assert json.loads(cache.get(seeded, 1))['title'] == "Q1"
+        time.sleep(0.06)
+        assert json.loads(cache.get(seeded, 1))['title'] == "Q1 (elsewhere)"
+        assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,55 @@
+"""
+Unit Tests for the database performance profile
+"""
+import os
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from app.core.config import settings
+from app.core.database import create_db_engine, engine_options
+
+
+def _pragma(engine, name: str):
+    with engine.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+class TestDatabaseProfile:
+    """Test suite for create_db_engine / engine_options"""
+
+    def test_sqlite_file_profile_applied_on_connect(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp_path, 'profile.db')}", profile=True)
+        try:
+            assert _pragma(engine, "journal_mode") == "wal"
+            assert _pragma(engine, "synchronous") == 1  # NORMAL
+            assert _pragma(engine, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT
+            assert _pragma(engine, "cache_size") == settings.SQLITE_CACHE_SIZE
+            assert _pragma(engine, "mmap_size") == settings.SQLITE_MMAP_SIZE
+            assert isinstance(engine.pool, QueuePool) and engine.pool.size() == settings.SQLITE_POOL_SIZE
+        finally:
+            engine.dispose()
+
+    def test_sqlite_without_profile_keeps_driver_defaults(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp_path, 'plain.db')}", profile=False)
+        try:
+            assert _pragma(engine, "journal_mode") == "delete"
+            assert _pragma(engine, "synchronous") == 2  # FULL
+        finally:
+            engine.dispose()
+
+    def test_in_memory_sqlite_skips_wal(self):
+        engine = create_db_engine("sqlite://", profile=True)
+        try:
+            assert _pragma(engine, "journal_mode") == "memory"
+            assert _pragma(engine, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT
+        finally:
+            engine.dispose()
+
+    def test_postgresql_pool_options(self):
+        options = engine_options("postgresql://user:pw@db:5432/tutor", profile=True)
+        assert options == {
+            'pool_size': settings.DB_POOL_SIZE,
+            'max_overflow': settings.DB_MAX_OVERFLOW,
+            'pool_pre_ping': settings.DB_POOL_PRE_PING,
+            'pool_recycle': settings.DB_POOL_RECYCLE
+        }
+        assert engine_options("postgresql://user:pw@db:5432/tutor", profile=False) == {}
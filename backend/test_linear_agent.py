@@ -0,0 +1,77 @@
+"""
+Unit Tests for the linear function-approximation agent
+"""
+import pytest
+import numpy as np
+from app.services.linear_agent import LinearQAgent
+
+
+@pytest.fixture
+def agent():
+    """Agent with three items: easy/hard mechanics and an optics lesson"""
+    agent = LinearQAgent(learning_rate=0.1, discount_factor=0.0, initial_capacity=2)
+    agent.register_content(
+        [1, 2, 3],
+        topics=["mechanics", "mechanics", "optics"],
+        difficulties=[1, 5, 3],
+        content_types=["question", "question", "lesson"]
+    )
+    return agent
+
+
+class TestLinearQAgent:
+    """Test suite for LinearQAgent"""
+
+    def test_features_and_growth(self, agent):
+        """Content rows hold one topic bit, one type bit and the difficulty terms"""
+        assert len(agent.content_features) >= 3
+        rows = agent.content_features[:3]
+        assert rows[:, :agent.topic_buckets].sum(axis=1).tolist() == [1, 1, 1]
+        assert np.array_equal(rows[0, :agent.topic_buckets], rows[1, :agent.topic_buckets])
+        assert rows[:, -3].tolist() == pytest.approx([0.2, 1.0, 0.6])
+
+    def test_score_matches_bilinear_form(self, agent):
+        """score() equals x^T W f for every candidate"""
+        agent.weights = np.random.default_rng(0).normal(size=agent.weights.shape)
+        state = {'mechanics_score': 0.2, 'preferred_difficulty': 4}
+        x = agent.student_vectors([state])[0]
+        expected = [x @ agent.weights @ agent.content_features[i].astype(np.float64) for i in range(3)]
+        assert agent.score(state, [1, 2, 3]) == pytest.approx(expected, rel=1e-5)
+
+    def test_score_batch_matches_single(self, agent):
+        """A batch of students is scored in one multiply with the same result"""
+        agent.weights = np.random.default_rng(1).normal(size=agent.weights.shape)
+        states = [{'optics_score': 0.9}, {'mechanics_score': 0.1, 'preferred_difficulty': 1}]
+        batch = agent.score_batch(states, [3, 1])
+        assert batch.shape == (2, 2)
+        for row, state in zip(batch, states):
+            assert row == pytest.approx(agent.score(state, [3, 1]), rel=1e-5)
+
+    def test_sgd_learns_preference(self, agent):
+        """Rewarding the easy item and penalizing the hard one changes the recommendation"""
+        state = {'mechanics_score': 0.2}
+        for _ in range(50):
+            agent.update(state, 1, 1.0, state)
+            agent.update(state, 2, -0.5, state)
+        content_id, confidence = agent.get_recommended_content(state, [2, 1])
+        assert content_id == 1
+        assert confidence == pytest.approx(1.0, abs=0.1)
+        assert agent.total_updates == 100
+
+    def test_unseen_candidates_get_neutral_features(self, agent):
+        """Content missing from the registry is scored instead of raising"""
+        scores = agent.score({}, [1, 99])
+        assert scores.shape == (2,)
+        assert 99 in agent.registry
+
+    def test_save_and_load(self, agent, tmp_path):
+        """Weights, content rows and stats round-trip through the .npz file"""
+        agent.update({'mechanics_score': 0.2}, 1, 1.0, {'mechanics_score': 0.3})
+        path = str(tmp_path / "linear.npz")
+        agent.save_model(path)
+
+        restored = LinearQAgent()
+        restored.load_model(path)
+        assert np.array_equal(restored.weights, agent.weights)
+        assert restored.score({}, [1, 2, 3]) == pytest.approx(agent.score({}, [1, 2, 3]))
+        assert restored.total_updates == 1
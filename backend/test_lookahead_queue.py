@@ -0,0 +1,120 @@
+"""
+Unit Tests for the per-student lookahead queue
+"""
+import json
+import pytest
+import app.api.session as session_api
+from app.models.models import Content, Student
+from app.models.schemas import AnswerSubmit, SessionStart
+from app.services.content_catalog import catalog_index
+from app.services.lookahead_queue import LookaheadQueue
+from app.services.state_encoder import state_features
+
+STATE = {'algebra_score': 0.5, 'optics_score': 0.5, 'preferred_difficulty': 2}
+
+
+def first_candidate(content_ids):
+    """Deterministic fill: always the lowest remaining ID"""
+    return min(content_ids), {'propensity': 1.0}
+
+
+@pytest.fixture
+def lookahead():
+    queue = LookaheadQueue(depth=3, threshold=0.25)
+    yield queue
+    queue.shutdown()
+
+
+class TestLookaheadQueue:
+    """Test suite for LookaheadQueue"""
+
+    def test_refill_then_pop_in_order(self, lookahead):
+        assert lookahead.pop(1, 'algebra', STATE) is None
+        lookahead.refill(1, 'algebra', STATE, lambda: [9, 4, 7, 5, 8], first_candidate)
+        lookahead.wait()
+        assert [lookahead.pop(1, 'algebra', STATE)[0] for _ in range(3)] == [4, 5, 7]
+        assert lookahead.pop(1, 'algebra', STATE) is None
+        assert lookahead.pop(2, 'algebra', STATE) is None  # queues are per student
+        assert (lookahead.hits, lookahead.misses) == (3, 3)
+
+    def test_refill_tops_up_without_duplicates(self, lookahead):
+        lookahead.refill(1, 'algebra', STATE, lambda: [1, 2, 3, 4, 5], first_candidate)
+        lookahead.wait()
+        assert lookahead.pop(1, 'algebra', STATE)[0] == 1
+
+        lookahead.refill(1, 'algebra', STATE, lambda: [1, 2, 3, 4, 5], first_candidate)
+        lookahead.wait()
+        assert [lookahead.pop(1, 'algebra', STATE)[0] for _ in range(3)] == [2, 3, 1]
+
+    def test_state_change_past_threshold_invalidates(self, lookahead):
+        lookahead.refill(1, 'algebra', STATE, lambda: [1, 2, 3], first_candidate)
+        lookahead.wait()
+        assert lookahead.pop(1, 'algebra', {**STATE, 'algebra_score': 0.7})[0] == 1  # within threshold
+        assert lookahead.pop(1, 'algebra', {**STATE, 'algebra_score': 0.9}) is None
+        assert lookahead.invalidations == 1
+        assert lookahead.pop(1, 'algebra', STATE) is None
+
+        # A refill under a drifted state replaces the stale items
+        lookahead.refill(1, 'algebra', STATE, lambda: [1, 2, 3], first_candidate)
+        lookahead.wait()
+        lookahead.refill(1, 'algebra', {**STATE, 'optics_score': 0.0}, lambda: [2, 3], first_candidate)
+        lookahead.wait()
+        assert lookahead.pop(1, 'algebra', {**STATE, 'optics_score': 0.0})[0] == 2
+
+    def test_items_popped_during_refill_are_not_restored(self, lookahead):
+        lookahead.refill(1, 'algebra', STATE, lambda: [1, 2, 3], first_candidate)
+        lookahead.wait()
+        lookahead.pop(1, 'algebra', STATE)  # serves 1; queue is [2, 3]
+
+        def popping_fill(content_ids):
+            lookahead.pop(1, 'algebra', STATE)  # a request serves 2 while the policy runs
+            return first_candidate(content_ids)
+
+        lookahead.refill(1, 'algebra', STATE, lambda: [1, 2, 3, 4], popping_fill)
+        lookahead.wait()
+        assert [lookahead.pop(1, 'algebra', STATE)[0] for _ in range(2)] == [3, 1]
+
+    def test_items_are_tagged_with_their_draw(self, lookahead):
+        """Queued decisions record the state and the reduced candidate set they were drawn from"""
+        lookahead.refill(1, 'algebra', STATE, lambda: [9, 4, 7, 5, 8], first_candidate)
+        lookahead.wait()
+        decisions = [lookahead.pop(1, 'algebra', STATE)[1] for _ in range(3)]
+        assert [decision['excluded'] for decision in decisions] == [[], [4], [4, 5]]
+        assert all(decision['source'] == "lookahead" for decision in decisions)
+        assert decisions[0]['chosen_under'] == pytest.approx(state_features([STATE])[0].tolist())
+
+    def test_disabled_queue_never_fills(self):
+        queue = LookaheadQueue(depth=0)
+        queue.refill(1, 'algebra', STATE, lambda: [1, 2], first_candidate)
+        queue.wait()
+        assert queue.pop(1, 'algebra', STATE) is None
+        queue.shutdown()
+
+
+class TestSessionLookahead:
+    """The session endpoints serve from the lookahead queue once it is filled"""
+
+    def test_start_and_answer_pop_from_queue(self, db, lookahead, monkeypatch):
+        db.add(Student(id=1, username="la", email="la@x.io", hashed_password="x"))
+        for i in range(1, 9):
+            db.add(Content(id=i, title=f"Q{i}", topic="algebra", difficulty=2, content_type="question",
+                           correct_answer="a", explanation="e"))
+        db.commit()
+        catalog_index.rebuild(db)
+        monkeypatch.setattr(session_api, "lookahead_queue", lookahead)
+
+        first = json.loads(session_api.start_session(SessionStart(topic="algebra"), "la", db).body)
+        lookahead.wait()
+        second = json.loads(session_api.start_session(SessionStart(topic="algebra"), "la", db).body)
+        assert lookahead.hits == 1 and second['topic'] == "algebra"
+
+        # Wrong answers move algebra_score by 0.06, so queued items stay valid
+        response = json.loads(session_api.submit_answer(
+            AnswerSubmit(session_id=first['id'], student_answer="b", time_spent=20), "la", db
+        ).body)
+        lookahead.wait()
+        response = json.loads(session_api.submit_answer(
+            AnswerSubmit(session_id=response['next_content']['id'], student_answer="b", time_spent=20), "la", db
+        ).body)
+        assert lookahead.hits == 2
+        assert response['next_content']['topic'] == "algebra"
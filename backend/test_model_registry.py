@@ -0,0 +1,174 @@
+"""
+Unit Tests for the versioned Q-table model registry
+"""
+import os
+import pytest
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import rl_models
+from app.api.deps import get_current_student
+from app.services.principal_cache import Principal
+from app.services.q_table_persistence import QTablePersistence
+from app.services.rl_agent import QLearningAgent
+from app.services.model_registry import ModelRegistry, ModelRegistryError
+from app.services.state_encoder import AverageScoreEncoder
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registry in a temporary directory"""
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+@pytest.fixture
+def agent():
+    """Agent with a small registered catalog"""
+    fresh = QLearningAgent(num_states=10, num_actions=4, learning_rate=0.5, discount_factor=0.9, epsilon=0.1)
+    fresh.register_content([11, 12, 13])
+    return fresh
+
+
+class TestModelRegistry:
+    """Test suite for ModelRegistry"""
+
+    def test_publish_numbers_and_checksums_versions(self, registry, agent):
+        """Each publish gets the next number and a verifiable manifest"""
+        first = registry.publish(agent, metadata={'note': 'baseline'})
+        second = registry.publish(agent)
+
+        assert (first['version'], second['version']) == (1, 2)
+        assert first['metadata'] == {'note': 'baseline'}
+        assert set(first['checksums']) == {"q_table.npy", "q_table_actions.npy"}
+        assert [m['version'] for m in registry.list_versions()] == [1, 2]
+        assert registry.verify(1)
+
+    def test_corrupt_version_is_rejected(self, registry, agent):
+        """A tampered table fails verification and is never activated"""
+        registry.publish(agent)
+        with open(os.path.join(registry.root, "v0001", "q_table.npy"), 'r+b') as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b'\xff' * 8)
+
+        assert not registry.verify(1)
+        with pytest.raises(ModelRegistryError):
+            registry.activate(agent, 1)
+
+    def test_activate_swaps_memory_mapped_policy(self, registry, agent):
+        """Activation swaps in the stored policy, memory-mapped, with its own columns"""
+        trained = QLearningAgent(num_states=10, num_actions=4)
+        trained.register_content([13, 12])
+        trained.q_table[2, trained.action_index(12)] = 5.0
+        registry.publish(trained)
+
+        registry.activate(agent, 1)
+
+        assert isinstance(agent.q_table, np.memmap)
+        assert agent.q_table[2, agent.action_index(12)] == 5.0
+        assert registry.current_version() == 1
+
+    def test_rollback_restores_previous_policy(self, registry, agent):
+        """Rollback is an in-memory swap back to the replaced policy"""
+        agent.q_table[1, agent.action_index(11)] = 1.5
+        original = agent.policy
+        registry.publish(QLearningAgent(num_states=10, num_actions=4))
+        registry.activate(agent, 1)
+
+        assert registry.rollback(agent) is None
+        assert agent.policy is original
+        assert registry.current_version() is None
+        with pytest.raises(ModelRegistryError):
+            registry.rollback(agent)
+
+    def test_publish_snapshot_from_offline_training(self, registry, agent, tmp_path):
+        """A save_model snapshot can be imported as a version"""
+        snapshot = str(tmp_path / "offline" / "q_table_offline.npy")
+        agent.save_model(snapshot)
+        manifest = registry.publish_snapshot(snapshot, metadata={'source': 'offline_trainer'})
+
+        assert manifest['shape'] == [10, 4]
+        assert manifest['agent']['num_states'] == 10
+        with pytest.raises(ModelRegistryError):
+            registry.publish_snapshot(str(tmp_path / "missing.npy"))
+
+    def test_incompatible_versions_are_refused(self, registry, agent, tmp_path):
+        """A table with other states or another (or the legacy) encoder never replaces the policy"""
+        registry.publish(QLearningAgent(num_states=20, num_actions=4))
+        registry.publish(QLearningAgent(num_states=10, num_actions=4, state_encoder=AverageScoreEncoder(10)))
+        snapshot = str(tmp_path / "bare.npy")
+        np.save(snapshot, np.zeros((10, 4)))
+        registry.publish_snapshot(snapshot)  # no metadata: predates the encoder field
+
+        original = agent.policy
+        for version, reason in ((1, "20 states"), (2, "average"), (3, "average")):
+            with pytest.raises(ModelRegistryError, match=reason):
+                registry.activate(agent, version)
+            with pytest.raises(ModelRegistryError):
+                registry.load_policy(version, agent=agent)
+        assert agent.policy is original and registry.current_version() is None
+
+    def test_activation_survives_a_crash(self, registry, agent, tmp_path):
+        """activate snapshots the new policy, so the log is never replayed onto the old one"""
+        snapshot_path, log_path = str(tmp_path / "q_table.npy"), str(tmp_path / "q_table.wal")
+        trained = QLearningAgent(num_states=10, num_actions=4)
+        trained.register_content([11, 12, 13])
+        trained.q_table[2, trained.action_index(12)] = 5.0
+        registry.publish(trained)
+
+        persistence = QTablePersistence(agent, log_path, snapshot_path, interval=3600, flush_interval=0)
+        registry.persistence = persistence
+        persistence.start()
+        agent.update_q_value(1, agent.action_index(11), 1.0, 2)  # learnt by the old policy
+        registry.activate(agent, 1)
+        agent.update_q_value(3, agent.action_index(13), 1.0, 2)
+        agent.update_log.flush()
+        expected = np.array(agent.q_table)
+        # Simulate a crash: no stop()
+
+        restored = QLearningAgent(num_states=10, num_actions=4, learning_rate=0.5, discount_factor=0.9)
+        restored.load_model(snapshot_path)
+        assert QTablePersistence(restored, log_path, snapshot_path, interval=3600).start() == 1
+        assert restored.policy_version == 1
+        assert np.allclose(restored.q_table, expected)
+        assert registry.restore_current(restored) is None  # already derived from CURRENT
+        persistence.stop()
+
+    def test_restore_current_at_startup(self, registry, agent):
+        """A worker whose snapshot predates the activation is swapped to CURRENT"""
+        trained = QLearningAgent(num_states=10, num_actions=4)
+        trained.register_content([12])
+        trained.q_table[0, 0] = 3.0
+        registry.publish(trained)
+        registry.activate(QLearningAgent(num_states=10, num_actions=4), 1)  # in another worker
+
+        assert registry.restore_current(agent) == 1
+        assert agent.policy_version == 1 and agent.q_table[0, agent.action_index(12)] == 3.0
+        assert registry.restore_current(agent) is None
+        assert registry.rollback(agent) is None and agent.policy_version is None
+
+
+class TestRegistryApi:
+    """Publishing, activation and rollback are limited to administrators"""
+
+    @pytest.fixture
+    def client(self, registry, agent, monkeypatch):
+        monkeypatch.setattr(rl_models, "model_registry", registry)
+        monkeypatch.setattr(rl_models, "agent", agent)
+        monkeypatch.setattr(rl_models.settings, "ADMIN_USERNAMES", ["root"])
+        registry.publish(agent)
+        api = FastAPI()
+        api.include_router(rl_models.router)
+        user = {'name': "student"}
+        api.dependency_overrides[get_current_student] = lambda: Principal(1, user['name'], "x@x.io", None, None)
+        return TestClient(api), user
+
+    def test_students_cannot_swap_policies(self, client, registry):
+        client, user = client
+        assert client.get("/rl-models").status_code == 200
+        for path in ("/rl-models/publish", "/rl-models/1/activate", "/rl-models/rollback"):
+            assert client.post(path).status_code == 403
+        assert registry.current_version() is None
+
+        user['name'] = "root"
+        assert client.post("/rl-models/1/activate").status_code == 200
+        assert client.post("/rl-models/rollback").status_code == 200
@@ -0,0 +1,198 @@
+"""
+Unit Tests for propensity logging and off-policy evaluation
+"""
+import pytest
+import numpy as np
+from app.models.models import Content, LearningSession, Student
+from app.services.decision_log import DecisionLog
+from app.services.linear_agent import LinearQAgent
+from app.services.off_policy_eval import (
+    EpsilonGreedyPolicy, LoggedDecisions, evaluate_policy, load_logged_decisions, simulate_logged_decisions
+)
+from app.services.rl_agent import QLearningAgent, epsilon_greedy
+from app.services.state_encoder import state_features
+from app.services.student_simulator import SimulatedCatalog, StudentSimulator
+
+
+@pytest.fixture
+def bandit():
+    """Contextual bandit over 20 student prototypes and 5 items, logged uniformly at random"""
+    rng = np.random.default_rng(0)
+    agent = QLearningAgent(num_states=100, num_actions=5)
+    agent.register_content([1, 2, 3, 4, 5])
+    agent.q_table[:] = rng.normal(size=agent.q_table.shape)
+
+    prototypes = rng.random((20, 14))
+    true_reward = rng.random((100, 5))  # by agent state and item position
+
+    n = 200_000
+    features = prototypes[rng.integers(20, size=n)]
+    positions = rng.integers(5, size=n)
+    states = agent.discretize_states(features)
+    rewards = true_reward[states, positions] + rng.normal(scale=0.5, size=n)
+    logs = LoggedDecisions(features, positions + 1, rewards, np.full(n, 0.2), np.arange(1, 6))
+    return agent, logs, true_reward[states]
+
+
+class TestEpsilonGreedy:
+    """Test suite for the serving-time propensities"""
+
+    def test_propensity_matches_empirical_frequency(self):
+        np.random.seed(0)
+        q_values = np.array([0.1, 0.9, 0.3, 0.2])
+        counts = np.zeros(4)
+        for _ in range(20000):
+            chosen, propensity = epsilon_greedy(q_values, 0.2)
+            counts[chosen] += 1
+            assert propensity == pytest.approx(0.85 if chosen == 1 else 0.05)
+        assert counts / counts.sum() == pytest.approx([0.05, 0.85, 0.05, 0.05], abs=0.01)
+
+    def test_select_content_without_exploration_is_greedy(self):
+        agent = QLearningAgent(num_states=10, num_actions=3, epsilon=0.0)
+        state = {'algebra_score': 0.4}
+        agent.q_table[agent._discretize_state(state), agent.action_index(7)] = 1.0
+        assert agent.select_content(state, [5, 6, 7]) == (7, 1.0, 1.0)
+        assert agent.get_recommended_content(state, [5, 6, 7]) == (7, 1.0)
+
+        linear = LinearQAgent(epsilon=1.0)
+        content_id, _, propensity = linear.select_content(state, [5, 6, 7])
+        assert content_id in (5, 6, 7) and propensity == pytest.approx(1 / 3)
+
+
+class TestDecisionLog:
+    """Test suite for DecisionLog and loading logged decisions"""
+
+    def test_pop_and_eviction(self):
+        log = DecisionLog(capacity=2)
+        log.record(1, 10, {'propensity': 0.5})
+        log.record(1, 11, {'propensity': 0.25})
+        log.record(2, 10, {'propensity': 1.0})
+        assert len(log) == 2
+        assert log.pop(1, 10) is None  # evicted
+        assert log.pop(1, 11) == {'propensity': 0.25}
+        assert log.pop(1, 11) is None
+
+    def test_load_logged_decisions_rebuilds_candidates(self, db):
+        db.add(Student(id=1, username="ope", email="ope@x.io", hashed_password="x"))
+        db.add_all([Content(id=i, title=f"Q{i}", topic="algebra" if i < 5 else "physics", difficulty=i,
+                            content_type="question") for i in range(1, 8)])
+        state = {'algebra_score': 0.7, 'preferred_difficulty': 3}
+        algebra = {'topic': "algebra", 'difficulty_range': [3, 4]}
+        db.add_all([
+            LearningSession(student_id=1, content_id=3, reward=1.0, state_before=state,
+                            action_taken={'content_id': 3, 'propensity': 0.5,
+                                          'candidate_scope': algebra, 'candidate_count': 2}),
+            LearningSession(student_id=1, content_id=4, reward=0.5, state_before=state,
+                            action_taken={'content_id': 4, 'difficulty': 2}),  # no propensity logged
+            LearningSession(student_id=1, content_id=6, reward=-0.5, state_before=state,
+                            action_taken={'content_id': 6, 'propensity': 0.3,
+                                          'candidate_scope': {'topic': "physics"}, 'candidate_count': 3}),
+            LearningSession(student_id=1, content_id=4, reward=0.0, state_before=state,
+                            action_taken={'content_id': 4, 'propensity': 0.5,
+                                          'candidate_scope': algebra, 'candidate_count': 2}),
+            LearningSession(student_id=1, content_id=2, reward=0.0, state_before=state,
+                            action_taken={'content_id': 2, 'propensity': 0.5,
+                                          'candidate_scope': {'topic': None}, 'candidate_count': 6}),  # catalog grew
+            LearningSession(student_id=1, content_id=5, reward=0.0, state_before=state,
+                            action_taken={'content_id': 5, 'propensity': 0.3, 'candidates': [4, 5]}),  # legacy row
+        ])
+        db.commit()
+
+        logs = load_logged_decisions(db, chunk_size=2)
+        assert len(logs) == 4
+        assert logs.actions.tolist() == [3, 6, 4, 5]
+        assert logs.propensities.tolist() == [0.5, 0.3, 0.5, 0.3]
+        sets = [[3, 4], [5, 6, 7], list(range(1, 8)), [4, 5]]  # the whole-catalog set is rebuilt, then rejected
+        assert [candidates.tolist() for candidates in logs.candidates] == sets
+        assert logs.groups.tolist() == [0, 1, 0, 3]
+        assert logs.candidate_counts().tolist() == [2, 3, 2, 2]
+        assert logs.features[0, 7] == pytest.approx(0.7)
+
+        restored = LoggedDecisions.from_arrays(logs.features, logs.actions, logs.rewards, logs.propensities,
+                                               **logs.candidate_arrays())
+        assert [candidates.tolist() for candidates in restored.candidates] == sets
+        assert restored.candidate_counts().tolist() == [2, 3, 2, 2]
+
+
+    def test_lookahead_decisions(self, db):
+        """Lookahead items are skipped by default, or evaluated under the state and set they were drawn from"""
+        db.add(Student(id=1, username="ope", email="ope@x.io", hashed_password="x"))
+        db.add_all([Content(id=i, title=f"Q{i}", topic="algebra", difficulty=1, content_type="question")
+                    for i in range(1, 6)])
+        chosen_under = [0.25] * 14
+        db.add_all([
+            LearningSession(student_id=1, content_id=2, reward=1.0, state_before={'algebra_score': 0.7},
+                            action_taken={'content_id': 2, 'propensity': 0.2, 'candidate_count': 5,
+                                          'candidate_scope': {'topic': "algebra"}}),
+            LearningSession(student_id=1, content_id=4, reward=0.5, state_before={'algebra_score': 0.7},
+                            action_taken={'content_id': 4, 'propensity': 0.25, 'candidate_count': 3,
+                                          'candidate_scope': {'topic': "algebra"}, 'source': "lookahead",
+                                          'chosen_under': chosen_under, 'excluded': [1, 2]}),
+        ])
+        db.commit()
+
+        assert load_logged_decisions(db).actions.tolist() == [2]
+
+        logs = load_logged_decisions(db, include_lookahead=True)
+        assert logs.actions.tolist() == [2, 4]
+        assert logs.candidate_counts().tolist() == [5, 3]
+        assert logs.candidates[logs.groups[1]].tolist() == [3, 4, 5]
+        assert logs.features[0, 7] == pytest.approx(0.7)
+        assert logs.features[1].tolist() == chosen_under
+
+
+class TestEstimators:
+    """Test suite for IPS, SNIPS and doubly robust estimates"""
+
+    @pytest.mark.parametrize("epsilon", [0.0, 0.3])
+    def test_estimates_recover_true_policy_value(self, bandit, epsilon):
+        agent, logs, state_rewards = bandit
+        policy = EpsilonGreedyPolicy(agent, epsilon)
+        greedy_positions = policy.greedy_actions(logs) - 1
+        truth = ((1 - epsilon) * state_rewards[np.arange(len(logs)), greedy_positions]
+                 + epsilon * state_rewards.mean(axis=1)).mean()
+
+        report = evaluate_policy(logs, policy)
+        for estimate in ('ips', 'snips', 'dr'):
+            assert report[estimate] == pytest.approx(truth, abs=4 * report['ips_stderr'])
+        assert report['dm'] == pytest.approx(truth, abs=0.01)
+        assert report['dr_stderr'] < report['ips_stderr']
+
+    def test_grouped_candidates_match_shared(self, bandit):
+        agent, logs, _ = bandit
+        groups = np.arange(len(logs)) % 3
+        grouped = LoggedDecisions(logs.features, logs.actions, logs.rewards, logs.propensities,
+                                  [logs.candidates] * 3, groups)
+        shared = evaluate_policy(logs, EpsilonGreedyPolicy(agent, 0.2))
+        per_group = evaluate_policy(grouped, EpsilonGreedyPolicy(agent, 0.2))
+        for estimate in ('ips', 'snips', 'dm', 'dr'):
+            assert per_group[estimate] == pytest.approx(shared[estimate])
+
+    def test_simulated_uniform_logging(self):
+        """Evaluating the uniform logging policy itself gives unit weights"""
+        catalog = SimulatedCatalog.synthetic(30, seed=0)
+        logs = simulate_logged_decisions(StudentSimulator(500, catalog, seed=0), 4)
+        assert len(logs) == 2000
+        assert logs.propensities == pytest.approx(np.full(2000, 1 / 30))
+
+        report = evaluate_policy(logs, EpsilonGreedyPolicy(QLearningAgent(num_states=10, num_actions=1), 1.0))
+        assert report['ips'] == pytest.approx(report['logging_policy_value'])
+        assert report['effective_sample_size'] == pytest.approx(2000)
+
+    def test_replayed_greedy_decision_on_tied_table(self):
+        """An untrained (all-tied) agent evaluates the argmax it served, with weight 1 / propensity"""
+        np.random.seed(1)
+        agent = QLearningAgent(num_states=10, epsilon=0.1)
+        candidates = np.arange(1, 1001)
+        agent.register_content(candidates.tolist())
+        state = {'algebra_score': 0.3, 'preferred_difficulty': 2}
+        content_id, _, propensity = agent.select_content(state, candidates.tolist())
+        assert content_id == 1 and propensity == pytest.approx(0.9 + 0.1 / 1000)
+
+        logs = LoggedDecisions(state_features([state]), np.array([content_id]), np.array([1.0]),
+                               np.array([propensity]), candidates)
+        policy = EpsilonGreedyPolicy(agent, 0.0)
+        assert policy.greedy_actions(logs).tolist() == [content_id]
+        report = evaluate_policy(logs, policy)
+        assert report['match_rate'] == 1.0
+        assert report['ips'] == pytest.approx(1.0 / propensity)
@@ -0,0 +1,106 @@
+"""
+Unit Tests for the Offline Experience-Replay Trainer
+Tests batched Q-updates and training from logged LearningSession rows
+"""
+import pytest
+import numpy as np
+from app.core.config import settings
+from app.models.models import Student, Content, LearningSession
+from app.services.rl_agent import QLearningAgent
+from app.services.offline_trainer import load_transitions, train_offline, run_offline_training
+
+
+@pytest.fixture
+def agent():
+    """Fresh agent with fixed hyperparameters"""
+    return QLearningAgent(num_states=10, num_actions=5, learning_rate=0.5, discount_factor=0.9, epsilon=0.1)
+
+
+def _log_sessions(db, count):
+    student = Student(email="replay@example.com", username="replay", hashed_password="x")
+    content = Content(title="Q", topic="algebra", difficulty=2, content_type="question")
+    db.add_all([student, content])
+    db.commit()
+
+    for i in range(count):
+        db.add(LearningSession(
+            student_id=student.id,
+            content_id=content.id,
+            is_correct=i % 2 == 0,
+            time_spent=20.0,
+            state_before={'algebra_score': 0.5, 'calculus_score': 0.5},
+            action_taken={'content_id': content.id, 'difficulty': 2},
+            reward=1.0 if i % 2 == 0 else -0.5,
+            state_after={'algebra_score': 0.6, 'calculus_score': 0.5}
+        ))
+    # A row without RL data must be skipped
+    db.add(LearningSession(student_id=student.id, content_id=content.id, is_correct=True, time_spent=5.0))
+    db.commit()
+    return content
+
+
+class TestBatchUpdate:
+    """Test suite for QLearningAgent.batch_update"""
+
+    def test_single_transition_matches_online_update(self, agent):
+        """A batch of one must equal update_q_value"""
+        online = QLearningAgent(num_states=10, num_actions=5, learning_rate=0.5, discount_factor=0.9)
+        online.q_table[4] = [0.1, 0.7, 0.2, 0.0, 0.3]
+        agent.q_table[4] = online.q_table[4]
+
+        online.update_q_value(2, 3, 1.0, 4)
+        agent.batch_update(np.array([2]), np.array([3]), np.array([1.0]), np.array([4]))
+
+        assert np.allclose(agent.q_table, online.q_table)
+        assert agent.total_updates == 1
+
+    def test_duplicate_pairs_are_averaged(self, agent):
+        """Repeated (s, a) pairs take one step toward their mean target"""
+        agent.batch_update(np.array([1, 1]), np.array([0, 0]), np.array([1.0, 0.0]), np.array([9, 9]))
+        assert agent.q_table[1, 0] == pytest.approx(0.5 * 0.5)
+
+
+class TestOfflineTrainer:
+    """Test suite for training from logged sessions"""
+
+    def test_load_transitions_streams_in_chunks(self, db, agent):
+        """Every usable row is converted, regardless of chunk size"""
+        content = _log_sessions(db, 7)
+        buffer = load_transitions(db, agent, chunk_size=3)
+
+        assert len(buffer) == 7
+        assert set(buffer.actions.tolist()) == {agent.action_index(content.id)}
+        assert buffer.rewards.dtype == np.float64
+
+    def test_training_moves_q_toward_mean_reward(self, db, agent):
+        """Many epochs converge Q(s,a) toward the fixed point of the logged data"""
+        content = _log_sessions(db, 10)
+        buffer = load_transitions(db, agent)
+        summary = train_offline(agent, buffer, epochs=200, seed=0)
+
+        state = buffer.states[0]
+        assert summary['transitions'] == 10
+        assert agent.q_table[state, agent.action_index(content.id)] > 0
+
+    def test_run_offline_training_writes_snapshot(self, db, tmp_path):
+        """The library entry point saves a loadable Q-table snapshot"""
+        _log_sessions(db, 4)
+        output = str(tmp_path / "q_table_offline.npy")
+        summary = run_offline_training(db, output_path=output, epochs=5, seed=0)
+
+        restored = QLearningAgent()
+        restored.load_model(output)
+        assert summary['transitions'] == 4
+        assert restored.total_updates == 20
+
+    def test_run_offline_training_uses_configured_states(self, db, tmp_path, monkeypatch):
+        """The snapshot has the serving agent's row count and encoder, not the constructor defaults"""
+        monkeypatch.setattr(settings, "Q_TABLE_NUM_STATES", 37)
+        _log_sessions(db, 4)
+        output = str(tmp_path / "q_table_offline.npy")
+        run_offline_training(db, output_path=output, epochs=1, seed=0)
+
+        assert np.load(output).shape[0] == 37
+        restored = QLearningAgent(num_states=37)
+        restored.load_model(output)
+        assert restored.total_updates == 4
@@ -0,0 +1,94 @@
+"""
+Unit Tests for process-pool password hashing
+"""
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import app.api.auth as auth_api
+from app.core.database import get_db
+from app.core.security import PasswordHasher, PasswordHasherBusy, get_password_hash, verify_password
+
+
+@pytest.fixture
+def client(db):
+    api = FastAPI()
+    api.include_router(auth_api.router)
+    api.dependency_overrides[get_db] = lambda: db
+    return TestClient(api)
+
+
+def _register(client, username: str):
+    return client.post("/auth/register", json=dict(username=username, email=f"{username}@x.io",
+                                                   password="pw123456", full_name="H"))
+
+
+class TestPasswordHasher:
+    """Test suite for PasswordHasher"""
+
+    def test_process_pool_round_trip(self):
+        hasher = PasswordHasher(workers=1)
+        try:
+            async def run():
+                hashed = await hasher.hash("secret")
+                return hashed, await hasher.verify("secret", hashed), await hasher.verify("wrong", hashed)
+
+            hashed, ok, wrong = asyncio.run(run())
+        finally:
+            hasher.shutdown()
+        assert verify_password("secret", hashed)
+        assert ok and not wrong
+        stats = hasher.stats()
+        assert stats['completed'] == 3 and stats['pending'] == 0
+        assert stats['run_ms_p50'] > 0 and stats['queue_ms_p99'] >= 0
+
+    def test_admission_limit_rejects_immediately(self):
+        hasher = PasswordHasher(workers=0, max_pending=2)
+        hashed = get_password_hash("secret")
+
+        async def burst():
+            return await asyncio.gather(*[hasher.verify("secret", hashed) for _ in range(5)],
+                                        return_exceptions=True)
+
+        results = asyncio.run(burst())
+        assert results[:2] == [True, True]
+        assert all(isinstance(result, PasswordHasherBusy) for result in results[2:])
+        assert hasher.rejected == 3 and hasher.completed == 2 and hasher.pending == 0
+
+
+class TestAuthEndpoints:
+    """register and login await the hasher and answer 503 when it is saturated"""
+
+    def test_register_and_login(self, client, monkeypatch):
+        monkeypatch.setattr(auth_api, "password_hasher", PasswordHasher(workers=0))
+        assert _register(client, "hash1").status_code == 200
+        login = client.post("/auth/login", json=dict(username="hash1", password="pw123456"))
+        assert login.status_code == 200 and login.json()["access_token"]
+        assert client.post("/auth/login", json=dict(username="hash1", password="nope")).status_code == 401
+        assert client.get("/auth/hashing/stats").status_code == 401
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        assert client.get("/auth/hashing/stats", headers=headers).json()['completed'] == 3
+
+    def test_database_work_runs_off_the_event_loop(self, client, monkeypatch):
+        monkeypatch.setattr(auth_api, "password_hasher", PasswordHasher(workers=0))
+        loops = []
+
+        def recording(helper):
+            def wrapper(*args):
+                try:
+                    loops.append(asyncio.get_running_loop())
+                except RuntimeError:
+                    loops.append(None)
+                return helper(*args)
+            return wrapper
+
+        for name in ("_check_available", "_create_student", "_find_credentials"):
+            monkeypatch.setattr(auth_api, name, recording(getattr(auth_api, name)))
+        assert _register(client, "hash3").status_code == 200
+        assert client.post("/auth/login", json=dict(username="hash3", password="pw123456")).status_code == 200
+        assert loops == [None, None, None]
+
+    def test_saturated_hasher_returns_503(self, client, monkeypatch):
+        monkeypatch.setattr(auth_api, "password_hasher", PasswordHasher(workers=0, max_pending=0))
+        response = _register(client, "hash2")
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
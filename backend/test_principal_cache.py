@@ -0,0 +1,125 @@
+"""
+Unit Tests for the authenticated-principal cache
+"""
+import time
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+import app.api.deps as deps
+import app.services.principal_cache as principal_module
+from app.core.security import create_access_token
+from app.models.models import Student
+from app.services.principal_cache import Principal, PrincipalCache
+
+
+@pytest.fixture
+def seeded(db):
+    db.add(Student(id=1, username="pc", email="pc@x.io", hashed_password="x", full_name="P C"))
+    db.add(Student(id=2, username="other", email="o@x.io", hashed_password="x"))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PrincipalCache(max_items=100, ttl=60)
+    monkeypatch.setattr(principal_module, "principal_cache", cache)
+    monkeypatch.setattr(deps, "principal_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def statements(seeded):
+    counts = {'n': 0}
+
+    def count(*args):
+        counts['n'] += 1
+
+    event.listen(seeded.bind, "before_cursor_execute", count)
+    yield counts
+    event.remove(seeded.bind, "before_cursor_execute", count)
+
+
+class TestPrincipalCache:
+    """Test suite for PrincipalCache"""
+
+    def test_username_lookup_is_cached(self, seeded, cache, statements):
+        principal = cache.by_username(seeded, "pc")
+        assert principal == Principal(1, "pc", "pc@x.io", "P C", principal.created_at)
+        assert cache.by_username(seeded, "pc") is principal
+        assert statements['n'] == 1
+
+        assert cache.by_username(seeded, "nobody") is None
+        assert cache.by_username(seeded, "nobody") is None
+        assert statements['n'] == 3  # unknown usernames are not cached
+
+    def test_ttl_and_lru_bound(self, seeded):
+        cache = PrincipalCache(max_items=1, ttl=0.05)
+        cache.by_username(seeded, "pc")
+        cache.by_username(seeded, "other")
+        assert len(cache) == 1
+        time.sleep(0.06)
+        cache.by_username(seeded, "other")
+        assert (cache.hits, cache.misses) == (0, 3)
+
+    def test_disabled_cache_always_queries(self, seeded, statements):
+        cache = PrincipalCache(max_items=0)
+        cache.by_username(seeded, "pc")
+        cache.by_username(seeded, "pc")
+        assert statements['n'] == 2 and len(cache) == 0
+
+    def test_orm_update_and_delete_invalidate_on_commit(self, seeded, cache):
+        token = create_access_token({"sub": "pc"})
+        cache.remember_token(token, cache.by_username(seeded, "pc"))
+        cache.by_username(seeded, "other")
+
+        student = seeded.get(Student, 1)
+        student.username = "renamed"
+        seeded.flush()
+        seeded.rollback()
+        assert cache.by_token(token) is not None  # rolled back: nothing dropped
+
+        seeded.get(Student, 1).username = "renamed"
+        seeded.commit()
+        assert cache.by_token(token) is None
+        assert cache.by_username(seeded, "pc") is None
+        assert cache.by_username(seeded, "renamed").id == 1
+
+        seeded.delete(seeded.get(Student, 2))
+        seeded.commit()
+        assert cache.by_username(seeded, "other") is None
+
+    def test_explicit_invalidate(self, seeded, cache):
+        cache.by_username(seeded, "pc")
+        cache.by_username(seeded, "other")
+        cache.invalidate(username="pc")
+        assert len(cache) == 1
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+class TestGetCurrentStudent:
+    """deps.get_current_student answers repeated tokens from the cache"""
+
+    def test_repeated_token_skips_the_database(self, seeded, cache, statements):
+        token = create_access_token({"sub": "pc"})
+        assert deps.get_current_student(token, seeded).id == 1
+        queries = statements['n']
+        for _ in range(10):
+            assert deps.get_current_student(token, seeded).username == "pc"
+        assert statements['n'] == queries == 1
+
+    def test_forged_claims_with_a_cached_signature_are_rejected(self, seeded, cache):
+        token = create_access_token({"sub": "pc"})
+        deps.get_current_student(token, seeded)
+        forged = create_access_token({"sub": "other"}).rsplit(".", 1)[0] + "." + token.rsplit(".", 1)[1]
+        with pytest.raises(HTTPException) as error:
+            deps.get_current_student(forged, seeded)
+        assert error.value.status_code == 401
+
+    def test_token_entry_expires_with_the_token(self, seeded, cache):
+        token = create_access_token({"sub": "pc"})
+        cache.remember_token(token, cache.by_username(seeded, "pc"), token_expires_at=time.time() - 1)
+        assert cache.by_token(token) is None
+        cache.remember_token(token, cache.by_username(seeded, "pc"), token_expires_at=time.time() + 600)
+        assert cache.by_token(token).id == 1
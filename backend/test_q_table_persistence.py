@@ -0,0 +1,153 @@
+"""
+Unit Tests for crash-safe Q-table persistence (update log + snapshots)
+"""
+import os
+import threading
+import time
+import pytest
+import numpy as np
+from app.services.rl_agent import QLearningAgent
+from app.services.q_table_persistence import QTablePersistence, UpdateLog, LOG_RECORD, read_log_records
+
+
+def _agent():
+    agent = QLearningAgent(num_states=10, num_actions=4, learning_rate=0.5, discount_factor=0.9, epsilon=0.1)
+    agent.register_content([11, 12, 13])
+    return agent
+
+
+@pytest.fixture
+def paths(tmp_path):
+    """Snapshot and log paths in a temporary directory"""
+    return str(tmp_path / "q_table.npy"), str(tmp_path / "q_table.wal")
+
+
+class TestUpdateLog:
+    """Test suite for UpdateLog"""
+
+    def test_append_and_read(self, tmp_path):
+        """Single and batched appends read back as structured records"""
+        log = UpdateLog(str(tmp_path / "log.wal"))
+        with log.lock:
+            log.append(1, 11, 0.5, 2)
+            log.append_many(np.array([3, 4]), np.array([12, 13]), np.array([1.0, -0.5]), np.array([4, 5]))
+        records = log.read()
+        log.close()
+
+        assert records['content_id'].tolist() == [11, 12, 13]
+        assert records['reward'].tolist() == [0.5, 1.0, -0.5]
+
+    def test_torn_tail_is_dropped(self, tmp_path):
+        """A half-written last record from a crash is ignored"""
+        path = str(tmp_path / "log.wal")
+        with open(path, 'wb') as f:
+            f.write(LOG_RECORD.pack(1, 11, 0.5, 2))
+            f.write(LOG_RECORD.pack(2, 12, 0.5, 3)[:10])
+        log = UpdateLog(path)
+        assert len(log.read()) == 1
+        log.close()
+
+
+class TestQTablePersistence:
+    """Test suite for QTablePersistence"""
+
+    def test_crash_recovery_replays_log(self, paths):
+        """Updates made after the last snapshot survive a crash"""
+        snapshot_path, log_path = paths
+        agent = _agent()
+        agent.save_model(snapshot_path)
+        persistence = QTablePersistence(agent, log_path, snapshot_path, interval=3600)
+        persistence.start()
+        for _ in range(3):
+            agent.update_q_value(1, agent.action_index(12), 1.0, 2)
+        agent.update_log.flush()
+        expected = agent.q_table.copy()
+        # Simulate a crash: no stop(), no snapshot
+
+        restored = _agent()
+        restored.load_model(snapshot_path)
+        replayed = QTablePersistence(restored, log_path, snapshot_path, interval=3600).start()
+
+        assert replayed == 3
+        assert np.allclose(restored.q_table, expected)
+        assert restored.total_updates == 3
+
+    def test_snapshot_compacts_log(self, paths):
+        """A snapshot captures logged updates and truncates the log"""
+        snapshot_path, log_path = paths
+        agent = _agent()
+        persistence = QTablePersistence(agent, log_path, snapshot_path, interval=3600)
+        persistence.start()
+        agent.update_q_value(1, agent.action_index(11), 1.0, 2)
+        persistence.snapshot()
+
+        assert os.path.getsize(log_path) == 0
+        restored = _agent()
+        restored.load_model(snapshot_path)
+        assert restored.q_table[1, restored.action_index(11)] == pytest.approx(0.5)
+        persistence.stop()
+
+    def test_stop_flushes_final_snapshot(self, paths):
+        """Shutdown writes a snapshot so nothing depends on the log"""
+        snapshot_path, log_path = paths
+        agent = _agent()
+        persistence = QTablePersistence(agent, log_path, snapshot_path, interval=3600)
+        persistence.start()
+        agent.batch_update(agent.action_indices([11, 13]) * 0, agent.action_indices([11, 13]),
+                           np.array([1.0, 1.0]), np.array([0, 0]))
+        persistence.stop()
+
+        assert agent.update_log is None
+        restored = _agent()
+        restored.load_model(snapshot_path)
+        assert np.allclose(restored.q_table, agent.q_table)
+        assert restored.total_updates == 2
+
+    def test_timed_flush_reaches_the_file(self, paths):
+        """Logged updates hit the file within flush_interval, not only at the next snapshot"""
+        snapshot_path, log_path = paths
+        agent = _agent()
+        persistence = QTablePersistence(agent, log_path, snapshot_path, interval=3600, flush_interval=0.02)
+        persistence.start()
+        agent.update_q_value(1, agent.action_index(12), 1.0, 2)
+        deadline = time.monotonic() + 2.0
+        while not len(read_log_records(log_path)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(read_log_records(log_path)) == 1
+        persistence.stop()
+
+    def test_updates_proceed_while_snapshot_writes(self, paths):
+        """The table is copied under the log lock and written outside it"""
+        snapshot_path, log_path = paths
+        agent = _agent()
+        persistence = QTablePersistence(agent, log_path, snapshot_path, interval=3600)
+        persistence.start()
+        agent.update_q_value(1, agent.action_index(11), 1.0, 2)
+
+        capture = agent.capture_model
+
+        def slow_capture():
+            write = capture()
+
+            def write_while_updating(path):
+                # Would deadlock (and time out) if the snapshot held the log lock here
+                updater = threading.Thread(target=agent.update_q_value, args=(3, agent.action_index(13), 1.0, 4))
+                updater.start()
+                updater.join(timeout=2.0)
+                assert not updater.is_alive()
+                write(path)
+            return write_while_updating
+
+        agent.capture_model = slow_capture
+        persistence.snapshot()
+        del agent.capture_model
+
+        # The snapshot predates the concurrent update, which stays in the log
+        restored = _agent()
+        restored.load_model(snapshot_path)
+        assert restored.q_table[3, restored.action_index(13)] == 0.0
+        recovered = QTablePersistence(restored, log_path, snapshot_path, interval=3600)
+        assert recovered.start() == 1
+        assert np.allclose(restored.q_table, agent.q_table)
+        recovered.stop()
+        persistence.stop()
@@ -0,0 +1,129 @@
+"""
+Unit Tests for topic-partitioned, memory-mapped Q-table shards
+"""
+import pytest
+import numpy as np
+from app.services.content_catalog import ContentCatalog, catalog_index
+from app.services.rl_agent import ShardedQLearningAgent
+from app.services.state_encoder import AverageScoreEncoder
+
+
+@pytest.fixture
+def agent(tmp_path):
+    """Sharded agent over a temporary shard directory"""
+    sharded = ShardedQLearningAgent(
+        shard_dir=str(tmp_path), num_states=10, num_actions=2,
+        learning_rate=0.5, discount_factor=0.9, epsilon=0.1
+    )
+    sharded.register_content([1, 2, 3, 4], ["algebra", "algebra", "optics", "optics"])
+    return sharded
+
+
+class TestShardedAgent:
+    """Test suite for ShardedQLearningAgent"""
+
+    def test_shards_open_lazily(self, agent):
+        """Registering content opens nothing; touching a topic opens only its shard"""
+        assert agent.shards.loaded_topics == []
+        agent.get_recommended_content({'algebra_score': 0.5}, [1, 2])
+        assert agent.shards.loaded_topics == ["algebra"]
+
+    def test_updates_stay_in_their_topic(self, agent):
+        """A Q-update routes to the content's topic shard only"""
+        agent.update_q_value(3, agent.action_index(3), 1.0, 3)
+        optics = agent.shards.shard("optics")
+        assert optics.q_table[3, 0] == pytest.approx(0.5)
+        assert not agent.shards.shard("algebra").q_table.any()
+
+    def test_recommend_across_topics(self, agent):
+        """Candidates spanning several shards are ranked together"""
+        state = agent._discretize_state({'algebra_score': 0.5})
+        agent.update_q_value(state, agent.action_index(4), 1.0, 0)
+        content_id, confidence = agent.get_recommended_content({'algebra_score': 0.5}, [1, 2, 3, 4])
+        assert content_id == 4
+        assert confidence == pytest.approx(0.5)
+
+    def test_batch_update_groups_by_shard(self, agent):
+        """batch_update applies one vectorized step per touched shard"""
+        actions = agent.action_indices([1, 3, 3])
+        agent.batch_update(np.array([0, 0, 0]), actions, np.array([1.0, 1.0, 0.0]), np.array([9, 9, 9]))
+        assert agent.shards.shard("algebra").q_table[0, 0] == pytest.approx(0.5)
+        assert agent.shards.shard("optics").q_table[0, 0] == pytest.approx(0.25)
+        assert agent.total_updates == 3
+
+    def test_save_and_reload_memory_maps(self, agent, tmp_path):
+        """Saved shards reopen as copy-on-write memory maps"""
+        agent.update_q_value(2, agent.action_index(2), 1.0, 2)
+        agent.save_model()
+
+        restored = ShardedQLearningAgent(shard_dir=str(tmp_path), num_states=10)
+        restored.load_model()
+        restored.register_content([1, 2, 3, 4], ["algebra", "algebra", "optics", "optics"])
+        shard = restored.shards.shard("algebra")
+
+        assert isinstance(shard.q_table, np.memmap)
+        assert shard.q_table[2, shard.columns([2])[0]] == pytest.approx(0.5)
+        assert restored.total_updates == 1
+        assert "optics" not in restored.shards.loaded_topics
+
+    def test_topic_map_is_saved_with_the_shards(self, agent, tmp_path):
+        """A restarted agent routes content to its shard before anything re-registers it"""
+        agent.update_q_value(2, agent.action_index(3), 1.0, 2)
+        agent.save_model()
+
+        restored = ShardedQLearningAgent(shard_dir=str(tmp_path), num_states=10)
+        restored.load_model()
+        assert restored.content_topics == {1: "algebra", 2: "algebra", 3: "optics", 4: "optics"}
+        assert restored.candidate_q_values(2, [3])[0] == pytest.approx(0.5)
+        assert restored.shards.loaded_topics == ["optics"]
+
+    def test_shards_from_other_encoder_are_refused(self, agent, tmp_path):
+        agent.update_q_value(2, agent.action_index(3), 1.0, 2)
+        agent.save_model()
+        restored = ShardedQLearningAgent(shard_dir=str(tmp_path), num_states=10)
+        restored.state_encoder = AverageScoreEncoder(10)
+        with pytest.raises(ValueError, match="hashed_bins"):
+            restored.load_model()
+
+    def test_runtime_content_resolves_topic_from_catalog(self, agent, monkeypatch):
+        """Content registered without a topic is routed by the catalog index, not DEFAULT_TOPIC"""
+        monkeypatch.setattr(catalog_index, "_catalog", ContentCatalog([(7, "optics", 2, "question")]))
+        agent.update_q_value(1, agent.action_index(7), 1.0, 1)
+        assert agent.content_topics[7] == "optics"
+        assert "general" not in agent.shards.loaded_topics
+
+        agent.update_q_value(1, agent.action_index(8), 1.0, 1)  # not in the catalog
+        assert 8 not in agent.content_topics
+        assert "general" in agent.shards.loaded_topics
+
+    def test_statistics_cover_loaded_shards(self, agent):
+        """Stats aggregate only the shards this process has opened"""
+        agent.update_q_value(0, agent.action_index(1), 2.0, 0)
+        stats = agent.get_statistics()
+        assert stats['loaded_topics'] == ["algebra"]
+        assert stats['max_q_value'] == pytest.approx(1.0)
+
+    def test_failed_save_keeps_previous_files(self, agent, monkeypatch):
+        """A crash while writing leaves the last saved table and registry intact"""
+        agent.update_q_value(2, agent.action_index(1), 1.0, 2)
+        agent.save_model()
+        shard = agent.shards.shard("algebra")
+        saved = np.load(shard.actions_path).tolist()
+
+        shard.columns([5])  # registers a new algebra item
+        real_save = np.save
+
+        def failing_save(path, array):
+            if path.startswith(shard.actions_path):
+                raise OSError("disk full")
+            real_save(path, array)
+
+        monkeypatch.setattr(np, "save", failing_save)
+        with pytest.raises(OSError):
+            shard.save()
+        monkeypatch.undo()
+
+        assert np.load(shard.actions_path).tolist() == saved
+        assert shard.dirty  # retried by the next save
+        shard.save()
+        assert np.load(shard.actions_path).tolist() == saved + [5]
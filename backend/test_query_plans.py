@@ -0,0 +1,93 @@
+"""
+Query plan tests for the composite indexes behind the hottest filters
+
+Each hot query is run through SQLite's EXPLAIN QUERY PLAN; a plan that
+scans the table instead of searching the composite index fails.
+"""
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from sqlalchemy import and_, select
+from app.core.database import create_missing_indexes
+from app.models.mastery import StudentMastery, StudyPlan
+from app.models.models import Content, LearningSession
+from app.models.skill_gap import SkillGap
+from app.models.smart_recommendations import FlashCard, UserInteraction
+
+NOW = datetime(2026, 1, 1)
+
+# (statement, index that must serve it)
+HOT_QUERIES = {
+    'time_window': (
+        select(LearningSession).where(LearningSession.student_id == 1,
+                                      LearningSession.timestamp >= NOW - timedelta(days=7)),
+        "ix_learning_sessions_student_id_timestamp"
+    ),
+    'recent_history': (
+        select(LearningSession).where(LearningSession.student_id == 1)
+        .order_by(LearningSession.timestamp.desc()).limit(10),
+        "ix_learning_sessions_student_id_timestamp"
+    ),
+    'skill_mastery': (
+        select(StudentMastery).where(StudentMastery.student_id == 1, StudentMastery.skill_id == 2),
+        "ix_student_mastery_student_id_skill_id"
+    ),
+    'due_flashcards': (
+        select(FlashCard).where(and_(FlashCard.student_id == 1, FlashCard.next_review_date <= NOW))
+        .order_by(FlashCard.next_review_date),
+        "ix_flashcards_student_id_next_review_date"
+    ),
+    'content_interactions': (
+        select(UserInteraction).where(UserInteraction.student_id == 1, UserInteraction.content_id == 2),
+        "ix_user_interactions_student_id_content_id"
+    ),
+    'topic_gap': (
+        select(SkillGap).where(SkillGap.student_id == 1, SkillGap.topic == "algebra"),
+        "ix_skill_gaps_student_id_topic"
+    ),
+    'active_plans': (
+        select(StudyPlan).where(StudyPlan.student_id == 1, StudyPlan.is_active == True),  # noqa: E712
+        "ix_study_plans_student_id_is_active"
+    ),
+    'catalog_level': (
+        select(Content).where(Content.topic == "algebra", Content.difficulty <= 3),
+        "ix_content_topic_difficulty"
+    ),
+}
+
+
+def query_plan(db, statement) -> List[str]:
+    """Detail column of EXPLAIN QUERY PLAN for a statement"""
+    compiled = statement.compile(dialect=db.bind.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+class TestHotQueryPlans:
+    """Every hot query searches its composite index"""
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_no_full_scan(self, db, name):
+        statement, index = HOT_QUERIES[name]
+        table = statement.get_final_froms()[0].name
+        plan = query_plan(db, statement)
+        assert not [step for step in plan if step.startswith(f"SCAN {table}")], plan
+        assert any(f"INDEX {index} " in step for step in plan), plan
+
+    def test_recent_history_needs_no_sort(self, db):
+        plan = query_plan(db, HOT_QUERIES['recent_history'][0])
+        assert not [step for step in plan if "TEMP B-TREE" in step], plan
+
+
+class TestCreateMissingIndexes:
+    """Databases created before the indexes were declared get them at startup"""
+
+    def test_adds_dropped_index_once(self, db):
+        engine = db.bind
+        db.close()
+        index = next(ix for ix in LearningSession.__table__.indexes
+                     if ix.name == "ix_learning_sessions_student_id_timestamp")
+        index.drop(engine)
+        assert create_missing_indexes(engine) == ["ix_learning_sessions_student_id_timestamp"]
+        assert create_missing_indexes(engine) == []
@@ -0,0 +1,187 @@
+"""
+Unit Tests for batch top-k recommendation and the nightly precompute job
+"""
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from app.api.recommendations import get_ranked_content
+from app.core.config import settings
+from app.models.models import Student, Content, StudentKnowledge, LearningSession
+from app.models.recommendation_cache import PrecomputedRecommendation
+from app.services.content_catalog import catalog_index
+from app.services.linear_agent import LinearQAgent
+from app.services.recommendation_precompute import difficulty_mask, precompute_recommendations
+from app.services.rl_agent import QLearningAgent, ShardedQLearningAgent, rank_candidates, top_k
+
+
+def _students(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'mechanics_score': float(rng.random()), 'algebra_score': float(rng.random()),
+             'preferred_difficulty': int(rng.integers(1, 6))} for _ in range(n)]
+
+
+class TestTopK:
+    """Test suite for top_k and rank_candidates"""
+
+    def test_matches_full_sort(self):
+        """argpartition + partial sort gives the same order as sorting every row"""
+        scores = np.random.default_rng(0).normal(size=(50, 300))
+        positions, values = top_k(scores, 7)
+        expected = np.argsort(-scores, axis=1)[:, :7]
+        assert np.array_equal(positions, expected)
+        assert np.array_equal(values, np.take_along_axis(scores, expected, axis=1))
+
+    def test_k_larger_than_candidates(self):
+        positions, _ = top_k(np.array([[0.1, 0.3]]), 5)
+        assert positions.tolist() == [[1, 0]]
+
+    def test_ties_break_by_lowest_position(self):
+        """Tied scores rank in candidate order, so the first slot agrees with np.argmax"""
+        scores = np.zeros((2, 1000))
+        scores[1, [10, 500, 900]] = 1.0
+        positions, values = top_k(scores, 5)
+        assert positions.tolist() == [[0, 1, 2, 3, 4], [10, 500, 900, 0, 1]]
+        assert np.array_equal(positions[:, 0], np.argmax(scores, axis=1))
+        assert values[1].tolist() == [1.0, 1.0, 1.0, 0.0, 0.0]
+
+    def test_untrained_agent_agrees_with_select_content(self):
+        agent = QLearningAgent(num_states=10, epsilon=0.0)
+        catalog = list(range(1, 1001))
+        agent.register_content(catalog)
+        state = {'algebra_score': 0.3, 'preferred_difficulty': 2}
+        top_ids, _ = agent.recommend_top_k([state], catalog, k=3)
+        assert top_ids[0, 0] == agent.select_content(state, catalog)[0] == agent.get_recommended_content(state, catalog)[0]
+
+    def test_padding_and_mask_are_never_returned(self):
+        """-1 padding and masked-out candidates become empty (-1, -inf) slots"""
+        scores = np.array([[5.0, 4.0, 3.0], [1.0, 2.0, 9.0]])
+        ids = np.array([[10, 11, -1], [20, 21, 22]])
+        mask = np.array([[True, False, True], [True, True, True]])
+        top_ids, top_scores = rank_candidates(scores, ids, 3, mask)
+        assert top_ids.tolist() == [[10, -1, -1], [22, 21, 20]]
+        assert np.isneginf(top_scores[0, 1:]).all()
+
+
+class TestAgentTopK:
+    """Test suite for recommend_top_k on every agent type"""
+
+    def test_tabular_matches_candidate_q_values(self):
+        agent = QLearningAgent(num_states=50, num_actions=2)
+        agent.register_content(list(range(1, 41)))
+        agent.q_table[:] = np.random.default_rng(1).normal(size=agent.q_table.shape)
+        students = _students(30)
+        top_ids, top_scores = agent.recommend_top_k(students, list(range(1, 41)), k=5)
+        for student, ids, scores in zip(students, top_ids, top_scores):
+            q = agent.candidate_q_values(agent._discretize_state(student), list(range(1, 41)))
+            assert scores.tolist() == sorted(q, reverse=True)[:5]
+            assert ids[0] == 1 + int(np.argmax(q))
+
+    def test_per_student_candidate_matrix(self):
+        """A padded (n_students, m) candidate matrix ranks each row's own set"""
+        agent = QLearningAgent(num_states=10, num_actions=4)
+        agent.register_content([1, 2, 3, 4])
+        agent.q_table[:] = np.arange(agent.q_table.shape[1])[None, :]
+        top_ids, _ = agent.recommend_top_k([{}, {}], np.array([[1, 2, -1], [3, 4, 2]]), k=2)
+        assert top_ids.tolist() == [[2, 1], [4, 3]]
+
+    def test_sharded_matches_unsharded(self, tmp_path):
+        """Shard-routed Q-matrix gathering ranks like a single table"""
+        sharded = ShardedQLearningAgent(shard_dir=str(tmp_path), num_states=20, num_actions=2)
+        sharded.register_content([1, 2, 3, 4], ["algebra", "algebra", "optics", "optics"])
+        for content_id, reward in [(1, 0.2), (2, 0.9), (3, 0.5), (4, -0.3)]:
+            state = sharded._discretize_state({})
+            sharded.update_q_value(state, sharded.action_index(content_id), reward, state)
+        top_ids, top_scores = sharded.recommend_top_k([{}], [1, 2, 3, 4], k=4)
+        q = sharded.candidate_q_values(sharded._discretize_state({}), [1, 2, 3, 4])
+        assert top_ids[0].tolist() == (1 + np.argsort(-q, kind='stable')).tolist()
+        assert top_scores[0].tolist() == pytest.approx(sorted(q, reverse=True))
+
+    def test_linear_matches_score_batch(self):
+        agent = LinearQAgent()
+        agent.register_content([1, 2, 3], ["mechanics", "optics", "algebra"], [1, 3, 5],
+                               ["question", "lesson", "quiz"])
+        agent.weights = np.random.default_rng(2).normal(size=agent.weights.shape)
+        students = _students(8)
+        top_ids, top_scores = agent.recommend_top_k(students, [1, 2, 3], k=2)
+        full = agent.score_batch(students, [1, 2, 3])
+        assert top_ids.tolist() == (1 + np.argsort(-full, axis=1)[:, :2]).tolist()
+        assert top_scores == pytest.approx(np.sort(full, axis=1)[:, ::-1][:, :2], rel=1e-5)
+
+
+class TestPrecompute:
+    """Test suite for the nightly precompute job"""
+
+    def test_difficulty_mask_falls_back_to_catalog(self):
+        mask = difficulty_mask(np.array([1, 5]), np.array([1, 2, 3]), window=1)
+        assert mask.tolist() == [[True, True, False], [True, True, True]]
+
+    def test_writes_ranked_rows_for_every_student(self, db):
+        db.add_all([Content(id=i, title=f"c{i}", topic="algebra", difficulty=d)
+                    for i, d in [(1, 1), (2, 2), (3, 5), (4, 3)]])
+        db.add_all([Student(id=i, username=f"s{i}", email=f"s{i}@x.io", hashed_password="x")
+                    for i in range(1, 6)])
+        db.add(StudentKnowledge(student_id=1, preferred_difficulty=1))
+        db.commit()
+
+        agent = QLearningAgent(num_states=10, num_actions=4)
+        agent.register_content([1, 2, 3, 4])
+        agent.q_table[:] = np.array([0.1, 0.4, 0.9, 0.2])[None, :]
+
+        summary = precompute_recommendations(db, agent, k=2, chunk_size=2, difficulty_window=1)
+        assert summary['students'] == 5
+
+        rows = {row.student_id: row for row in db.query(PrecomputedRecommendation).all()}
+        assert len(rows) == 5
+        assert rows[1].content_ids == [2, 1]  # difficulty 1 +/- 1 excludes item 3
+        assert rows[3].content_ids == [2, 4]  # default difficulty 2 +/- 1
+        assert rows[1].scores == pytest.approx([0.4, 0.1])
+
+        # Re-running replaces rather than duplicates
+        precompute_recommendations(db, agent, k=2, chunk_size=10, difficulty_window=1)
+        assert db.query(PrecomputedRecommendation).count() == 5
+
+
+class TestRankedContent:
+    """Precomputed lists are served only while they still describe the student"""
+
+    @pytest.fixture
+    def seeded(self, db):
+        db.add_all([Content(id=i, title=f"c{i}", topic="algebra", difficulty=2) for i in (1, 2, 3)])
+        db.add(Student(id=1, username="s1", email="s1@x.io", hashed_password="x"))
+        db.add(PrecomputedRecommendation(student_id=1, content_ids=[3, 1], scores=[0.9, 0.5],
+                                         generated_at=datetime.utcnow() - timedelta(hours=1)))
+        db.commit()
+        catalog_index.rebuild(db)
+        return db
+
+    def test_fresh_list_is_served(self, seeded):
+        ranked = get_ranked_content(seeded, 1, {}, k=5)
+        assert ranked["source"] == "precomputed"
+        assert [item["id"] for item in ranked["items"]] == [3, 1]
+
+    def test_session_after_generation_falls_back_to_live(self, seeded):
+        seeded.add(LearningSession(student_id=1, content_id=3, is_correct=True, timestamp=datetime.utcnow()))
+        seeded.commit()
+        ranked = get_ranked_content(seeded, 1, {}, k=5)
+        assert ranked["source"] == "live" and ranked["generated_at"] is None
+        assert sorted(item["id"] for item in ranked["items"]) == [1, 2, 3]
+
+    def test_session_before_generation_keeps_list(self, seeded):
+        seeded.add(LearningSession(student_id=1, content_id=3, is_correct=True,
+                                   timestamp=datetime.utcnow() - timedelta(hours=2)))
+        seeded.commit()
+        assert get_ranked_content(seeded, 1, {}, k=5)["source"] == "precomputed"
+
+    def test_expired_list_falls_back_to_live(self, seeded, monkeypatch):
+        monkeypatch.setattr(settings, "PRECOMPUTED_RECOMMENDATION_TTL", 60)
+        assert get_ranked_content(seeded, 1, {}, k=5)["source"] == "live"
+
+    def test_live_ranking_applies_difficulty_window(self, seeded, monkeypatch):
+        """The live fallback ranks the same difficulty window as the nightly job"""
+        monkeypatch.setattr(settings, "PRECOMPUTED_RECOMMENDATION_TTL", 0)
+        seeded.add(Content(id=4, title="c4", topic="algebra", difficulty=5))
+        seeded.commit()
+        ranked = get_ranked_content(seeded, 1, {'preferred_difficulty': 2}, k=5)
+        assert ranked["source"] == "live" and sorted(item["id"] for item in ranked["items"]) == [1, 2, 3]
+        ranked = get_ranked_content(seeded, 1, {'preferred_difficulty': 5}, k=5)
+        assert [item["id"] for item in ranked["items"]] == [4]
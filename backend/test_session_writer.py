@@ -0,0 +1,97 @@
+"""
+Unit Tests for the LearningSession write-behind buffer
+"""
+import json
+import threading
+import time
+import pytest
+from sqlalchemy.orm import sessionmaker
+import app.api.session as session_api
+from app.models.models import Content, LearningSession, Student
+from app.models.schemas import AnswerSubmit
+from app.services.content_catalog import catalog_index
+from app.services.session_writer import SessionWriteBehind
+
+
+def _row(i: int) -> dict:
+    return dict(student_id=1, content_id=1, student_answer=str(i), is_correct=i % 2 == 0,
+                time_spent=10.0, reward=0.5, state_before={'i': i}, action_taken={'content_id': 1})
+
+
+@pytest.fixture
+def factory(db):
+    db.add(Student(id=1, username="wb", email="wb@x.io", hashed_password="x"))
+    db.add(Content(id=1, title="Q1", topic="algebra", difficulty=2, content_type="question",
+                   correct_answer="a", explanation="e"))
+    db.commit()
+    return sessionmaker(autocommit=False, autoflush=False, bind=db.bind)
+
+
+def _count(db) -> int:
+    db.expire_all()
+    return db.query(LearningSession).count()
+
+
+class TestSessionWriteBehind:
+    """Test suite for SessionWriteBehind"""
+
+    def test_batches_by_size_and_interval(self, db, factory):
+        writer = SessionWriteBehind(factory, flush_interval=0.05, flush_size=50)
+        assert not writer.submit(_row(0))  # not started
+        writer.start()
+        for i in range(120):
+            assert writer.submit(_row(i))
+        deadline = time.time() + 5
+        while writer.rows_written < 120 and time.time() < deadline:
+            time.sleep(0.01)
+        writer.stop()
+
+        assert writer.rows_written == 120 and _count(db) == 120
+        assert writer.batches_written < 120
+        assert db.query(LearningSession).filter(LearningSession.student_answer == "7").one().state_before == {'i': 7}
+
+    def test_backpressure_and_drain_on_stop(self, db, factory):
+        writer = SessionWriteBehind(factory, flush_interval=60, flush_size=100, max_queue=3, enqueue_timeout=0.05)
+        writer.start()
+        assert all(writer.submit(_row(i)) for i in range(3))
+        started = time.perf_counter()
+        assert not writer.submit(_row(3))  # full: blocks for the timeout, then gives up
+        assert time.perf_counter() - started >= 0.05
+        assert writer.rows_rejected == 1 and _count(db) == 0
+
+        writer.stop()
+        assert writer.pending == 0 and _count(db) == 3
+        assert not writer.submit(_row(4))
+
+    def test_full_queue_timeouts_run_concurrently(self, db, factory):
+        """Submitters blocked on a full queue each wait their own timeout, not one after another"""
+        writer = SessionWriteBehind(factory, flush_interval=60, flush_size=100, max_queue=1, enqueue_timeout=0.2)
+        writer.start()
+        assert writer.submit(_row(0))
+        threads = [threading.Thread(target=writer.submit, args=(_row(i),)) for i in range(1, 9)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.perf_counter() - started < 0.8
+        assert writer.rows_rejected == 8
+
+        writer.stop()
+        assert _count(db) == 1
+
+    def test_submit_answer_queues_session_row(self, db, factory, monkeypatch):
+        catalog_index.rebuild(db)
+        writer = SessionWriteBehind(factory, flush_interval=60, flush_size=100)
+        monkeypatch.setattr(session_api, "session_writer", writer)
+        writer.start()
+
+        response = json.loads(
+            session_api.submit_answer(AnswerSubmit(session_id=1, student_answer="a", time_spent=20), "wb", db).body
+        )
+        assert response['id'] is None and response['is_correct']
+        assert _count(db) == 0 and writer.pending == 1
+
+        writer.stop()
+        session = db.query(LearningSession).one()
+        assert session.reward == response['reward'] and session.state_after['total_attempts'] == 1
@@ -0,0 +1,163 @@
+"""
+Unit Tests for the shared-memory Q-table used across worker processes
+"""
+import multiprocessing
+import os
+import uuid
+import pytest
+import numpy as np
+from app.services.rl_agent import QLearningAgent, SharedQLearningAgent
+from app.services.q_table_persistence import QTablePersistence
+from app.services.model_registry import ModelRegistry, ModelRegistryError
+from app.services.shared_q_table import _open_segment, _unlink_segment
+
+
+def _shared_agent(name, **kwargs):
+    agent = SharedQLearningAgent(name=name, num_states=10, max_actions=8,
+                                 learning_rate=0.5, discount_factor=0.9, epsilon=0.1, **kwargs)
+    return agent
+
+
+def _hammer(name, content_id, updates):
+    """Worker process: repeatedly update one contended (state, action) pair"""
+    agent = _shared_agent(name)
+    agent.learning_rate = 0.01
+    agent.discount_factor = 0.0
+    action = agent.action_index(content_id)
+    for _ in range(updates):
+        agent.update_q_value(3, action, 1.0, 4)
+    agent.close()
+
+
+def _attach_and_unlink(name):
+    """Worker process: attach, then shut down the way main.py does"""
+    _shared_agent(name).close(unlink=True)
+
+
+@pytest.fixture
+def segment_name():
+    """Unique segment name, unlinked after the test even if attachments leaked"""
+    name = f"test_q_{uuid.uuid4().hex[:12]}"
+    yield name
+    try:
+        segment = _open_segment(name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    _unlink_segment(segment)
+
+
+class TestSharedQLearningAgent:
+    """Test suite for SharedQLearningAgent"""
+
+    def test_workers_share_table_and_registry(self, segment_name):
+        """An update or registration in one attachment is visible in another"""
+        first = _shared_agent(segment_name)
+        second = _shared_agent(segment_name)
+        assert first.shared.created and not second.shared.created
+
+        first.register_content([101, 102])
+        first.update_q_value(1, first.action_index(102), 1.0, 2)
+
+        assert second.action_index(102) == first.action_index(102)
+        assert second.candidate_q_values(1, [101, 102])[1] == pytest.approx(0.5)
+        # Content first seen by the second worker gets the next shared column
+        assert second.action_index(103) == 2
+        assert first.registry.content_ids.tolist() == [101, 102, 103]
+        second.close()
+        first.close()
+
+    def test_only_last_detach_unlinks(self, segment_name):
+        """A worker shutting down never removes the segment from under live workers"""
+        first = _shared_agent(segment_name)
+        second = _shared_agent(segment_name)
+        assert first.shared.attached == 2
+        first.register_content([101])
+
+        assert first.close(unlink=True) is False
+        third = _shared_agent(segment_name)
+        assert not third.shared.created and third.registry.content_ids.tolist() == [101]
+        assert second.shared.attached == 2
+
+        assert third.close(unlink=True) is False
+        assert second.close(unlink=True) is True
+        fresh = _shared_agent(segment_name)
+        assert fresh.shared.created and fresh.registry.content_ids.tolist() == []
+        fresh.close()
+
+    @pytest.mark.skipif(os.name != "posix", reason="fork start method")
+    def test_exiting_process_keeps_segment(self, segment_name):
+        agent = _shared_agent(segment_name)
+        agent.register_content([7])
+        context = multiprocessing.get_context("fork")
+        worker = context.Process(target=_attach_and_unlink, args=(segment_name,))
+        worker.start()
+        worker.join()
+        assert worker.exitcode == 0
+
+        other = _shared_agent(segment_name)
+        assert not other.shared.created and other.action_index(7) == 0
+        other.close()
+        agent.close()
+
+    def test_capacity_is_fixed(self, segment_name):
+        """Registering past the segment capacity fails instead of growing"""
+        agent = _shared_agent(segment_name)
+        agent.register_content(range(8))
+        with pytest.raises(RuntimeError):
+            agent.action_index(99)
+        agent.close()
+
+    def test_creator_loads_snapshot_and_replays_log(self, segment_name, tmp_path):
+        """A new segment starts from the last snapshot plus the logged tail"""
+        snapshot_path, log_path = str(tmp_path / "q_table.npy"), str(tmp_path / "q_table.wal")
+        source = QLearningAgent(num_states=10, num_actions=4, learning_rate=0.5, discount_factor=0.9)
+        source.register_content([11, 12])
+        source.update_q_value(1, source.action_index(11), 1.0, 2)
+        source.save_model(snapshot_path)
+        persistence = QTablePersistence(source, log_path, snapshot_path, interval=3600)
+        persistence.start()
+        source.update_q_value(2, source.action_index(12), 1.0, 3)
+        persistence.log.flush()
+
+        agent = _shared_agent(segment_name, snapshot_path=snapshot_path, log_path=log_path)
+        np.testing.assert_allclose(agent.q_table[:, :2], source.q_table[:, :2])
+        assert agent.replays_update_log is False
+        persistence.stop()
+        agent.close()
+
+    def test_single_persistence_owner(self, segment_name):
+        """Only one attachment may claim the update log and snapshots"""
+        first = _shared_agent(segment_name)
+        assert first.claim_persistence() is True
+        # flock is per open file, so a second claim in this process still loses
+        second = _shared_agent(segment_name)
+        assert second.claim_persistence() is False
+        second.close()
+        first.close()
+
+    def test_registry_refuses_hot_swap(self, segment_name, tmp_path):
+        """Hot swap would detach this worker from the shared table"""
+        agent = _shared_agent(segment_name)
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        manifest = registry.publish(QLearningAgent(num_states=10, num_actions=4))
+        with pytest.raises(ModelRegistryError):
+            registry.activate(agent, manifest['version'])
+        agent.close()
+
+    @pytest.mark.skipif(os.name != "posix", reason="fork start method")
+    def test_no_lost_updates_across_processes(self, segment_name):
+        """Concurrent writers to one row never overwrite each other's updates"""
+        agent = _shared_agent(segment_name)
+        agent.register_content([7])
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_hammer, args=(segment_name, 7, 500)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # With gamma = 0 and a constant reward, n updates give 1 - (1 - lr)^n in any order
+        expected = 1.0 - (1.0 - 0.01) ** 2000
+        assert agent.q_table[3, agent.action_index(7)] == pytest.approx(expected, rel=1e-9)
+        agent.close()
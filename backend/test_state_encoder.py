@@ -0,0 +1,110 @@
+"""
+Unit Tests for the knowledge-state encoders
+"""
+import pytest
+import numpy as np
+from app.services.rl_agent import QLearningAgent
+from app.services.state_encoder import (
+    AverageScoreEncoder, HashedBinEncoder, STATE_FEATURE_KEYS, TOPIC_SCORE_KEYS,
+    create_state_encoder, state_features
+)
+
+
+def _students(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {**dict(zip(TOPIC_SCORE_KEYS, rng.random(len(TOPIC_SCORE_KEYS)).tolist())),
+         'preferred_difficulty': int(rng.integers(1, 6))}
+        for _ in range(n)
+    ]
+
+
+class TestStateFeatures:
+    """Test suite for state_features"""
+
+    def test_columns_and_defaults(self):
+        """Missing or None values fall back to StudentKnowledge defaults"""
+        features = state_features([{'optics_score': 0.9, 'calculus_score': None, 'preferred_difficulty': 5}, {}])
+        assert features.shape == (2, len(STATE_FEATURE_KEYS))
+        assert features[0, TOPIC_SCORE_KEYS.index('optics_score')] == pytest.approx(0.9)
+        assert features[0, TOPIC_SCORE_KEYS.index('calculus_score')] == pytest.approx(0.5)
+        assert features[0, -1] == pytest.approx(1.0)
+        assert features[1, -1] == pytest.approx(0.25)  # default difficulty 2 of 1-5
+
+
+class TestHashedBinEncoder:
+    """Test suite for HashedBinEncoder"""
+
+    def test_every_feature_is_binned(self):
+        """Moving any single topic score (or the difficulty) changes the bin vector"""
+        encoder = HashedBinEncoder(num_states=100)
+        base = encoder.bin_codes([{}])[0]
+        for column, key in enumerate(STATE_FEATURE_KEYS):
+            changed = encoder.bin_codes([{key: 5 if key == 'preferred_difficulty' else 0.95}])[0]
+            assert changed[column] != base[column]
+            assert np.array_equal(np.delete(changed, column), np.delete(base, column))
+
+    def test_batch_matches_single_encoding(self):
+        """One vectorized call gives the same rows as encoding students one by one"""
+        encoder = HashedBinEncoder(num_states=257)
+        students = _students(200)
+        batch = encoder.encode_batch(students)
+        assert batch.tolist() == [encoder.encode(student) for student in students]
+        assert np.array_equal(encoder.encode_batch(state_features(students)), batch)
+
+    @pytest.mark.parametrize("num_states", [1, 7, 100, 4096])
+    def test_rows_fit_any_table_height(self, num_states):
+        """Q-table height is independent of the 14 encoded features"""
+        rows = HashedBinEncoder(num_states).encode_batch(_students(500))
+        assert rows.min() >= 0 and rows.max() < num_states
+
+    def test_spreads_students_the_average_encoder_merges(self):
+        """Students differing outside algebra/calculus no longer share one state"""
+        students = [{**student, 'algebra_score': 0.5, 'calculus_score': 0.5} for student in _students(300)]
+        legacy = AverageScoreEncoder(100).encode_batch(students)
+        hashed = HashedBinEncoder(100).encode_batch(students)
+        assert len(set(legacy.tolist())) == 1
+        assert len(set(hashed.tolist())) > 50
+
+    def test_empty_batch(self):
+        assert HashedBinEncoder(100).encode_batch([]).shape == (0,)
+
+
+class TestEncoderSelection:
+    """Test suite for create_state_encoder and agent integration"""
+
+    def test_factory(self):
+        assert isinstance(create_state_encoder("average", 10), AverageScoreEncoder)
+        assert create_state_encoder("hashed_bins", 10, bins=4).bins == 4
+        with pytest.raises(ValueError):
+            create_state_encoder("tiles", 10)
+
+    def test_agent_uses_encoder(self, tmp_path):
+        """The agent discretizes through its encoder and records it in metadata"""
+        agent = QLearningAgent(num_states=64, num_actions=2, state_encoder=HashedBinEncoder(64))
+        students = _students(20)
+        assert agent.discretize_states(students).tolist() == [agent._discretize_state(s) for s in students]
+
+        agent.save_model(str(tmp_path / "q.npy"))
+        assert '"state_encoder": "hashed_bins"' in (tmp_path / "q_meta.json").read_text()
+
+    def test_snapshot_from_other_encoder_is_skipped(self, tmp_path):
+        """Rows written under another encoder are not loaded, nor is their update log replayed"""
+        legacy = QLearningAgent(num_states=64, num_actions=2, state_encoder=AverageScoreEncoder(64))
+        legacy.register_content([1, 2])
+        legacy.q_table[5, 0] = 1.0
+        legacy.save_model(str(tmp_path / "q.npy"))
+
+        agent = QLearningAgent(num_states=64, num_actions=2, state_encoder=HashedBinEncoder(64))
+        agent.load_model(str(tmp_path / "q.npy"))
+        assert not agent.q_table.any() and len(agent.registry) == 0
+        assert agent.replays_update_log is False
+
+        same = QLearningAgent(num_states=64, num_actions=2, state_encoder=AverageScoreEncoder(64))
+        same.load_model(str(tmp_path / "q.npy"))
+        assert same.q_table[5, same.action_index(1)] == 1.0 and same.replays_update_log
+
+        # Checking compatibility alone leaves log replay alone
+        probe = QLearningAgent(num_states=64, num_actions=2, state_encoder=HashedBinEncoder(64))
+        assert not probe._snapshot_compatible("probe", 64, {'state_encoder': "average"})
+        assert probe.replays_update_log
@@ -0,0 +1,87 @@
+"""
+Unit Tests for the reward ring buffer and incremental Q-table aggregates
+"""
+import pytest
+import numpy as np
+from app.services.rl_agent import QLearningAgent, ShardedQLearningAgent
+from app.services.streaming_stats import QTableAggregates, RewardRingBuffer
+
+
+class TestRewardRingBuffer:
+    """Test suite for RewardRingBuffer"""
+
+    def test_moments_match_numpy_over_the_window(self):
+        """Appends and batch extends keep mean/variance equal to a full recompute"""
+        rng = np.random.default_rng(0)
+        ring = RewardRingBuffer(capacity=50)
+        history = []
+        for step in range(300):
+            if step % 7 == 0:
+                batch = rng.normal(size=int(rng.integers(1, 80)))
+                ring.extend(batch)
+                history.extend(batch.tolist())
+            else:
+                reward = float(rng.normal())
+                ring.append(reward)
+                history.append(reward)
+            window = np.array(history[-50:])
+            assert len(ring) == len(window)
+            assert ring.mean == pytest.approx(window.mean(), abs=1e-9)
+            assert ring.variance == pytest.approx(window.var(), abs=1e-9)
+        assert ring.tolist() == pytest.approx(history[-50:])
+
+    def test_empty_and_reset(self):
+        ring = RewardRingBuffer(capacity=3, rewards=[1.0, 2.0, 3.0, 4.0])
+        assert ring.tolist() == [2.0, 3.0, 4.0]
+        ring.reset()
+        assert len(ring) == 0 and ring.mean == 0.0 and ring.std == 0.0
+
+
+class TestQTableAggregates:
+    """Test suite for QTableAggregates and the agent's O(1) statistics"""
+
+    def test_record_tracks_lowered_maxima(self):
+        table = np.array([[1.0, 5.0], [2.0, 0.0]])
+        aggregates = QTableAggregates(table)
+        table[0, 1] = -1.0
+        aggregates.record(0, 5.0, -1.0)
+        assert aggregates.max == 2.0
+        assert aggregates.mean == pytest.approx(table.mean())
+
+    def test_agent_statistics_match_full_scan(self):
+        """Online, batched and accumulated updates all keep mean/max exact"""
+        rng = np.random.default_rng(1)
+        agent = QLearningAgent(num_states=20, num_actions=2, learning_rate=0.3)
+        agent.register_content(list(range(1, 31)))
+        for step in range(400):
+            if step % 5 == 0:
+                n = 64
+                agent.batch_update(rng.integers(20, size=n), rng.integers(30, size=n),
+                                   rng.normal(size=n), rng.integers(20, size=n), accumulate=step % 10 == 0)
+            else:
+                agent.update_q_value(int(rng.integers(20)), int(rng.integers(30)),
+                                     float(rng.normal()), int(rng.integers(20)))
+            stats = agent.get_statistics()
+            assert stats['mean_q_value'] == pytest.approx(agent.q_table.mean(), abs=1e-9)
+            assert stats['max_q_value'] == agent.q_table.max()
+        assert stats['avg_reward'] == pytest.approx(np.mean(agent.episode_rewards))
+
+    def test_resize_and_swap_rebuild_aggregates(self):
+        agent = QLearningAgent(num_states=4, num_actions=1)
+        agent.update_q_value(0, agent.action_index(1), 2.0, 0)
+        agent.register_content(list(range(2, 10)))  # grows the table
+        assert agent.get_statistics()['q_table_size'] == agent.q_table.size
+        agent.q_table = np.full((4, 3), -1.0)
+        assert agent.get_statistics()['max_q_value'] == -1.0
+
+    def test_sharded_statistics_match_full_scan(self, tmp_path):
+        rng = np.random.default_rng(2)
+        agent = ShardedQLearningAgent(shard_dir=str(tmp_path), num_states=8, num_actions=2, learning_rate=0.5)
+        agent.register_content(list(range(1, 9)), ["algebra", "optics"] * 4)
+        for _ in range(100):
+            agent.update_q_value(int(rng.integers(8)), agent.action_index(int(rng.integers(1, 9))),
+                                 float(rng.normal()), int(rng.integers(8)))
+        tables = [shard.q_table[:, :shard.width] for shard in agent.shards.loaded_shards()]
+        stats = agent.get_statistics()
+        assert stats['mean_q_value'] == pytest.approx(np.concatenate(tables, axis=1).mean())
+        assert stats['max_q_value'] == max(table.max() for table in tables)
@@ -0,0 +1,198 @@
+"""
+Unit Tests for bulk student onboarding
+"""
+import io
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+import app.api.students as students_api
+from app.api.deps import get_current_admin, get_current_student
+from app.core.database import get_db
+from app.core.security import verify_password
+from app.models.models import Student, StudentKnowledge
+from app.services.principal_cache import Principal
+from app.services.student_import import HashingPool, ImportBusy, RecordParser, StudentImporter, import_students
+
+
+def fake_hash(password: str) -> str:
+    return f"hashed:{password}"
+
+
+@pytest.fixture
+def existing(db):
+    db.add(Student(id=1, username="taken", email="taken@x.io", hashed_password="x"))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def statements(existing):
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement.split()[0].upper())
+
+    event.listen(existing.bind, "before_cursor_execute", record)
+    yield seen
+    event.remove(existing.bind, "before_cursor_execute", record)
+
+
+class TestRecordParser:
+    """Test suite for RecordParser"""
+
+    def test_csv_with_header(self):
+        parser = RecordParser("csv")
+        assert parser.feed("Username,Email,Password,Full_Name") is None
+        assert parser.feed('a1,a1@x.io,pw,"Doe, Ann"') == (2, {'username': "a1", 'email': "a1@x.io",
+                                                               'password': "pw", 'full_name': "Doe, Ann"})
+        assert parser.feed("") is None
+        assert parser.feed("too,few") == (4, None)
+
+    def test_jsonl(self):
+        parser = RecordParser("jsonl")
+        assert parser.feed('{"username": "a"}') == (1, {'username': "a"})
+        assert parser.feed("{not json") == (2, None)
+        assert parser.feed("[1, 2]") == (3, None)
+        with pytest.raises(ValueError):
+            RecordParser("xml")
+
+
+class TestStudentImporter:
+    """Test suite for StudentImporter"""
+
+    def test_chunked_import_with_duplicates_and_errors(self, existing, statements):
+        importer = StudentImporter(existing, chunk_size=3, hash_password=fake_hash)
+        records = [
+            {'username': "s1", 'email': "s1@x.io", 'password': "p1", 'full_name': "One"},
+            {'username': "taken", 'email': "new@x.io", 'password': "p"},       # exists in the database
+            {'username': "s2", 'email': "not-an-email", 'password': "p"},      # invalid email
+            {'username': "s3", 'email': "s3@x.io", 'password': "p3"},
+            {'username': "s1", 'email': "other@x.io", 'password': "p"},        # repeated in the import
+            {'username': "s4", 'email': "taken@x.io", 'password': "p"},        # email exists
+            {'username': "s5", 'email': "s5@x.io", 'password': ""},            # missing password
+        ]
+        for line, record in enumerate(records, start=1):
+            if importer.add(line, record):
+                importer.flush()
+        importer.add(8, None)
+        importer.flush()
+
+        report = importer.report()
+        assert (report['created'], report['duplicates'], report['invalid']) == (2, 3, 3)
+        assert sorted(error['line'] for error in report['errors']) == [2, 3, 5, 6, 7, 8]
+        # 3 chunks, the last with no valid record: one uniqueness query and two INSERTs per written chunk
+        assert report['chunks'] == 3
+        assert statements == ["SELECT", "INSERT", "INSERT"] * 2
+
+        students = {s.username: s for s in existing.query(Student).all()}
+        assert students["s1"].hashed_password == "hashed:p1" and students["s1"].full_name == "One"
+        knowledge = existing.query(StudentKnowledge).filter(StudentKnowledge.student_id == students["s3"].id).one()
+        assert knowledge.algebra_score == 0.5 and knowledge.preferred_difficulty == 2
+
+    def test_repeated_races_report_duplicates(self, existing, monkeypatch):
+        """Each concurrent registration that beats the insert is reported, the rest still land"""
+        importer = StudentImporter(existing, chunk_size=10, hash_password=fake_hash)
+        racers = ["r1", "r2"]
+        insert = importer._insert
+
+        def racing_insert(students, hashes):
+            if racers:
+                name = racers.pop(0)
+                existing.add(Student(username=name, email=f"{name}@other.io", hashed_password="x"))
+                existing.commit()
+            insert(students, hashes)
+
+        monkeypatch.setattr(importer, "_insert", racing_insert)
+        for line, name in enumerate(["r1", "r2", "r3"], start=1):
+            importer.add(line, {'username': name, 'email': f"{name}@x.io", 'password': "p"})
+        importer.flush()
+
+        report = importer.report()
+        assert (report['created'], report['duplicates'], report['chunks']) == (1, 2, 1)
+        assert existing.query(Student).filter(Student.username == "r3").one()
+
+    def test_invisible_conflict_skips_chunk(self, existing, monkeypatch):
+        importer = StudentImporter(existing, chunk_size=10, hash_password=fake_hash)
+
+        def conflicting_insert(students, hashes):
+            raise IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+
+        monkeypatch.setattr(importer, "_insert", conflicting_insert)
+        importer.add(1, {'username': "c1", 'email': "c1@x.io", 'password': "p"})
+        importer.flush()
+        assert importer.report()['duplicates'] == 1 and importer.report()['created'] == 0
+
+    def test_import_students_hashes_in_process_pool(self, existing):
+        lines = io.StringIO("username,email,password\np1,p1@x.io,secret1\np2,p2@x.io,secret2\n")
+        report = import_students(existing, lines, format="csv", chunk_size=10, workers=2)
+        assert report['created'] == 2 and report['chunks'] == 1
+        student = existing.query(Student).filter(Student.username == "p2").one()
+        assert verify_password("secret2", student.hashed_password)
+
+
+class TestImportEndpoint:
+    """POST /students/import streams the request body through the importer"""
+
+    def test_jsonl_upload(self, existing, monkeypatch):
+        pool = HashingPool(workers=1)
+        monkeypatch.setattr(students_api, "import_pool", pool)
+        api = FastAPI()
+        api.include_router(students_api.router)
+        api.dependency_overrides[get_db] = lambda: existing
+        api.dependency_overrides[get_current_admin] = lambda: None
+        body = "\n".join(json.dumps(record) for record in [
+            {'username': "j1", 'email': "j1@x.io", 'password': "pw"},
+            {'username': "taken", 'email': "t2@x.io", 'password': "pw"},
+        ])
+
+        def chunks():
+            for start in range(0, len(body), 7):  # split records across body chunks
+                yield body[start:start + 7].encode()
+
+        response = TestClient(api).post("/students/import", content=chunks(),
+                                        headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.json()['created'] == 1 and response.json()['duplicates'] == 1
+        assert existing.query(Student).filter(Student.username == "j1").one()
+
+        response = TestClient(api).post("/students/import?format=xml", content=b"")
+        assert response.status_code == 400
+
+        # The next import reuses the same worker processes
+        executor = pool._executor
+        response = TestClient(api).post("/students/import", content=json.dumps(
+            {'username': "j2", 'email': "j2@x.io", 'password': "pw"}
+        ), headers={"Content-Type": "application/x-ndjson"})
+        assert response.json()['created'] == 1 and pool._executor is executor and pool.active == 0
+        pool.shutdown()
+
+    def test_busy_pool_answers_503(self, existing, monkeypatch):
+        pool = HashingPool(workers=1, max_imports=1)
+        monkeypatch.setattr(students_api, "import_pool", pool)
+        api = FastAPI()
+        api.include_router(students_api.router)
+        api.dependency_overrides[get_db] = lambda: existing
+        api.dependency_overrides[get_current_admin] = lambda: None
+        with pool.admit():
+            with pytest.raises(ImportBusy):
+                with pool.admit():
+                    pass
+            response = TestClient(api).post("/students/import", content=b"username,email,password\n")
+        assert response.status_code == 503
+        assert pool.active == 0
+        pool.shutdown()
+
+    def test_requires_admin(self, existing, monkeypatch):
+        monkeypatch.setattr(students_api.settings, "ADMIN_USERNAMES", ["admin"])
+        api = FastAPI()
+        api.include_router(students_api.router)
+        api.dependency_overrides[get_db] = lambda: existing
+        api.dependency_overrides[get_current_student] = lambda: Principal(1, "taken", "taken@x.io", None, None)
+        body = json.dumps({'username': "j1", 'email': "j1@x.io", 'password': "pw"})
+        response = TestClient(api).post("/students/import", content=body,
+                                        headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 403
+        assert existing.query(Student).filter(Student.username == "j1").first() is None
@@ -0,0 +1,112 @@
+"""
+Unit Tests for the vectorized synthetic student simulator
+"""
+import itertools
+import pytest
+import numpy as np
+from app.models.mastery import StudentMastery
+from app.models.models import Student
+from app.services.content_bandit import calculate_content_reward, calculate_content_rewards
+from app.services.rl_agent import QLearningAgent, calculate_rewards
+from app.services.student_model import StudentModelService
+from app.services.student_simulator import SimulatedCatalog, StudentSimulator, run_bandit, run_policy
+
+
+@pytest.fixture
+def catalog():
+    return SimulatedCatalog.synthetic(60, seed=0)
+
+
+class TestVectorizedRewards:
+    """The array reward functions agree with the scalar ones used by the API"""
+
+    def test_calculate_rewards_matches_scalar(self):
+        agent = QLearningAgent(num_states=4, num_actions=1)
+        grid = list(itertools.product([True, False], [10, 45, 90], [1, 2, 3, 4, 5], [0.0, 0.3, 0.55, 1.0]))
+        correct, spent, difficulty, level = map(np.array, zip(*grid))
+        expected = [agent.calculate_reward(*row) for row in grid]
+        assert calculate_rewards(correct, spent, difficulty, level) == pytest.approx(expected)
+
+    def test_calculate_content_rewards_matches_scalar(self):
+        grid = list(itertools.product([True, False], [30, 60, 200, 300, 400], [0.0, 0.5, 1.0]))
+        correct, spent, engagement = map(np.array, zip(*grid))
+        expected = [calculate_content_reward(*row) for row in grid]
+        assert calculate_content_rewards(correct, spent, engagement) == pytest.approx(expected)
+        assert calculate_content_rewards(correct, spent) == pytest.approx(
+            [calculate_content_reward(c, t) for c, t, _ in grid])
+
+
+class TestStudentSimulator:
+    """Test suite for StudentSimulator"""
+
+    def test_answer_probability_follows_skill_and_difficulty(self):
+        catalog = SimulatedCatalog([1, 2], ["algebra", "algebra"], [1, 5])
+        simulator = StudentSimulator(2, catalog, seed=0)
+        simulator.skills[:, 7] = [0.1, 0.9]  # algebra
+        easy = simulator.answer_probability(np.array([0, 0]))
+        hard = simulator.answer_probability(np.array([1, 1]))
+        assert (easy > hard).all()
+        assert easy[1] > easy[0] and hard[1] > hard[0]
+        assert ((hard >= simulator.guess) & (easy <= 1 - simulator.slip)).all()
+
+    def test_seeded_runs_are_reproducible(self, catalog):
+        results = []
+        for _ in range(2):
+            simulator = StudentSimulator(100, catalog, seed=7)
+            results.append(simulator.step(np.arange(100) % len(catalog)))
+        assert np.array_equal(results[0].is_correct, results[1].is_correct)
+        assert np.array_equal(results[0].reward, results[1].reward)
+
+    def test_observed_state_matches_update_knowledge(self, db):
+        """Simulated observations follow StudentModelService.update_knowledge exactly"""
+        db.add(Student(id=1, username="sim", email="sim@x.io", hashed_password="x"))
+        db.commit()
+        catalog = SimulatedCatalog([1, 2, 3], ["algebra", "optics", "sets_and_relations"], [2, 3, 2])
+        simulator = StudentSimulator(1, catalog, seed=3)
+
+        for step in range(40):
+            position = step % 3
+            result = simulator.step(np.array([position]))
+            knowledge = StudentModelService.update_knowledge(
+                db, 1, ["algebra", "optics", "sets_and_relations"][position],
+                bool(result.is_correct[0]), int(catalog.difficulty[position]), float(result.time_spent[0])
+            )
+            state = StudentModelService.knowledge_to_state(knowledge)
+            assert simulator.scores[0, 7] == pytest.approx(state['algebra_score'])
+            assert simulator.scores[0, 2] == pytest.approx(state['optics_score'])
+            assert simulator.preferred_difficulty[0] == state['preferred_difficulty']
+            assert simulator.accuracy_rate[0] == pytest.approx(state['accuracy_rate'])
+
+    def test_mastery_levels_match_student_mastery(self, catalog):
+        simulator = StudentSimulator(500, catalog, seed=1)
+        for _ in range(25):
+            simulator.step(simulator.rng.integers(len(catalog), size=500))
+        levels = simulator.mastery_levels()
+        for student, topic in [(0, 0), (10, 3), (99, 7), (250, 12)]:
+            mastery = StudentMastery()
+            attempts, correct = simulator.topic_attempts[student, topic], simulator.topic_correct[student, topic]
+            for i in range(attempts):
+                mastery.update_mastery(i < correct)
+            assert levels[student, topic] == (mastery.mastery_level or 0)
+
+
+class TestPolicyRuns:
+    """Test suite for run_policy and run_bandit"""
+
+    def test_run_policy_trains_and_evaluates(self, catalog):
+        """Training applies one Q-update per interaction; evaluation leaves the table alone"""
+        agent = QLearningAgent(num_states=100, num_actions=4)
+        training = run_policy(agent, StudentSimulator(2000, catalog, seed=0), 30, epsilon=0.2)
+        assert training['interactions'] == 60000
+        assert agent.total_updates == 60000
+        assert len(agent.registry) == len(catalog)
+        assert agent.get_statistics()['max_q_value'] > 0
+
+        trained = agent.q_table.copy()
+        evaluation = run_policy(agent, StudentSimulator(2000, catalog, seed=1), 5, epsilon=0.0, learn=False)
+        assert np.array_equal(agent.q_table, trained)
+        assert 0.0 < evaluation['accuracy'] < 1.0
+
+    def test_bandits_find_preferred_content_type(self, catalog):
+        summary = run_bandit(StudentSimulator(1000, catalog, seed=2), 200, epsilon=0.2)
+        assert summary['best_arm_found'] > 0.4  # chance is 0.25
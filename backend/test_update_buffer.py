@@ -0,0 +1,151 @@
+"""
+Unit Tests for thread-local buffered Q-updates
+"""
+import threading
+import pytest
+import numpy as np
+from app.services.rl_agent import QLearningAgent
+from app.services.q_table_persistence import QTablePersistence
+from app.services.update_buffer import BufferedQUpdater
+
+
+def _agent() -> QLearningAgent:
+    agent = QLearningAgent(num_states=10, num_actions=4, learning_rate=0.1, epsilon=0.1)
+    agent.discount_factor = 0.9
+    agent.register_content([11, 12, 13])
+    return agent
+
+
+@pytest.fixture
+def agent():
+    return _agent()
+
+
+def _sequential(transitions) -> QLearningAgent:
+    """Reference agent that applied the transitions one update_q_value call at a time"""
+    reference = _agent()
+    for state, content_id, reward, next_state in transitions:
+        reference.update_q_value(state, reference.action_index(content_id), reward, next_state)
+    return reference
+
+
+class TestBufferedQUpdater:
+    """Test suite for BufferedQUpdater"""
+
+    def test_submit_defers_until_flush(self, agent):
+        """update_q_value only queues while a buffer is attached"""
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=10 ** 6)
+        agent.update_buffer = updater
+        agent.update_q_value(1, agent.action_index(12), 1.0, 2)
+
+        assert agent.q_table[1, agent.action_index(12)] == 0.0
+        assert updater.pending == 1
+        assert updater.flush() == 1
+        assert agent.q_table[1, agent.action_index(12)] == pytest.approx(0.1)
+        assert agent.total_updates == 1
+        assert agent.episode_rewards == [1.0]
+
+    def test_concurrent_threads_lose_nothing(self, agent):
+        """Every update from every thread is applied exactly once"""
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=10 ** 6)
+        agent.update_buffer = updater
+        action = agent.action_index(13)
+
+        def answer():
+            for _ in range(2000):
+                agent.update_q_value(4, action, 0.5, 5)
+
+        threads = [threading.Thread(target=answer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        updater.flush()
+
+        assert updater.updates_applied == agent.total_updates == 16000
+        # 16000 sequential steps toward 0.5 + γ * max Q(5, .) = 0.5
+        assert agent.q_table[4, action] == pytest.approx(_sequential([(4, 13, 0.5, 5)] * 16000).q_table[4, action])
+        assert agent.q_table[4, action] == pytest.approx(0.5)
+
+    def test_flush_matches_sequential_updates(self, agent):
+        """Repeated cells in one flush step one after another, in submission order"""
+        rng = np.random.default_rng(0)
+        transitions = [(int(rng.integers(0, 5)), int(rng.choice([11, 12, 13])),
+                        float(rng.choice([-0.5, 1.0, 1.5])), int(rng.integers(5, 10)))
+                       for _ in range(500)]
+        for state, content_id, reward, next_state in transitions:
+            agent.update_q_value(state, agent.action_index(content_id), reward, next_state)
+        reference = _sequential(transitions)
+
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=10 ** 6)
+        agent.update_buffer = updater
+        for state, content_id, reward, next_state in transitions:
+            agent.update_q_value(state, agent.action_index(content_id), reward, next_state)
+        for state, content_id, reward, next_state in transitions:
+            reference.update_q_value(state, reference.action_index(content_id), reward, next_state)
+        updater.flush()
+
+        np.testing.assert_allclose(agent.q_table, reference.q_table, atol=1e-12)
+
+    def test_repeated_flushes_converge_like_sequential(self, agent):
+        """50 identical answers per flush converge to the fixed point instead of oscillating"""
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=10 ** 6)
+        agent.update_buffer = updater
+        action = agent.action_index(11)
+        fixed_point = 1.0 / (1 - agent.discount_factor)
+        for _ in range(80):
+            for _ in range(50):
+                agent.update_q_value(2, action, 1.0, 2)
+            updater.flush()
+            assert 0.0 < agent.q_table[2, action] <= fixed_point
+
+        # A self-loop bootstraps from the pre-flush row, so it converges more slowly, to the same point
+        reference = _sequential([(2, 11, 1.0, 2)] * 4000)
+        assert reference.q_table[2, action] == pytest.approx(fixed_point)
+        assert agent.q_table[2, action] == pytest.approx(fixed_point, abs=0.01)
+
+    def test_background_flush_and_drain_on_stop(self, agent):
+        """A full buffer wakes the flusher; stop() applies whatever is left"""
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=5)
+        updater.start()
+        for _ in range(5):
+            agent.update_q_value(1, agent.action_index(11), 1.0, 2)
+        for _ in range(50):
+            if updater.updates_applied == 5:
+                break
+            threading.Event().wait(0.01)
+        assert updater.updates_applied == 5
+
+        agent.update_q_value(1, agent.action_index(11), 1.0, 2)
+        updater.stop()
+        assert agent.update_buffer is None
+        assert updater.updates_applied == agent.total_updates == 6
+
+    def test_buffered_updates_are_logged(self, agent, tmp_path):
+        """Batches go through the update log like direct updates"""
+        persistence = QTablePersistence(agent, str(tmp_path / "q.wal"), str(tmp_path / "q.npy"), interval=3600)
+        persistence.start()
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=10 ** 6)
+        agent.update_buffer = updater
+        agent.update_q_value(1, agent.action_index(12), 1.0, 2)
+        agent.update_q_value(3, agent.action_index(13), -0.5, 4)
+        updater.flush()
+
+        records = persistence.log.read()
+        assert records['content_id'].tolist() == [12, 13]
+        assert records['reward'].tolist() == [1.0, -0.5]
+        persistence.stop()
+
+    def test_columns_resolved_at_flush(self, agent):
+        """Queued updates follow their content ID, not the column at submit time"""
+        updater = BufferedQUpdater(agent, flush_interval=3600, flush_size=10 ** 6)
+        agent.update_buffer = updater
+        agent.update_q_value(1, agent.action_index(13), 1.0, 2)
+
+        replacement = QLearningAgent(num_states=10, num_actions=4)
+        replacement.register_content([13])
+        agent.swap_policy(replacement.policy)
+        updater.flush()
+
+        assert agent.q_table[1, agent.action_index(13)] == pytest.approx(0.1)
+        assert agent.action_index(13) == 0